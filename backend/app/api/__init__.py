@@ -3,7 +3,7 @@ API Package - Contains all API endpoints, dependencies, decorators, and error ha
 
 Key Modules:
 - dependencies: FastAPI dependency injection (get_identity, get_db, optional auth)
-- decorators: Authorization decorators (@require_roles, @require_tenant)
+- decorators: Authorization decorators (@require_roles, @require_tenant, @require_policy)
 - error_handlers: Standardized error responses (401, 403, 429, 500)
 """
 
@@ -14,7 +14,7 @@ from .dependencies import (
     get_optional_identity,
     security,
 )
-from .decorators import require_roles, require_tenant
+from .decorators import require_roles, require_tenant, require_policy, list_policies
 from .error_handlers import (
     AuthenticationError,
     AuthorizationError,
@@ -33,6 +33,8 @@ __all__ = [
     # Decorators
     "require_roles",
     "require_tenant",
+    "require_policy",
+    "list_policies",
     # Error Handlers
     "AuthenticationError",
     "AuthorizationError",
@@ -4,51 +4,348 @@ Decorators for Authorization and Access Control
 Provides role-based and tenant-based authorization decorators
 to enforce permissions at the endpoint level.
 
+Policies are compiled once at decoration time:
+- The Identity parameter is located in the endpoint signature once
+  (no per-call scanning of args/kwargs)
+- Required roles are compiled to a bitmask; each Identity's role mask
+  is computed once and cached on the instance
+- Every decorated endpoint is recorded in a policy registry
+  (list_policies) for audits
+
 Usage:
     @router.get("/admin-only")
     @require_roles("admin")
     async def admin_endpoint(identity: Identity = Depends(get_identity)):
         ...
-        
+
     @router.get("/multi-tenant-safe")
     @require_tenant()
     async def safe_endpoint(identity: Identity = Depends(get_identity)):
         # Automatically ensures requests only access their tenant's data
         ...
+
+    @router.post("/analisar")
+    @require_policy(roles=("analista", "revisor", "admin"), tenant=True)
+    async def analisar(identity: Identity = Depends(get_identity)):
+        # Roles + tenant declared once for the route
+        ...
 """
 
+from dataclasses import dataclass
 from functools import wraps
-from typing import Callable, List
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union, get_args, get_origin
 from fastapi import HTTPException, status
 from app.core.oidc_models import Identity
+import inspect
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# ============================================================================
+# Role Bitmasks
+# ============================================================================
+
+class RoleRegistry:
+    """
+    Maps role names (case-insensitive) to bits.
+
+    Bits are allocated when policies are declared (import time), so a
+    role check at request time is a single AND between two integers.
+    """
+
+    def __init__(self):
+        self._bits: Dict[str, int] = {}
+
+    @property
+    def version(self) -> int:
+        """Changes whenever a new role is registered (invalidates cached masks)"""
+        return len(self._bits)
+
+    def register(self, roles: Iterable[str]) -> int:
+        """Allocate bits for roles and return their combined mask"""
+        mask = 0
+        for role in roles:
+            role = role.lower()
+            if role not in self._bits:
+                self._bits[role] = 1 << len(self._bits)
+            mask |= self._bits[role]
+        return mask
+
+    def mask_for(self, roles: Iterable[str]) -> int:
+        """Mask of known roles (roles never required by any policy are ignored)"""
+        mask = 0
+        for role in roles:
+            mask |= self._bits.get(role.lower(), 0)
+        return mask
+
+    def identity_mask(self, identity: Identity) -> int:
+        """
+        Role mask for an Identity, computed once per instance.
+
+        Cached as a private attribute together with the registry version.
+        """
+        cached = identity.__dict__.get("_role_mask")
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+
+        mask = self.mask_for(identity.roles or [])
+        identity.__dict__["_role_mask"] = (self.version, mask)
+        return mask
+
+
+role_registry = RoleRegistry()
+
+
+# ============================================================================
+# Policy Registry
+# ============================================================================
+
+@dataclass
+class AccessPolicy:
+    """
+    Authorization policy declared for one endpoint
+
+    Each stacked role decorator is checked on its own (a user needs one
+    role of EVERY set), so role_sets keeps one entry per decorator.
+    """
+
+    endpoint: str
+    role_sets: Tuple[Tuple[str, ...], ...] = ()
+    tenant: bool = False
+
+    @property
+    def roles(self) -> Tuple[str, ...]:
+        """Roles that alone satisfy every role set (the set itself if only one)"""
+        if not self.role_sets:
+            return ()
+        first, *others = self.role_sets
+        return tuple(role for role in first if all(role in other for other in others))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary (audit listing)"""
+        return {
+            "endpoint": self.endpoint,
+            "roles": list(self.roles),
+            "role_sets": [list(roles) for roles in self.role_sets],
+            "tenant": self.tenant,
+        }
+
+
+_policies: Dict[str, AccessPolicy] = {}
+
+
+def _endpoint_key(func: Callable) -> str:
+    """Stable key for the innermost endpoint function"""
+    target = inspect.unwrap(func)
+    return f"{target.__module__}.{target.__qualname__}"
+
+
+def _register_policy(func: Callable, roles: Tuple[str, ...], tenant: bool) -> AccessPolicy:
+    """
+    Record (or merge) the policy of an endpoint.
+
+    Stacked @require_roles/@require_tenant on the same endpoint are merged
+    into a single policy entry; each decorator's roles stay a separate set
+    (they are enforced as AND, not as a union).
+    """
+    key = _endpoint_key(func)
+    policy = _policies.get(key)
+    if policy is None:
+        policy = _policies[key] = AccessPolicy(endpoint=key)
+
+    if roles and roles not in policy.role_sets:
+        policy.role_sets = policy.role_sets + (roles,)
+    policy.tenant = policy.tenant or tenant
+    return policy
+
+
+def get_policy(func: Callable) -> Optional[AccessPolicy]:
+    """Policy declared for an endpoint (None if unprotected)"""
+    return _policies.get(_endpoint_key(func))
+
+
+def list_policies() -> List[AccessPolicy]:
+    """All declared policies, sorted by endpoint (for audits)"""
+    return [_policies[key] for key in sorted(_policies)]
+
+
+# ============================================================================
+# Identity Resolution
+# ============================================================================
+
+def _is_identity_annotation(annotation: Any) -> bool:
+    """Check if a parameter annotation is Identity or Optional[Identity]"""
+    if annotation is Identity or annotation == "Identity":
+        return True
+    if get_origin(annotation) is Union:
+        return Identity in get_args(annotation)
+    return False
+
+
+def _resolve_identity_param(func: Callable) -> Optional[Tuple[str, int]]:
+    """Find (name, position) of the Identity parameter once, at decoration time"""
+    try:
+        parameters = inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return None
+
+    for position, (name, parameter) in enumerate(parameters.items()):
+        if _is_identity_annotation(parameter.annotation):
+            return name, position
+
+    if "identity" in parameters:
+        return "identity", list(parameters).index("identity")
+    return None
+
+
+def _scan_identity(args: tuple, kwargs: dict) -> Optional[Identity]:
+    """Fallback for endpoints whose signature doesn't declare Identity"""
+    for arg in args:
+        if isinstance(arg, Identity):
+            return arg
+    for arg in kwargs.values():
+        if isinstance(arg, Identity):
+            return arg
+    return None
+
+
+def _identity_getter(func: Callable) -> Callable[[tuple, dict], Optional[Identity]]:
+    """Build the identity extractor for an endpoint"""
+    resolved = _resolve_identity_param(func)
+    if resolved is None:
+        return _scan_identity
+
+    name, position = resolved
+
+    def get_identity(args: tuple, kwargs: dict) -> Optional[Identity]:
+        identity = kwargs.get(name)
+        if identity is None and position < len(args):
+            identity = args[position]
+        if isinstance(identity, Identity):
+            return identity
+        return _scan_identity(args, kwargs)
+
+    return get_identity
+
+
+# ============================================================================
+# Policy Decorators
+# ============================================================================
+
+def _policy_decorator(
+    roles: Tuple[str, ...],
+    tenant: bool,
+    decorator_name: str,
+) -> Callable:
+    """Compile a policy and wrap the endpoint with an O(1) check"""
+    required_roles_lower = tuple(dict.fromkeys(role.lower() for role in roles))
+    required_mask = role_registry.register(required_roles_lower)
+    denied_detail = (
+        f"Insufficient permissions. Required roles: {', '.join(required_roles_lower)}"
+    )
+
+    def check(identity: Optional[Identity]):
+        if not identity:
+            logger.error(f"Identity not found in {decorator_name} decorator")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Authentication error"
+            )
+
+        # Check if user has any of the required roles
+        if required_mask and not (role_registry.identity_mask(identity) & required_mask):
+            logger.warning(
+                f"Access denied - insufficient roles",
+                extra={
+                    "user_id": identity.sub,
+                    "required_roles": list(required_roles_lower),
+                    "user_roles": list(identity.roles or []),
+                }
+            )
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=denied_detail
+            )
+
+        # Validate tenant_id is set
+        if tenant and not identity.tenant_id:
+            logger.warning(
+                f"Access denied - tenant_id missing",
+                extra={"user_id": identity.sub}
+            )
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Tenant information missing"
+            )
+
+    def decorator(func: Callable) -> Callable:
+        _register_policy(func, required_roles_lower, tenant)
+        get_identity = _identity_getter(func)
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                check(get_identity(args, kwargs))
+                return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            check(get_identity(args, kwargs))
+            return func(*args, **kwargs)
+
+        return sync_wrapper
+
+    return decorator
+
+
+def require_policy(roles: Iterable[str] = (), tenant: bool = False) -> Callable:
+    """
+    Decorator declaring the full authorization policy of a route at once.
+
+    Args:
+        roles: Role names (case-insensitive). User needs at least ONE of them.
+               Empty means any authenticated user.
+        tenant: If True, the identity must carry a tenant_id.
+
+    Raises:
+        HTTPException(403): If user doesn't have required role or tenant
+
+    Example:
+        @router.post("/analisar")
+        @require_policy(roles=("analista", "revisor", "admin"), tenant=True)
+        async def analisar(identity: Identity = Depends(get_identity)):
+            ...
+    """
+    return _policy_decorator(tuple(roles), tenant, "require_policy")
+
+
 def require_roles(*required_roles: str) -> Callable:
     """
     Decorator to enforce role-based access control.
-    
+
     Validates that the authenticated user has at least one of the required roles.
-    
+
     Args:
         *required_roles: Variable number of role names (case-insensitive).
                         User needs at least ONE of these roles.
-                        
+
     Returns:
         Decorated function that checks roles before execution
-        
+
     Raises:
         HTTPException(403): If user doesn't have required role
-        
+        ValueError: At decoration time, if no role is given
+
     Example:
         @router.get("/admin")
         @require_roles("admin")
         async def admin_endpoint(identity: Identity = Depends(get_identity)):
             # Only users with "admin" role can access
             return {"role": identity.roles}
-            
+
         @router.post("/create-contrato")
         @require_roles("analista", "revisor", "admin")
         async def create_contrato(
@@ -61,142 +358,29 @@ def require_roles(*required_roles: str) -> Callable:
             db.commit()
             return contrato
     """
-    # Normalize roles to lowercase for case-insensitive comparison
-    required_roles_lower = {role.lower() for role in required_roles}
-    
-    def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        async def async_wrapper(*args, **kwargs):
-            # Extract identity from kwargs (injected by FastAPI)
-            identity = None
-            for arg in args:
-                if isinstance(arg, Identity):
-                    identity = arg
-                    break
-            
-            if not identity:
-                for arg in kwargs.values():
-                    if isinstance(arg, Identity):
-                        identity = arg
-                        break
-            
-            if not identity:
-                logger.error("Identity not found in require_roles decorator")
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Authentication error"
-                )
-            
-            # Check if user has any of the required roles
-            user_roles_lower = {role.lower() for role in (identity.roles or [])}
-            
-            if not user_roles_lower.intersection(required_roles_lower):
-                logger.warning(
-                    f"Access denied - insufficient roles",
-                    extra={
-                        "user_id": identity.sub,
-                        "required_roles": list(required_roles_lower),
-                        "user_roles": list(user_roles_lower),
-                    }
-                )
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail=f"Insufficient permissions. Required roles: {', '.join(required_roles_lower)}"
-                )
-            
-            logger.info(
-                f"Role check passed",
-                extra={
-                    "user_id": identity.sub,
-                    "required_roles": list(required_roles_lower),
-                    "user_roles": list(user_roles_lower),
-                }
-            )
-            
-            # Call original function
-            return await func(*args, **kwargs)
-        
-        @wraps(func)
-        def sync_wrapper(*args, **kwargs):
-            # Same logic for sync functions
-            identity = None
-            for arg in args:
-                if isinstance(arg, Identity):
-                    identity = arg
-                    break
-            
-            if not identity:
-                for arg in kwargs.values():
-                    if isinstance(arg, Identity):
-                        identity = arg
-                        break
-            
-            if not identity:
-                logger.error("Identity not found in require_roles decorator")
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Authentication error"
-                )
-            
-            user_roles_lower = {role.lower() for role in (identity.roles or [])}
-            
-            if not user_roles_lower.intersection(required_roles_lower):
-                logger.warning(
-                    f"Access denied - insufficient roles",
-                    extra={
-                        "user_id": identity.sub,
-                        "required_roles": list(required_roles_lower),
-                        "user_roles": list(user_roles_lower),
-                    }
-                )
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail=f"Insufficient permissions. Required roles: {', '.join(required_roles_lower)}"
-                )
-            
-            logger.info(
-                f"Role check passed",
-                extra={
-                    "user_id": identity.sub,
-                    "required_roles": list(required_roles_lower),
-                    "user_roles": list(user_roles_lower),
-                }
-            )
-            
-            return func(*args, **kwargs)
-        
-        # Return appropriate wrapper based on whether function is async
-        if hasattr(func, '__self__'):  # Instance method
-            return sync_wrapper
-        else:
-            # Try to detect if it's async
-            import inspect
-            if inspect.iscoroutinefunction(func):
-                return async_wrapper
-            else:
-                return sync_wrapper
-        
-    return decorator
+    if not required_roles:
+        raise ValueError("require_roles() needs at least one role (use require_policy() for any authenticated user)")
+    return _policy_decorator(tuple(required_roles), False, "require_roles")
 
 
 def require_tenant() -> Callable:
     """
     Decorator to enforce tenant isolation.
-    
+
     Validates that requests can only access data within their own tenant.
     This decorator primarily serves as a marker/contract that the endpoint
     properly filters by tenant_id. The actual filtering should be done
     in the endpoint logic.
-    
+
     Args:
         None (decorator is used without arguments)
-        
+
     Returns:
         Decorated function with tenant validation context
-        
+
     Raises:
         HTTPException(403): If tenant_id is invalid or missing
-        
+
     Example:
         @router.get("/contratos")
         @require_tenant()
@@ -209,7 +393,7 @@ def require_tenant() -> Callable:
                 .filter(Contrato.tenant_id == identity.tenant_id)\
                 .all()
             return contratos
-            
+
         @router.get("/contratos/{id}")
         @require_tenant()
         async def get_contrato(
@@ -222,104 +406,10 @@ def require_tenant() -> Callable:
                 .filter(Contrato.id == id)\
                 .filter(Contrato.tenant_id == identity.tenant_id)\
                 .first()
-            
+
             if not contrato:
                 raise HTTPException(status_code=404, detail="Contrato not found")
-            
+
             return contrato
     """
-    def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        async def async_wrapper(*args, **kwargs):
-            # Extract identity from kwargs (injected by FastAPI)
-            identity = None
-            for arg in args:
-                if isinstance(arg, Identity):
-                    identity = arg
-                    break
-            
-            if not identity:
-                for arg in kwargs.values():
-                    if isinstance(arg, Identity):
-                        identity = arg
-                        break
-            
-            if not identity:
-                logger.error("Identity not found in require_tenant decorator")
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Authentication error"
-                )
-            
-            # Validate tenant_id is set
-            if not identity.tenant_id:
-                logger.warning(
-                    f"Access denied - tenant_id missing",
-                    extra={"user_id": identity.sub}
-                )
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Tenant information missing"
-                )
-            
-            logger.debug(
-                f"Tenant validation passed",
-                extra={
-                    "user_id": identity.sub,
-                    "tenant_id": identity.tenant_id,
-                }
-            )
-            
-            # Call original function
-            return await func(*args, **kwargs)
-        
-        @wraps(func)
-        def sync_wrapper(*args, **kwargs):
-            # Same logic for sync functions
-            identity = None
-            for arg in args:
-                if isinstance(arg, Identity):
-                    identity = arg
-                    break
-            
-            if not identity:
-                for arg in kwargs.values():
-                    if isinstance(arg, Identity):
-                        identity = arg
-                        break
-            
-            if not identity:
-                logger.error("Identity not found in require_tenant decorator")
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Authentication error"
-                )
-            
-            if not identity.tenant_id:
-                logger.warning(
-                    f"Access denied - tenant_id missing",
-                    extra={"user_id": identity.sub}
-                )
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Tenant information missing"
-                )
-            
-            logger.debug(
-                f"Tenant validation passed",
-                extra={
-                    "user_id": identity.sub,
-                    "tenant_id": identity.tenant_id,
-                }
-            )
-            
-            return func(*args, **kwargs)
-        
-        # Return appropriate wrapper based on whether function is async
-        import inspect
-        if inspect.iscoroutinefunction(func):
-            return async_wrapper
-        else:
-            return sync_wrapper
-        
-    return decorator
+    return _policy_decorator((), True, "require_tenant")
@@ -62,6 +62,9 @@ class RateLimits:
     
     # Audit logs: moderado
     AUDIT = "20/minute"
+    
+    # Processamento em lote (até milhares de contratos por requisição)
+    BATCH = "2/minute"
 
 
 # ============================================================================
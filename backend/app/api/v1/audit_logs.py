@@ -11,6 +11,7 @@ Rate Limiting:
 - GET /failed-actions: 5 req/min (ADMIN)
 - GET /activity-summary: 5 req/min (ADMIN)
 - GET /suspicious-activity: 5 req/min (ADMIN)
+- GET /policies: 5 req/min (ADMIN)
 """
 
 from typing import Optional
@@ -18,7 +19,7 @@ from fastapi import APIRouter, Depends, Query, HTTPException, Request
 from sqlalchemy.orm import Session
 
 from app.api.dependencies import get_db, get_audit_log_service
-from app.api.decorators import require_roles, require_tenant
+from app.api.decorators import require_tenant, require_policy, list_policies
 from app.api.rate_limiting import limiter, RateLimits
 from app.core.oidc_models import Identity
 from app.api.dependencies import get_identity
@@ -97,8 +98,7 @@ async def get_my_activity(
         429: {"description": "Muitas requisições. Limite: 5 por minuto"},
     }
 )
-@require_tenant()
-@require_roles("admin")
+@require_policy(roles=("admin",), tenant=True)
 @limiter.limit(RateLimits.ADMIN)
 async def get_tenant_activity(
     request: Request,  # Necessário para rate limiting
@@ -219,8 +219,7 @@ async def get_resource_history(
         429: {"description": "Muitas requisições. Limite: 5 por minuto"},
     }
 )
-@require_tenant()
-@require_roles("admin")
+@require_policy(roles=("admin",), tenant=True)
 @limiter.limit(RateLimits.ADMIN)
 async def get_failed_actions(
     request: Request,  # Necessário para rate limiting
@@ -269,8 +268,7 @@ async def get_failed_actions(
         429: {"description": "Muitas requisições. Limite: 5 por minuto"},
     }
 )
-@require_tenant()
-@require_roles("admin")
+@require_policy(roles=("admin",), tenant=True)
 @limiter.limit(RateLimits.ADMIN)
 async def get_activity_summary(
     request: Request,  # Necessário para rate limiting
@@ -305,8 +303,7 @@ async def get_activity_summary(
         429: {"description": "Muitas requisições. Limite: 5 por minuto"},
     }
 )
-@require_tenant()
-@require_roles("admin")
+@require_policy(roles=("admin",), tenant=True)
 @limiter.limit(RateLimits.ADMIN)
 async def detect_suspicious_activity(
     request: Request,  # Necessário para rate limiting
@@ -333,3 +330,36 @@ async def detect_suspicious_activity(
         tenant_id=identity.tenant_id,
         threshold=threshold,
     )
+
+
+@router.get(
+    "/policies",
+    summary="Listar políticas de autorização",
+    description="Lista as políticas de acesso (roles/tenant) declaradas em cada endpoint",
+    responses={
+        200: {"description": "Lista de políticas por endpoint"},
+        429: {"description": "Muitas requisições. Limite: 5 por minuto"},
+    }
+)
+@require_policy(roles=("admin",), tenant=True)
+@limiter.limit(RateLimits.ADMIN)
+async def get_access_policies(
+    request: Request,  # Necessário para rate limiting
+    identity: Identity = Depends(get_identity),
+):
+    """
+    Lista as políticas de autorização compiladas de todos os endpoints.
+    
+    Útil para auditorias de compliance (quem pode acessar o quê).
+    
+    Requer autenticação + role 'admin'.
+    
+    Rate limit: 5 requisições por minuto
+    
+    ### Response:
+    - Lista de {endpoint, roles, role_sets, tenant}
+    - **role_sets**: Uma lista por decorator de roles; o usuário precisa de
+      uma role de CADA lista
+    - **roles**: Roles que sozinhas atendem todas as listas
+    """
+    return [policy.to_dict() for policy in list_policies()]
@@ -4,24 +4,31 @@ Bureau Router - API endpoints for bureau data management
 Autenticação: Todos os endpoints requerem JWT Bearer token (get_identity)
 Autorização: Usuarios com roles: analista, revisor, admin
 Isolação: Todos dados filtrados por tenant_id do usuario autenticado
-Rate Limiting: Read limitado a 50 req/min
+Rate Limiting: Read limitado a 50 req/min, Admin limitado a 5 req/min
 """
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
+from kombu.exceptions import OperationalError
 from sqlalchemy.orm import Session
 from typing import Optional
 
 from app.api.dependencies import get_db, get_identity
-from app.api.decorators import require_roles, require_tenant
+from app.api.decorators import require_roles, require_tenant, require_policy
 from app.api.rate_limiting import limiter, RateLimits
 from app.core.oidc_models import Identity
 from app.core.exceptions import (
     BureauNaoEncontrado,
     ContratoNaoEncontrado,
+    GeocodificacaoLoteNaoEncontrada,
     SemPermissao,
+    ServicoGeocodificacaoIndisponivel,
+    ServicoExternoIndisponivel,
+    ValidacaoFalhou,
 )
-from app.services import BureauService, ContratoService
-from app.schemas import DadosBureauResponse
+from app.services import BureauService, ContratoService, GeocodificacaoLoteService
+from app.schemas import DadosBureauResponse, GeocodificacaoLoteResponse
+from app.tasks.geocodificacao import geocodificar_backlog_bureau
+from app.utils.cep_index import PRECISAO_LOGRADOURO, PRECISOES
 
 router = APIRouter(
     prefix="/bureau",
@@ -40,6 +47,131 @@ def get_contrato_service(db: Session = Depends(get_db)) -> ContratoService:
     return ContratoService(db)
 
 
+def get_geocodificacao_lote_service(db: Session = Depends(get_db)) -> GeocodificacaoLoteService:
+    """Dependency for GeocodificacaoLoteService injection"""
+    return GeocodificacaoLoteService(db)
+
+
+@router.post(
+    "/geocodificacao-lote",
+    response_model=GeocodificacaoLoteResponse,
+    status_code=202,
+    summary="Geocodificar Backlog do Bureau",
+    description="Enfileira um job que geocodifica todos os registros de bureau sem coordenadas do tenant",
+    responses={
+        202: {"description": "Job enfileirado (ou job já em andamento)"},
+        403: {"description": "Sem permissão"},
+        429: {"description": "Muitas requisições. Limite: 5 por minuto"},
+        503: {"description": "Fila de tarefas indisponível"},
+    }
+)
+@require_policy(roles=("admin",), tenant=True)
+@limiter.limit(RateLimits.ADMIN)
+async def iniciar_geocodificacao_lote(
+    request: Request,  # Necessário para rate limiting
+    identity: Identity = Depends(get_identity),
+    lote_service: GeocodificacaoLoteService = Depends(get_geocodificacao_lote_service),
+):
+    """
+    Enfileira a geocodificação em lote do backlog de bureau sem coordenadas.
+    
+    Requer autenticação (JWT Bearer token) e role admin.
+    Rate limit: 5 requisições por minuto
+    
+    O worker Celery processa os registros em lotes, passando pelo cache
+    de geocodificação e pelo limite global de requisições ao Nominatim
+    (faixa de baixa prioridade: geocodificações interativas continuam na
+    frente). O progresso é gravado a cada lote; se o worker cair, o job
+    continua do último checkpoint. Há no máximo um job ativo por tenant:
+    se já existe um, ele é retornado.
+    
+    ### Response:
+    - Status do job (acompanhar em GET /bureau/geocodificacao-lote/{lote_id})
+    """
+    lote = lote_service.criar(identity.tenant_id)
+    if lote.task_id is None:
+        try:
+            task = geocodificar_backlog_bureau.apply_async(args=[lote.id])
+        except OperationalError as e:
+            lote_service.falhar(lote.id, f"Fila de tarefas indisponível: {e}")
+            raise ServicoExternoIndisponivel("Fila de tarefas")
+        lote = lote_service.registrar_task(lote.id, task.id)
+    return lote_service.status(lote)
+
+
+@router.get(
+    "/geocodificacao-lote/{lote_id}",
+    response_model=GeocodificacaoLoteResponse,
+    summary="Status da Geocodificação em Lote",
+    description="Progresso, taxa e tempo estimado de um job de geocodificação em lote",
+    responses={
+        200: {"description": "Status do job"},
+        403: {"description": "Sem permissão"},
+        404: {"description": "Job não encontrado"},
+        429: {"description": "Muitas requisições. Limite: 50 por minuto"},
+    }
+)
+@require_policy(roles=("admin",), tenant=True)
+@limiter.limit(RateLimits.READ)
+async def status_geocodificacao_lote(
+    request: Request,  # Necessário para rate limiting
+    lote_id: int,
+    identity: Identity = Depends(get_identity),
+    lote_service: GeocodificacaoLoteService = Depends(get_geocodificacao_lote_service),
+):
+    """
+    Status de um job de geocodificação em lote do tenant.
+    
+    Requer autenticação (JWT Bearer token) e role admin.
+    Rate limit: 50 requisições por minuto
+    
+    ### Response:
+    - **processados / geocodificados / nao_encontrados / restantes**: Contadores
+    - **percentual**: processados / total
+    - **taxa_por_segundo**: Registros por segundo desde o início do job
+    - **eta_segundos / previsao_conclusao**: Estimativa (apenas EXECUTANDO)
+    """
+    lote = lote_service.obter(lote_id, identity.tenant_id)
+    if not lote:
+        raise GeocodificacaoLoteNaoEncontrada(lote_id)
+    return lote_service.status(lote)
+
+
+@router.post(
+    "/geocodificacao-lote/{lote_id}/cancelar",
+    response_model=GeocodificacaoLoteResponse,
+    summary="Cancelar Geocodificação em Lote",
+    description="Interrompe o job antes do próximo lote (coordenadas já gravadas são mantidas)",
+    responses={
+        200: {"description": "Job cancelado (ou já finalizado)"},
+        403: {"description": "Sem permissão"},
+        404: {"description": "Job não encontrado"},
+        429: {"description": "Muitas requisições. Limite: 5 por minuto"},
+    }
+)
+@require_policy(roles=("admin",), tenant=True)
+@limiter.limit(RateLimits.ADMIN)
+async def cancelar_geocodificacao_lote(
+    request: Request,  # Necessário para rate limiting
+    lote_id: int,
+    identity: Identity = Depends(get_identity),
+    lote_service: GeocodificacaoLoteService = Depends(get_geocodificacao_lote_service),
+):
+    """
+    Cancela um job de geocodificação em lote pendente ou em execução.
+    
+    Requer autenticação (JWT Bearer token) e role admin.
+    Rate limit: 5 requisições por minuto
+    
+    O worker termina o lote em andamento e para; coordenadas já gravadas
+    são mantidas. Um novo job começa do início do backlog restante.
+    """
+    lote = lote_service.obter(lote_id, identity.tenant_id)
+    if not lote:
+        raise GeocodificacaoLoteNaoEncontrada(lote_id)
+    return lote_service.status(lote_service.cancelar(lote))
+
+
 @router.get(
     "/{contrato_id}",
     response_model=DadosBureauResponse,
@@ -171,3 +303,77 @@ async def list_bureau(
         "limit": limit,
         "items": items
     }
+
+
+@router.post(
+    "/{contrato_id}/geocodificar",
+    response_model=DadosBureauResponse,
+    summary="Geocodificar Endereço do Bureau",
+    description="Geocodifica o logradouro do bureau e grava latitude/longitude",
+    responses={
+        200: {"description": "Coordenadas gravadas"},
+        404: {"description": "Bureau não encontrado ou contrato inválido"},
+        403: {"description": "Sem permissão"},
+        422: {"description": "Precisão mínima inválida"},
+        429: {"description": "Muitas requisições. Limite: 20 por minuto"},
+        503: {"description": "Endereço não geocodificado (não encontrado ou serviço indisponível)"},
+    }
+)
+@require_tenant()
+@limiter.limit(RateLimits.WRITE)
+async def geocodificar_bureau(
+    request: Request,  # Necessário para rate limiting
+    contrato_id: int,
+    precisao_minima: str = Query(
+        PRECISAO_LOGRADOURO,
+        description="Precisão mínima aceita: setor_cep, cep ou logradouro",
+    ),
+    identity: Identity = Depends(get_identity),
+    bureau_service: BureauService = Depends(get_bureau_service),
+    contrato_service: ContratoService = Depends(get_contrato_service),
+):
+    """
+    Geocodifica o endereço (logradouro) do bureau de um contrato.
+    
+    Requer autenticação (JWT Bearer token).
+    Rate limit: 20 requisições por minuto
+    
+    Por padrão consulta o Nominatim de forma assíncrona (precisão de
+    logradouro). Com precisao_minima=cep ou setor_cep, usa o centroide do
+    CEP (índice offline, sem chamada externa) quando disponível; a resposta
+    informa a precisão obtida.
+    
+    ### Parâmetros:
+    - **contrato_id**: ID do contrato
+    - **precisao_minima**: setor_cep, cep ou logradouro (padrão)
+    
+    ### Response:
+    - **precisao_geocodificacao**: Precisão obtida (setor_cep, cep ou logradouro)
+    
+    ### Erros:
+    - 404: Bureau não encontrado ou contrato inválido
+    - 403: Você não tem permissão para acessar este contrato
+    - 422: Precisão mínima inválida
+    - 503: Endereço não geocodificado
+    """
+    
+    if precisao_minima not in PRECISOES:
+        raise ValidacaoFalhou("precisao_minima", f"use {', '.join(PRECISOES)}")
+    
+    contrato = contrato_service.get_contrato(contrato_id)
+    if not contrato:
+        raise ContratoNaoEncontrado(contrato_id)
+    
+    if not contrato_service.pertence_ao_tenant(contrato_id, identity.tenant_id):
+        raise SemPermissao("Você não tem permissão para acessar este contrato")
+    
+    bureau = bureau_service.obter_por_contrato(contrato_id)
+    if not bureau:
+        raise BureauNaoEncontrado(contrato_id)
+    
+    try:
+        return await bureau_service.geocodificar_endereco_bureau_async(
+            bureau.id, contrato.usuario_id, precisao_minima
+        )
+    except ValueError:
+        raise ServicoGeocodificacaoIndisponivel()
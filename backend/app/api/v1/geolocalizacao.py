@@ -4,31 +4,50 @@ Geolocalização Router - API endpoints for geolocation analysis
 Autenticação: Todos os endpoints requerem JWT Bearer token (get_identity)
 Autorização: Usuarios com roles: analista, revisor, admin
 Isolação: Todos dados filtrados por tenant_id do usuario autenticado
-Rate Limiting: POST (análise) 10 req/min, GET (read) 50 req/min
+Rate Limiting: POST (análise) 10 req/min, POST (lote) 2 req/min, GET (read) 50 req/min
 """
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, field_validator
+from typing import Optional, Literal
 from decimal import Decimal
+from datetime import datetime
 
 from app.api.dependencies import get_db, get_identity
-from app.api.decorators import require_roles, require_tenant
+from app.api.decorators import require_tenant, require_policy
 from app.api.rate_limiting import limiter, RateLimits
 from app.core.oidc_models import Identity
 from app.core.exceptions import (
     ContratoNaoEncontrado,
+    EnderecoNaoEncontrado,
     BureauNaoEncontrado,
     DadosInsuficientes,
     SemPermissao,
     ServicoGeocodificacaoIndisponivel,
+    ValidacaoFalhou,
+)
+from app.repositories import UsuarioRepository
+from app.utils import get_distance_mode, geocode_scheduler_stats
+from app.schemas import (
+    GeolocationBatchRequest,
+    GeolocationBatchResponse,
+    GeolocationNearbyResponse,
+    GeolocationHotspotsResponse,
+    GeolocationClustersResponse,
+    GeocodeCacheStatsResponse,
+    GeocodeSchedulerStatsResponse,
+    GeocodeResponse,
+    ReverseGeocodeResponse,
 )
 from app.services import (
     GeolocalizacaoService,
+    GeoIndexService,
+    MapClusterService,
     ContratoService,
     BureauService,
 )
+from app.services.geocoding_service import geocode_cache_stats
 
 router = APIRouter(
     prefix="/geolocalizacao",
@@ -41,6 +60,15 @@ class GeolocationAnalysisRequest(BaseModel):
     """Request schema for geolocation analysis"""
     contrato_id: int
     forcar_atualizacao: bool = False
+    modo_distancia: Optional[str] = None  # fast, haversine, geodesic (padrão: configuração do tenant)
+
+    @field_validator("modo_distancia")
+    @classmethod
+    def check_modo_distancia(cls, value):
+        """Reject unknown distance modes"""
+        if value is not None:
+            get_distance_mode(value)
+        return value
 
 
 class GeolocationAnalysisResponse(BaseModel):
@@ -55,9 +83,11 @@ class GeolocationAnalysisResponse(BaseModel):
     distancia_km: Decimal
     tipo_parecer: str
     texto_parecer: str
+    modo_distancia: str = "haversine"
+    regras_versao: Optional[str] = None
     confianca: Optional[Decimal] = None
-    rota: list = []
-    timestamp: str
+    rota: Optional[list] = None
+    timestamp: datetime
 
 
 def get_geolocalizacao_service(db: Session = Depends(get_db)) -> GeolocalizacaoService:
@@ -65,6 +95,16 @@ def get_geolocalizacao_service(db: Session = Depends(get_db)) -> GeolocalizacaoS
     return GeolocalizacaoService(db)
 
 
+def get_geo_index_service(db: Session = Depends(get_db)) -> GeoIndexService:
+    """Dependency for GeoIndexService injection"""
+    return GeoIndexService(db)
+
+
+def get_map_cluster_service(db: Session = Depends(get_db)) -> MapClusterService:
+    """Dependency for MapClusterService injection"""
+    return MapClusterService(db)
+
+
 def get_contrato_service(db: Session = Depends(get_db)) -> ContratoService:
     """Dependency for ContratoService injection"""
     return ContratoService(db)
@@ -88,13 +128,13 @@ def get_bureau_service(db: Session = Depends(get_db)) -> BureauService:
         503: {"description": "Serviço de geocodificação indisponível"},
     }
 )
-@require_roles("analista", "revisor", "admin")
-@require_tenant()
+@require_policy(roles=("analista", "revisor", "admin"), tenant=True)
 @limiter.limit(RateLimits.UPLOAD)
 async def analisar_geolocalizacao(
-    request: GeolocationAnalysisRequest,
-    req,  # Necessário para rate limiting
+    payload: GeolocationAnalysisRequest,
+    request: Request,  # Necessário para rate limiting
     identity: Identity = Depends(get_identity),
+    db: Session = Depends(get_db),
     geo_service: GeolocalizacaoService = Depends(get_geolocalizacao_service),
     contrato_service: ContratoService = Depends(get_contrato_service),
     bureau_service: BureauService = Depends(get_bureau_service),
@@ -113,9 +153,13 @@ async def analisar_geolocalizacao(
     5. Salva resultado em pareceres
     6. Retorna análise completa
     
+    Se coordenadas, endereços, modo de distância e versão das regras forem
+    os mesmos da última análise, o parecer salvo é retornado sem gravações.
+    
     ### Request:
     - **contrato_id**: ID do contrato a analisar
-    - **forcar_atualizacao**: Se True, recalcula mesmo se já analisado
+    - **forcar_atualizacao**: Se True, recalcula mesmo se as entradas não mudaram
+    - **modo_distancia**: fast (triagem), haversine (padrão) ou geodesic (WGS84)
     
     ### Response:
     - **contrato_id**: ID do contrato
@@ -124,6 +168,8 @@ async def analisar_geolocalizacao(
     - **distancia_km**: Distância em quilômetros
     - **tipo_parecer**: PROXIMAL, MODERADO, DISTANTE, MUITO_DISTANTE
     - **texto_parecer**: Descrição do parecer
+    - **modo_distancia**: Modo de cálculo de distância usado
+    - **regras_versao**: Versão das regras de parecer do tenant
     - **confianca**: Nível de confiança da análise (0-1)
     - **timestamp**: Data/hora da análise
     
@@ -136,17 +182,17 @@ async def analisar_geolocalizacao(
     
     try:
         # Verificar se contrato pertence ao tenant do usuário
-        contrato = contrato_service.get_contrato(request.contrato_id)
+        contrato = contrato_service.get_contrato(payload.contrato_id)
         if not contrato:
-            raise ContratoNaoEncontrado(request.contrato_id)
+            raise ContratoNaoEncontrado(payload.contrato_id)
         
-        if contrato.tenant_id != identity.tenant_id:
+        if not contrato_service.pertence_ao_tenant(payload.contrato_id, identity.tenant_id):
             raise SemPermissao("Você não tem permissão para analisar este contrato")
         
         # Verificar se existem dados de bureau
-        bureau = bureau_service.get_by_contrato(request.contrato_id)
+        bureau = bureau_service.obter_por_contrato(payload.contrato_id)
         if not bureau:
-            raise BureauNaoEncontrado(request.contrato_id)
+            raise BureauNaoEncontrado(payload.contrato_id)
         
         # Validar se temos coordenadas
         if not contrato.latitude or not contrato.longitude:
@@ -155,12 +201,14 @@ async def analisar_geolocalizacao(
         if not bureau.latitude or not bureau.longitude:
             raise DadosInsuficientes("Bureau não possui coordenadas geocodificadas")
         
-        # Realizar análise
-        resultado = geo_service.analisar(
-            contrato_id=request.contrato_id,
-            forcar_atualizacao=request.forcar_atualizacao,
-            usuario_id=identity.sub,  # Use UUID from JWT
-            tenant_id=identity.tenant_id  # Include tenant_id
+        # Realizar análise (reutiliza o parecer se as entradas não mudaram)
+        usuario = UsuarioRepository(db).get_by_keycloak_id(identity.sub)
+        resultado = geo_service.analisar_geolocalizacao(
+            contrato_id=payload.contrato_id,
+            usuario_id=usuario.id if usuario else None,
+            modo_distancia=payload.modo_distancia,
+            tenant_id=identity.tenant_id,
+            forcar_atualizacao=payload.forcar_atualizacao,
         )
         
         return resultado
@@ -173,6 +221,384 @@ async def analisar_geolocalizacao(
         raise
 
 
+@router.post(
+    "/analisar-lote",
+    response_model=GeolocationBatchResponse,
+    summary="Analisar Geolocalização em Lote",
+    description="Realiza análise de geolocalização de vários contratos de uma vez",
+    responses={
+        200: {"description": "Lote processado (resultado individual por contrato)"},
+        422: {"description": "Requisição inválida (informe contrato_ids ou status)"},
+        429: {"description": "Muitas análises em lote. Limite: 2 por minuto"},
+    }
+)
+@require_policy(roles=("analista", "revisor", "admin"), tenant=True)
+@limiter.limit(RateLimits.BATCH)
+async def analisar_geolocalizacao_lote(
+    payload: GeolocationBatchRequest,
+    request: Request,  # Necessário para rate limiting
+    identity: Identity = Depends(get_identity),
+    db: Session = Depends(get_db),
+    geo_service: GeolocalizacaoService = Depends(get_geolocalizacao_service),
+):
+    """
+    Realiza análise de geolocalização de vários contratos do tenant.
+    Rate limit: 2 lotes por minuto
+    
+    Requer autenticação (JWT Bearer token) e roles: analista, revisor ou admin.
+    
+    ### Fluxo:
+    1. Busca contratos do tenant (uma consulta)
+    2. Busca dados_bureau de todos os contratos (uma consulta)
+    3. Calcula distâncias e tipos de parecer de forma vetorizada
+    4. Grava pareceres (upsert), status e logs_analise em lote
+    5. Retorna resumo por contrato
+    
+    ### Request:
+    - **contrato_ids**: IDs dos contratos (até 5000)
+    - **status**: Alternativa aos IDs: analisa contratos com este status
+    - **limite**: Máximo de contratos no modo filtro (padrão 1000)
+    - **modo_distancia**: fast (triagem), haversine ou geodesic
+    
+    ### Response:
+    - **total / concluidos / erros**: Contadores do lote
+    - **resultados**: Por contrato: status (CONCLUIDO/ERRO), distancia_km,
+      tipo_parecer ou erro (contrato inexistente, sem bureau, sem coordenadas)
+    
+    ### Erros:
+    - 422: Nem contrato_ids nem status informados
+    - 403: Sem permissão
+    """
+    usuario = UsuarioRepository(db).get_by_keycloak_id(identity.sub)
+    
+    return geo_service.analisar_lote(
+        tenant_id=identity.tenant_id,
+        usuario_id=usuario.id if usuario else None,
+        contrato_ids=payload.contrato_ids,
+        status=payload.status,
+        limite=payload.limite,
+        modo_distancia=payload.modo_distancia,
+    )
+
+
+@router.get(
+    "/proximos",
+    response_model=GeolocationNearbyResponse,
+    summary="Buscar Contratos/Bureau Próximos",
+    description="Lista contratos ou endereços de bureau dentro de um raio de um ponto",
+    responses={
+        200: {"description": "Busca realizada (mais próximos primeiro)"},
+        403: {"description": "Sem permissão"},
+        429: {"description": "Muitas requisições. Limite: 50 por minuto"},
+    }
+)
+@require_tenant()
+@limiter.limit(RateLimits.READ)
+async def buscar_proximos(
+    request: Request,  # Necessário para rate limiting
+    latitude: Decimal = Query(..., ge=-90, le=90, description="Latitude do centro"),
+    longitude: Decimal = Query(..., ge=-180, le=180, description="Longitude do centro"),
+    raio_km: Decimal = Query(Decimal("2"), gt=0, le=500, description="Raio em km"),
+    tipo: Literal["contrato", "bureau"] = Query("contrato", description="contrato ou bureau"),
+    limite: int = Query(50, ge=1, le=500, description="Máximo de resultados"),
+    identity: Identity = Depends(get_identity),
+    geo_service: GeolocalizacaoService = Depends(get_geolocalizacao_service),
+):
+    """
+    Busca contratos (endereço de assinatura) ou endereços de bureau do tenant
+    dentro de um raio, ordenados pela distância.
+    
+    Requer autenticação (JWT Bearer token).
+    Rate limit: 50 requisições por minuto
+    
+    Usa o índice geohash (B-tree) para selecionar apenas as células que
+    cobrem o raio, em vez de varrer a tabela inteira.
+    
+    ### Parâmetros:
+    - **latitude / longitude**: Centro da busca
+    - **raio_km**: Raio em km (padrão 2)
+    - **tipo**: contrato (padrão) ou bureau
+    - **limite**: Máximo de resultados (padrão 50)
+    
+    ### Erros:
+    - 403: Sem permissão
+    """
+    return geo_service.buscar_proximos(
+        tenant_id=identity.tenant_id,
+        latitude=latitude,
+        longitude=longitude,
+        raio_km=raio_km,
+        tipo=tipo,
+        limite=limite,
+    )
+
+
+@router.get(
+    "/hotspots",
+    response_model=GeolocationHotspotsResponse,
+    summary="Hotspots de Assinatura",
+    description="Lista locais com muitos contratos assinados por CPFs diferentes",
+    responses={
+        200: {"description": "Hotspots encontrados (mais densos primeiro)"},
+        403: {"description": "Sem permissão"},
+        429: {"description": "Muitas requisições. Limite: 50 por minuto"},
+    }
+)
+@require_policy(roles=("analista", "revisor", "admin"), tenant=True)
+@limiter.limit(RateLimits.READ)
+async def listar_hotspots(
+    request: Request,  # Necessário para rate limiting
+    min_contratos: int = Query(5, ge=2, le=1000, description="Mínimo de contratos no local"),
+    min_cpfs: int = Query(2, ge=1, le=1000, description="Mínimo de CPFs distintos no local"),
+    limite: int = Query(50, ge=1, le=500, description="Máximo de hotspots"),
+    identity: Identity = Depends(get_identity),
+    geo_index_service: GeoIndexService = Depends(get_geo_index_service),
+):
+    """
+    Lista concentrações de contratos assinados no mesmo local por CPFs
+    diferentes (padrão clássico de fraude).
+    
+    Requer autenticação (JWT Bearer token) e roles: analista, revisor ou admin.
+    Rate limit: 50 requisições por minuto
+    
+    Consulta o índice espacial em memória do tenant (grade de ~100m,
+    atualizada conforme contratos são geocodificados), sem varrer o banco.
+    
+    ### Parâmetros:
+    - **min_contratos**: Mínimo de contratos no local (padrão 5)
+    - **min_cpfs**: Mínimo de CPFs distintos (padrão 2)
+    - **limite**: Máximo de hotspots (padrão 50)
+    
+    ### Response:
+    - **total_indexado**: Contratos geocodificados do tenant
+    - **hotspots**: latitude/longitude (centro), raio_km, contratos,
+      cpfs_distintos e contrato_ids
+    """
+    return geo_index_service.hotspots(
+        tenant_id=identity.tenant_id,
+        min_contratos=min_contratos,
+        min_cpfs=min_cpfs,
+        limite=limite,
+    )
+
+
+@router.get(
+    "/clusters",
+    response_model=GeolocationClustersResponse,
+    summary="Clusters do Mapa",
+    description="Agrupa pontos de contrato e bureau da área visível do mapa em clusters",
+    responses={
+        200: {"description": "Clusters da área visível"},
+        403: {"description": "Sem permissão"},
+        422: {"description": "bbox inválido ou grande demais para o zoom"},
+        429: {"description": "Muitas requisições. Limite: 50 por minuto"},
+    }
+)
+@require_tenant()
+@limiter.limit(RateLimits.READ)
+async def listar_clusters(
+    request: Request,  # Necessário para rate limiting
+    bbox: str = Query(..., description="Área visível: oeste,sul,leste,norte (graus)"),
+    zoom: int = Query(..., ge=0, le=22, description="Zoom do mapa"),
+    identity: Identity = Depends(get_identity),
+    map_cluster_service: MapClusterService = Depends(get_map_cluster_service),
+):
+    """
+    Agrupa os pontos de contrato (assinatura) e de bureau do tenant em
+    clusters de grade para a área visível do mapa.
+    
+    Requer autenticação (JWT Bearer token).
+    Rate limit: 50 requisições por minuto
+    
+    Lê agregados pré-calculados por zoom (células de 1/4 de tile, ~64px),
+    então a resposta tem no máximo algumas centenas de clusters por tela,
+    independente do número de contratos. Atualizados a cada minuto.
+    
+    ### Parâmetros:
+    - **bbox**: oeste,sul,leste,norte em graus (oeste > leste cruza o antimeridiano)
+    - **zoom**: Zoom do mapa (acima de 18 usa 18)
+    
+    ### Response:
+    - **zoom**: Zoom efetivo
+    - **total_pontos**: Pontos de contrato e bureau do tenant
+    - **clusters**: id, latitude/longitude (centroide), total, contratos,
+      bureaus, tipo_dominante e tipos (pontos por tipo de parecer)
+    
+    ### Erros:
+    - 422: bbox inválido ou grande demais para o zoom
+    - 403: Sem permissão
+    """
+    try:
+        west, south, east, north = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise ValidacaoFalhou("bbox", "use oeste,sul,leste,norte")
+    if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= north <= 90):
+        raise ValidacaoFalhou("bbox", "coordenadas fora do intervalo ou sul > norte")
+
+    try:
+        return map_cluster_service.clusters(identity.tenant_id, (west, south, east, north), zoom)
+    except ValueError as e:
+        raise ValidacaoFalhou("bbox", str(e))
+
+
+@router.get(
+    "/geocode",
+    response_model=GeocodeResponse,
+    summary="Geocodificar Endereço",
+    description="Converte um endereço em coordenadas (com cache)",
+    responses={
+        200: {"description": "Endereço geocodificado"},
+        404: {"description": "Endereço não encontrado"},
+        403: {"description": "Sem permissão"},
+        429: {"description": "Muitas requisições. Limite: 50 por minuto"},
+    }
+)
+@require_tenant()
+@limiter.limit(RateLimits.READ)
+async def geocodificar_endereco(
+    request: Request,  # Necessário para rate limiting
+    endereco: str = Query(..., min_length=3, max_length=500, description="Endereço completo"),
+    identity: Identity = Depends(get_identity),
+    geo_service: GeolocalizacaoService = Depends(get_geolocalizacao_service),
+):
+    """
+    Geocodifica um endereço (latitude/longitude e endereço formatado).
+    
+    Requer autenticação (JWT Bearer token).
+    Rate limit: 50 requisições por minuto
+    
+    Consulta o cache de geocodificação e, em falta, o Nominatim sem
+    bloquear o event loop (outras requisições seguem sendo atendidas
+    enquanto o provedor responde).
+    
+    ### Erros:
+    - 404: Endereço não encontrado (ou provedor indisponível)
+    - 403: Sem permissão
+    """
+    result = await geo_service.geocodificar_endereco_async(endereco)
+    if not result:
+        raise EnderecoNaoEncontrado(endereco)
+    latitude, longitude, endereco_formatado = result
+    return {
+        "endereco": endereco,
+        "latitude": latitude,
+        "longitude": longitude,
+        "endereco_formatado": endereco_formatado,
+    }
+
+
+@router.get(
+    "/reverse",
+    response_model=ReverseGeocodeResponse,
+    summary="Geocodificação Reversa",
+    description="Converte coordenadas em endereço",
+    responses={
+        200: {"description": "Endereço encontrado"},
+        404: {"description": "Nenhum endereço para as coordenadas"},
+        403: {"description": "Sem permissão"},
+        429: {"description": "Muitas requisições. Limite: 50 por minuto"},
+    }
+)
+@require_tenant()
+@limiter.limit(RateLimits.READ)
+async def reverse_geocodificar(
+    request: Request,  # Necessário para rate limiting
+    latitude: Decimal = Query(..., ge=-90, le=90, description="Latitude"),
+    longitude: Decimal = Query(..., ge=-180, le=180, description="Longitude"),
+    identity: Identity = Depends(get_identity),
+    geo_service: GeolocalizacaoService = Depends(get_geolocalizacao_service),
+):
+    """
+    Obtém o endereço de um par de coordenadas.
+    
+    Requer autenticação (JWT Bearer token).
+    Rate limit: 50 requisições por minuto
+    
+    ### Erros:
+    - 404: Nenhum endereço para as coordenadas (ou provedor indisponível)
+    - 403: Sem permissão
+    """
+    endereco = await geo_service.reverse_geocodificar_async(latitude, longitude)
+    if not endereco:
+        raise EnderecoNaoEncontrado(f"{latitude}, {longitude}")
+    return {"latitude": latitude, "longitude": longitude, "endereco": endereco}
+
+
+@router.get(
+    "/geocode-cache/estatisticas",
+    response_model=GeocodeCacheStatsResponse,
+    summary="Métricas do Cache de Geocodificação",
+    description="Acertos por nível (memória, banco), consultas ao provedor e hit ratio (direta e reversa)",
+    responses={
+        200: {"description": "Métricas desta instância da API"},
+        403: {"description": "Sem permissão"},
+        429: {"description": "Muitas requisições. Limite: 50 por minuto"},
+    }
+)
+@require_policy(roles=("admin",), tenant=True)
+@limiter.limit(RateLimits.READ)
+async def estatisticas_geocode_cache(
+    request: Request,  # Necessário para rate limiting
+    identity: Identity = Depends(get_identity),
+):
+    """
+    Métricas do cache de geocodificação em dois níveis (LRU em memória +
+    tabela geocode_cache) desde o início do processo.
+    
+    Requer autenticação (JWT Bearer token) e role admin.
+    Rate limit: 50 requisições por minuto
+    
+    ### Response:
+    - **memoria / banco**: Acertos em cada nível (incluem negativos)
+    - **negativos**: Acertos de endereços sabidamente não encontrados
+    - **provedor**: Consultas que saíram do processo para o Nominatim
+    - **erros**: Falhas do provedor (timeout, HTTP != 200), não gravadas
+    - **hit_ratio**: (memoria + banco) / total
+    - **entradas_memoria**: Tamanho atual do LRU
+    - **reverso**: As mesmas métricas para a geocodificação reversa
+      (células da grade de coordenadas); **vizinhos** conta os acertos
+      pelo ponto em cache mais próximo dentro da tolerância
+    """
+    return geocode_cache_stats()
+
+
+@router.get(
+    "/geocode-scheduler/estatisticas",
+    response_model=GeocodeSchedulerStatsResponse,
+    summary="Métricas da Fila de Geocodificação",
+    description="Tempo de espera por faixa de prioridade, profundidade da fila, consultas coalescidas e estado dos provedores",
+    responses={
+        200: {"description": "Métricas desta instância da API"},
+        403: {"description": "Sem permissão"},
+        429: {"description": "Muitas requisições. Limite: 50 por minuto"},
+    }
+)
+@require_policy(roles=("admin",), tenant=True)
+@limiter.limit(RateLimits.READ)
+async def estatisticas_geocode_scheduler(
+    request: Request,  # Necessário para rate limiting
+    identity: Identity = Depends(get_identity),
+):
+    """
+    Métricas da fila que limita as consultas ao Nominatim (token bucket
+    global) desde o início do processo.
+    
+    Requer autenticação (JWT Bearer token) e role admin.
+    Rate limit: 50 requisições por minuto
+    
+    ### Response:
+    - **limite_por_segundo / rajada**: Configuração do token bucket
+    - **bucket**: redis (compartilhado entre workers) ou local
+    - **coalescidas**: Consultas que aproveitaram requisição idêntica em andamento
+    - **faixas**: Por prioridade (interactive, backlog): fila atual,
+      despachadas, abandonadas (todos os chamadores desistiram antes do
+      despacho) e espera média/p50/p95/máxima em segundos
+    - **provedores**: Por backend do geocoder: estado do circuito,
+      chamadas, falhas/timeouts, hedges, latência p50/p95 e timeout atual
+    """
+    return geocode_scheduler_stats()
+
+
 @router.get(
     "/{contrato_id}",
     summary="Obter Análise de Geolocalização",
@@ -9,12 +9,14 @@ Rate Limiting: UNLIMITED (no rate limit for health checks)
 """
 
 from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse
 from datetime import datetime
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from app.api.dependencies import get_db
 from app.api.rate_limiting import limiter, RateLimits
+from app.core.warmup import warmup_state
 
 router = APIRouter(
     prefix="/health",
@@ -71,3 +73,39 @@ async def health_check(request: Request, db: Session = Depends(get_db)):
             "database": database_status,
         }
     }
+
+
+@router.get("/ready", tags=["Health Check"])
+@limiter.limit(RateLimits.UNLIMITED)
+async def readiness_check(request: Request):
+    """
+    Readiness probe - indica se a instância pode receber tráfego.
+    
+    Retorna 503 enquanto o warm-up de startup (provider OIDC, JWKS,
+    pool do banco, caches) não terminou. Use em load balancers e
+    rolling deploys para evitar picos de latência na primeira requisição.
+    
+    **Rate Limit**: UNLIMITED (no rate limiting)
+    
+    Example:
+        GET /api/v1/health/ready
+        
+        Response (200):
+        {
+            "status": "READY",
+            "warmup": {
+                "ready": true,
+                "started_at": "2024-02-02T10:50:00.123456Z",
+                "finished_at": "2024-02-02T10:50:01.234567Z",
+                "steps": {"auth": "ok", "database": "ok"}
+            }
+        }
+    """
+    ready = warmup_state.ready
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "READY" if ready else "WARMING_UP",
+            "warmup": warmup_state.to_dict(),
+        },
+    )
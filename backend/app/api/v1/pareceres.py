@@ -4,25 +4,31 @@ Pareceres Router - API endpoints for parecer (opinion) management
 Autenticação: Todos os endpoints requerem JWT Bearer token (get_identity)
 Autorização: Usuarios com roles: analista, revisor, admin
 Isolação: Todos pareceres filtrados por tenant_id do usuario autenticado
-Rate Limiting: Delete limitado a 10 req/min, others 50 req/min
+Rate Limiting: Delete limitado a 10 req/min, regras (edição) 5 req/min, others 50 req/min
 """
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.orm import Session
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, date
 
 from app.api.dependencies import get_db, get_identity
-from app.api.decorators import require_roles, require_tenant
+from app.api.decorators import require_roles, require_tenant, require_policy
 from app.api.rate_limiting import limiter, RateLimits
 from app.core.oidc_models import Identity
 from app.core.exceptions import (
     PareceNaoEncontrado,
     ContratoNaoEncontrado,
     SemPermissao,
+    ValidacaoFalhou,
+)
+from app.services import PareceService, ContratoService, RegrasParecerService
+from app.schemas import (
+    PareceResponse,
+    RegrasParecerRequest,
+    RegrasParecerResponse,
+    HistogramaDistanciasResponse,
 )
-from app.services import PareceService, ContratoService
-from app.schemas import PareceResponse
 
 router = APIRouter(
     prefix="/pareceres",
@@ -41,6 +47,11 @@ def get_contrato_service(db: Session = Depends(get_db)) -> ContratoService:
     return ContratoService(db)
 
 
+def get_regras_service(db: Session = Depends(get_db)) -> RegrasParecerService:
+    """Dependency for RegrasParecerService injection"""
+    return RegrasParecerService(db)
+
+
 @router.get(
     "",
     summary="Listar Pareceres",
@@ -129,6 +140,118 @@ async def list_pareceres(
     }
 
 
+@router.get(
+    "/regras",
+    response_model=RegrasParecerResponse,
+    summary="Obter Regras de Parecer",
+    description="Obtém as faixas de distância e textos de parecer do tenant",
+    responses={
+        200: {"description": "Regras em vigor (personalizadas ou padrão)"},
+        429: {"description": "Muitas requisições. Limite: 50 por minuto"},
+    }
+)
+@require_tenant()
+@limiter.limit(RateLimits.READ)
+async def get_regras(
+    request: Request,  # Necessário para rate limiting
+    identity: Identity = Depends(get_identity),
+    service: RegrasParecerService = Depends(get_regras_service),
+):
+    """
+    Obtém as regras de classificação de parecer em vigor para o tenant.
+    
+    Requer autenticação (JWT Bearer token).
+    
+    ### Response:
+    - **versao**: Versão das regras (gravada em cada parecer como regras_versao)
+    - **padrao**: True se o tenant usa as regras padrão (5/20/50 km)
+    - **faixas**: Lista de faixas em ordem crescente:
+      - **tipo**: PROXIMAL, MODERADO, DISTANTE, MUITO_DISTANTE
+      - **ate_km**: Limite superior da faixa (nulo na última)
+      - **template**: Texto com {distancia}, {endereco_origem}, {endereco_destino}
+    """
+    return service.obter_regras(identity.tenant_id)
+
+
+@router.put(
+    "/regras",
+    response_model=RegrasParecerResponse,
+    summary="Atualizar Regras de Parecer",
+    description="Substitui as faixas de distância e textos de parecer do tenant",
+    responses={
+        200: {"description": "Regras atualizadas"},
+        403: {"description": "Sem permissão"},
+        422: {"description": "Regras inválidas"},
+        429: {"description": "Muitas requisições. Limite: 5 por minuto"},
+    }
+)
+@require_policy(roles=("admin",), tenant=True)
+@limiter.limit(RateLimits.ADMIN)
+async def update_regras(
+    regras: RegrasParecerRequest,
+    request: Request,  # Necessário para rate limiting
+    identity: Identity = Depends(get_identity),
+    service: RegrasParecerService = Depends(get_regras_service),
+):
+    """
+    Substitui as regras de classificação de parecer do tenant.
+    
+    Requer autenticação (JWT Bearer token) e role: admin.
+    As próximas análises do tenant usam as novas regras; pareceres
+    existentes mantêm a versão com que foram calculados.
+    
+    ### Request:
+    - **faixas**: Faixas em ordem crescente de ate_km; a última sem limite
+      (ate_km nulo). Cada tipo aparece no máximo uma vez.
+    
+    ### Exemplo:
+    ```json
+    {
+      "faixas": [
+        {"tipo": "PROXIMAL", "ate_km": 2, "template": "Distância de {distancia:.2f} km. APROVADO."},
+        {"tipo": "DISTANTE", "ate_km": 30, "template": "Distância de {distancia:.2f} km. VERIFICAR."},
+        {"tipo": "MUITO_DISTANTE", "ate_km": null, "template": "Distância de {distancia:.2f} km. RISCO ALTO."}
+      ]
+    }
+    ```
+    
+    ### Erros:
+    - 422: Regras inválidas (ordem, faixa final, campo desconhecido no template)
+    - 403: Sem permissão
+    """
+    return service.atualizar_regras(
+        identity.tenant_id,
+        [faixa.model_dump() for faixa in regras.faixas],
+        atualizado_por=identity.sub,
+    )
+
+
+@router.delete(
+    "/regras",
+    response_model=RegrasParecerResponse,
+    summary="Restaurar Regras Padrão",
+    description="Remove as regras personalizadas do tenant (volta às regras padrão)",
+    responses={
+        200: {"description": "Regras padrão restauradas"},
+        403: {"description": "Sem permissão"},
+        429: {"description": "Muitas requisições. Limite: 5 por minuto"},
+    }
+)
+@require_policy(roles=("admin",), tenant=True)
+@limiter.limit(RateLimits.ADMIN)
+async def delete_regras(
+    request: Request,  # Necessário para rate limiting
+    identity: Identity = Depends(get_identity),
+    service: RegrasParecerService = Depends(get_regras_service),
+):
+    """
+    Remove as regras personalizadas do tenant (volta às regras padrão).
+    
+    Requer autenticação (JWT Bearer token) e role: admin.
+    """
+    return service.restaurar_padrao(identity.tenant_id)
+
+
 @router.get(
     "/{parecer_id}",
     response_model=PareceResponse,
@@ -166,6 +289,8 @@ async def get_parecer(
     - **texto_parecer**: Descrição do parecer
     - **latitude_inicio/longitude_inicio**: Coordenadas do contrato
     - **latitude_fim/longitude_fim**: Coordenadas do bureau
+    - **regras_versao**: Versão das regras de parecer usadas
+    - **modo_distancia**: Modo de cálculo de distância usado
     - **criado_em**: Data de criação
     
     ### Erros:
@@ -256,6 +381,52 @@ async def get_estatisticas(
     return stats
 
 
+@router.get(
+    "/estatisticas/histograma",
+    response_model=HistogramaDistanciasResponse,
+    summary="Histograma de Distâncias",
+    description="Distribuição de distancia_km e percentis dos pareceres do tenant",
+    responses={
+        200: {"description": "Histograma calculado"},
+        422: {"description": "Período inválido"},
+        429: {"description": "Muitas requisições. Limite: 50 por minuto"},
+    }
+)
+@require_tenant()
+@limiter.limit(RateLimits.READ)
+async def get_histograma(
+    request: Request,  # Necessário para rate limiting
+    data_inicio: Optional[date] = Query(None, description="Primeiro dia (inclusivo)"),
+    data_fim: Optional[date] = Query(None, description="Último dia (inclusivo)"),
+    identity: Identity = Depends(get_identity),
+    service: PareceService = Depends(get_parecer_service),
+):
+    """
+    Retorna o histograma de distâncias e percentis dos pareceres do tenant.
+    
+    Requer autenticação (JWT Bearer token).
+    Servido a partir do histograma materializado por tenant e dia (atualizado
+    a cada gravação de parecer): o custo independe do número de pareceres.
+    
+    ### Parâmetros:
+    - **data_inicio / data_fim**: Período pelo dia de criação do parecer (UTC)
+    
+    ### Response:
+    - **total**: Número de pareceres no período
+    - **media_km**: Distância média (exata)
+    - **p50_km / p90_km / p99_km**: Percentis estimados por interpolação no bucket (resolução ~26%)
+    - **buckets**: Buckets não vazios em escala logarítmica (10 por década):
+      de_km, ate_km, contagem
+    
+    ### Erros:
+    - 422: data_inicio posterior a data_fim
+    """
+    if data_inicio and data_fim and data_inicio > data_fim:
+        raise ValidacaoFalhou("data_inicio", "deve ser anterior ou igual a data_fim")
+    
+    return service.get_histograma_distancias(identity.tenant_id, data_inicio, data_fim)
+
+
 @router.delete(
     "/{parecer_id}",
     status_code=204,
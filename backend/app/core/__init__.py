@@ -8,6 +8,8 @@ from .exceptions import (
     BureauNaoEncontrado,
     PareceNaoEncontrado,
     UsuarioNaoEncontrado,
+    GeocodificacaoLoteNaoEncontrada,
+    EnderecoNaoEncontrado,
     ArquivoInvalido,
     ArquivoMuitoGrande,
     DadosInsuficientes,
@@ -35,6 +37,19 @@ from .oidc_provider import (
     ProviderType,
     get_provider,
     set_provider,
+    close_provider,
+)
+
+from .http_client import (
+    get_http_client,
+    close_http_client,
+)
+
+from .warmup import (
+    run_warmup,
+    register_warmup_step,
+    is_ready,
+    warmup_state,
 )
 
 from .oidc_models import (
@@ -43,6 +58,7 @@ from .oidc_models import (
     TokenValidationResult,
     IdentityAdapter,
     JWKSCache,
+    DiscoveryCache,
 )
 
 __all__ = [
@@ -52,6 +68,8 @@ __all__ = [
     "BureauNaoEncontrado",
     "PareceNaoEncontrado",
     "UsuarioNaoEncontrado",
+    "GeocodificacaoLoteNaoEncontrada",
+    "EnderecoNaoEncontrado",
     "ArquivoInvalido",
     "ArquivoMuitoGrande",
     "DadosInsuficientes",
@@ -77,9 +95,19 @@ __all__ = [
     "ProviderType",
     "get_provider",
     "set_provider",
+    "close_provider",
     "OIDCConfig",
     "Identity",
     "TokenValidationResult",
     "IdentityAdapter",
     "JWKSCache",
+    "DiscoveryCache",
+    # HTTP
+    "get_http_client",
+    "close_http_client",
+    # Warm-up
+    "run_warmup",
+    "register_warmup_step",
+    "is_ready",
+    "warmup_state",
 ]
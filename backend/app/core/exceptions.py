@@ -78,6 +78,32 @@ class UsuarioNaoEncontrado(APIException):
         )
 
 
+class GeocodificacaoLoteNaoEncontrada(APIException):
+    """Job de geocodificação em lote não encontrado"""
+    
+    def __init__(self, lote_id: int = None):
+        detail = "Geocodificação em lote não encontrada"
+        if lote_id:
+            detail += f" (ID: {lote_id})"
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=detail,
+        )
+
+
+class EnderecoNaoEncontrado(APIException):
+    """Endereço/coordenada sem resultado no serviço de geocodificação"""
+    
+    def __init__(self, endereco: str = None):
+        detail = "Endereço não encontrado"
+        if endereco:
+            detail += f": {endereco}"
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=detail,
+        )
+
+
 # ============================================================================
 # 400 BAD REQUEST EXCEPTIONS
 # ============================================================================
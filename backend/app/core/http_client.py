@@ -0,0 +1,62 @@
+"""
+HTTP Client - Cliente HTTP compartilhado com pool de conexões
+Usado pelos provedores OIDC (descoberta, JWKS, troca de tokens)
+Autor: Sistema de Laudos
+Data: 2026-10-19
+"""
+
+from typing import Optional
+import os
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+# Singleton global (inicializado no startup da aplicação)
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """Criar cliente com limites de pool e keep-alive configuráveis via ambiente"""
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "60")),
+    )
+    timeout = httpx.Timeout(
+        float(os.getenv("HTTP_TIMEOUT_SECONDS", "10")),
+        connect=float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5")),
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Obter cliente HTTP compartilhado
+
+    Cria o cliente sob demanda se o startup ainda não o inicializou
+    (ex.: scripts e testes).
+
+    Returns:
+        Instância única de httpx.AsyncClient
+    """
+    global _http_client
+
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _build_http_client()
+        logger.info("Cliente HTTP compartilhado criado")
+
+    return _http_client
+
+
+async def close_http_client():
+    """Fechar cliente HTTP compartilhado (shutdown da aplicação)"""
+    global _http_client
+
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+        logger.info("Cliente HTTP compartilhado fechado")
+
+    _http_client = None
@@ -8,6 +8,11 @@ from dataclasses import dataclass, field, asdict
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import json
+import logging
+
+from jose import jwk
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -29,6 +34,12 @@ class OIDCConfig:
     
     # Cache JWKS
     jwks_cache_ttl_seconds: int = 86400  # 24 horas
+    jwks_refresh_ratio: float = 0.8  # Atualizar em background a 80% do TTL
+    jwks_min_refresh_interval_seconds: int = 60  # Limite para refresh forçado (kid desconhecido)
+    jwks_stale_ttl_seconds: int = 3600  # Servir JWKS expirado enquanto atualiza
+    
+    # Cache do documento de descoberta (.well-known/openid-configuration)
+    discovery_cache_ttl_seconds: int = 3600  # 1 hora
     
     # Token validation
     validate_issuer: bool = True
@@ -65,28 +76,106 @@ class OIDCConfig:
 
 @dataclass
 class JWKSCache:
-    """Cache para JWKS com TTL"""
+    """
+    Cache para JWKS com TTL
+    
+    Mantém um índice kid -> chave pública já construída, evitando
+    reconverter o JWK a cada validação de token.
+    """
     
     keys: Dict[str, Any]
     cached_at: datetime
     ttl_seconds: int = 86400  # 24 horas
+    refresh_ratio: float = 0.8
+    stale_ttl_seconds: int = 0  # Tolerância após expirar (stale-while-revalidate)
+    algorithm: str = "RS256"
+    public_keys: Dict[str, Any] = field(default_factory=dict, repr=False)
+    
+    def __post_init__(self):
+        """Construir índice de chaves públicas a partir do JWKS"""
+        if not self.public_keys:
+            self.public_keys = self.build_index(self.keys, self.algorithm)
+    
+    @staticmethod
+    def build_index(jwks: Dict[str, Any], algorithm: str = "RS256") -> Dict[str, Any]:
+        """
+        Construir dicionário kid -> chave pública (jose Key)
+        
+        Chaves que não são de assinatura ou que não podem ser
+        construídas são ignoradas (com log).
+        """
+        index: Dict[str, Any] = {}
+        for key in jwks.get("keys", []):
+            if key.get("use", "sig") != "sig":
+                continue
+            try:
+                index[key.get("kid")] = jwk.construct(key, key.get("alg", algorithm))
+            except Exception as e:
+                logger.warning(f"Ignorando chave {key.get('kid')} do JWKS: {e}")
+        return index
+    
+    @property
+    def expires_at(self) -> datetime:
+        """Momento em que o cache expira"""
+        return self.cached_at + timedelta(seconds=self.ttl_seconds)
+    
+    @property
+    def refresh_at(self) -> datetime:
+        """Momento a partir do qual o cache deve ser atualizado em background"""
+        return self.cached_at + timedelta(seconds=self.ttl_seconds * self.refresh_ratio)
     
     def is_valid(self) -> bool:
         """Verificar se o cache ainda é válido"""
-        expires_at = self.cached_at + timedelta(seconds=self.ttl_seconds)
-        return datetime.utcnow() < expires_at
+        return datetime.utcnow() < self.expires_at
+    
+    def is_usable(self) -> bool:
+        """Verificar se o cache pode ser servido (válido ou dentro da tolerância)"""
+        return datetime.utcnow() < self.expires_at + timedelta(seconds=self.stale_ttl_seconds)
     
-    def get_key(self, kid: str) -> Optional[Dict[str, Any]]:
-        """Obter chave específica do cache"""
-        if not self.is_valid():
+    def should_refresh(self) -> bool:
+        """Verificar se o cache entrou na janela de atualização antecipada"""
+        return datetime.utcnow() >= self.refresh_at
+    
+    def seconds_until_refresh(self) -> float:
+        """Segundos até a atualização antecipada (0 se já passou)"""
+        return max((self.refresh_at - datetime.utcnow()).total_seconds(), 0.0)
+    
+    def get_key(self, kid: Optional[str]) -> Optional[Any]:
+        """
+        Obter chave pública pronta para uso
+        
+        Args:
+            kid: Key ID do header do token. Se None, retorna a primeira chave
+        
+        Returns:
+            Chave pública (jose Key) ou None se não encontrada/expirada
+        """
+        if not self.is_usable():
             return None
         
-        # Procurar chave por kid
-        for key in self.keys.get("keys", []):
-            if key.get("kid") == kid:
-                return key
+        if kid is None:
+            return next(iter(self.public_keys.values()), None)
         
-        return None
+        return self.public_keys.get(kid)
+
+
+@dataclass
+class DiscoveryCache:
+    """Cache para metadados de descoberta OIDC com TTL e ETag"""
+    
+    metadata: Dict[str, Any]
+    cached_at: datetime
+    ttl_seconds: int = 3600  # 1 hora
+    etag: Optional[str] = None
+    
+    def is_valid(self) -> bool:
+        """Verificar se o cache ainda é válido"""
+        expires_at = self.cached_at + timedelta(seconds=self.ttl_seconds)
+        return datetime.utcnow() < expires_at
+    
+    def revalidate(self):
+        """Renovar TTL após resposta 304 (Not Modified) do IdP"""
+        self.cached_at = datetime.utcnow()
 
 
 @dataclass
@@ -6,14 +6,15 @@ Data: 2024-02-03
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable
 from datetime import datetime, timedelta
 import httpx
 import asyncio
 import json
-from functools import lru_cache
+from functools import lru_cache, partial
 import logging
 from enum import Enum
+from jose import jwt, JWTError
 
 from .oidc_models import (
     OIDCConfig,
@@ -21,7 +22,9 @@ from .oidc_models import (
     TokenValidationResult,
     IdentityAdapter,
     JWKSCache,
+    DiscoveryCache,
 )
+from .http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -44,26 +47,126 @@ class OIDCProvider(ABC):
     def __init__(self, config: OIDCConfig):
         self.config = config
         self._jwks_cache: Optional[JWKSCache] = None
+        self._jwks_refresh_task: Optional[asyncio.Task] = None
+        self._last_forced_refresh: Optional[datetime] = None
+        self._discovery_cache: Optional[DiscoveryCache] = None
+        # Buscas em andamento (single-flight): chave -> task compartilhada
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Cliente injetado (testes); por padrão usa o cliente compartilhado
         self._http_client: Optional[httpx.AsyncClient] = None
         self.provider_type = ProviderType.CUSTOM
     
     async def __aenter__(self):
         """Context manager entry"""
-        self._http_client = httpx.AsyncClient()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit"""
-        if self._http_client:
-            await self._http_client.aclose()
+        await self.aclose()
     
-    @abstractmethod
-    async def get_discovery_metadata(self) -> Dict[str, Any]:
+    async def aclose(self):
+        """Cancelar refresh em background (o cliente HTTP compartilhado não é fechado)"""
+        if self._jwks_refresh_task and not self._jwks_refresh_task.done():
+            self._jwks_refresh_task.cancel()
+            try:
+                await self._jwks_refresh_task
+            except asyncio.CancelledError:
+                pass
+        self._jwks_refresh_task = None
+        
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self._inflight.clear()
+    
+    def _start_flight(self, key: str, factory: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """
+        Iniciar busca single-flight ou reaproveitar a que está em andamento
+        
+        Args:
+            key: Identificador da busca (ex: "jwks", "discovery")
+            factory: Função que cria a corrotina da busca
+        
+        Returns:
+            Task compartilhada por todos os chamadores concorrentes
+        """
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            task = asyncio.get_running_loop().create_task(factory())
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._finish_flight, key))
+        return task
+    
+    def _finish_flight(self, key: str, task: asyncio.Task):
+        """Remover busca concluída e registrar falha (evita exceção não observada)"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Falha na busca '{key}': {task.exception()}")
+    
+    async def _single_flight(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Aguardar busca single-flight
+        
+        Chamadores concorrentes aguardam a mesma task; o cancelamento de um
+        chamador (shield) não cancela a busca compartilhada.
+        """
+        return await asyncio.shield(self._start_flight(key, factory))
+    
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Cliente HTTP com pool de conexões (compartilhado entre providers)"""
+        return self._http_client or get_http_client()
+    
+    @property
+    def discovery_url(self) -> str:
+        """URL do documento de descoberta OIDC"""
+        return f"{self.config.authority.rstrip('/')}/.well-known/openid-configuration"
+    
+    async def get_discovery_metadata(self, force_refresh: bool = False) -> Dict[str, Any]:
         """
         Obter metadados de descoberta do provedor
-        Implementar em subclasses específicas
+        
+        Cacheado por discovery_cache_ttl_seconds. Depois de expirar, os
+        metadados antigos continuam sendo servidos enquanto uma revalidação
+        (única, em background) acontece.
         """
-        pass
+        cache = self._discovery_cache
+        if not force_refresh and cache:
+            if not cache.is_valid():
+                self._start_flight("discovery", self._fetch_discovery_metadata)
+            return cache.metadata
+        
+        return await self._single_flight("discovery", self._fetch_discovery_metadata)
+    
+    async def _fetch_discovery_metadata(self) -> Dict[str, Any]:
+        """
+        Buscar documento de descoberta no IdP
+        
+        Revalida com If-None-Match (ETag): um 304 renova o cache sem
+        baixar o documento novamente.
+        """
+        cache = self._discovery_cache
+        headers = {}
+        if cache and cache.etag:
+            headers["If-None-Match"] = cache.etag
+        
+        logger.info(f"Buscando metadados de {self.discovery_url}")
+        response = await self.http_client.get(self.discovery_url, headers=headers, timeout=10.0)
+        
+        if response.status_code == 304 and cache:
+            cache.revalidate()
+            return cache.metadata
+        
+        response.raise_for_status()
+        metadata = response.json()
+        
+        self._discovery_cache = DiscoveryCache(
+            metadata=metadata,
+            cached_at=datetime.utcnow(),
+            ttl_seconds=self.config.discovery_cache_ttl_seconds,
+            etag=response.headers.get("ETag"),
+        )
+        return metadata
     
     @abstractmethod
     def adapt_claims(self, claims: Dict[str, Any]) -> Identity:
@@ -76,13 +179,30 @@ class OIDCProvider(ABC):
     async def get_jwks(self, force_refresh: bool = False) -> Dict[str, Any]:
         """
         Obter JSON Web Key Set (JWKS)
-        Com cache de 24 horas
+        Com cache de 24 horas, atualizado em background antes de expirar
+        
+        Chamadores concorrentes compartilham uma única busca (single-flight).
+        Um cache expirado continua sendo servido por até jwks_stale_ttl_seconds
+        enquanto a atualização acontece em background (stale-while-revalidate).
         """
-        # Verificar cache válido
-        if not force_refresh and self._jwks_cache and self._jwks_cache.is_valid():
-            logger.info("Usando JWKS em cache")
-            return self._jwks_cache.keys
+        cache = self._jwks_cache
+        if not force_refresh and cache:
+            # Verificar cache válido
+            if cache.is_valid():
+                logger.debug("Usando JWKS em cache")
+                self._ensure_jwks_refresh_task()
+                return cache.keys
+            
+            if cache.is_usable():
+                logger.info("JWKS expirado, servindo cache antigo durante atualização")
+                self._start_flight("jwks", self._fetch_jwks)
+                return cache.keys
         
+        cache = await self._single_flight("jwks", self._fetch_jwks)
+        return cache.keys
+    
+    async def _fetch_jwks(self) -> JWKSCache:
+        """Buscar JWKS no IdP e substituir o cache (com índice de chaves)"""
         # Buscar metadata de descoberta
         metadata = await self.get_discovery_metadata()
         jwks_uri = metadata.get("jwks_uri")
@@ -92,20 +212,87 @@ class OIDCProvider(ABC):
         
         # Buscar JWKS
         logger.info(f"Buscando JWKS de {jwks_uri}")
-        async with httpx.AsyncClient() as client:
-            response = await client.get(jwks_uri, timeout=10.0)
-            response.raise_for_status()
-            jwks = response.json()
+        response = await self.http_client.get(jwks_uri, timeout=10.0)
+        response.raise_for_status()
+        jwks = response.json()
         
         # Cachear por 24 horas
         self._jwks_cache = JWKSCache(
             keys=jwks,
             cached_at=datetime.utcnow(),
-            ttl_seconds=self.config.jwks_cache_ttl_seconds
+            ttl_seconds=self.config.jwks_cache_ttl_seconds,
+            refresh_ratio=self.config.jwks_refresh_ratio,
+            stale_ttl_seconds=self.config.jwks_stale_ttl_seconds,
+            algorithm=self.config.algorithm,
         )
+        self._ensure_jwks_refresh_task()
+        
+        logger.info(f"JWKS atualizado, {len(self._jwks_cache.public_keys)} chaves")
+        return self._jwks_cache
+    
+    def _ensure_jwks_refresh_task(self):
+        """Garantir que a tarefa de refresh em background está rodando"""
+        if self._jwks_refresh_task and not self._jwks_refresh_task.done():
+            return
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
         
-        logger.info(f"JWKS atualizado, {len(jwks.get('keys', []))} chaves")
-        return jwks
+        self._jwks_refresh_task = loop.create_task(self._jwks_refresh_loop())
+    
+    async def _jwks_refresh_loop(self):
+        """
+        Atualizar JWKS antes do TTL expirar
+        
+        Dorme até a janela de atualização antecipada (refresh_ratio * TTL),
+        de modo que nenhuma requisição precise esperar pela busca do JWKS.
+        Em caso de falha, tenta novamente após jwks_min_refresh_interval_seconds
+        mantendo as chaves atuais.
+        """
+        while True:
+            delay = self._jwks_cache.seconds_until_refresh() if self._jwks_cache else 0.0
+            await asyncio.sleep(delay)
+            
+            try:
+                await self._single_flight("jwks", self._fetch_jwks)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Falha ao atualizar JWKS em background: {e}")
+                await asyncio.sleep(self.config.jwks_min_refresh_interval_seconds)
+    
+    def _can_force_refresh(self) -> bool:
+        """Verificar limite de refresh forçado (rotação de chaves)"""
+        if self._last_forced_refresh is None:
+            return True
+        elapsed = (datetime.utcnow() - self._last_forced_refresh).total_seconds()
+        return elapsed >= self.config.jwks_min_refresh_interval_seconds
+    
+    async def get_signing_key(self, kid: Optional[str]) -> Optional[Any]:
+        """
+        Obter chave pública de assinatura pelo kid
+        
+        Se o kid for desconhecido (rotação de chaves no IdP), força um refresh
+        do JWKS, limitado a um por jwks_min_refresh_interval_seconds.
+        
+        Args:
+            kid: Key ID do header do token (None = primeira chave)
+        
+        Returns:
+            Chave pública (jose Key) ou None se não encontrada
+        """
+        await self.get_jwks()
+        key = self._jwks_cache.get_key(kid)
+        
+        if key is None and kid and self._can_force_refresh():
+            logger.info(f"Chave {kid} desconhecida, forçando atualização do JWKS")
+            self._last_forced_refresh = datetime.utcnow()
+            await self.get_jwks(force_refresh=True)
+            key = self._jwks_cache.get_key(kid)
+        
+        return key
     
     async def validate_token(
         self,
@@ -133,8 +320,6 @@ class OIDCProvider(ABC):
                 )
             
             # 2. Decodificar header e payload
-            from jose import jwt, JWTError
-            
             # Decodificar sem validação primeiro (para extrair kid)
             unverified = jwt.get_unverified_header(token)
             kid = unverified.get("kid")
@@ -143,9 +328,9 @@ class OIDCProvider(ABC):
                 logger.warning("Token sem kid no header")
                 kid = None  # Tentar primeira chave disponível
             
-            # 3. Obter JWKS
+            # 3. Obter chave pública do JWKS (índice por kid)
             try:
-                jwks = await self.get_jwks()
+                key = await self.get_signing_key(kid)
             except Exception as e:
                 logger.error(f"Erro ao obter JWKS: {e}")
                 return TokenValidationResult(
@@ -154,19 +339,6 @@ class OIDCProvider(ABC):
                     error_code="jwks_error"
                 )
             
-            # 4. Encontrar chave correta
-            key = None
-            if kid:
-                for k in jwks.get("keys", []):
-                    if k.get("kid") == kid:
-                        key = k
-                        break
-            else:
-                # Se não houver kid, usar primeira chave
-                keys = jwks.get("keys", [])
-                if keys:
-                    key = keys[0]
-            
             if not key:
                 logger.warning(f"Chave {kid} não encontrada no JWKS")
                 return TokenValidationResult(
@@ -175,17 +347,13 @@ class OIDCProvider(ABC):
                     error_code="key_not_found"
                 )
             
-            # 5. Converter JWK para PEM
-            from jose.backends.rsa_backend import RSAKey
-            rsa_key = RSAKey(key)
-            
-            # 6. Validar assinatura e claims
+            # 4. Validar assinatura e claims
             audience = expected_aud or self.config.client_id
             
             try:
                 claims = jwt.decode(
                     token,
-                    rsa_key.public_key,
+                    key,
                     algorithms=[self.config.algorithm],
                     audience=audience if self.config.validate_audience else None,
                     issuer=self.config.authority if self.config.validate_issuer else None,
@@ -198,7 +366,7 @@ class OIDCProvider(ABC):
                     error_code="invalid_token"
                 )
             
-            # 7. Verificações adicionais
+            # 5. Verificações adicionais
             if claims.get("exp") and claims["exp"] < datetime.utcnow().timestamp():
                 return TokenValidationResult(
                     valid=False,
@@ -206,7 +374,7 @@ class OIDCProvider(ABC):
                     error_code="token_expired"
                 )
             
-            # 8. Adaptar claims para Identity
+            # 6. Adaptar claims para Identity
             identity = self.adapt_claims(claims)
             
             logger.info(f"Token válido para {identity.email}")
@@ -247,16 +415,6 @@ class KeycloakProvider(OIDCProvider):
         if not self.config.authority.endswith("/"):
             self.config.authority = self.config.authority + "/"
     
-    async def get_discovery_metadata(self) -> Dict[str, Any]:
-        """Buscar metadados de descoberta do Keycloak"""
-        url = f"{self.config.authority}.well-known/openid-configuration"
-        
-        logger.info(f"Buscando metadados de {url}")
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=10.0)
-            response.raise_for_status()
-            return response.json()
-    
     def adapt_claims(self, claims: Dict[str, Any]) -> Identity:
         """Adaptar claims do Keycloak"""
         return IdentityAdapter.from_keycloak(claims)
@@ -273,19 +431,18 @@ class KeycloakProvider(OIDCProvider):
         if not token_endpoint:
             raise ValueError("token_endpoint não encontrado em metadados")
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                token_endpoint,
-                data={
-                    "grant_type": "authorization_code",
-                    "client_id": self.config.client_id,
-                    "code": code,
-                    "redirect_uri": self.config.redirect_uri,
-                    "code_verifier": code_verifier,
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self.http_client.post(
+            token_endpoint,
+            data={
+                "grant_type": "authorization_code",
+                "client_id": self.config.client_id,
+                "code": code,
+                "redirect_uri": self.config.redirect_uri,
+                "code_verifier": code_verifier,
+            }
+        )
+        response.raise_for_status()
+        return response.json()
 
 
 class MicrosoftEntraProvider(OIDCProvider):
@@ -299,15 +456,6 @@ class MicrosoftEntraProvider(OIDCProvider):
         if not self.config.authority.endswith("/"):
             self.config.authority = self.config.authority + "/"
     
-    async def get_discovery_metadata(self) -> Dict[str, Any]:
-        """Buscar metadados de descoberta do Entra"""
-        url = f"{self.config.authority}.well-known/openid-configuration"
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=10.0)
-            response.raise_for_status()
-            return response.json()
-    
     def adapt_claims(self, claims: Dict[str, Any]) -> Identity:
         """Adaptar claims do Microsoft Entra"""
         return IdentityAdapter.from_microsoft_entra(claims)
@@ -324,15 +472,6 @@ class GoogleProvider(OIDCProvider):
         if self.config.authority != "https://accounts.google.com":
             self.config.authority = "https://accounts.google.com"
     
-    async def get_discovery_metadata(self) -> Dict[str, Any]:
-        """Buscar metadados de descoberta do Google"""
-        url = "https://accounts.google.com/.well-known/openid-configuration"
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=10.0)
-            response.raise_for_status()
-            return response.json()
-    
     def adapt_claims(self, claims: Dict[str, Any]) -> Identity:
         """Adaptar claims do Google"""
         return IdentityAdapter.from_google(claims)
@@ -350,15 +489,6 @@ class AWSCognitoProvider(OIDCProvider):
         if not self.config.authority.endswith("/"):
             self.config.authority = self.config.authority + "/"
     
-    async def get_discovery_metadata(self) -> Dict[str, Any]:
-        """Buscar metadados de descoberta do Cognito"""
-        url = f"{self.config.authority}.well-known/openid-configuration"
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=10.0)
-            response.raise_for_status()
-            return response.json()
-    
     def adapt_claims(self, claims: Dict[str, Any]) -> Identity:
         """Adaptar claims do AWS Cognito"""
         return IdentityAdapter.from_cognito(claims)
@@ -438,3 +568,12 @@ def set_provider(provider: OIDCProvider):
     """Definir instância do provider (para testes)"""
     global _provider_instance
     _provider_instance = provider
+
+
+async def close_provider():
+    """Encerrar tarefas em background do provider (shutdown da aplicação)"""
+    global _provider_instance
+    
+    if _provider_instance is not None:
+        await _provider_instance.aclose()
+        _provider_instance = None
@@ -0,0 +1,186 @@
+"""
+Warm-up - Aquecimento da aplicação antes de aceitar tráfego
+Pré-carrega provider OIDC (descoberta + JWKS), pool de conexões do banco,
+índice espacial em memória e caches quentes. A readiness (/health/ready) só fica verde ao terminar.
+Autor: Sistema de Laudos
+Data: 2026-10-19
+"""
+
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+WarmupStep = Callable[[], Awaitable[Optional[str]]]
+
+
+@dataclass
+class WarmupState:
+    """Estado do aquecimento (exposto pelo endpoint de readiness)"""
+
+    ready: bool = False
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    steps: Dict[str, str] = field(default_factory=dict)  # nome -> ok / skipped / error: ...
+
+    def to_dict(self) -> Dict:
+        """Converter para dicionário"""
+        return {
+            "ready": self.ready,
+            "started_at": self.started_at.isoformat() + "Z" if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() + "Z" if self.finished_at else None,
+            "steps": dict(self.steps),
+        }
+
+
+# Registro de etapas (ordem de registro = ordem de execução)
+_steps: List[Tuple[str, WarmupStep]] = []
+
+# Estado global do aquecimento
+warmup_state = WarmupState()
+
+
+def register_warmup_step(name: str) -> Callable[[WarmupStep], WarmupStep]:
+    """
+    Registrar etapa de aquecimento
+
+    A etapa é uma corrotina sem argumentos. Pode retornar "skipped" quando
+    não se aplica ao ambiente (ex.: OIDC não configurado).
+
+    Usage:
+        @register_warmup_step("geocode_cache")
+        async def warm_geocode_cache():
+            ...
+    """
+    def decorator(func: WarmupStep) -> WarmupStep:
+        _steps.append((name, func))
+        return func
+    return decorator
+
+
+def is_ready() -> bool:
+    """Verificar se o aquecimento terminou"""
+    return warmup_state.ready
+
+
+def _enabled_steps() -> List[Tuple[str, WarmupStep]]:
+    """Filtrar etapas por WARMUP_STEPS (lista separada por vírgula; vazio = todas)"""
+    selected = os.getenv("WARMUP_STEPS", "").strip()
+    if not selected:
+        return list(_steps)
+    names = {name.strip() for name in selected.split(",") if name.strip()}
+    return [(name, step) for name, step in _steps if name in names]
+
+
+async def run_warmup() -> WarmupState:
+    """
+    Executar etapas de aquecimento e liberar readiness
+
+    Cada etapa tem timeout (WARMUP_TIMEOUT_SECONDS). Falhas são registradas
+    e não impedem as demais etapas: a aplicação continua funcional, apenas
+    sem o cache aquecido.
+
+    Returns:
+        WarmupState final
+    """
+    warmup_state.started_at = datetime.utcnow()
+
+    if os.getenv("WARMUP_ENABLED", "true").lower() != "true":
+        logger.info("Warm-up desativado (WARMUP_ENABLED=false)")
+    else:
+        timeout = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "30"))
+
+        for name, step in _enabled_steps():
+            try:
+                result = await asyncio.wait_for(step(), timeout=timeout)
+                warmup_state.steps[name] = result or "ok"
+            except asyncio.TimeoutError:
+                warmup_state.steps[name] = f"error: timeout após {timeout}s"
+                logger.warning(f"Warm-up '{name}' excedeu {timeout}s")
+            except Exception as e:
+                warmup_state.steps[name] = f"error: {e}"
+                logger.warning(f"Warm-up '{name}' falhou: {e}")
+
+    warmup_state.finished_at = datetime.utcnow()
+    warmup_state.ready = True
+
+    elapsed = (warmup_state.finished_at - warmup_state.started_at).total_seconds()
+    logger.info(f"Warm-up concluído em {elapsed:.2f}s: {warmup_state.steps}")
+    return warmup_state
+
+
+# ============================================================================
+# Etapas padrão
+# ============================================================================
+
+@register_warmup_step("auth")
+async def warm_auth_provider() -> Optional[str]:
+    """Criar provider OIDC e buscar descoberta + JWKS (inicia refresh em background)"""
+    if not os.getenv("OIDC_AUTHORITY"):
+        return "skipped"
+
+    from .oidc_provider import get_provider
+
+    provider = await get_provider()
+    await provider.get_jwks()
+    return None
+
+
+@register_warmup_step("database")
+async def warm_database_pool() -> Optional[str]:
+    """Abrir conexões até o tamanho mínimo do pool (DB_POOL_SIZE)"""
+    from sqlalchemy import text
+    from app.models.database import engine, DB_POOL_SIZE
+
+    if DB_POOL_SIZE <= 0:
+        return "skipped"
+
+    def fill_pool():
+        connections = []
+        try:
+            for _ in range(DB_POOL_SIZE):
+                connection = engine.connect()
+                connections.append(connection)
+                connection.execute(text("SELECT 1"))
+        finally:
+            # Devolver ao pool (permanecem abertas para as próximas requisições)
+            for connection in connections:
+                connection.close()
+
+    await asyncio.to_thread(fill_pool)
+    return None
+
+
+@register_warmup_step("geo_index")
+async def warm_geo_index() -> Optional[str]:
+    """Carregar índice espacial em memória de todos os tenants (hotspots de fraude)"""
+    from app.models.database import SessionLocal
+    from app.services.geo_index_service import build_all_indexes
+
+    def build():
+        db = SessionLocal()
+        try:
+            return build_all_indexes(db)
+        finally:
+            db.close()
+
+    total = await asyncio.to_thread(build)
+    logger.info(f"Índice espacial carregado: {total} contratos")
+    return None
+
+
+@register_warmup_step("cep_index")
+async def warm_cep_index() -> Optional[str]:
+    """Mapear o índice offline de centroides de CEP (camada rápida de geocodificação)"""
+    from app.utils.cep_index import get_cep_index
+
+    index = await asyncio.to_thread(get_cep_index)
+    if index is None:
+        return "skipped"
+    # Tocar as páginas de busca antes da primeira requisição
+    await asyncio.to_thread(index.lookup, "01001000")
+    return None
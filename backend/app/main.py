@@ -14,6 +14,13 @@ from app.api.v1 import api_v1_router
 from app.api.middleware import AuditLoggingMiddleware
 from app.api.rate_limiting import limiter
 from app.core.exceptions import APIException
+from app.core.http_client import get_http_client, close_http_client
+from app.utils.nominatim_client import get_nominatim_client, close_nominatim_client
+from app.utils.geocode_scheduler import close_geocode_scheduler
+from app.utils.geocoder import close_geocoder
+from app.core.oidc_provider import close_provider
+from app.core.warmup import run_warmup
+import asyncio
 
 app = FastAPI(
     title="Sistema de Laudos API",
@@ -115,6 +122,12 @@ def api_root():
 @app.on_event("startup")
 async def startup_event():
     """Executed when application starts"""
+    # Cliente HTTP compartilhado (pool de conexões para o IdP)
+    get_http_client()
+    # Cliente Nominatim compartilhado (sessão aiohttp com keep-alive e cache de DNS)
+    await get_nominatim_client().open()
+    # Warm-up em background: /api/v1/health/ready fica 503 até terminar
+    app.state.warmup_task = asyncio.create_task(run_warmup())
     print("✅ Sistema de Laudos API started")
     print("📚 Docs: http://localhost:8000/docs")
     print("📖 ReDoc: http://localhost:8000/redoc")
@@ -122,4 +135,12 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Executed when application shuts down"""
+    warmup_task = getattr(app.state, "warmup_task", None)
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+    await close_provider()
+    await close_http_client()
+    await close_geocode_scheduler()
+    await close_geocoder()
+    await close_nominatim_client()
     print("🛑 Sistema de Laudos API shut down")
@@ -6,6 +6,11 @@ from .usuario import Usuario
 from .dados_contrato import DadosContrato
 from .dados_bureau import DadosBureau
 from .parecer import Parecer
+from .regras_parecer import RegrasParecer
+from .histograma_distancias import HistogramaDistancias
+from .geocode_cache import GeocodeCache
+from .reverse_geocode_cache import ReverseGeocodeCache
+from .geocodificacao_lote import GeocodificacaoLote
 from .logs_analise import LogsAnalise
 from .tenant import Tenant
 from .audit_log import AuditLog, AuditAction, AuditStatus
@@ -15,6 +20,11 @@ __all__ = [
     "DadosContrato",
     "DadosBureau",
     "Parecer",
+    "RegrasParecer",
+    "HistogramaDistancias",
+    "GeocodeCache",
+    "ReverseGeocodeCache",
+    "GeocodificacaoLote",
     "LogsAnalise",
     "Tenant",
     "AuditLog",
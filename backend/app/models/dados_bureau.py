@@ -5,6 +5,7 @@ DadosBureau Model
 from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Index, Text
 from datetime import datetime
 from .database import Base
+from .spatial import track_geohash
 
 
 class DadosBureau(Base):
@@ -21,6 +22,8 @@ class DadosBureau(Base):
         cep: CEP do endereço
         latitude: Latitude obtida via Nominatim (coordenada de destino)
         longitude: Longitude obtida via Nominatim (coordenada de destino)
+        geohash: Célula geohash das coordenadas (busca por raio/retângulo)
+        precisao_geocodificacao: Origem das coordenadas (setor_cep, cep ou logradouro)
         data_consulta: Data da consulta ao bureau
         criado_em: Timestamp de criação
     """
@@ -36,6 +39,8 @@ class DadosBureau(Base):
     cep = Column(String(8), nullable=True)
     latitude = Column(Numeric(precision=10, scale=8), nullable=True)
     longitude = Column(Numeric(precision=11, scale=8), nullable=True)
+    geohash = Column(String(12), nullable=True)  # Célula de (latitude, longitude) p/ índice espacial
+    precisao_geocodificacao = Column(String(20), nullable=True)  # app.utils.cep_index.PRECISOES
     data_consulta = Column(DateTime, nullable=True)
     criado_em = Column(DateTime, default=datetime.utcnow, nullable=False)
     
@@ -44,7 +49,11 @@ class DadosBureau(Base):
         Index("idx_dados_bureau_contrato_id", "contrato_id"),
         Index("idx_dados_bureau_cpf", "cpf_cliente"),
         Index("idx_dados_bureau_criado_em", "criado_em"),
+        Index("idx_dados_bureau_geohash", "geohash"),
     )
     
     def __repr__(self):
         return f"<DadosBureau(id={self.id}, cpf={self.cpf_cliente}, nome={self.nome_cliente})>"
+
+
+track_geohash(DadosBureau, "latitude", "longitude", "geohash")
@@ -5,6 +5,7 @@ DadosContrato Model
 from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Index, Text
 from datetime import datetime
 from .database import Base
+from .spatial import track_geohash
 
 
 class DadosContrato(Base):
@@ -19,6 +20,7 @@ class DadosContrato(Base):
         latitude: Latitude do endereço de assinatura (coordenada de origem)
         longitude: Longitude do endereço de assinatura (coordenada de origem)
         endereco_assinatura: Endereço onde o contrato foi assinado
+        geohash: Célula geohash das coordenadas (busca por raio/retângulo)
         arquivo_pdf_path: Caminho do arquivo PDF armazenado
         status: Status do processamento (RECEBIDO, PROCESSANDO, CONCLUIDO, ERRO)
         criado_em: Timestamp de criação
@@ -34,6 +36,7 @@ class DadosContrato(Base):
     latitude = Column(Numeric(precision=10, scale=8), nullable=True)
     longitude = Column(Numeric(precision=11, scale=8), nullable=True)
     endereco_assinatura = Column(Text, nullable=True)
+    geohash = Column(String(12), nullable=True)  # Célula de (latitude, longitude) p/ índice espacial
     arquivo_pdf_path = Column(String(500), nullable=False)
     status = Column(String(20), default="RECEBIDO", nullable=False, index=True)
     criado_em = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -46,7 +49,11 @@ class DadosContrato(Base):
         Index("idx_dados_contrato_numero", "numero_contrato"),
         Index("idx_dados_contrato_status", "status"),
         Index("idx_dados_contrato_criado_em", "criado_em"),
+        Index("idx_dados_contrato_geohash", "geohash"),
     )
     
     def __repr__(self):
         return f"<DadosContrato(id={self.id}, cpf={self.cpf_cliente}, contrato={self.numero_contrato})>"
+
+
+track_geohash(DadosContrato, "latitude", "longitude", "geohash")
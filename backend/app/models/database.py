@@ -24,11 +24,26 @@ db_name = os.getenv("DB_NAME", "sistema_de_laudos_dev")
 db_password_encoded = quote_plus(db_password)
 DATABASE_URL = f"postgresql://{db_user}:{db_password_encoded}@{db_host}:{db_port}/{db_name}"
 
+# Connection pool (DB_POOL_SIZE=0 desativa o pool e usa NullPool)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+_pool_options = (
+    {"poolclass": NullPool}
+    if DB_POOL_SIZE <= 0
+    else {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_pre_ping": True,
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800")),
+    }
+)
+
 # Create SQLAlchemy engine
 engine = create_engine(
     DATABASE_URL,
-    poolclass=NullPool,
     echo=os.getenv("SQL_ECHO", "false").lower() == "true",
+    **_pool_options,
 )
 
 # SessionLocal for creating database sessions
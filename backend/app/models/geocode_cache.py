@@ -0,0 +1,41 @@
+"""
+GeocodeCache Model
+"""
+
+from sqlalchemy import Column, String, DateTime, Numeric, Boolean, Text
+from datetime import datetime
+from .database import Base
+
+
+class GeocodeCache(Base):
+    """
+    Cache persistente de geocodificação (nível 2, atrás do LRU em memória)
+
+    Uma linha por endereço normalizado. Endereços não encontrados também
+    são gravados (encontrado = False, sem coordenadas) para não repetir a
+    consulta; a validade depende de encontrado (TTLs em GeocodingService).
+
+    Attributes:
+        chave: SHA-256 do endereço normalizado (chave primária)
+        endereco_normalizado: Endereço normalizado (minúsculas, sem acentos)
+        latitude: Latitude (None se não encontrado)
+        longitude: Longitude (None se não encontrado)
+        display_name: Endereço formatado devolvido pelo provedor
+        provider: Provedor que respondeu (ex.: nominatim)
+        encontrado: False para cache negativo
+        consultado_em: Instante da consulta ao provedor
+    """
+
+    __tablename__ = "geocode_cache"
+
+    chave = Column(String(64), primary_key=True)
+    endereco_normalizado = Column(Text, nullable=False)
+    latitude = Column(Numeric(precision=10, scale=8), nullable=True)
+    longitude = Column(Numeric(precision=11, scale=8), nullable=True)
+    display_name = Column(Text, nullable=True)
+    provider = Column(String(50), nullable=False)
+    encontrado = Column(Boolean, nullable=False, default=True)
+    consultado_em = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<GeocodeCache(endereco={self.endereco_normalizado!r}, encontrado={self.encontrado})>"
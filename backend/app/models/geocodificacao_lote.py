@@ -0,0 +1,53 @@
+"""
+GeocodificacaoLote Model
+"""
+
+from sqlalchemy import Column, String, Integer, DateTime, Text, Index
+from datetime import datetime
+from .database import Base
+
+
+class GeocodificacaoLote(Base):
+    """
+    Job de geocodificação em lote do backlog de bureau sem coordenadas
+
+    Uma linha por execução (Celery: app.tasks.geocodificacao). O worker
+    percorre os registros sem localização do tenant em ordem de id e grava
+    o checkpoint (ultimo_bureau_id) e os contadores a cada lote, então uma
+    execução interrompida continua de onde parou.
+
+    Attributes:
+        tenant_id: Tenant cujo backlog é processado
+        status: PENDENTE, EXECUTANDO, CONCLUIDO, FALHOU ou CANCELADO
+        total: Registros sem localização no início do job
+        processados: Registros já consultados (com ou sem resultado)
+        geocodificados: Registros que receberam coordenadas
+        nao_encontrados: Endereços sem resultado no provedor
+        ultimo_bureau_id: Checkpoint (maior id já processado)
+        task_id: ID da task Celery
+        mensagem: Motivo da falha/cancelamento
+    """
+
+    __tablename__ = "geocodificacao_lotes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(String(36), nullable=False)
+    status = Column(String(20), nullable=False, default="PENDENTE")
+    total = Column(Integer, nullable=False, default=0)
+    processados = Column(Integer, nullable=False, default=0)
+    geocodificados = Column(Integer, nullable=False, default=0)
+    nao_encontrados = Column(Integer, nullable=False, default=0)
+    ultimo_bureau_id = Column(Integer, nullable=False, default=0)
+    task_id = Column(String(255), nullable=True)
+    mensagem = Column(Text, nullable=True)
+    criado_em = Column(DateTime, default=datetime.utcnow, nullable=False)
+    iniciado_em = Column(DateTime, nullable=True)
+    atualizado_em = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    concluido_em = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("idx_geocodificacao_lotes_tenant_status", "tenant_id", "status"),
+    )
+
+    def __repr__(self):
+        return f"<GeocodificacaoLote(id={self.id}, tenant={self.tenant_id}, status={self.status}, {self.processados}/{self.total})>"
@@ -0,0 +1,35 @@
+"""
+HistogramaDistancias Model
+"""
+
+from sqlalchemy import Column, String, Date, SmallInteger, Integer, Numeric
+from .database import Base
+
+
+class HistogramaDistancias(Base):
+    """
+    Histograma materializado de distancia_km por tenant e dia
+
+    Uma linha por (tenant, dia, bucket) com contagem e soma das distâncias
+    dos pareceres criados no dia. Mantido incrementalmente a cada gravação
+    de parecer (PareceRepository); buckets definidos em
+    app.utils.distance_histogram.
+
+    Attributes:
+        tenant_id: Tenant dos contratos
+        dia: Dia de criação do parecer (UTC)
+        bucket: Índice do bucket em escala logarítmica
+        contagem: Número de pareceres no bucket
+        soma_km: Soma das distâncias (média exata)
+    """
+
+    __tablename__ = "histograma_distancias"
+
+    tenant_id = Column(String(36), primary_key=True)
+    dia = Column(Date, primary_key=True)
+    bucket = Column(SmallInteger, primary_key=True)
+    contagem = Column(Integer, nullable=False, default=0)
+    soma_km = Column(Numeric(precision=16, scale=2), nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<HistogramaDistancias(tenant_id={self.tenant_id}, dia={self.dia}, bucket={self.bucket}, contagem={self.contagem})>"
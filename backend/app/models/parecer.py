@@ -2,9 +2,13 @@
 Parecer Model
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Index, Text
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Index, Text, Boolean, false
 from datetime import datetime
 from .database import Base
+from .spatial import track_geohash
+from .staleness import track_parecer_inputs
+from .dados_contrato import DadosContrato
+from .dados_bureau import DadosBureau
 
 
 class Parecer(Base):
@@ -21,6 +25,14 @@ class Parecer(Base):
         longitude_inicio: Longitude do ponto de origem (contrato)
         latitude_fim: Latitude do ponto de destino (bureau)
         longitude_fim: Longitude do ponto de destino (bureau)
+        geohash_inicio: Célula geohash do ponto de origem
+        geohash_fim: Célula geohash do ponto de destino
+        fingerprint: Impressão digital das entradas (coordenadas, endereços, modo, regras)
+        desatualizado: Entradas mudaram desde o cálculo (aguarda reanálise em background)
+        reanalise_tentativas: Reanálises que falharam desde a última marcação
+        reanalise_apos: Não reanalisar antes deste instante (lote em andamento ou espera após falha)
+        regras_versao: Versão das regras de classificação usadas (RegrasParecer.versao)
+        modo_distancia: Modo de cálculo de distância usado (fast, haversine, geodesic)
         criado_em: Timestamp de criação
     """
     
@@ -35,6 +47,14 @@ class Parecer(Base):
     longitude_inicio = Column(Numeric(precision=11, scale=8), nullable=False)
     latitude_fim = Column(Numeric(precision=10, scale=8), nullable=False)
     longitude_fim = Column(Numeric(precision=11, scale=8), nullable=False)
+    geohash_inicio = Column(String(12), nullable=True)
+    geohash_fim = Column(String(12), nullable=True)
+    fingerprint = Column(String(64), nullable=True)
+    desatualizado = Column(Boolean, default=False, server_default=false(), nullable=False)
+    reanalise_tentativas = Column(Integer, default=0, server_default="0", nullable=False)
+    reanalise_apos = Column(DateTime, nullable=True)
+    regras_versao = Column(String(12), nullable=True)
+    modo_distancia = Column(String(20), nullable=True)
     criado_em = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Índices
@@ -42,7 +62,18 @@ class Parecer(Base):
         Index("idx_parecer_contrato_id", "contrato_id"),
         Index("idx_parecer_tipo", "tipo_parecer"),
         Index("idx_parecer_criado_em", "criado_em"),
+        Index("idx_parecer_geohash_inicio", "geohash_inicio"),
+        Index("idx_parecer_geohash_fim", "geohash_fim"),
+        Index("idx_parecer_desatualizado", "desatualizado"),
     )
     
     def __repr__(self):
         return f"<Parecer(id={self.id}, contrato_id={self.contrato_id}, tipo={self.tipo_parecer}, dist={self.distancia_km}km)>"
+
+
+track_geohash(Parecer, "latitude_inicio", "longitude_inicio", "geohash_inicio")
+track_geohash(Parecer, "latitude_fim", "longitude_fim", "geohash_fim")
+
+# Mudança de coordenadas/endereço do contrato ou do bureau -> parecer desatualizado
+track_parecer_inputs(DadosContrato, "id", ("latitude", "longitude", "endereco_assinatura"))
+track_parecer_inputs(DadosBureau, "contrato_id", ("latitude", "longitude", "logradouro"))
@@ -0,0 +1,35 @@
+"""
+RegrasParecer Model
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from datetime import datetime
+from .database import Base
+
+
+class RegrasParecer(Base):
+    """
+    Regras de classificação do parecer personalizadas por tenant
+
+    Tenants sem registro usam as regras padrão (app.utils.parecer_rules.DEFAULT_RULES).
+
+    Attributes:
+        id: Identificador único
+        tenant_id: Tenant dono das regras (uma linha por tenant)
+        faixas: Lista de faixas [{tipo, ate_km, template}] em ordem crescente
+        versao: Identificador da versão (hash das faixas), gravado em cada parecer
+        atualizado_por: Usuário (sub do JWT) que editou as regras
+        atualizado_em: Timestamp da última edição
+    """
+
+    __tablename__ = "regras_parecer"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(String(36), nullable=False, unique=True, index=True)
+    faixas = Column(JSON, nullable=False)
+    versao = Column(String(12), nullable=False)
+    atualizado_por = Column(String(255), nullable=True)
+    atualizado_em = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<RegrasParecer(tenant_id={self.tenant_id}, versao={self.versao})>"
@@ -0,0 +1,47 @@
+"""
+ReverseGeocodeCache Model
+"""
+
+from sqlalchemy import Column, String, DateTime, Numeric, Boolean, Text, Index
+from datetime import datetime
+from .database import Base
+
+
+class ReverseGeocodeCache(Base):
+    """
+    Cache persistente de geocodificação reversa (nível 2, atrás do LRU)
+
+    Uma linha por célula da grade de coordenadas (reverse_cache_key). Guarda
+    o ponto efetivamente consultado e o seu geohash para a busca do vizinho
+    mais próximo dentro da tolerância. Pontos sem endereço também são
+    gravados (encontrado = False); a validade segue os TTLs do
+    GeocodingService.
+
+    Attributes:
+        chave: Tamanho da grade + célula (chave primária)
+        latitude: Latitude consultada ao provedor
+        longitude: Longitude consultada ao provedor
+        geohash: Célula geohash do ponto (busca por proximidade)
+        display_name: Endereço formatado (None se não encontrado)
+        provider: Provedor que respondeu (ex.: nominatim)
+        encontrado: False para cache negativo
+        consultado_em: Instante da consulta ao provedor
+    """
+
+    __tablename__ = "reverse_geocode_cache"
+
+    chave = Column(String(64), primary_key=True)
+    latitude = Column(Numeric(precision=10, scale=8), nullable=False)
+    longitude = Column(Numeric(precision=11, scale=8), nullable=False)
+    geohash = Column(String(12), nullable=False)
+    display_name = Column(Text, nullable=True)
+    provider = Column(String(50), nullable=False)
+    encontrado = Column(Boolean, nullable=False, default=True)
+    consultado_em = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = (
+        Index("idx_reverse_geocode_cache_geohash", "geohash"),
+    )
+
+    def __repr__(self):
+        return f"<ReverseGeocodeCache(chave={self.chave!r}, encontrado={self.encontrado})>"
@@ -0,0 +1,24 @@
+"""
+Manutenção automática das colunas geohash (índice espacial)
+"""
+
+from sqlalchemy import event
+
+from app.utils.geohash import encode
+
+
+def track_geohash(model, latitude_attr: str, longitude_attr: str, geohash_attr: str):
+    """
+    Recalcular geohash_attr sempre que a entidade for inserida/atualizada via ORM
+
+    Escritas via Core (insert/update em lote) devem preencher a coluna
+    explicitamente com app.utils.geohash.encode().
+    """
+    def update_geohash(mapper, connection, target):
+        setattr(target, geohash_attr, encode(
+            getattr(target, latitude_attr),
+            getattr(target, longitude_attr),
+        ))
+
+    event.listen(model, "before_insert", update_geohash)
+    event.listen(model, "before_update", update_geohash)
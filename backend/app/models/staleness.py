@@ -0,0 +1,39 @@
+"""
+Rastreamento de dependências do parecer (reanálise incremental)
+
+O parecer de um contrato depende das coordenadas e endereços do contrato
+e do bureau. Quando uma dessas entradas muda via ORM, o parecer é marcado
+como desatualizado (pareceres.desatualizado) na mesma transação; a
+task periódica de reanálise (app.tasks.reanalise) recalcula os marcados em lote.
+"""
+
+from typing import Sequence
+
+from sqlalchemy import event, inspect, update
+
+
+def track_parecer_inputs(model, contrato_id_attr: str, input_attrs: Sequence[str]):
+    """
+    Marcar o parecer do contrato como desatualizado quando input_attrs mudar
+
+    Escritas via Core (update em lote) não disparam o listener e devem
+    marcar o parecer explicitamente (PareceRepository.set_dirty).
+
+    Args:
+        model: Modelo com as entradas da análise (DadosContrato, DadosBureau)
+        contrato_id_attr: Atributo com o ID do contrato ("id" ou "contrato_id")
+        input_attrs: Atributos usados na análise (coordenadas, endereço)
+    """
+    from .parecer import Parecer
+
+    def mark_parecer_dirty(mapper, connection, target):
+        state = inspect(target)
+        if not any(state.attrs[attr].history.has_changes() for attr in input_attrs):
+            return
+        connection.execute(
+            update(Parecer.__table__)
+            .where(Parecer.__table__.c.contrato_id == getattr(target, contrato_id_attr))
+            .values(desatualizado=True, reanalise_tentativas=0, reanalise_apos=None)
+        )
+
+    event.listen(model, "after_update", mark_parecer_dirty)
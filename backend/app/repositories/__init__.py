@@ -8,6 +8,11 @@ from .usuario_repository import UsuarioRepository
 from .contrato_repository import ContratoRepository
 from .bureau_repository import BureauRepository
 from .parecer_repository import PareceRepository
+from .regras_parecer_repository import RegrasParecerRepository
+from .histograma_repository import HistogramaDistanciasRepository
+from .geocode_cache_repository import GeocodeCacheRepository
+from .reverse_geocode_cache_repository import ReverseGeocodeCacheRepository
+from .geocodificacao_lote_repository import GeocodificacaoLoteRepository
 from .logs_repository import LogsAnaliseRepository
 from .audit_log_repository import AuditLogRepository
 
@@ -17,6 +22,11 @@ __all__ = [
     "ContratoRepository",
     "BureauRepository",
     "PareceRepository",
+    "RegrasParecerRepository",
+    "HistogramaDistanciasRepository",
+    "GeocodeCacheRepository",
+    "ReverseGeocodeCacheRepository",
+    "GeocodificacaoLoteRepository",
     "LogsAnaliseRepository",
     "AuditLogRepository",
 ]
@@ -28,6 +28,25 @@ class BaseRepository(ABC, Generic[T]):
         self.db = db
         self.model = model
 
+    def upsert_insert(self, table=None):
+        """
+        Dialect-specific insert() supporting on_conflict_do_update.
+
+        Args:
+            table: Model or table (defaults to this repository's model)
+
+        Returns:
+            Insert construct (PostgreSQL or SQLite)
+        """
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise NotImplementedError(f"upsert not supported on {dialect}")
+        return insert(table if table is not None else self.model)
+
     def create(self, obj_in: dict) -> T:
         """
         Create a new object in the database.
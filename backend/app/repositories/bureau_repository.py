@@ -2,21 +2,43 @@
 DadosBureau Repository - Data Access Layer for DadosBureau model
 """
 
-from typing import Optional, List
+from typing import Optional, List, Dict, Sequence
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, update
 
 from app.models.dados_bureau import DadosBureau
+from app.models.dados_contrato import DadosContrato
+from app.models.usuario import Usuario
+from app.utils.geohash import encode
 from .base_repository import BaseRepository
+from .spatial_mixin import SpatialRepositoryMixin
 
 
-class BureauRepository(BaseRepository[DadosBureau]):
+class BureauRepository(SpatialRepositoryMixin, BaseRepository[DadosBureau]):
     """Repository for DadosBureau model"""
 
     def __init__(self, db: Session):
         super().__init__(db, DadosBureau)
 
+    def query_for_tenant(self, tenant_id: str):
+        """
+        Base query restricted to bureau records of a tenant's contracts.
+
+        Args:
+            tenant_id: Tenant ID
+
+        Returns:
+            SQLAlchemy query
+        """
+        return self.db.query(DadosBureau).join(
+            DadosContrato, DadosContrato.id == DadosBureau.contrato_id
+        ).join(
+            Usuario, Usuario.id == DadosContrato.usuario_id
+        ).filter(
+            Usuario.tenant_id == tenant_id
+        )
+
     def get_by_contrato(self, contrato_id: int) -> Optional[DadosBureau]:
         """
         Get bureau data by contract ID.
@@ -31,6 +53,38 @@ class BureauRepository(BaseRepository[DadosBureau]):
             DadosBureau.contrato_id == contrato_id
         ).first()
 
+    def get_locations_by_contratos(
+        self,
+        contrato_ids: Sequence[int]
+    ) -> Dict[int, object]:
+        """
+        Get bureau location of many contracts in a single query.
+
+        When a contract has more than one bureau row, the oldest one wins
+        (same row get_by_contrato() returns on PostgreSQL heap order).
+
+        Args:
+            contrato_ids: Contract IDs
+
+        Returns:
+            Dict contrato_id -> row (contrato_id, latitude, longitude, logradouro)
+        """
+        if not contrato_ids:
+            return {}
+        rows = self.db.query(
+            DadosBureau.contrato_id,
+            DadosBureau.latitude,
+            DadosBureau.longitude,
+            DadosBureau.logradouro,
+        ).filter(
+            DadosBureau.contrato_id.in_(contrato_ids)
+        ).order_by(DadosBureau.id).all()
+
+        locations = {}
+        for row in rows:
+            locations.setdefault(row.contrato_id, row)
+        return locations
+
     def get_by_cpf(self, cpf: str) -> List[DadosBureau]:
         """
         Get all bureau records by CPF.
@@ -89,6 +143,90 @@ class BureauRepository(BaseRepository[DadosBureau]):
         records = query.offset(skip).limit(limit).all()
         return records, total
 
+    def _without_location(self, tenant_id: Optional[str] = None):
+        query = self.query_for_tenant(tenant_id) if tenant_id else self.db.query(DadosBureau)
+        return query.filter(
+            (DadosBureau.latitude.is_(None)) | (DadosBureau.longitude.is_(None))
+        )
+
+    def count_without_location(self, tenant_id: Optional[str] = None) -> int:
+        """
+        Count bureau records without geocoded location.
+
+        Args:
+            tenant_id: Restrict to a tenant (None = all tenants)
+
+        Returns:
+            Count of records
+        """
+        return self._without_location(tenant_id).count()
+
+    def get_without_location_after(
+        self,
+        after_id: int,
+        limit: int,
+        tenant_id: Optional[str] = None
+    ) -> List:
+        """
+        Next page of bureau records without location, in id order.
+
+        Keyset pagination (id > after_id): records that stay without
+        location (address not found) are not returned again, unlike an
+        offset over a shrinking result set.
+
+        Args:
+            after_id: Checkpoint (last processed id)
+            limit: Page size
+            tenant_id: Restrict to a tenant (None = all tenants)
+
+        Returns:
+            Rows of (id, contrato_id, logradouro)
+        """
+        return self._without_location(tenant_id).filter(
+            DadosBureau.id > after_id
+        ).order_by(DadosBureau.id).with_entities(
+            DadosBureau.id, DadosBureau.contrato_id, DadosBureau.logradouro
+        ).limit(limit).all()
+
+    def bulk_update_locations(
+        self,
+        locations: Sequence[tuple],
+        data_consulta: Optional[datetime] = None,
+        precisao: Optional[str] = None
+    ) -> int:
+        """
+        Write many coordinates in one executemany UPDATE (by primary key).
+
+        Bypasses the ORM listeners: the geohash column is filled here and
+        callers mark the affected pareceres as stale (PareceRepository.set_dirty).
+
+        Args:
+            locations: (bureau_id, latitude, longitude) tuples
+            data_consulta: Query date
+            precisao: Geocoding precision of all locations
+
+        Returns:
+            Number of updated records (not committed)
+        """
+        if not locations:
+            return 0
+        data_consulta = data_consulta or datetime.utcnow()
+        self.db.execute(
+            update(DadosBureau),
+            [
+                {
+                    "id": bureau_id,
+                    "latitude": lat,
+                    "longitude": lon,
+                    "geohash": encode(lat, lon),
+                    "precisao_geocodificacao": precisao,
+                    "data_consulta": data_consulta,
+                }
+                for bureau_id, lat, lon in locations
+            ],
+        )
+        return len(locations)
+
     def get_recent(
         self,
         days: int = 7,
@@ -121,7 +259,8 @@ class BureauRepository(BaseRepository[DadosBureau]):
         bureau_id: int,
         latitude,
         longitude,
-        data_consulta: Optional[datetime] = None
+        data_consulta: Optional[datetime] = None,
+        precisao: Optional[str] = None
     ) -> Optional[DadosBureau]:
         """
         Update bureau location coordinates.
@@ -131,13 +270,15 @@ class BureauRepository(BaseRepository[DadosBureau]):
             latitude: Latitude
             longitude: Longitude
             data_consulta: Query date
+            precisao: Geocoding precision (setor_cep, cep, logradouro)
 
         Returns:
             Updated record or None
         """
         update_data = {
             "latitude": latitude,
-            "longitude": longitude
+            "longitude": longitude,
+            "precisao_geocodificacao": precisao,
         }
         if data_consulta:
             update_data["data_consulta"] = data_consulta
@@ -2,21 +2,117 @@
 DadosContrato Repository - Data Access Layer for DadosContrato model
 """
 
-from typing import Optional, List
+from typing import Optional, List, Sequence
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, update
 
 from app.models.dados_contrato import DadosContrato
+from app.models.usuario import Usuario
+from app.models.dados_bureau import DadosBureau
+from app.models.parecer import Parecer
 from .base_repository import BaseRepository
+from .spatial_mixin import SpatialRepositoryMixin
 
 
-class ContratoRepository(BaseRepository[DadosContrato]):
+class ContratoRepository(SpatialRepositoryMixin, BaseRepository[DadosContrato]):
     """Repository for DadosContrato model"""
 
     def __init__(self, db: Session):
         super().__init__(db, DadosContrato)
 
+    def query_for_tenant(self, tenant_id: str):
+        """
+        Base query restricted to contracts of a tenant
+        (tenant resolved through the owning user).
+
+        Args:
+            tenant_id: Tenant ID
+
+        Returns:
+            SQLAlchemy query
+        """
+        return self.db.query(DadosContrato).join(
+            Usuario, Usuario.id == DadosContrato.usuario_id
+        ).filter(
+            Usuario.tenant_id == tenant_id
+        )
+
+    def get_tenant_id(self, contrato_id: int) -> Optional[str]:
+        """
+        Get the tenant of a contract (through the owning user).
+
+        Args:
+            contrato_id: Contract ID
+
+        Returns:
+            Tenant ID or None
+        """
+        row = self.db.query(Usuario.tenant_id).join(
+            DadosContrato, DadosContrato.usuario_id == Usuario.id
+        ).filter(
+            DadosContrato.id == contrato_id
+        ).first()
+        return row.tenant_id if row else None
+
+    def get_indexable_locations(self, tenant_id: Optional[str] = None) -> List:
+        """
+        Get coordinates of all geocoded contracts (in-memory spatial index load).
+
+        Args:
+            tenant_id: Tenant ID (None = all tenants)
+
+        Returns:
+            List of rows (tenant_id, id, latitude, longitude, cpf_cliente)
+        """
+        query = self.db.query(
+            Usuario.tenant_id,
+            DadosContrato.id,
+            DadosContrato.latitude,
+            DadosContrato.longitude,
+            DadosContrato.cpf_cliente,
+        ).select_from(DadosContrato).join(
+            Usuario, Usuario.id == DadosContrato.usuario_id
+        ).filter(
+            DadosContrato.latitude.isnot(None),
+            DadosContrato.longitude.isnot(None),
+        )
+        if tenant_id is not None:
+            query = query.filter(Usuario.tenant_id == tenant_id)
+        return query.all()
+
+    def get_map_points(self, tenant_id: str) -> List:
+        """
+        Get contract and bureau coordinates of a tenant with the parecer type
+        (map cluster aggregate load).
+
+        Args:
+            tenant_id: Tenant ID
+
+        Returns:
+            List of rows (latitude, longitude, bureau_latitude,
+            bureau_longitude, tipo_parecer); coordinates may be None
+        """
+        return self.db.query(
+            DadosContrato.latitude,
+            DadosContrato.longitude,
+            DadosBureau.latitude.label("bureau_latitude"),
+            DadosBureau.longitude.label("bureau_longitude"),
+            Parecer.tipo_parecer,
+        ).select_from(DadosContrato).join(
+            Usuario, Usuario.id == DadosContrato.usuario_id
+        ).outerjoin(
+            DadosBureau, DadosBureau.contrato_id == DadosContrato.id
+        ).outerjoin(
+            Parecer, Parecer.contrato_id == DadosContrato.id
+        ).filter(
+            Usuario.tenant_id == tenant_id,
+            or_(
+                DadosContrato.latitude.isnot(None),
+                DadosBureau.latitude.isnot(None),
+            ),
+        ).all()
+
     def get_by_cpf(self, cpf: str) -> Optional[DadosContrato]:
         """
         Get contract by CPF.
@@ -207,3 +303,63 @@ class ContratoRepository(BaseRepository[DadosContrato]):
             contrato_id,
             {"latitude": latitude, "longitude": longitude}
         )
+
+    def get_for_analysis(
+        self,
+        tenant_id: str,
+        contrato_ids: Optional[Sequence[int]] = None,
+        status: Optional[str] = None,
+        limit: int = 1000
+    ) -> List:
+        """
+        Get the columns needed for geolocation analysis of many contracts
+        in a single query (tenant resolved through the owning user).
+
+        Args:
+            tenant_id: Tenant ID
+            contrato_ids: Contract IDs (None = filter only by status)
+            status: Contract status filter
+            limit: Limit results
+
+        Returns:
+            List of rows (id, latitude, longitude, endereco_assinatura)
+        """
+        query = self.db.query(
+            DadosContrato.id,
+            DadosContrato.latitude,
+            DadosContrato.longitude,
+            DadosContrato.endereco_assinatura,
+        ).join(
+            Usuario, Usuario.id == DadosContrato.usuario_id
+        ).filter(
+            Usuario.tenant_id == tenant_id
+        )
+        if contrato_ids is not None:
+            query = query.filter(DadosContrato.id.in_(contrato_ids))
+        if status:
+            query = query.filter(DadosContrato.status == status)
+        return query.order_by(DadosContrato.id).limit(limit).all()
+
+    def bulk_update_status(
+        self,
+        contrato_ids: Sequence[int],
+        new_status: str
+    ) -> int:
+        """
+        Update status of many contracts in a single statement.
+
+        Args:
+            contrato_ids: Contract IDs
+            new_status: New status value
+
+        Returns:
+            Number of updated rows (not committed)
+        """
+        if not contrato_ids:
+            return 0
+        result = self.db.execute(
+            update(DadosContrato)
+            .where(DadosContrato.id.in_(contrato_ids))
+            .values(status=new_status, atualizado_em=datetime.utcnow())
+        )
+        return result.rowcount
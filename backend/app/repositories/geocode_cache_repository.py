@@ -0,0 +1,98 @@
+"""
+GeocodeCache Repository - Data Access Layer for the persistent geocoding cache
+"""
+
+from typing import Dict, Optional
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import or_, and_
+
+from app.models.geocode_cache import GeocodeCache
+from .base_repository import BaseRepository
+
+
+class GeocodeCacheRepository(BaseRepository[GeocodeCache]):
+    """Repository for GeocodeCache model"""
+
+    def __init__(self, db: Session):
+        super().__init__(db, GeocodeCache)
+
+    def get_valid(
+        self,
+        chave: str,
+        found_since: datetime,
+        not_found_since: datetime
+    ) -> Optional[GeocodeCache]:
+        """
+        Get a cache entry that has not expired yet.
+
+        Args:
+            chave: Key (hash of the normalized address)
+            found_since: Oldest valid lookup for found addresses
+            not_found_since: Oldest valid lookup for negative entries
+
+        Returns:
+            GeocodeCache object or None (missing or expired)
+        """
+        return self.db.query(GeocodeCache).filter(
+            GeocodeCache.chave == chave,
+            or_(
+                and_(GeocodeCache.encontrado.is_(True), GeocodeCache.consultado_em >= found_since),
+                and_(GeocodeCache.encontrado.is_(False), GeocodeCache.consultado_em >= not_found_since),
+            ),
+        ).first()
+
+    def save(self, values: dict) -> None:
+        """
+        Insert or replace a cache entry in one statement
+        (INSERT ... ON CONFLICT (chave) DO UPDATE) and commit.
+
+        Args:
+            values: GeocodeCache columns
+        """
+        stmt = self.upsert_insert().values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[GeocodeCache.chave],
+            set_={
+                column: stmt.excluded[column]
+                for column in values
+                if column != "chave"
+            },
+        )
+        self.db.execute(stmt)
+        self.db.commit()
+
+    def delete_expired(
+        self,
+        found_before: datetime,
+        not_found_before: datetime,
+        provider_found_before: Optional[Dict[str, datetime]] = None
+    ) -> int:
+        """
+        Delete expired entries.
+
+        Args:
+            found_before: Lookups of found addresses older than this expire
+            not_found_before: Negative lookups older than this expire
+            provider_found_before: Per-provider cutoff for found addresses
+                (providers with a shorter validity)
+
+        Returns:
+            Number of deleted entries
+        """
+        deleted = self.db.query(GeocodeCache).filter(
+            or_(
+                and_(GeocodeCache.encontrado.is_(True), GeocodeCache.consultado_em < found_before),
+                and_(GeocodeCache.encontrado.is_(False), GeocodeCache.consultado_em < not_found_before),
+                *(
+                    and_(
+                        GeocodeCache.encontrado.is_(True),
+                        GeocodeCache.provider == provider,
+                        GeocodeCache.consultado_em < before,
+                    )
+                    for provider, before in (provider_found_before or {}).items()
+                ),
+            )
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted
@@ -0,0 +1,63 @@
+"""
+GeocodificacaoLote Repository - Data Access Layer for bulk geocoding jobs
+"""
+
+from typing import Optional
+from sqlalchemy.orm import Session
+
+from app.models.geocodificacao_lote import GeocodificacaoLote
+from .base_repository import BaseRepository
+
+ATIVOS = ("PENDENTE", "EXECUTANDO")
+
+
+class GeocodificacaoLoteRepository(BaseRepository[GeocodificacaoLote]):
+    """Repository for GeocodificacaoLote model"""
+
+    def __init__(self, db: Session):
+        super().__init__(db, GeocodificacaoLote)
+
+    def get_for_tenant(self, lote_id: int, tenant_id: str) -> Optional[GeocodificacaoLote]:
+        """
+        Get a job of a tenant.
+
+        Args:
+            lote_id: Job ID
+            tenant_id: Tenant ID
+
+        Returns:
+            GeocodificacaoLote object or None
+        """
+        return self.db.query(GeocodificacaoLote).filter(
+            GeocodificacaoLote.id == lote_id,
+            GeocodificacaoLote.tenant_id == tenant_id,
+        ).first()
+
+    def get_active(self, tenant_id: str) -> Optional[GeocodificacaoLote]:
+        """
+        Get the pending or running job of a tenant.
+
+        Args:
+            tenant_id: Tenant ID
+
+        Returns:
+            GeocodificacaoLote object or None
+        """
+        return self.db.query(GeocodificacaoLote).filter(
+            GeocodificacaoLote.tenant_id == tenant_id,
+            GeocodificacaoLote.status.in_(ATIVOS),
+        ).order_by(GeocodificacaoLote.id.desc()).first()
+
+    def get_latest(self, tenant_id: str) -> Optional[GeocodificacaoLote]:
+        """
+        Get the most recent job of a tenant.
+
+        Args:
+            tenant_id: Tenant ID
+
+        Returns:
+            GeocodificacaoLote object or None
+        """
+        return self.db.query(GeocodificacaoLote).filter(
+            GeocodificacaoLote.tenant_id == tenant_id,
+        ).order_by(GeocodificacaoLote.id.desc()).first()
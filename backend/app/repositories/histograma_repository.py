@@ -0,0 +1,80 @@
+"""
+HistogramaDistancias Repository - Data Access Layer for the materialized distance histogram
+"""
+
+from typing import List, Optional
+from datetime import date
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+
+from app.models.histograma_distancias import HistogramaDistancias
+from app.utils.distance_histogram import HistogramDeltas
+from .base_repository import BaseRepository
+
+
+class HistogramaDistanciasRepository(BaseRepository[HistogramaDistancias]):
+    """Repository for HistogramaDistancias model"""
+
+    def __init__(self, db: Session):
+        super().__init__(db, HistogramaDistancias)
+
+    def apply_deltas(self, deltas: HistogramDeltas) -> int:
+        """
+        Add count/sum deltas to the histogram in one statement
+        (INSERT ... ON CONFLICT (tenant_id, dia, bucket) DO UPDATE SET contagem = contagem + ...).
+
+        Args:
+            deltas: (tenant_id, dia, bucket) -> (contagem, soma_km)
+
+        Returns:
+            Number of touched buckets (not committed)
+        """
+        values = [
+            {"tenant_id": tenant_id, "dia": dia, "bucket": bucket, "contagem": count, "soma_km": total}
+            for (tenant_id, dia, bucket), (count, total) in deltas.items()
+            if count or total
+        ]
+        if not values:
+            return 0
+
+        table = HistogramaDistancias.__table__
+        stmt = self.upsert_insert().values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.tenant_id, table.c.dia, table.c.bucket],
+            set_={
+                "contagem": table.c.contagem + stmt.excluded.contagem,
+                "soma_km": table.c.soma_km + stmt.excluded.soma_km,
+            },
+        )
+        self.db.execute(stmt)
+        return len(values)
+
+    def get_bucket_totals(
+        self,
+        tenant_id: str,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None
+    ) -> List:
+        """
+        Sum the histogram of a tenant over a period, bucket by bucket.
+
+        Args:
+            tenant_id: Tenant ID
+            data_inicio: First day (inclusive, None = no lower bound)
+            data_fim: Last day (inclusive, None = no upper bound)
+
+        Returns:
+            List of rows (bucket, contagem, soma_km)
+        """
+        query = self.db.query(
+            HistogramaDistancias.bucket,
+            func.sum(HistogramaDistancias.contagem),
+            func.sum(HistogramaDistancias.soma_km),
+        ).filter(
+            HistogramaDistancias.tenant_id == tenant_id
+        )
+        if data_inicio:
+            query = query.filter(HistogramaDistancias.dia >= data_inicio)
+        if data_fim:
+            query = query.filter(HistogramaDistancias.dia <= data_fim)
+        return query.group_by(HistogramaDistancias.bucket).all()
@@ -5,7 +5,7 @@ LogsAnalise Repository - Data Access Layer for LogsAnalise model
 from typing import Optional, List
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, desc, insert
 
 from app.models.logs_analise import LogsAnalise
 from .base_repository import BaseRepository
@@ -17,6 +17,25 @@ class LogsAnaliseRepository(BaseRepository[LogsAnalise]):
     def __init__(self, db: Session):
         super().__init__(db, LogsAnalise)
 
+    def bulk_create(self, rows: List[dict]) -> int:
+        """
+        Insert many log entries in a single executemany.
+
+        Args:
+            rows: Log entries (same keys as create())
+
+        Returns:
+            Number of inserted rows (not committed)
+        """
+        if not rows:
+            return 0
+        now = datetime.utcnow()
+        self.db.execute(
+            insert(LogsAnalise),
+            [{"detalhes": None, "criado_em": now, **row} for row in rows]
+        )
+        return len(rows)
+
     def get_by_contrato(
         self,
         contrato_id: int,
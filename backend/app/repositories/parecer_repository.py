@@ -2,21 +2,50 @@
 Parecer Repository - Data Access Layer for Parecer model
 """
 
-from typing import Optional, List
-from datetime import datetime
+from typing import Optional, List, Sequence, Dict, Tuple
+from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
+from sqlalchemy import and_, or_, desc, update
 from decimal import Decimal
 
 from app.models.parecer import Parecer
+from app.models.dados_contrato import DadosContrato
+from app.models.usuario import Usuario
+from app.utils import geohash
+from app.utils.distance_histogram import HistogramDeltas, add_delta
 from .base_repository import BaseRepository
+from .histograma_repository import HistogramaDistanciasRepository
+from .spatial_mixin import SpatialRepositoryMixin
 
 
-class PareceRepository(BaseRepository[Parecer]):
-    """Repository for Parecer model"""
+class PareceRepository(SpatialRepositoryMixin, BaseRepository[Parecer]):
+    """
+    Repository for Parecer model
+
+    Every parecer write (create, bulk_upsert, delete) also updates the
+    materialized distance histogram (histograma_distancias) in the same
+    transaction: +1 in the bucket of the new parecer, -1 in the bucket
+    of the parecer it replaces. The contract rows are locked (SELECT ...
+    FOR UPDATE) before the replaced parecer is read, so concurrent writes
+    of the same contract are serialized and never subtract the same old
+    bucket twice.
+    """
+
+    # Spatial queries use the contract (origin) point
+    spatial_columns = ("latitude_inicio", "longitude_inicio", "geohash_inicio")
+
+    BULK_CHUNK_SIZE = 1000
+    UPSERT_COLUMNS = (
+        "distancia_km", "tipo_parecer", "texto_parecer",
+        "latitude_inicio", "longitude_inicio",
+        "latitude_fim", "longitude_fim", "geohash_inicio", "geohash_fim",
+        "fingerprint", "regras_versao", "modo_distancia", "desatualizado", "criado_em",
+        "reanalise_tentativas", "reanalise_apos",
+    )
 
     def __init__(self, db: Session):
         super().__init__(db, Parecer)
+        self.histograma_repo = HistogramaDistanciasRepository(db)
 
     def get_by_contrato(self, contrato_id: int) -> Optional[Parecer]:
         """
@@ -32,6 +61,236 @@ class PareceRepository(BaseRepository[Parecer]):
             Parecer.contrato_id == contrato_id
         ).first()
 
+    def bulk_upsert(self, rows: List[dict]) -> int:
+        """
+        Insert or replace the parecer of many contracts in one statement
+        (INSERT ... ON CONFLICT (contrato_id) DO UPDATE).
+
+        Args:
+            rows: Parecer data (PareceCreate fields), one per contract
+
+        Returns:
+            Number of upserted rows (not committed)
+        """
+        if not rows:
+            return 0
+
+        now = datetime.utcnow()
+        # Ascending contract order: concurrent batches lock rows in the same order
+        rows = sorted(rows, key=lambda row: row["contrato_id"])
+        # Chunked to stay below the bind-parameter limit of a single statement
+        for start in range(0, len(rows), self.BULK_CHUNK_SIZE):
+            chunk = rows[start:start + self.BULK_CHUNK_SIZE]
+            deltas, tenants = self._replaced_deltas([row["contrato_id"] for row in chunk])
+            stmt = self.upsert_insert().values([
+                {
+                    "criado_em": now,
+                    "desatualizado": False,
+                    "reanalise_tentativas": 0,
+                    "reanalise_apos": None,
+                    # Core insert: listeners de geohash do ORM não se aplicam
+                    "geohash_inicio": geohash.encode(row["latitude_inicio"], row["longitude_inicio"]),
+                    "geohash_fim": geohash.encode(row["latitude_fim"], row["longitude_fim"]),
+                    **row,
+                }
+                for row in chunk
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Parecer.contrato_id],
+                set_={
+                    column: stmt.excluded[column]
+                    for column in self.UPSERT_COLUMNS
+                },
+            )
+            self.db.execute(stmt)
+
+            for row in chunk:
+                tenant_id = tenants.get(row["contrato_id"])
+                if tenant_id is not None:
+                    add_delta(deltas, tenant_id, now.date(), row["distancia_km"])
+            self.histograma_repo.apply_deltas(deltas)
+        return len(rows)
+
+    def create(self, obj_in: dict) -> Parecer:
+        """
+        Create a parecer (and count it in the distance histogram).
+
+        Args:
+            obj_in: Parecer data
+
+        Returns:
+            Created parecer
+        """
+        deltas, tenants = self._replaced_deltas([obj_in["contrato_id"]])
+        tenant_id = tenants.get(obj_in["contrato_id"])
+        if tenant_id is not None:
+            add_delta(deltas, tenant_id, datetime.utcnow().date(), obj_in["distancia_km"])
+        self.histograma_repo.apply_deltas(deltas)
+        return super().create(obj_in)
+
+    def delete(self, id: int) -> bool:
+        """
+        Delete a parecer (and remove it from the distance histogram).
+
+        Args:
+            id: Parecer ID
+
+        Returns:
+            True if deleted, False if not found
+        """
+        parecer = self.get_by_id(id)
+        if parecer is None:
+            return False
+        self.remove_from_histogram([parecer.contrato_id])
+        return super().delete(id)
+
+    def remove_from_histogram(self, contrato_ids: Sequence[int]) -> None:
+        """
+        Subtract the current pareceres of contracts from the histogram
+        (before deleting them, e.g. contract deletion cascades).
+
+        Args:
+            contrato_ids: Contract IDs (not committed)
+        """
+        deltas, _ = self._replaced_deltas(contrato_ids)
+        self.histograma_repo.apply_deltas(deltas)
+
+    def _replaced_deltas(
+        self,
+        contrato_ids: Sequence[int]
+    ) -> Tuple[HistogramDeltas, Dict[int, str]]:
+        """
+        Lock contracts and look up their tenant and current parecer.
+
+        The contract rows stay locked (FOR UPDATE, in id order) until the
+        caller's transaction ends, so a concurrent write of the same
+        contract waits and then reads the parecer committed by this one.
+        The lookup is a separate statement so that, under READ COMMITTED,
+        it sees that committed parecer.
+
+        Returns:
+            Tuple of (-1 deltas of the pareceres about to be replaced,
+            contrato_id -> tenant_id)
+        """
+        self.db.query(DadosContrato.id).filter(
+            DadosContrato.id.in_(contrato_ids)
+        ).order_by(DadosContrato.id).with_for_update().all()
+
+        rows = self.db.query(
+            DadosContrato.id,
+            Usuario.tenant_id,
+            Parecer.distancia_km,
+            Parecer.criado_em,
+        ).select_from(DadosContrato).join(
+            Usuario, Usuario.id == DadosContrato.usuario_id
+        ).outerjoin(
+            Parecer, Parecer.contrato_id == DadosContrato.id
+        ).filter(
+            DadosContrato.id.in_(contrato_ids)
+        ).all()
+
+        deltas: HistogramDeltas = {}
+        tenants: Dict[int, str] = {}
+        for contrato_id, tenant_id, distancia_km, criado_em in rows:
+            tenants[contrato_id] = tenant_id
+            if distancia_km is not None:
+                add_delta(deltas, tenant_id, criado_em.date(), distancia_km, sign=-1)
+        return deltas, tenants
+
+    def claim_dirty(self, limit: int = 500, lease_seconds: float = 600) -> List:
+        """
+        Claim a batch of pareceres whose inputs changed since they were computed.
+
+        Rows are selected with FOR UPDATE SKIP LOCKED and leased
+        (reanalise_apos = now + lease_seconds), so concurrent runners get
+        disjoint batches once the caller commits. Rows still leased or
+        waiting after a failure are skipped; a lease that expires (runner
+        died mid-batch) makes the row claimable again.
+
+        Args:
+            limit: Limit results (oldest pareceres first)
+            lease_seconds: How long the claimed rows stay reserved
+
+        Returns:
+            List of rows (contrato_id, tenant_id, modo_distancia) (not committed)
+        """
+        now = datetime.utcnow()
+        rows = self.db.query(
+            Parecer.contrato_id,
+            Usuario.tenant_id,
+            Parecer.modo_distancia,
+        ).join(
+            DadosContrato, DadosContrato.id == Parecer.contrato_id
+        ).join(
+            Usuario, Usuario.id == DadosContrato.usuario_id
+        ).filter(
+            Parecer.desatualizado.is_(True),
+            or_(Parecer.reanalise_apos.is_(None), Parecer.reanalise_apos <= now),
+        ).order_by(Parecer.id).limit(limit).with_for_update(
+            of=Parecer, skip_locked=True
+        ).all()
+
+        if rows:
+            self.db.execute(
+                update(Parecer)
+                .where(Parecer.contrato_id.in_([row.contrato_id for row in rows]))
+                .values(reanalise_apos=now + timedelta(seconds=lease_seconds))
+                .execution_options(synchronize_session=False)
+            )
+        return rows
+
+    def defer_dirty(
+        self,
+        contrato_ids: Sequence[int],
+        base_seconds: float,
+        max_seconds: float
+    ) -> int:
+        """
+        Keep failed re-analyses stale and retry them later with exponential
+        backoff (base_seconds * 2^(failures - 1), capped at max_seconds).
+
+        Args:
+            contrato_ids: Contract IDs whose re-analysis failed
+            base_seconds: Wait after the first failure
+            max_seconds: Maximum wait
+
+        Returns:
+            Number of updated rows (not committed)
+        """
+        if not contrato_ids:
+            return 0
+        now = datetime.utcnow()
+        pareceres = self.db.query(Parecer).filter(Parecer.contrato_id.in_(contrato_ids)).all()
+        for parecer in pareceres:
+            parecer.reanalise_tentativas += 1
+            espera = min(base_seconds * 2 ** (parecer.reanalise_tentativas - 1), max_seconds)
+            parecer.reanalise_apos = now + timedelta(seconds=espera)
+        self.db.flush()
+        return len(pareceres)
+
+    def set_dirty(self, contrato_ids: Sequence[int], dirty: bool = True) -> int:
+        """
+        Mark the parecer of many contracts as stale (or fresh) in one statement.
+
+        Either way the retry state is reset: a new change is retried at once.
+
+        Args:
+            contrato_ids: Contract IDs
+            dirty: New value of the desatualizado flag
+
+        Returns:
+            Number of updated rows (not committed)
+        """
+        if not contrato_ids:
+            return 0
+        result = self.db.execute(
+            update(Parecer)
+            .where(Parecer.contrato_id.in_(contrato_ids))
+            .values(desatualizado=dirty, reanalise_tentativas=0, reanalise_apos=None)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
     def get_by_tipo(
         self,
         tipo_parecer: str,
@@ -0,0 +1,76 @@
+"""
+RegrasParecer Repository - Data Access Layer for RegrasParecer model
+"""
+
+from typing import Optional, List
+from sqlalchemy.orm import Session
+
+from app.models.regras_parecer import RegrasParecer
+from .base_repository import BaseRepository
+
+
+class RegrasParecerRepository(BaseRepository[RegrasParecer]):
+    """Repository for RegrasParecer model"""
+
+    def __init__(self, db: Session):
+        super().__init__(db, RegrasParecer)
+
+    def get_by_tenant(self, tenant_id: str) -> Optional[RegrasParecer]:
+        """
+        Get the custom rules of a tenant.
+
+        Args:
+            tenant_id: Tenant ID
+
+        Returns:
+            RegrasParecer object or None (tenant uses the default rules)
+        """
+        return self.db.query(RegrasParecer).filter(
+            RegrasParecer.tenant_id == tenant_id
+        ).first()
+
+    def save_for_tenant(
+        self,
+        tenant_id: str,
+        faixas: List[dict],
+        versao: str,
+        atualizado_por: Optional[str] = None
+    ) -> RegrasParecer:
+        """
+        Create or replace the custom rules of a tenant.
+
+        Args:
+            tenant_id: Tenant ID
+            faixas: Rule bands [{tipo, ate_km, template}]
+            versao: Version id of the compiled rules
+            atualizado_por: User who edited the rules
+
+        Returns:
+            Saved RegrasParecer
+        """
+        regras = self.get_by_tenant(tenant_id)
+        if regras is None:
+            regras = RegrasParecer(tenant_id=tenant_id)
+            self.db.add(regras)
+        regras.faixas = faixas
+        regras.versao = versao
+        regras.atualizado_por = atualizado_por
+        self.db.commit()
+        self.db.refresh(regras)
+        return regras
+
+    def delete_for_tenant(self, tenant_id: str) -> bool:
+        """
+        Delete the custom rules of a tenant (back to the default rules).
+
+        Args:
+            tenant_id: Tenant ID
+
+        Returns:
+            True if rules were deleted
+        """
+        deleted = self.db.query(RegrasParecer).filter(
+            RegrasParecer.tenant_id == tenant_id
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted > 0
@@ -0,0 +1,127 @@
+"""
+ReverseGeocodeCache Repository - Data Access Layer for the persistent reverse geocoding cache
+"""
+
+from typing import Dict, Optional, Tuple
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy.orm import Session
+from sqlalchemy import or_, and_
+
+from app.models.reverse_geocode_cache import ReverseGeocodeCache
+from .base_repository import BaseRepository
+from .spatial_mixin import SpatialRepositoryMixin
+
+
+class ReverseGeocodeCacheRepository(SpatialRepositoryMixin, BaseRepository[ReverseGeocodeCache]):
+    """Repository for ReverseGeocodeCache model"""
+
+    def __init__(self, db: Session):
+        super().__init__(db, ReverseGeocodeCache)
+
+    def get_valid(
+        self,
+        chave: str,
+        found_since: datetime,
+        not_found_since: datetime
+    ) -> Optional[ReverseGeocodeCache]:
+        """
+        Get a cache entry that has not expired yet.
+
+        Args:
+            chave: Key (grid cell of the coordinates)
+            found_since: Oldest valid lookup for found addresses
+            not_found_since: Oldest valid lookup for negative entries
+
+        Returns:
+            ReverseGeocodeCache object or None (missing or expired)
+        """
+        return self.db.query(ReverseGeocodeCache).filter(
+            ReverseGeocodeCache.chave == chave,
+            or_(
+                and_(ReverseGeocodeCache.encontrado.is_(True), ReverseGeocodeCache.consultado_em >= found_since),
+                and_(ReverseGeocodeCache.encontrado.is_(False), ReverseGeocodeCache.consultado_em >= not_found_since),
+            ),
+        ).first()
+
+    def get_nearest_found(
+        self,
+        latitude,
+        longitude,
+        radius_km,
+        found_since: datetime
+    ) -> Optional[Tuple[ReverseGeocodeCache, Decimal]]:
+        """
+        Get the nearest valid found entry within radius_km of a point.
+
+        Args:
+            latitude: Latitude
+            longitude: Longitude
+            radius_km: Tolerance in kilometers
+            found_since: Oldest valid lookup
+
+        Returns:
+            (ReverseGeocodeCache, distance in km) or None
+        """
+        query = self.db.query(ReverseGeocodeCache).filter(
+            ReverseGeocodeCache.encontrado.is_(True),
+            ReverseGeocodeCache.consultado_em >= found_since,
+        )
+        nearest = self.get_within_radius(latitude, longitude, radius_km, limit=1, query=query)
+        return nearest[0] if nearest else None
+
+    def save(self, values: dict) -> None:
+        """
+        Insert or replace a cache entry in one statement
+        (INSERT ... ON CONFLICT (chave) DO UPDATE) and commit.
+
+        Args:
+            values: ReverseGeocodeCache columns (geohash included: Core
+                inserts bypass the ORM listeners)
+        """
+        stmt = self.upsert_insert().values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ReverseGeocodeCache.chave],
+            set_={
+                column: stmt.excluded[column]
+                for column in values
+                if column != "chave"
+            },
+        )
+        self.db.execute(stmt)
+        self.db.commit()
+
+    def delete_expired(
+        self,
+        found_before: datetime,
+        not_found_before: datetime,
+        provider_found_before: Optional[Dict[str, datetime]] = None
+    ) -> int:
+        """
+        Delete expired entries.
+
+        Args:
+            found_before: Lookups of found addresses older than this expire
+            not_found_before: Negative lookups older than this expire
+            provider_found_before: Per-provider cutoff for found addresses
+                (providers with a shorter validity)
+
+        Returns:
+            Number of deleted entries
+        """
+        deleted = self.db.query(ReverseGeocodeCache).filter(
+            or_(
+                and_(ReverseGeocodeCache.encontrado.is_(True), ReverseGeocodeCache.consultado_em < found_before),
+                and_(ReverseGeocodeCache.encontrado.is_(False), ReverseGeocodeCache.consultado_em < not_found_before),
+                *(
+                    and_(
+                        ReverseGeocodeCache.encontrado.is_(True),
+                        ReverseGeocodeCache.provider == provider,
+                        ReverseGeocodeCache.consultado_em < before,
+                    )
+                    for provider, before in (provider_found_before or {}).items()
+                ),
+            )
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted
@@ -0,0 +1,130 @@
+"""
+Spatial queries (bounding box / radius) over geohash-indexed coordinates
+"""
+
+from typing import List, Optional, Tuple
+from decimal import Decimal
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+from app.utils import DistanceCalculator
+from app.utils.geohash import bbox_for_radius, cell_ranges, cover_bbox
+
+
+class SpatialRepositoryMixin:
+    """
+    Radius and bounding-box queries for repositories whose model has
+    latitude/longitude columns plus a B-tree indexed geohash column.
+
+    The geohash cells covering the area become index range scans; the
+    latitude/longitude bounds and the exact Haversine distance then drop
+    the false positives at the cell borders.
+    """
+
+    # (latitude, longitude, geohash) attribute names on the model
+    spatial_columns = ("latitude", "longitude", "geohash")
+
+    def _spatial_columns(self):
+        return tuple(getattr(self.model, name) for name in self.spatial_columns)
+
+    def bbox_filter(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        SQL filter for points inside a bounding box.
+
+        Args:
+            min_lat: South bound
+            min_lon: West bound
+            max_lat: North bound
+            max_lon: East bound
+
+        Returns:
+            SQLAlchemy boolean clause
+        """
+        latitude, longitude, geohash = self._spatial_columns()
+
+        cells = []
+        for lower, upper in cell_ranges(cover_bbox(min_lat, min_lon, max_lat, max_lon)):
+            if upper is None:
+                cells.append(geohash >= lower)
+            else:
+                cells.append(and_(geohash >= lower, geohash < upper))
+
+        return and_(
+            or_(*cells),
+            latitude.between(float(min_lat), float(max_lat)),
+            longitude.between(float(min_lon), float(max_lon)),
+        )
+
+    def get_in_bbox(
+        self,
+        min_lat,
+        min_lon,
+        max_lat,
+        max_lon,
+        limit: int = 100,
+        query: Optional[Query] = None
+    ) -> List:
+        """
+        Get records located inside a bounding box.
+
+        Args:
+            min_lat: South bound
+            min_lon: West bound
+            max_lat: North bound
+            max_lon: East bound
+            limit: Limit results
+            query: Base query (e.g. tenant-filtered); defaults to all records
+
+        Returns:
+            List of records
+        """
+        if query is None:
+            query = self.db.query(self.model)
+        return query.filter(
+            self.bbox_filter(min_lat, min_lon, max_lat, max_lon)
+        ).limit(limit).all()
+
+    def get_within_radius(
+        self,
+        latitude,
+        longitude,
+        radius_km,
+        limit: int = 100,
+        query: Optional[Query] = None
+    ) -> List[Tuple[object, Decimal]]:
+        """
+        Get records within radius_km of a point, nearest first.
+
+        Args:
+            latitude: Center latitude
+            longitude: Center longitude
+            radius_km: Radius in kilometers
+            limit: Limit results
+            query: Base query (e.g. tenant-filtered); defaults to all records
+
+        Returns:
+            List of (record, distance in km)
+        """
+        if query is None:
+            query = self.db.query(self.model)
+
+        candidates = query.filter(
+            self.bbox_filter(*bbox_for_radius(latitude, longitude, radius_km))
+        ).all()
+        if not candidates:
+            return []
+
+        lat_attr, lon_attr, _ = self.spatial_columns
+        distances = DistanceCalculator.haversine_batch(
+            [latitude] * len(candidates),
+            [longitude] * len(candidates),
+            [getattr(record, lat_attr) for record in candidates],
+            [getattr(record, lon_attr) for record in candidates],
+        )
+
+        inside = [
+            i for i in distances.argsort(kind="stable")
+            if distances[i] <= float(radius_km)
+        ][:limit]
+        decimals = DistanceCalculator.to_decimals(distances[inside])
+        return [(candidates[i], distance) for i, distance in zip(inside, decimals)]
@@ -27,6 +27,7 @@ from .bureau_schema import (
     DadosBureauUpdate,
     DadosBureauResponse,
     DadosBureauListResponse,
+    GeocodificacaoLoteResponse,
 )
 
 # Parecer Schemas
@@ -37,12 +38,33 @@ from .parecer_schema import (
     PareceResponse,
     PareceListResponse,
     PareceFilterRequest,
+    RegraParecerFaixa,
+    RegrasParecerRequest,
+    RegrasParecerResponse,
+    HistogramaBucket,
+    HistogramaDistanciasResponse,
 )
 
 # Geolocation Schemas
 from .geolocation_schema import (
     GeolocationRequest,
     GeolocationAnalysisResponse,
+    GeolocationBatchRequest,
+    GeolocationBatchItem,
+    GeolocationBatchResponse,
+    GeolocationNearbyItem,
+    GeolocationNearbyResponse,
+    GeolocationHotspot,
+    GeolocationHotspotsResponse,
+    GeolocationCluster,
+    GeolocationClustersResponse,
+    GeocodeResponse,
+    ReverseGeocodeResponse,
+    GeocodeCacheStatsResponse,
+    ReverseGeocodeCacheStats,
+    GeocodeLaneStats,
+    GeocodeSchedulerStatsResponse,
+    GeocoderBackendStats,
     CoordenadasRequest,
     DistanceCalculationRequest,
     DistanceCalculationResponse,
@@ -83,6 +105,7 @@ __all__ = [
     "DadosBureauUpdate",
     "DadosBureauResponse",
     "DadosBureauListResponse",
+    "GeocodificacaoLoteResponse",
     # Parecer
     "PareceBase",
     "PareceCreate",
@@ -90,9 +113,30 @@ __all__ = [
     "PareceResponse",
     "PareceListResponse",
     "PareceFilterRequest",
+    "RegraParecerFaixa",
+    "RegrasParecerRequest",
+    "RegrasParecerResponse",
+    "HistogramaBucket",
+    "HistogramaDistanciasResponse",
     # Geolocation
     "GeolocationRequest",
     "GeolocationAnalysisResponse",
+    "GeolocationBatchRequest",
+    "GeolocationBatchItem",
+    "GeolocationBatchResponse",
+    "GeolocationNearbyItem",
+    "GeolocationNearbyResponse",
+    "GeolocationHotspot",
+    "GeolocationHotspotsResponse",
+    "GeolocationCluster",
+    "GeolocationClustersResponse",
+    "GeocodeResponse",
+    "ReverseGeocodeResponse",
+    "GeocodeCacheStatsResponse",
+    "ReverseGeocodeCacheStats",
+    "GeocodeLaneStats",
+    "GeocodeSchedulerStatsResponse",
+    "GeocoderBackendStats",
     "CoordenadasRequest",
     "DistanceCalculationRequest",
     "DistanceCalculationResponse",
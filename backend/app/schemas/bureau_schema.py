@@ -42,6 +42,7 @@ class DadosBureauResponse(DadosBureauBase):
     contrato_id: int
     latitude: Optional[Decimal] = None
     longitude: Optional[Decimal] = None
+    precisao_geocodificacao: Optional[str] = Field(None, description="setor_cep, cep ou logradouro")
     data_consulta: Optional[datetime] = None
     criado_em: datetime
 
@@ -56,3 +57,23 @@ class DadosBureauListResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class GeocodificacaoLoteResponse(BaseModel):
+    """Schema for bulk geocoding job status"""
+    id: int
+    status: str = Field(..., description="PENDENTE, EXECUTANDO, CONCLUIDO, FALHOU ou CANCELADO")
+    total: int = Field(..., description="Registros sem localização no início do job")
+    processados: int
+    geocodificados: int
+    nao_encontrados: int
+    restantes: int
+    percentual: float
+    taxa_por_segundo: Optional[float] = Field(None, description="Registros processados por segundo")
+    eta_segundos: Optional[int] = Field(None, description="Tempo estimado até a conclusão")
+    previsao_conclusao: Optional[datetime] = None
+    mensagem: Optional[str] = None
+    criado_em: datetime
+    iniciado_em: Optional[datetime] = None
+    atualizado_em: datetime
+    concluido_em: Optional[datetime] = None
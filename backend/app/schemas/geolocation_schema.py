@@ -2,11 +2,13 @@
 Geolocalização Schemas (DTOs)
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator, model_validator
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional, List, Literal
 from decimal import Decimal
 
+from app.utils.distance_modes import get_distance_mode
+
 
 class GeolocationRequest(BaseModel):
     """Schema for geolocation analysis request"""
@@ -25,6 +27,8 @@ class GeolocationAnalysisResponse(BaseModel):
     distancia_km: Decimal
     tipo_parecer: str
     texto_parecer: str
+    modo_distancia: str = Field("haversine", description="Modo de cálculo usado (fast, haversine, geodesic)")
+    regras_versao: Optional[str] = Field(None, description="Versão das regras de parecer do tenant")
     rota: Optional[list[list[Decimal]]] = Field(None, description="Array de coordenadas [lat, lng]")
     timestamp: datetime
 
@@ -32,6 +36,181 @@ class GeolocationAnalysisResponse(BaseModel):
         from_attributes = True
 
 
+class GeolocationBatchRequest(BaseModel):
+    """Schema for batch geolocation analysis (list of IDs or status filter)"""
+    contrato_ids: Optional[List[int]] = Field(None, min_length=1, max_length=5000)
+    status: Optional[str] = Field(None, description="Filtro por status do contrato (ex.: RECEBIDO)")
+    limite: int = Field(1000, ge=1, le=5000, description="Máximo de contratos analisados")
+    modo_distancia: Optional[str] = Field(None, description="fast, haversine ou geodesic (padrão: configuração do tenant)")
+
+    @field_validator("modo_distancia")
+    @classmethod
+    def check_modo_distancia(cls, value):
+        """Reject unknown distance modes"""
+        if value is not None:
+            get_distance_mode(value)
+        return value
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        """Require contrato_ids or status"""
+        if not self.contrato_ids and not self.status:
+            raise ValueError("Informe contrato_ids ou status")
+        return self
+
+
+class GeolocationBatchItem(BaseModel):
+    """Per-contract result of a batch analysis"""
+    contrato_id: int
+    status: Literal["CONCLUIDO", "ERRO"]
+    distancia_km: Optional[Decimal] = None
+    tipo_parecer: Optional[str] = None
+    erro: Optional[str] = None
+
+
+class GeolocationBatchResponse(BaseModel):
+    """Schema for batch geolocation analysis response"""
+    total: int
+    concluidos: int
+    erros: int
+    modo_distancia: str
+    resultados: List[GeolocationBatchItem]
+    timestamp: datetime
+
+
+class GeolocationNearbyItem(BaseModel):
+    """Record found near a point"""
+    id: int
+    contrato_id: int
+    latitude: Decimal
+    longitude: Decimal
+    endereco: Optional[str] = None
+    distancia_km: Decimal
+
+
+class GeolocationNearbyResponse(BaseModel):
+    """Schema for radius search response"""
+    latitude: Decimal
+    longitude: Decimal
+    raio_km: Decimal
+    tipo: Literal["contrato", "bureau"]
+    total: int
+    resultados: List[GeolocationNearbyItem]
+
+
+class GeolocationHotspot(BaseModel):
+    """Cluster of contracts signed at the same spot"""
+    latitude: Decimal
+    longitude: Decimal
+    raio_km: Decimal
+    contratos: int
+    cpfs_distintos: int
+    contrato_ids: List[int]
+
+
+class GeolocationHotspotsResponse(BaseModel):
+    """Schema for hotspots (fraud clustering) response"""
+    total_indexado: int
+    hotspots: List[GeolocationHotspot]
+
+
+class GeolocationCluster(BaseModel):
+    """Map cluster: points of one grid cell"""
+    id: str = Field(..., description="Célula da grade (nível/x/y)")
+    latitude: Decimal
+    longitude: Decimal
+    total: int
+    contratos: int
+    bureaus: int
+    tipo_dominante: Optional[str] = None
+    tipos: Dict[str, int] = Field(default_factory=dict, description="Pontos por tipo de parecer")
+
+
+class GeolocationClustersResponse(BaseModel):
+    """Schema for map clusters response"""
+    zoom: int
+    total_pontos: int
+    clusters: List[GeolocationCluster]
+
+
+class GeocodeResponse(BaseModel):
+    """Schema for address geocoding response"""
+    endereco: str
+    latitude: Decimal
+    longitude: Decimal
+    endereco_formatado: str
+
+
+class ReverseGeocodeResponse(BaseModel):
+    """Schema for reverse geocoding response"""
+    latitude: Decimal
+    longitude: Decimal
+    endereco: str
+
+
+class ReverseGeocodeCacheStats(BaseModel):
+    """Reverse geocoding cache metrics of the serving process"""
+    memoria: int = Field(..., description="Acertos no LRU em memória")
+    banco: int = Field(..., description="Acertos na tabela reverse_geocode_cache (incluem vizinhos)")
+    vizinhos: int = Field(..., description="Acertos no banco pelo ponto mais próximo dentro da tolerância")
+    negativos: int = Field(..., description="Acertos de pontos sem endereço")
+    provedor: int = Field(..., description="Consultas respondidas pelo provedor")
+    erros: int = Field(..., description="Falhas do provedor (não gravadas)")
+    total: int
+    hit_ratio: Optional[float] = None
+    hit_ratio_memoria: Optional[float] = None
+    entradas_memoria: int
+
+
+class GeocodeCacheStatsResponse(BaseModel):
+    """Geocoding cache metrics of the serving process"""
+    memoria: int = Field(..., description="Acertos no LRU em memória")
+    banco: int = Field(..., description="Acertos na tabela geocode_cache")
+    negativos: int = Field(..., description="Acertos de endereços não encontrados")
+    provedor: int = Field(..., description="Consultas respondidas pelo provedor")
+    erros: int = Field(..., description="Falhas do provedor (não gravadas)")
+    total: int
+    hit_ratio: Optional[float] = None
+    hit_ratio_memoria: Optional[float] = None
+    entradas_memoria: int
+    reverso: ReverseGeocodeCacheStats
+
+
+class GeocodeLaneStats(BaseModel):
+    """Queue metrics of one scheduler lane"""
+    fila: int = Field(..., description="Consultas aguardando token")
+    despachadas: int = Field(..., description="Consultas enviadas ao provedor")
+    abandonadas: int = Field(0, description="Retiradas da fila após todos os chamadores desistirem")
+    espera_media_s: Optional[float] = None
+    espera_p50_s: Optional[float] = None
+    espera_p95_s: Optional[float] = None
+    espera_max_s: Optional[float] = None
+
+
+class GeocoderBackendStats(BaseModel):
+    """Metrics of one geocoder backend"""
+    estado: str = Field(..., description="Circuito: fechado, aberto (pulado) ou meio_aberto")
+    falhas_seguidas: int
+    chamadas: int
+    sucessos: int
+    falhas: int = Field(..., description="Falhas e timeouts (contam para o circuito)")
+    timeouts: int
+    hedges: int = Field(..., description="Consultas disparadas em paralelo a um backend lento")
+    latencia_p50_s: Optional[float] = None
+    latencia_p95_s: Optional[float] = None
+    timeout_s: float = Field(..., description="Timeout adaptativo atual")
+
+
+class GeocodeSchedulerStatsResponse(BaseModel):
+    """Geocoding scheduler metrics of the serving process"""
+    limite_por_segundo: float = Field(..., description="Requisições/s ao provedor (todos os workers)")
+    rajada: float
+    bucket: str = Field(..., description="redis (global) ou local (sem Redis ou Redis fora)")
+    coalescidas: int = Field(..., description="Consultas atendidas por requisição idêntica em andamento")
+    faixas: Dict[str, GeocodeLaneStats]
+    provedores: Dict[str, GeocoderBackendStats] = {}
+
+
 class CoordenadasRequest(BaseModel):
     """Schema for coordinates request"""
     latitude: Decimal
@@ -2,11 +2,13 @@
 Parecer Schemas (DTOs)
 """
 
-from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import Optional, Literal
+from pydantic import BaseModel, Field, field_validator
+from datetime import datetime, date
+from typing import Optional, Literal, List
 from decimal import Decimal
 
+from app.utils.parecer_rules import CompiledRules
+
 
 class PareceBase(BaseModel):
     """Base schema for Parecer"""
@@ -33,6 +35,8 @@ class PareceUpdate(BaseModel):
 class PareceResponse(PareceBase):
     """Schema for Parecer response"""
     id: int
+    regras_versao: Optional[str] = None
+    modo_distancia: Optional[str] = None
     criado_em: datetime
 
     class Config:
@@ -59,3 +63,50 @@ class PareceFilterRequest(BaseModel):
     distancia_maxima: Optional[Decimal] = Field(None, gt=0)
     page: int = Field(default=1, ge=1)
     limit: int = Field(default=10, ge=1, le=100)
+
+
+class RegraParecerFaixa(BaseModel):
+    """Faixa de distância de uma regra de parecer"""
+    tipo: Literal["PROXIMAL", "MODERADO", "DISTANTE", "MUITO_DISTANTE"]
+    ate_km: Optional[float] = Field(None, gt=0)  # None = sem limite (última faixa)
+    template: str = Field(..., min_length=1, max_length=2000)
+
+
+class RegrasParecerRequest(BaseModel):
+    """Schema for replacing the parecer rules of a tenant"""
+    faixas: List[RegraParecerFaixa] = Field(..., min_length=1, max_length=4)
+
+    @field_validator("faixas")
+    @classmethod
+    def check_faixas(cls, faixas):
+        """Compile the rules (order, catch-all band, template fields)"""
+        CompiledRules.from_dicts([faixa.model_dump() for faixa in faixas])
+        return faixas
+
+
+class RegrasParecerResponse(BaseModel):
+    """Schema for the parecer rules in effect for a tenant"""
+    tenant_id: str
+    versao: str
+    padrao: bool
+    faixas: List[RegraParecerFaixa]
+
+
+class HistogramaBucket(BaseModel):
+    """Bucket do histograma de distâncias ([de_km, ate_km))"""
+    de_km: float
+    ate_km: Optional[float] = None  # None = sem limite superior
+    contagem: int
+
+
+class HistogramaDistanciasResponse(BaseModel):
+    """Schema for the distance histogram of a tenant's pareceres"""
+    tenant_id: str
+    data_inicio: Optional[date] = None
+    data_fim: Optional[date] = None
+    total: int
+    media_km: Optional[float] = None
+    p50_km: Optional[float] = None
+    p90_km: Optional[float] = None
+    p99_km: Optional[float] = None
+    buckets: List[HistogramaBucket]
@@ -8,6 +8,12 @@ from .bureau_service import BureauService
 from .geolocation_service import GeolocalizacaoService
 from .parecer_service import PareceService
 from .audit_log_service import AuditLogService
+from .geo_index_service import GeoIndexService
+from .reanalise_service import ReanaliseService
+from .parecer_rules_service import RegrasParecerService
+from .map_cluster_service import MapClusterService
+from .geocoding_service import GeocodingService
+from .geocodificacao_lote_service import GeocodificacaoLoteService
 
 __all__ = [
     "BaseService",
@@ -16,4 +22,10 @@ __all__ = [
     "GeolocalizacaoService",
     "PareceService",
     "AuditLogService",
+    "GeoIndexService",
+    "ReanaliseService",
+    "RegrasParecerService",
+    "MapClusterService",
+    "GeocodingService",
+    "GeocodificacaoLoteService",
 ]
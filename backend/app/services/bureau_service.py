@@ -1,5 +1,9 @@
 """
 Bureau Service - Business logic for bureau data
+
+Geocodificação em camadas: o centroide do CEP (índice offline, sem rede)
+atende quando a precisão pedida permite; só para precisão de logradouro
+(ou CEP fora do índice) a consulta vai ao GeocodingService/Nominatim.
 """
 
 from sqlalchemy.orm import Session
@@ -10,8 +14,14 @@ from datetime import datetime
 from app.repositories import BureauRepository, ContratoRepository, LogsAnaliseRepository
 from app.models.dados_bureau import DadosBureau
 from app.schemas import DadosBureauCreate, DadosBureauResponse, DadosBureauListResponse
-from app.utils import NominatimClient
+from app.utils import GeocodePriority, get_geocode_scheduler
+from app.utils.cep_index import (
+    PRECISAO_LOGRADOURO,
+    get_cep_index,
+    precisao_atende,
+)
 from .base_service import BaseService
+from .geocoding_service import GeocodingService
 
 
 class BureauService(BaseService):
@@ -22,7 +32,8 @@ class BureauService(BaseService):
         self.bureau_repo = BureauRepository(db)
         self.contrato_repo = ContratoRepository(db)
         self.logs_repo = LogsAnaliseRepository(db)
-        self.nominatim = NominatimClient()
+        self.nominatim = get_geocode_scheduler().lane(GeocodePriority.INTERACTIVE)
+        self.geocoding = GeocodingService(db, self.nominatim)
 
     def criar_bureau_data(
         self,
@@ -136,7 +147,8 @@ class BureauService(BaseService):
     def geocodificar_endereco_bureau(
         self,
         bureau_id: int,
-        usuario_id: int
+        usuario_id: int,
+        precisao_minima: str = PRECISAO_LOGRADOURO
     ) -> Optional[DadosBureauResponse]:
         """
         Geocode bureau address and update coordinates.
@@ -144,38 +156,93 @@ class BureauService(BaseService):
         Args:
             bureau_id: Bureau data ID
             usuario_id: User ID
+            precisao_minima: Coarsest acceptable precision (setor_cep, cep
+                or logradouro); logradouro (default) always queries the provider
 
         Returns:
-            Updated bureau data or None
+            Updated bureau data (with precisao_geocodificacao) or None
         """
         try:
-            bureau = self.bureau_repo.get_by_id(bureau_id)
-            if not bureau:
-                raise ValueError(f"Bureau data {bureau_id} not found")
-
-            # Geocode address
-            result = self.nominatim.geocode_sync(bureau.logradouro)
-            if result:
-                lat, lon, formatted_address = result
-
-                # Update location
-                updated = self.bureau_repo.update_location(
-                    bureau_id,
-                    lat,
-                    lon,
-                    datetime.utcnow()
-                )
+            bureau = self._get_bureau_to_geocode(bureau_id)
+            local = self._localizar_por_cep(bureau, precisao_minima)
+            if local is not None:
+                return self._save_geocoded_location(bureau, local, local[2])
+            # Geocode address (LRU + persistent cache before Nominatim)
+            result = self.geocoding.geocodificar(bureau.logradouro)
+            return self._save_geocoded_location(bureau, result, PRECISAO_LOGRADOURO)
+        except Exception as e:
+            self.log_error(f"Error geocoding bureau address {bureau_id}", e)
+            raise
 
-                self.log_info(f"Geocoded bureau {bureau_id}: {lat}, {lon}")
+    async def geocodificar_endereco_bureau_async(
+        self,
+        bureau_id: int,
+        usuario_id: int,
+        precisao_minima: str = PRECISAO_LOGRADOURO
+    ) -> Optional[DadosBureauResponse]:
+        """
+        Geocode bureau address and update coordinates (async routers).
 
-                return DadosBureauResponse.from_orm(updated)
-            else:
-                raise ValueError(f"Could not geocode address: {bureau.logradouro}")
+        Args:
+            bureau_id: Bureau data ID
+            usuario_id: User ID
+            precisao_minima: Coarsest acceptable precision (setor_cep, cep
+                or logradouro); logradouro (default) always queries the provider
 
+        Returns:
+            Updated bureau data (with precisao_geocodificacao) or None
+        """
+        try:
+            bureau = self._get_bureau_to_geocode(bureau_id)
+            local = self._localizar_por_cep(bureau, precisao_minima)
+            if local is not None:
+                return self._save_geocoded_location(bureau, local, local[2])
+            result = await self.geocoding.geocodificar_async(bureau.logradouro)
+            return self._save_geocoded_location(bureau, result, PRECISAO_LOGRADOURO)
         except Exception as e:
             self.log_error(f"Error geocoding bureau address {bureau_id}", e)
             raise
 
+    def _get_bureau_to_geocode(self, bureau_id: int) -> DadosBureau:
+        bureau = self.bureau_repo.get_by_id(bureau_id)
+        if not bureau:
+            raise ValueError(f"Bureau data {bureau_id} not found")
+        return bureau
+
+    def _localizar_por_cep(self, bureau: DadosBureau, precisao_minima: str) -> Optional[tuple]:
+        """(latitude, longitude, precisao) do centroide do CEP, se atende a precisão mínima"""
+        if precisao_minima == PRECISAO_LOGRADOURO or not bureau.cep:
+            return None
+        index = get_cep_index()
+        local = index.lookup(bureau.cep) if index is not None else None
+        if local is None or not precisao_atende(local.precisao, precisao_minima):
+            return None
+        return (local.latitude, local.longitude, local.precisao)
+
+    def _save_geocoded_location(
+        self,
+        bureau: DadosBureau,
+        result: Optional[tuple],
+        precisao: str
+    ) -> DadosBureauResponse:
+        if not result:
+            raise ValueError(f"Could not geocode address: {bureau.logradouro}")
+
+        lat, lon = result[0], result[1]
+
+        # Update location
+        updated = self.bureau_repo.update_location(
+            bureau.id,
+            lat,
+            lon,
+            datetime.utcnow(),
+            precisao
+        )
+
+        self.log_info(f"Geocoded bureau {bureau.id} ({precisao}): {lat}, {lon}")
+
+        return DadosBureauResponse.from_orm(updated)
+
     def obter_sem_localizacao(
         self,
         skip: int = 0,
@@ -6,10 +6,11 @@ from sqlalchemy.orm import Session
 from typing import Optional, Tuple, List
 from datetime import datetime
 
-from app.repositories import ContratoRepository, UsuarioRepository, LogsAnaliseRepository
+from app.repositories import ContratoRepository, UsuarioRepository, LogsAnaliseRepository, PareceRepository
 from app.models.dados_contrato import DadosContrato
 from app.schemas import DadosContratoCreate, DadosContratoResponse, DadosContratoListResponse
 from .base_service import BaseService
+from . import geo_index_service
 
 
 class ContratoService(BaseService):
@@ -50,6 +51,8 @@ class ContratoService(BaseService):
 
             # Create contract
             contrato = self.contrato_repo.create(contrato_data.dict())
+            if contrato.latitude is not None:
+                geo_index_service.index_contrato(self.db, contrato)
 
             # Log creation
             self.logs_repo.create({
@@ -82,6 +85,21 @@ class ContratoService(BaseService):
             return DadosContratoResponse.from_orm(contrato)
         return None
 
+    def pertence_ao_tenant(self, contrato_id: int, tenant_id: str) -> bool:
+        """
+        Check whether a contract belongs to a tenant (through its user).
+
+        Args:
+            contrato_id: Contract ID
+            tenant_id: Tenant ID
+
+        Returns:
+            True if the contract exists in the tenant
+        """
+        return self.db.query(
+            self.contrato_repo.query_for_tenant(tenant_id).filter(DadosContrato.id == contrato_id).exists()
+        ).scalar()
+
     def get_contratos_usuario(
         self,
         usuario_id: int,
@@ -204,6 +222,7 @@ class ContratoService(BaseService):
         """
         contrato = self.contrato_repo.update_location(contrato_id, latitude, longitude)
         if contrato:
+            geo_index_service.index_contrato(self.db, contrato)
             return DadosContratoResponse.from_orm(contrato)
         return None
 
@@ -217,7 +236,13 @@ class ContratoService(BaseService):
         Returns:
             True if deleted, False otherwise
         """
-        return self.contrato_repo.delete(contrato_id)
+        # Parecer is removed by cascade: take it out of the distance histogram
+        # (committed together with the deletion)
+        PareceRepository(self.db).remove_from_histogram([contrato_id])
+        deleted = self.contrato_repo.delete(contrato_id)
+        if deleted:
+            geo_index_service.remove_contrato(contrato_id)
+        return deleted
 
     def get_contratos_recentes(
         self,
@@ -0,0 +1,185 @@
+"""
+GeoIndex Service - Índice espacial em memória por tenant (detecção de fraude)
+
+Mantém um GeoGridIndex por tenant com as coordenadas de dados_contrato.
+O índice de um tenant é carregado do banco no primeiro uso (ou no warm-up)
+e depois atualizado incrementalmente quando contratos são geocodificados,
+movidos ou removidos.
+"""
+
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from decimal import Decimal
+import os
+import threading
+
+from app.repositories import ContratoRepository
+from app.utils.geo_grid import GeoGridIndex
+from .base_service import BaseService
+
+# Lado da célula da grade (km): "mesmo local" ~ até ~150m (bloco 3x3)
+GEO_INDEX_CELL_KM = float(os.getenv("GEO_INDEX_CELL_KM", "0.1"))
+
+# Índices carregados (tenant_id -> índice)
+_indexes: Dict[str, GeoGridIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _build_indexes(db: Session, tenant_id: Optional[str] = None) -> Dict[str, GeoGridIndex]:
+    """Carregar índices do banco (um tenant ou todos) numa única consulta"""
+    built: Dict[str, GeoGridIndex] = {}
+    if tenant_id is not None:
+        built[tenant_id] = GeoGridIndex(GEO_INDEX_CELL_KM)
+
+    for row in ContratoRepository(db).get_indexable_locations(tenant_id):
+        index = built.get(row.tenant_id)
+        if index is None:
+            index = built[row.tenant_id] = GeoGridIndex(GEO_INDEX_CELL_KM)
+        index.upsert(row.id, row.latitude, row.longitude, row.cpf_cliente)
+    return built
+
+
+def get_tenant_index(db: Session, tenant_id: str) -> GeoGridIndex:
+    """
+    Obter índice do tenant (carrega do banco no primeiro acesso)
+
+    Args:
+        db: Sessão do banco (usada apenas na carga)
+        tenant_id: Tenant ID
+
+    Returns:
+        GeoGridIndex do tenant
+    """
+    index = _indexes.get(tenant_id)
+    if index is not None:
+        return index
+
+    built = _build_indexes(db, tenant_id)[tenant_id]
+    with _indexes_lock:
+        # Outra requisição pode ter carregado enquanto consultávamos
+        return _indexes.setdefault(tenant_id, built)
+
+
+def build_all_indexes(db: Session) -> int:
+    """
+    Carregar índices de todos os tenants (warm-up)
+
+    Returns:
+        Número de contratos indexados
+    """
+    built = _build_indexes(db)
+    with _indexes_lock:
+        _indexes.update(built)
+    return sum(len(index) for index in built.values())
+
+
+def index_contrato(db: Session, contrato) -> None:
+    """
+    Atualizar o índice após geocodificação/mudança de localização
+
+    Só atua se o índice do tenant já estiver carregado (caso contrário
+    o contrato entra na próxima carga).
+
+    Args:
+        db: Sessão do banco
+        contrato: DadosContrato (ou objeto com id, usuario_id, latitude,
+                  longitude, cpf_cliente)
+    """
+    if not _indexes:
+        return
+
+    tenant_id = ContratoRepository(db).get_tenant_id(contrato.id)
+    index = _indexes.get(tenant_id)
+    if index is not None:
+        index.upsert(contrato.id, contrato.latitude, contrato.longitude, contrato.cpf_cliente)
+
+
+def remove_contrato(contrato_id: int) -> None:
+    """Remover contrato de qualquer índice carregado"""
+    for index in list(_indexes.values()):
+        if index.remove(contrato_id):
+            return
+
+
+def reset_indexes() -> None:
+    """Descartar índices carregados (testes / recarga completa)"""
+    with _indexes_lock:
+        _indexes.clear()
+
+
+class GeoIndexService(BaseService):
+    """Service for cross-contract spatial queries (fraud clustering)"""
+
+    def vizinhos(
+        self,
+        tenant_id: str,
+        latitude: Decimal,
+        longitude: Decimal,
+        k: int = 10,
+        raio_max_km: float = 50.0
+    ) -> List[dict]:
+        """
+        k contracts nearest to a point.
+
+        Args:
+            tenant_id: Tenant ID
+            latitude: Latitude
+            longitude: Longitude
+            k: Number of neighbours
+            raio_max_km: Ignore contracts farther than this
+
+        Returns:
+            List of {contrato_id, distancia_km}, nearest first
+        """
+        index = get_tenant_index(self.db, tenant_id)
+        return [
+            {"contrato_id": contrato_id, "distancia_km": distance}
+            for contrato_id, distance in index.knn(latitude, longitude, k, raio_max_km)
+        ]
+
+    def densidade(
+        self,
+        tenant_id: str,
+        latitude: Decimal,
+        longitude: Decimal,
+        raio_km: float = 0.15
+    ) -> dict:
+        """
+        Contracts and distinct CPFs around a point.
+
+        Args:
+            tenant_id: Tenant ID
+            latitude: Latitude
+            longitude: Longitude
+            raio_km: Radius in kilometers
+
+        Returns:
+            Dict with contratos, cpfs_distintos, contrato_ids
+        """
+        return get_tenant_index(self.db, tenant_id).density(latitude, longitude, raio_km)
+
+    def hotspots(
+        self,
+        tenant_id: str,
+        min_contratos: int = 5,
+        min_cpfs: int = 2,
+        limite: int = 50
+    ) -> dict:
+        """
+        Dense clusters of contracts signed at the same spot by different CPFs.
+
+        Args:
+            tenant_id: Tenant ID
+            min_contratos: Minimum contracts in a cluster
+            min_cpfs: Minimum distinct CPFs in a cluster
+            limite: Maximum number of clusters
+
+        Returns:
+            Dict with total_indexado and hotspots (densest first)
+        """
+        index = get_tenant_index(self.db, tenant_id)
+        hotspots = index.hotspots(min_contratos, min_cpfs, limite)
+        return {
+            "total_indexado": len(index),
+            "hotspots": [hotspot.to_dict() for hotspot in hotspots],
+        }
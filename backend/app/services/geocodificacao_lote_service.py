@@ -0,0 +1,245 @@
+"""
+Geocodificação em Lote Service - Drena o backlog de bureau sem coordenadas
+
+O job (GeocodificacaoLote) percorre os registros sem localização do tenant
+em ordem de id, GEOCODE_BULK_BATCH_SIZE por vez. Cada lote passa pelo
+GeocodingService (cache em dois níveis) na faixa BACKLOG do
+GeocodeScheduler: o limite global do Nominatim vale também para o job e
+as consultas interativas continuam na frente. As coordenadas encontradas
+são gravadas com um UPDATE em lote, os pareceres afetados são marcados
+como desatualizados e o checkpoint é gravado na mesma transação.
+
+Falha do provedor encerra o lote no primeiro registro não consultado
+(checkpoint antes dele) e levanta ProvedorIndisponivel; a task Celery
+reagenda a execução, que continua do checkpoint.
+"""
+
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import os
+
+from app.models.geocodificacao_lote import GeocodificacaoLote
+from app.repositories import BureauRepository, GeocodificacaoLoteRepository, PareceRepository
+from app.repositories.geocodificacao_lote_repository import ATIVOS
+from app.utils import GeocodePriority, NominatimError
+from app.utils.cep_index import PRECISAO_LOGRADOURO
+from app.utils.loop_thread import run_sync
+from .base_service import BaseService
+from .geocoding_service import GeocodingService
+
+GEOCODE_BULK_BATCH_SIZE = int(os.getenv("GEOCODE_BULK_BATCH_SIZE", "100"))
+
+
+class ProvedorIndisponivel(Exception):
+    """Provedor falhou no meio do lote (o job continua do checkpoint)"""
+
+
+class GeocodificacaoLoteService(BaseService):
+    """Service for bulk geocoding of the bureau backlog"""
+
+    def __init__(self, db: Session, geocoding: Optional[GeocodingService] = None):
+        super().__init__(db)
+        self.lote_repo = GeocodificacaoLoteRepository(db)
+        self.bureau_repo = BureauRepository(db)
+        self.parecer_repo = PareceRepository(db)
+        self.geocoding = geocoding or GeocodingService(db, prioridade=GeocodePriority.BACKLOG)
+
+    def criar(self, tenant_id: str) -> GeocodificacaoLote:
+        """
+        Create a job for the tenant's backlog (one active job per tenant).
+
+        Args:
+            tenant_id: Tenant ID
+
+        Returns:
+            New job, or the tenant's pending/running job
+        """
+        ativo = self.lote_repo.get_active(tenant_id)
+        if ativo:
+            return ativo
+
+        lote = self.lote_repo.create({
+            "tenant_id": tenant_id,
+            "status": "PENDENTE",
+            "total": self.bureau_repo.count_without_location(tenant_id),
+        })
+        self.log_info(f"Bulk geocoding job {lote.id} created for tenant {tenant_id}: {lote.total} records")
+        return lote
+
+    def obter(self, lote_id: int, tenant_id: str) -> Optional[GeocodificacaoLote]:
+        """
+        Get a job of the tenant.
+
+        Args:
+            lote_id: Job ID
+            tenant_id: Tenant ID
+
+        Returns:
+            Job or None
+        """
+        return self.lote_repo.get_for_tenant(lote_id, tenant_id)
+
+    def registrar_task(self, lote_id: int, task_id: str) -> Optional[GeocodificacaoLote]:
+        """Store the Celery task ID of a job"""
+        return self.lote_repo.update(lote_id, {"task_id": task_id})
+
+    def falhar(self, lote_id: int, mensagem: str) -> Optional[GeocodificacaoLote]:
+        """Mark a job as failed"""
+        self.log_warning(f"Bulk geocoding job {lote_id} failed: {mensagem}")
+        return self.lote_repo.update(lote_id, {
+            "status": "FALHOU",
+            "mensagem": mensagem,
+            "concluido_em": datetime.utcnow(),
+        })
+
+    def cancelar(self, lote: GeocodificacaoLote) -> GeocodificacaoLote:
+        """
+        Cancel a pending or running job (the worker stops before the next batch).
+
+        Args:
+            lote: Job
+
+        Returns:
+            Updated job (unchanged if already finished)
+        """
+        if lote.status not in ATIVOS:
+            return lote
+        return self.lote_repo.update(lote.id, {
+            "status": "CANCELADO",
+            "mensagem": "Cancelado pelo usuário",
+            "concluido_em": datetime.utcnow(),
+        })
+
+    def processar(self, lote_id: int) -> Optional[GeocodificacaoLote]:
+        """
+        Run (or resume) a job until the backlog is drained or it is cancelled.
+
+        Args:
+            lote_id: Job ID
+
+        Returns:
+            Job in its final state (None if it does not exist)
+
+        Raises:
+            ProvedorIndisponivel: Provider failed; progress up to the
+                checkpoint is saved
+        """
+        lote = self.lote_repo.get_by_id(lote_id)
+        if lote is None or lote.status not in ATIVOS:
+            return lote
+
+        lote.status = "EXECUTANDO"
+        lote.iniciado_em = lote.iniciado_em or datetime.utcnow()
+        self.db.commit()
+
+        while True:
+            # Cancelamento chega por outra sessão (endpoint)
+            self.db.refresh(lote)
+            if lote.status != "EXECUTANDO":
+                return lote
+
+            rows = self.bureau_repo.get_without_location_after(
+                lote.ultimo_bureau_id, GEOCODE_BULK_BATCH_SIZE, lote.tenant_id
+            )
+            if not rows:
+                lote.status = "CONCLUIDO"
+                lote.concluido_em = datetime.utcnow()
+                self.db.commit()
+                self.log_info(
+                    f"Bulk geocoding job {lote.id} done: "
+                    f"{lote.geocodificados}/{lote.processados} geocoded"
+                )
+                return lote
+
+            self._processar_lote(lote, rows)
+
+    def _processar_lote(self, lote: GeocodificacaoLote, rows: List) -> None:
+        """Geocode one page, write found coordinates and the checkpoint"""
+        resultados = run_sync(self._geocodificar(rows))
+
+        encontrados = []
+        contrato_ids = []
+        nao_encontrados = 0
+        checkpoint = lote.ultimo_bureau_id
+        falha = None
+        for row, resultado in zip(rows, resultados):
+            if isinstance(resultado, NominatimError):
+                # Checkpoint para antes do primeiro endereço não consultado
+                falha = resultado
+                break
+            if isinstance(resultado, BaseException):
+                raise resultado
+            if resultado:
+                encontrados.append((row.id, resultado[0], resultado[1]))
+                contrato_ids.append(row.contrato_id)
+            else:
+                nao_encontrados += 1
+            checkpoint = row.id
+
+        self.bureau_repo.bulk_update_locations(encontrados, datetime.utcnow(), PRECISAO_LOGRADOURO)
+        self.parecer_repo.set_dirty(contrato_ids)
+        lote.processados += len(encontrados) + nao_encontrados
+        lote.geocodificados += len(encontrados)
+        lote.nao_encontrados += nao_encontrados
+        lote.ultimo_bureau_id = checkpoint
+        self.db.commit()
+
+        if falha is not None:
+            raise ProvedorIndisponivel(str(falha)) from falha
+
+    async def _geocodificar(self, rows: List) -> list:
+        """Lookups of one page, queued together (the scheduler paces them)"""
+        async def geocodificar(row):
+            if not (row.logradouro or "").strip():
+                return None
+            return await self.geocoding.geocodificar_async(row.logradouro, falhar_se_indisponivel=True)
+
+        return await asyncio.gather(*(geocodificar(row) for row in rows), return_exceptions=True)
+
+    @staticmethod
+    def status(lote: GeocodificacaoLote, agora: Optional[datetime] = None) -> dict:
+        """
+        Progress and ETA of a job.
+
+        The rate is measured between the first start and the last
+        checkpoint; the ETA extrapolates it over the remaining records.
+
+        Args:
+            lote: Job
+            agora: Reference instant (default: now)
+
+        Returns:
+            Job fields plus percentual, restantes, taxa_por_segundo,
+            eta_segundos and previsao_conclusao
+        """
+        agora = agora or datetime.utcnow()
+        restantes = max(lote.total - lote.processados, 0)
+        taxa = eta = previsao = None
+        if lote.iniciado_em and lote.processados:
+            decorrido = (lote.atualizado_em - lote.iniciado_em).total_seconds()
+            if decorrido > 0:
+                taxa = lote.processados / decorrido
+        if lote.status == "EXECUTANDO" and taxa:
+            previsao = lote.atualizado_em + timedelta(seconds=restantes / taxa)
+            eta = max(round((previsao - agora).total_seconds()), 0)
+
+        return {
+            "id": lote.id,
+            "status": lote.status,
+            "total": lote.total,
+            "processados": lote.processados,
+            "geocodificados": lote.geocodificados,
+            "nao_encontrados": lote.nao_encontrados,
+            "restantes": restantes,
+            "percentual": round(min(lote.processados / lote.total * 100, 100), 1) if lote.total else 100.0,
+            "taxa_por_segundo": round(taxa, 3) if taxa else None,
+            "eta_segundos": eta,
+            "previsao_conclusao": previsao,
+            "mensagem": lote.mensagem,
+            "criado_em": lote.criado_em,
+            "iniciado_em": lote.iniciado_em,
+            "atualizado_em": lote.atualizado_em,
+            "concluido_em": lote.concluido_em,
+        }
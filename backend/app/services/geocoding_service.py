@@ -0,0 +1,451 @@
+"""
+Geocoding Service - Geocodificação com cache em dois níveis
+
+Nível 1: LRU em memória do processo (GEOCODE_CACHE_SIZE entradas).
+Nível 2: tabela geocode_cache (compartilhada entre processos), chaveada
+pelo endereço normalizado (address_normalizer). O provedor recebe a
+consulta canônica (abreviações expandidas, sem complemento), a mesma que
+originou a chave. Só em falta nos dois níveis a consulta sai
+para o Nominatim; o resultado (inclusive "não encontrado") é gravado nos
+dois níveis. Falhas do provedor (timeout, HTTP != 200) não são gravadas.
+As consultas ao provedor passam pelo GeocodeScheduler (limite global de
+requisições, coalescência e faixa de prioridade).
+
+Validade: GEOCODE_CACHE_TTL_DAYS para endereços encontrados e
+GEOCODE_NEGATIVE_TTL_HOURS para não encontrados. Cada entrada registra o
+backend do geocoder que respondeu (provider); GEOCODE_PROVIDER_TTL_DAYS
+define validades menores por provedor para encontrados (padrão
+google=30: os termos do Google limitam o cache de coordenadas a 30 dias).
+
+Geocodificação reversa: mesmos dois níveis (LRU próprio com
+REVERSE_GEOCODE_CACHE_SIZE entradas + tabela reverse_geocode_cache) e
+mesmos TTLs, chaveados pela célula de ~REVERSE_GEOCODE_GRID_METERS que
+contém o ponto. Com REVERSE_GEOCODE_TOLERANCE_METERS > 0, uma falta na
+célula ainda procura no banco o endereço encontrado mais próximo dentro
+da tolerância (pontos na borda da célula vizinha) antes do provedor.
+"""
+
+from sqlalchemy.orm import Session
+from typing import Optional, Tuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+import os
+
+from app.repositories import GeocodeCacheRepository, ReverseGeocodeCacheRepository
+from app.utils import GeocodePriority, NominatimError, get_geocode_scheduler
+from app.utils.address_normalizer import geocode_query
+from app.utils.geocode_cache import (
+    CacheStats,
+    GeocodeEntry,
+    LRUCache,
+    ReverseCacheStats,
+    cache_key,
+    normalize_address,
+    reverse_cache_key,
+)
+from app.utils.geohash import encode
+from .base_service import BaseService
+
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", "10000"))
+GEOCODE_CACHE_TTL = timedelta(days=float(os.getenv("GEOCODE_CACHE_TTL_DAYS", "90")))
+GEOCODE_NEGATIVE_TTL = timedelta(hours=float(os.getenv("GEOCODE_NEGATIVE_TTL_HOURS", "24")))
+# Validade de endereços encontrados por provedor: "google=30,nominatim_local=180"
+GEOCODE_PROVIDER_TTL = {
+    name.strip(): timedelta(days=float(days))
+    for name, _, days in (
+        item.partition("=") for item in os.getenv("GEOCODE_PROVIDER_TTL_DAYS", "google=30").split(",")
+    )
+    if name.strip() and days
+}
+
+REVERSE_GEOCODE_CACHE_SIZE = int(os.getenv("REVERSE_GEOCODE_CACHE_SIZE", "10000"))
+REVERSE_GEOCODE_GRID_METERS = float(os.getenv("REVERSE_GEOCODE_GRID_METERS", "10"))
+REVERSE_GEOCODE_TOLERANCE_METERS = float(os.getenv("REVERSE_GEOCODE_TOLERANCE_METERS", "0"))
+
+# Provedor registrado quando a resposta não informa o backend
+# (cliente Nominatim direto ou "não encontrado")
+PROVIDER = "nominatim"
+
+# Nível 1 (chave -> GeocodeEntry) e métricas do processo
+_memory_cache = LRUCache(GEOCODE_CACHE_SIZE)
+_stats = CacheStats()
+
+# Cache reverso: célula da grade -> GeocodeEntry (coordenadas do ponto consultado)
+_reverse_memory_cache = LRUCache(REVERSE_GEOCODE_CACHE_SIZE)
+_reverse_stats = ReverseCacheStats()
+
+
+def geocode_cache_stats() -> dict:
+    """Métricas do cache de geocodificação (e do reverso) deste processo"""
+    return {
+        **_stats.to_dict(),
+        "entradas_memoria": len(_memory_cache),
+        "reverso": {**_reverse_stats.to_dict(), "entradas_memoria": len(_reverse_memory_cache)},
+    }
+
+
+def reset_geocode_cache() -> None:
+    """Descartar os níveis em memória e zerar as métricas (testes)"""
+    _memory_cache.clear()
+    _stats.reset()
+    _reverse_memory_cache.clear()
+    _reverse_stats.reset()
+
+
+def _provider(result) -> str:
+    """Backend que respondeu (GeocodeResult/ReverseGeocodeResult do geocoder)"""
+    return getattr(result, "provider", None) or PROVIDER
+
+
+def _ttl(entry: GeocodeEntry) -> timedelta:
+    if not entry.encontrado:
+        return GEOCODE_NEGATIVE_TTL
+    return GEOCODE_PROVIDER_TTL.get(entry.provider, GEOCODE_CACHE_TTL)
+
+
+def _expired(entry: GeocodeEntry) -> bool:
+    """Entrada além da validade do seu provedor (o banco filtra só pela validade geral)"""
+    return datetime.utcnow() - entry.consultado_em >= _ttl(entry)
+
+
+def _remember(key: str, entry: GeocodeEntry, cache: LRUCache = _memory_cache) -> None:
+    """Guardar no nível em memória pelo tempo de validade restante"""
+    remaining = _ttl(entry) - (datetime.utcnow() - entry.consultado_em)
+    cache.put(key, entry, remaining.total_seconds())
+
+
+class GeocodingService(BaseService):
+    """Service for cached address geocoding"""
+
+    def __init__(
+        self,
+        db: Session,
+        client=None,
+        prioridade: GeocodePriority = GeocodePriority.INTERACTIVE
+    ):
+        """
+        Args:
+            db: Database session
+            client: Provider with search/search_sync and
+                reverse_geocode/reverse_geocode_sync (default: scheduler lane)
+            prioridade: Scheduler lane for provider calls
+        """
+        super().__init__(db)
+        self.cache_repo = GeocodeCacheRepository(db)
+        self.reverse_cache_repo = ReverseGeocodeCacheRepository(db)
+        self.nominatim = client or get_geocode_scheduler().lane(prioridade)
+
+    def geocodificar(
+        self,
+        endereco: str,
+        pais: str = "Brazil"
+    ) -> Optional[Tuple[Decimal, Decimal, str]]:
+        """
+        Geocode an address through the two-level cache (sync callers;
+        the provider call runs on the background event loop).
+
+        Args:
+            endereco: Address string
+            pais: Country name
+
+        Returns:
+            Tuple of (latitude, longitude, formatted_address) or None
+            (not found or provider unavailable)
+        """
+        key, normalized, entry = self._lookup(endereco, pais)
+        if entry is not None:
+            return entry.as_result()
+
+        try:
+            result = self.nominatim.search_sync(geocode_query(endereco), pais)
+        except NominatimError as e:
+            return self._provider_failed(endereco, e)
+        return self._record(key, normalized, result)
+
+    async def geocodificar_async(
+        self,
+        endereco: str,
+        pais: str = "Brazil",
+        falhar_se_indisponivel: bool = False
+    ) -> Optional[Tuple[Decimal, Decimal, str]]:
+        """
+        Geocode an address through the two-level cache (async callers).
+
+        Args:
+            endereco: Address string
+            pais: Country name
+            falhar_se_indisponivel: Raise on provider failure instead of
+                returning None (batch jobs that must retry the address)
+
+        Returns:
+            Tuple of (latitude, longitude, formatted_address) or None
+            (not found or provider unavailable)
+
+        Raises:
+            NominatimError: Provider failure, if falhar_se_indisponivel
+        """
+        key, normalized, entry = self._lookup(endereco, pais)
+        if entry is not None:
+            return entry.as_result()
+
+        try:
+            result = await self.nominatim.search(geocode_query(endereco), pais)
+        except NominatimError as e:
+            self._provider_failed(endereco, e)
+            if falhar_se_indisponivel:
+                raise
+            return None
+        return self._record(key, normalized, result)
+
+    def reverse_geocodificar(
+        self,
+        latitude: Decimal,
+        longitude: Decimal
+    ) -> Optional[str]:
+        """
+        Reverse geocode coordinates through the grid-keyed cache (sync
+        callers; the provider call runs on the background event loop).
+
+        Args:
+            latitude: Latitude
+            longitude: Longitude
+
+        Returns:
+            Formatted address or None (not found or provider unavailable)
+        """
+        key, entry = self._reverse_lookup(latitude, longitude)
+        if entry is not None:
+            return entry.display_name if entry.encontrado else None
+
+        try:
+            address = self.nominatim.reverse_geocode_sync(latitude, longitude)
+        except NominatimError as e:
+            address = None
+            self.log_warning(f"Reverse geocoding provider failed for {latitude}, {longitude}: {e}")
+        return self._reverse_record(key, latitude, longitude, address)
+
+    async def reverse_geocodificar_async(
+        self,
+        latitude: Decimal,
+        longitude: Decimal
+    ) -> Optional[str]:
+        """
+        Reverse geocode coordinates through the grid-keyed cache (async callers).
+
+        Args:
+            latitude: Latitude
+            longitude: Longitude
+
+        Returns:
+            Formatted address or None (not found or provider unavailable)
+        """
+        key, entry = self._reverse_lookup(latitude, longitude)
+        if entry is not None:
+            return entry.display_name if entry.encontrado else None
+
+        try:
+            address = await self.nominatim.reverse_geocode(latitude, longitude)
+        except NominatimError as e:
+            address = None
+            self.log_warning(f"Reverse geocoding provider failed for {latitude}, {longitude}: {e}")
+        return self._reverse_record(key, latitude, longitude, address)
+
+    def limpar_expirados(self) -> int:
+        """
+        Delete expired entries from the persistent cache.
+
+        Returns:
+            Number of deleted entries
+        """
+        now = datetime.utcnow()
+        return self.cache_repo.delete_expired(
+            now - GEOCODE_CACHE_TTL, now - GEOCODE_NEGATIVE_TTL, self._provider_cutoffs(now)
+        )
+
+    def limpar_reversos_expirados(self) -> int:
+        """
+        Delete expired entries from the persistent reverse geocoding cache.
+
+        Returns:
+            Number of deleted entries
+        """
+        now = datetime.utcnow()
+        return self.reverse_cache_repo.delete_expired(
+            now - GEOCODE_CACHE_TTL, now - GEOCODE_NEGATIVE_TTL, self._provider_cutoffs(now)
+        )
+
+    @staticmethod
+    def _provider_cutoffs(now: datetime) -> dict:
+        """Provedor -> consulta mais antiga ainda válida (endereços encontrados)"""
+        return {provider: now - ttl for provider, ttl in GEOCODE_PROVIDER_TTL.items()}
+
+    def _lookup(self, endereco: str, pais: str) -> Tuple[str, str, Optional[GeocodeEntry]]:
+        """Chave, endereço normalizado e entrada em cache (memória, depois banco)"""
+        normalized = normalize_address(endereco, pais)
+        key = cache_key(normalized)
+
+        entry = _memory_cache.get(key)
+        if entry is not None:
+            self._count_hit("memoria", entry)
+            return key, normalized, entry
+
+        entry = self._load(key)
+        if entry is not None:
+            self._count_hit("banco", entry)
+            _remember(key, entry)
+        return key, normalized, entry
+
+    def _record(
+        self,
+        key: str,
+        normalized: str,
+        result: Optional[Tuple[Decimal, Decimal, str]]
+    ) -> Optional[Tuple[Decimal, Decimal, str]]:
+        """Gravar a resposta do provedor nos dois níveis"""
+        _stats.incr("provedor")
+        latitude, longitude, display_name = result if result else (None, None, None)
+        entry = GeocodeEntry(latitude, longitude, display_name, _provider(result), datetime.utcnow())
+        _remember(key, entry)
+        self._store(key, normalized, entry)
+        return entry.as_result()
+
+    def _reverse_lookup(self, latitude, longitude) -> Tuple[str, Optional[GeocodeEntry]]:
+        """Chave da célula e entrada em cache (memória, banco, vizinho mais próximo)"""
+        key = reverse_cache_key(latitude, longitude, REVERSE_GEOCODE_GRID_METERS)
+
+        entry = _reverse_memory_cache.get(key)
+        if entry is not None:
+            self._count_reverse_hit("memoria", entry)
+            return key, entry
+
+        entry = self._reverse_load(key, latitude, longitude)
+        if entry is not None:
+            self._count_reverse_hit("banco", entry)
+            _remember(key, entry, _reverse_memory_cache)
+        return key, entry
+
+    def _reverse_record(self, key: str, latitude, longitude, address: Optional[str]) -> Optional[str]:
+        """
+        Gravar a resposta do provedor nos dois níveis
+
+        O cliente devolve "" quando o provedor não tem endereço para o
+        ponto (cache negativo) e None em falha (não gravada).
+        """
+        if address is None:
+            _reverse_stats.incr("erros")
+            return None
+
+        _reverse_stats.incr("provedor")
+        found = bool(address)
+        entry = GeocodeEntry(
+            Decimal(str(latitude)) if found else None,
+            Decimal(str(longitude)) if found else None,
+            str(address) if found else None,
+            _provider(address),
+            datetime.utcnow(),
+        )
+        _remember(key, entry, _reverse_memory_cache)
+        self._reverse_store(key, latitude, longitude, entry)
+        return entry.display_name
+
+    def _count_reverse_hit(self, level: str, entry: GeocodeEntry) -> None:
+        _reverse_stats.incr(level)
+        if not entry.encontrado:
+            _reverse_stats.incr("negativos")
+
+    def _reverse_load(self, key: str, latitude, longitude) -> Optional[GeocodeEntry]:
+        """
+        Entrada válida da célula no nível persistente ou, com tolerância,
+        a entrada encontrada mais próxima (None se ausente/indisponível)
+        """
+        now = datetime.utcnow()
+        try:
+            row = self.reverse_cache_repo.get_valid(key, now - GEOCODE_CACHE_TTL, now - GEOCODE_NEGATIVE_TTL)
+            if row is None and REVERSE_GEOCODE_TOLERANCE_METERS > 0:
+                nearest = self.reverse_cache_repo.get_nearest_found(
+                    latitude,
+                    longitude,
+                    REVERSE_GEOCODE_TOLERANCE_METERS / 1000,
+                    now - GEOCODE_CACHE_TTL,
+                )
+                if nearest is not None:
+                    row = nearest[0]
+                    _reverse_stats.incr("vizinhos")
+        except Exception as e:
+            self.db.rollback()
+            self.log_warning(f"Reverse geocode cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+        entry = GeocodeEntry(
+            row.latitude if row.encontrado else None,
+            row.longitude if row.encontrado else None,
+            row.display_name,
+            row.provider,
+            row.consultado_em,
+        )
+        return None if _expired(entry) else entry
+
+    def _reverse_store(self, key: str, latitude, longitude, entry: GeocodeEntry) -> None:
+        """Gravar no nível persistente (falha só gera aviso)"""
+        try:
+            self.reverse_cache_repo.save({
+                "chave": key,
+                "latitude": latitude,
+                "longitude": longitude,
+                "geohash": encode(latitude, longitude),
+                "display_name": entry.display_name,
+                "provider": entry.provider,
+                "encontrado": entry.encontrado,
+                "consultado_em": entry.consultado_em,
+            })
+        except Exception as e:
+            self.db.rollback()
+            self.log_warning(f"Reverse geocode cache write failed: {e}")
+
+    def _provider_failed(self, endereco: str, error: Exception) -> None:
+        _stats.incr("erros")
+        self.log_warning(f"Geocoding provider failed for {endereco!r}: {error}")
+        return None
+
+    def _count_hit(self, level: str, entry: GeocodeEntry) -> None:
+        _stats.incr(level)
+        if not entry.encontrado:
+            _stats.incr("negativos")
+
+    def _load(self, key: str) -> Optional[GeocodeEntry]:
+        """Entrada válida do nível persistente (None se ausente/expirada/indisponível)"""
+        now = datetime.utcnow()
+        try:
+            row = self.cache_repo.get_valid(key, now - GEOCODE_CACHE_TTL, now - GEOCODE_NEGATIVE_TTL)
+        except Exception as e:
+            self.db.rollback()
+            self.log_warning(f"Geocode cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+        entry = GeocodeEntry(
+            row.latitude if row.encontrado else None,
+            row.longitude if row.encontrado else None,
+            row.display_name,
+            row.provider,
+            row.consultado_em,
+        )
+        return None if _expired(entry) else entry
+
+    def _store(self, key: str, normalized: str, entry: GeocodeEntry) -> None:
+        """Gravar no nível persistente (falha só gera aviso)"""
+        try:
+            self.cache_repo.save({
+                "chave": key,
+                "endereco_normalizado": normalized,
+                "latitude": entry.latitude,
+                "longitude": entry.longitude,
+                "display_name": entry.display_name,
+                "provider": entry.provider,
+                "encontrado": entry.encontrado,
+                "consultado_em": entry.consultado_em,
+            })
+        except Exception as e:
+            self.db.rollback()
+            self.log_warning(f"Geocode cache write failed: {e}")
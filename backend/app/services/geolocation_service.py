@@ -3,7 +3,7 @@ Geolocalização Service - Business logic for geolocation analysis
 """
 
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Optional, List
 from decimal import Decimal
 from datetime import datetime
 
@@ -13,9 +13,23 @@ from app.repositories import (
     PareceRepository,
     LogsAnaliseRepository
 )
-from app.utils import DistanceCalculator, NominatimClient
-from app.schemas import GeolocationAnalysisResponse
+from app.utils import (
+    DistanceCalculator,
+    GeocodePriority,
+    get_geocode_scheduler,
+    analysis_fingerprint,
+    resolve_distance_mode,
+)
+from app.schemas import (
+    GeolocationAnalysisResponse,
+    GeolocationBatchItem,
+    GeolocationBatchResponse,
+    GeolocationNearbyItem,
+    GeolocationNearbyResponse,
+)
 from .base_service import BaseService
+from .parecer_rules_service import get_tenant_rules
+from .geocoding_service import GeocodingService
 
 
 class GeolocalizacaoService(BaseService):
@@ -28,19 +42,32 @@ class GeolocalizacaoService(BaseService):
         self.parecer_repo = PareceRepository(db)
         self.logs_repo = LogsAnaliseRepository(db)
         self.distance_calc = DistanceCalculator()
-        self.nominatim = NominatimClient()
+        # Consultas ao Nominatim passam pela fila (limite global, coalescência)
+        self.nominatim = get_geocode_scheduler().lane(GeocodePriority.INTERACTIVE)
+        self.geocoding = GeocodingService(db, self.nominatim)
 
     def analisar_geolocalizacao(
         self,
         contrato_id: int,
-        usuario_id: int
+        usuario_id: int,
+        modo_distancia: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        forcar_atualizacao: bool = False
     ) -> Optional[GeolocationAnalysisResponse]:
         """
         Analyze geolocation of a contract.
 
+        Results are memoized on a fingerprint of the inputs (both coordinate
+        pairs, both addresses, distance mode and rules version): when the
+        stored parecer has the same fingerprint it is returned without any
+        write, unless forcar_atualizacao is set.
+
         Args:
             contrato_id: Contract ID
             usuario_id: User ID performing analysis
+            modo_distancia: Distance mode (None = tenant/default configuration)
+            tenant_id: Tenant ID (selects the tenant's distance mode and parecer rules)
+            forcar_atualizacao: Recompute even if the inputs did not change
 
         Returns:
             Geolocation analysis response or None
@@ -61,28 +88,62 @@ class GeolocalizacaoService(BaseService):
                 not bureau.latitude or not bureau.longitude):
                 raise ValueError("Missing coordinates for geolocation analysis")
 
+            # Get addresses
+            endereco_origem = contrato.endereco_assinatura or "Sem endereço"
+            endereco_destino = bureau.logradouro or "Sem endereço"
+
+            # Reuse stored parecer when the inputs did not change
+            modo = resolve_distance_mode(modo_distancia, tenant_id)
+            regras = get_tenant_rules(self.db, tenant_id)
+            fingerprint = analysis_fingerprint(
+                contrato.latitude,
+                contrato.longitude,
+                bureau.latitude,
+                bureau.longitude,
+                contrato.endereco_assinatura,
+                bureau.logradouro,
+                modo.name,
+                regras.version
+            )
+            parecer = self.parecer_repo.get_by_contrato(contrato_id)
+            if (not forcar_atualizacao and parecer is not None
+                    and not parecer.desatualizado
+                    and parecer.fingerprint == fingerprint):
+                self.log_info(f"Geolocation analysis for contract {contrato_id} unchanged (memoized)")
+                return GeolocationAnalysisResponse(
+                    contrato_id=contrato_id,
+                    endereco_origem=endereco_origem,
+                    endereco_destino=endereco_destino,
+                    latitude_origem=parecer.latitude_inicio,
+                    longitude_origem=parecer.longitude_inicio,
+                    latitude_destino=parecer.latitude_fim,
+                    longitude_destino=parecer.longitude_fim,
+                    distancia_km=parecer.distancia_km,
+                    tipo_parecer=parecer.tipo_parecer,
+                    texto_parecer=parecer.texto_parecer,
+                    modo_distancia=modo.name,
+                    regras_versao=parecer.regras_versao,
+                    timestamp=parecer.criado_em
+                )
+
             # Calculate distance
-            distance_km = self.distance_calc.haversine(
+            distance_km = modo.distance(
                 contrato.latitude,
                 contrato.longitude,
                 bureau.latitude,
                 bureau.longitude
             )
 
-            # Get parecer type
-            tipo_parecer = self.distance_calc.get_parecer_type(distance_km)
+            # Get parecer type (tenant rules)
+            tipo_parecer = regras.classify(distance_km)
 
             # Generate parecer text
-            texto_parecer = self.distance_calc.get_parecer_text(
+            texto_parecer = regras.text(
                 distance_km,
                 contrato.endereco_assinatura or "Endereço contrato",
                 bureau.logradouro or "Endereço bureau"
             )
 
-            # Get addresses
-            endereco_origem = contrato.endereco_assinatura or "Sem endereço"
-            endereco_destino = bureau.logradouro or "Sem endereço"
-
             # Create analysis response
             analysis = GeolocationAnalysisResponse(
                 contrato_id=contrato_id,
@@ -95,10 +156,27 @@ class GeolocalizacaoService(BaseService):
                 distancia_km=distance_km,
                 tipo_parecer=tipo_parecer,
                 texto_parecer=texto_parecer,
+                modo_distancia=modo.name,
+                regras_versao=regras.version,
                 timestamp=datetime.utcnow()
             )
 
-            # Update contract status
+            # Store parecer (replaces the previous one) with its fingerprint
+            self.parecer_repo.bulk_upsert([{
+                "contrato_id": contrato_id,
+                "distancia_km": distance_km,
+                "tipo_parecer": tipo_parecer,
+                "texto_parecer": texto_parecer,
+                "latitude_inicio": contrato.latitude,
+                "longitude_inicio": contrato.longitude,
+                "latitude_fim": bureau.latitude,
+                "longitude_fim": bureau.longitude,
+                "fingerprint": fingerprint,
+                "regras_versao": regras.version,
+                "modo_distancia": modo.name,
+            }])
+
+            # Update contract status (commits the parecer as well)
             self.contrato_repo.update_status(contrato_id, "CONCLUIDO")
 
             # Log success
@@ -114,6 +192,7 @@ class GeolocalizacaoService(BaseService):
             return analysis
 
         except Exception as e:
+            self.db.rollback()
             # Log error
             self.logs_repo.create({
                 "contrato_id": contrato_id,
@@ -125,6 +204,225 @@ class GeolocalizacaoService(BaseService):
             self.log_error(f"Error analyzing geolocation for contract {contrato_id}", e)
             raise
 
+    def analisar_lote(
+        self,
+        tenant_id: str,
+        usuario_id: Optional[int],
+        contrato_ids: Optional[List[int]] = None,
+        status: Optional[str] = None,
+        limite: int = 1000,
+        modo_distancia: Optional[str] = None
+    ) -> GeolocationBatchResponse:
+        """
+        Analyze geolocation of many contracts at once.
+
+        Contracts and bureau rows are loaded with two set-based queries,
+        distances and parecer types (tenant rules) are computed in one
+        vectorized pass, and pareceres, contract statuses and logs are
+        written in bulk within a single transaction.
+
+        Args:
+            tenant_id: Tenant ID (only contracts of this tenant are analyzed)
+            usuario_id: User ID performing analysis (None if not provisioned)
+            contrato_ids: Contract IDs to analyze
+            status: Contract status filter (used when contrato_ids is None)
+            limite: Maximum number of contracts (filter mode)
+            modo_distancia: Distance mode (None = tenant/default configuration)
+
+        Returns:
+            Batch analysis response with one result per contract
+        """
+        if contrato_ids is not None:
+            contrato_ids = list(dict.fromkeys(contrato_ids))
+            limite = len(contrato_ids)
+
+        contratos = self.contrato_repo.get_for_analysis(
+            tenant_id, contrato_ids=contrato_ids, status=status, limit=limite
+        )
+        bureaus = self.bureau_repo.get_locations_by_contratos(
+            [contrato.id for contrato in contratos]
+        )
+
+        # Vectorized pass (missing bureau/coordinates -> NaN)
+        modo = resolve_distance_mode(modo_distancia, tenant_id)
+        pares = [(contrato, bureaus.get(contrato.id)) for contrato in contratos]
+        distances = modo.distance_batch(
+            [contrato.latitude for contrato, _ in pares],
+            [contrato.longitude for contrato, _ in pares],
+            [bureau.latitude if bureau else None for _, bureau in pares],
+            [bureau.longitude if bureau else None for _, bureau in pares],
+        )
+        regras = get_tenant_rules(self.db, tenant_id)
+        tipos = regras.classify_batch(distances)
+        distancias = self.distance_calc.to_decimals(distances)
+
+        resultados = {}
+        pareceres = []
+        logs = []
+        concluidos = []
+
+        for (contrato, bureau), distance_km, tipo_parecer in zip(pares, distancias, tipos):
+            if bureau is None:
+                erro = f"Bureau data for contract {contrato.id} not found"
+            elif distance_km is None:
+                erro = "Missing coordinates for geolocation analysis"
+            else:
+                erro = None
+
+            if erro:
+                resultados[contrato.id] = GeolocationBatchItem(
+                    contrato_id=contrato.id, status="ERRO", erro=erro
+                )
+                logs.append({
+                    "contrato_id": contrato.id,
+                    "usuario_id": usuario_id,
+                    "tipo_evento": "ERRO",
+                    "mensagem": "Erro na análise de geolocalização (lote)",
+                    "detalhes": erro,
+                })
+                continue
+
+            tipo_parecer = str(tipo_parecer)
+            pareceres.append({
+                "contrato_id": contrato.id,
+                "distancia_km": distance_km,
+                "tipo_parecer": tipo_parecer,
+                "texto_parecer": regras.text(
+                    distance_km,
+                    contrato.endereco_assinatura or "Endereço contrato",
+                    bureau.logradouro or "Endereço bureau"
+                ),
+                "latitude_inicio": contrato.latitude,
+                "longitude_inicio": contrato.longitude,
+                "latitude_fim": bureau.latitude,
+                "longitude_fim": bureau.longitude,
+                "fingerprint": analysis_fingerprint(
+                    contrato.latitude,
+                    contrato.longitude,
+                    bureau.latitude,
+                    bureau.longitude,
+                    contrato.endereco_assinatura,
+                    bureau.logradouro,
+                    modo.name,
+                    regras.version
+                ),
+                "regras_versao": regras.version,
+                "modo_distancia": modo.name,
+            })
+            logs.append({
+                "contrato_id": contrato.id,
+                "usuario_id": usuario_id,
+                "tipo_evento": "SUCESSO",
+                "mensagem": f"Análise de geolocalização concluída. Distância: {distance_km}km. Tipo: {tipo_parecer}",
+            })
+            concluidos.append(contrato.id)
+            resultados[contrato.id] = GeolocationBatchItem(
+                contrato_id=contrato.id,
+                status="CONCLUIDO",
+                distancia_km=distance_km,
+                tipo_parecer=tipo_parecer,
+            )
+
+        try:
+            self.parecer_repo.bulk_upsert(pareceres)
+            self.contrato_repo.bulk_update_status(concluidos, "CONCLUIDO")
+            self.logs_repo.bulk_create(logs)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            self.log_error(f"Error in batch geolocation analysis ({len(contratos)} contracts)", e)
+            raise
+
+        # IDs requested but not found in the tenant (no log: contract may not exist)
+        for contrato_id in contrato_ids or []:
+            if contrato_id not in resultados:
+                resultados[contrato_id] = GeolocationBatchItem(
+                    contrato_id=contrato_id,
+                    status="ERRO",
+                    erro=f"Contract {contrato_id} not found",
+                )
+
+        ordem = contrato_ids if contrato_ids is not None else list(resultados)
+        self.log_info(
+            f"Batch geolocation analysis completed: {len(concluidos)}/{len(ordem)} contracts"
+        )
+
+        return GeolocationBatchResponse(
+            total=len(ordem),
+            concluidos=len(concluidos),
+            erros=len(ordem) - len(concluidos),
+            modo_distancia=modo.name,
+            resultados=[resultados[contrato_id] for contrato_id in ordem],
+            timestamp=datetime.utcnow(),
+        )
+
+    def buscar_proximos(
+        self,
+        tenant_id: str,
+        latitude: Decimal,
+        longitude: Decimal,
+        raio_km: Decimal,
+        tipo: str = "contrato",
+        limite: int = 50
+    ) -> GeolocationNearbyResponse:
+        """
+        Find contracts (signature point) or bureau addresses near a point.
+
+        Args:
+            tenant_id: Tenant ID
+            latitude: Center latitude
+            longitude: Center longitude
+            raio_km: Radius in kilometers
+            tipo: "contrato" or "bureau"
+            limite: Maximum number of results (nearest first)
+
+        Returns:
+            Radius search response
+        """
+        if tipo == "bureau":
+            repo = self.bureau_repo
+            encontrados = repo.get_within_radius(
+                latitude, longitude, raio_km, limit=limite,
+                query=repo.query_for_tenant(tenant_id)
+            )
+            resultados = [
+                GeolocationNearbyItem(
+                    id=bureau.id,
+                    contrato_id=bureau.contrato_id,
+                    latitude=bureau.latitude,
+                    longitude=bureau.longitude,
+                    endereco=bureau.logradouro,
+                    distancia_km=distancia,
+                )
+                for bureau, distancia in encontrados
+            ]
+        else:
+            repo = self.contrato_repo
+            encontrados = repo.get_within_radius(
+                latitude, longitude, raio_km, limit=limite,
+                query=repo.query_for_tenant(tenant_id)
+            )
+            resultados = [
+                GeolocationNearbyItem(
+                    id=contrato.id,
+                    contrato_id=contrato.id,
+                    latitude=contrato.latitude,
+                    longitude=contrato.longitude,
+                    endereco=contrato.endereco_assinatura,
+                    distancia_km=distancia,
+                )
+                for contrato, distancia in encontrados
+            ]
+
+        return GeolocationNearbyResponse(
+            latitude=latitude,
+            longitude=longitude,
+            raio_km=raio_km,
+            tipo=tipo,
+            total=len(resultados),
+            resultados=resultados,
+        )
+
     def calcular_distancia(
         self,
         lat1: Decimal,
@@ -151,7 +449,7 @@ class GeolocalizacaoService(BaseService):
         endereco: str
     ) -> Optional[tuple[Decimal, Decimal, str]]:
         """
-        Geocode an address.
+        Geocode an address (through the geocoding cache).
 
         Args:
             endereco: Address string
@@ -160,7 +458,7 @@ class GeolocalizacaoService(BaseService):
             Tuple of (latitude, longitude, formatted_address) or None
         """
         try:
-            result = self.nominatim.geocode_sync(endereco)
+            result = self.geocoding.geocodificar(endereco)
             if result:
                 self.log_info(f"Geocoded address: {endereco}")
             return result
@@ -174,7 +472,54 @@ class GeolocalizacaoService(BaseService):
         longitude: Decimal
     ) -> Optional[str]:
         """
-        Reverse geocode coordinates.
+        Reverse geocode coordinates (through the grid-keyed reverse cache).
+
+        Args:
+            latitude: Latitude
+            longitude: Longitude
+
+        Returns:
+            Address string or None
+        """
+        try:
+            address = self.geocoding.reverse_geocodificar(latitude, longitude)
+            if address:
+                self.log_info(f"Reverse geocoded: {latitude}, {longitude}")
+            return address
+        except Exception as e:
+            self.log_error(f"Error reverse geocoding {latitude}, {longitude}", e)
+            return None
+
+    async def geocodificar_endereco_async(
+        self,
+        endereco: str
+    ) -> Optional[tuple[Decimal, Decimal, str]]:
+        """
+        Geocode an address without blocking the event loop (async routers).
+
+        Args:
+            endereco: Address string
+
+        Returns:
+            Tuple of (latitude, longitude, formatted_address) or None
+        """
+        try:
+            result = await self.geocoding.geocodificar_async(endereco)
+            if result:
+                self.log_info(f"Geocoded address: {endereco}")
+            return result
+        except Exception as e:
+            self.log_error(f"Error geocoding address {endereco}", e)
+            return None
+
+    async def reverse_geocodificar_async(
+        self,
+        latitude: Decimal,
+        longitude: Decimal
+    ) -> Optional[str]:
+        """
+        Reverse geocode coordinates without blocking the event loop (async
+        routers), through the grid-keyed reverse cache.
 
         Args:
             latitude: Latitude
@@ -184,7 +529,7 @@ class GeolocalizacaoService(BaseService):
             Address string or None
         """
         try:
-            address = self.nominatim.reverse_geocode_sync(latitude, longitude)
+            address = await self.geocoding.reverse_geocodificar_async(latitude, longitude)
             if address:
                 self.log_info(f"Reverse geocoded: {latitude}, {longitude}")
             return address
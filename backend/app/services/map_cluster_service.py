@@ -0,0 +1,100 @@
+"""
+Map Cluster Service - Clusters de marcadores do mapa por tenant
+
+Mantém uma TilePyramid por tenant (pontos de contrato e de bureau com o
+tipo de parecer, agregados em todos os zooms). A pirâmide é montada com
+uma única consulta no primeiro acesso e reaproveitada por todas as
+requisições do mapa; é reconstruída quando tem mais de
+MAP_CLUSTERS_CACHE_TTL_SECONDS, então novos contratos e pareceres
+aparecem no mapa com atraso máximo desse intervalo.
+"""
+
+from sqlalchemy.orm import Session
+from typing import Dict, Optional, Tuple
+import os
+import threading
+import time
+
+from app.repositories import ContratoRepository
+from app.utils.map_tiles import BBox, MAX_ZOOM, TilePyramid
+from .base_service import BaseService
+
+MAP_CLUSTERS_CACHE_TTL_SECONDS = float(os.getenv("MAP_CLUSTERS_CACHE_TTL_SECONDS", "60"))
+
+# Pirâmides carregadas (tenant_id -> (pirâmide, instante da carga))
+_pyramids: Dict[str, Tuple[TilePyramid, float]] = {}
+_pyramids_lock = threading.Lock()
+
+
+def _build_pyramid(db: Session, tenant_id: str) -> TilePyramid:
+    """Montar a pirâmide do tenant a partir do banco (uma consulta)"""
+    latitudes, longitudes, bureau, tipos = [], [], [], []
+    for row in ContratoRepository(db).get_map_points(tenant_id):
+        if row.latitude is not None and row.longitude is not None:
+            latitudes.append(row.latitude)
+            longitudes.append(row.longitude)
+            bureau.append(False)
+            tipos.append(row.tipo_parecer)
+        if row.bureau_latitude is not None and row.bureau_longitude is not None:
+            latitudes.append(row.bureau_latitude)
+            longitudes.append(row.bureau_longitude)
+            bureau.append(True)
+            tipos.append(row.tipo_parecer)
+    return TilePyramid(latitudes, longitudes, bureau, tipos)
+
+
+def get_tenant_pyramid(db: Session, tenant_id: str) -> TilePyramid:
+    """
+    Obter pirâmide do tenant (monta no primeiro acesso ou após o TTL)
+
+    Args:
+        db: Sessão do banco (usada apenas na carga)
+        tenant_id: Tenant ID
+
+    Returns:
+        TilePyramid do tenant
+    """
+    cached = _pyramids.get(tenant_id)
+    if cached is not None and time.monotonic() - cached[1] < MAP_CLUSTERS_CACHE_TTL_SECONDS:
+        return cached[0]
+
+    pyramid = _build_pyramid(db, tenant_id)
+    with _pyramids_lock:
+        _pyramids[tenant_id] = (pyramid, time.monotonic())
+    return pyramid
+
+
+def invalidate_pyramids(tenant_id: Optional[str] = None) -> None:
+    """Descartar pirâmides em cache (um tenant ou todos)"""
+    with _pyramids_lock:
+        if tenant_id is None:
+            _pyramids.clear()
+        else:
+            _pyramids.pop(tenant_id, None)
+
+
+class MapClusterService(BaseService):
+    """Service for server-side map marker clustering"""
+
+    def clusters(self, tenant_id: str, bbox: BBox, zoom: int) -> dict:
+        """
+        Clusters of contract and bureau points in the visible map area.
+
+        Args:
+            tenant_id: Tenant ID
+            bbox: (west, south, east, north) in degrees
+            zoom: Map zoom level (levels above MAX_ZOOM use MAX_ZOOM)
+
+        Returns:
+            Dict with zoom (effective), total_pontos and clusters
+
+        Raises:
+            ValueError: Area too large for the zoom level
+        """
+        zoom = min(zoom, MAX_ZOOM)
+        pyramid = get_tenant_pyramid(self.db, tenant_id)
+        return {
+            "zoom": zoom,
+            "total_pontos": len(pyramid),
+            "clusters": pyramid.clusters(bbox, zoom),
+        }
@@ -0,0 +1,131 @@
+"""
+Parecer Rules Service - Regras de classificação do parecer por tenant
+
+As regras de cada tenant (faixas de distância e textos) são lidas do banco
+e compiladas uma única vez (CompiledRules); as análises usam a versão em
+memória. Uma edição invalida o cache do tenant neste processo na hora; nos
+demais processos a entrada expira após PARECER_RULES_CACHE_TTL_SECONDS.
+"""
+
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+import os
+import threading
+import time
+
+from app.repositories import RegrasParecerRepository
+from app.utils.parecer_rules import CompiledRules, DEFAULT_RULES
+from .base_service import BaseService
+
+PARECER_RULES_CACHE_TTL_SECONDS = float(os.getenv("PARECER_RULES_CACHE_TTL_SECONDS", "60"))
+
+# Regras compiladas (tenant_id -> (regras, instante da carga))
+_rules: Dict[str, Tuple[CompiledRules, float]] = {}
+_rules_lock = threading.Lock()
+
+
+def get_tenant_rules(db: Session, tenant_id: Optional[str]) -> CompiledRules:
+    """
+    Obter regras compiladas do tenant (carrega e compila no primeiro acesso)
+
+    Args:
+        db: Sessão do banco (usada apenas na carga)
+        tenant_id: Tenant ID (None = regras padrão)
+
+    Returns:
+        CompiledRules do tenant ou DEFAULT_RULES
+    """
+    if tenant_id is None:
+        return DEFAULT_RULES
+
+    cached = _rules.get(tenant_id)
+    if cached is not None and time.monotonic() - cached[1] < PARECER_RULES_CACHE_TTL_SECONDS:
+        return cached[0]
+
+    regras = RegrasParecerRepository(db).get_by_tenant(tenant_id)
+    compiled = CompiledRules.from_dicts(regras.faixas) if regras else DEFAULT_RULES
+    with _rules_lock:
+        _rules[tenant_id] = (compiled, time.monotonic())
+    return compiled
+
+
+def invalidate_rules(tenant_id: Optional[str] = None) -> None:
+    """Descartar regras em cache (um tenant ou todos)"""
+    with _rules_lock:
+        if tenant_id is None:
+            _rules.clear()
+        else:
+            _rules.pop(tenant_id, None)
+
+
+class RegrasParecerService(BaseService):
+    """Service for per-tenant parecer classification rules"""
+
+    def __init__(self, db: Session):
+        super().__init__(db)
+        self.regras_repo = RegrasParecerRepository(db)
+
+    def _to_dict(self, tenant_id: str, rules: CompiledRules) -> dict:
+        return {
+            "tenant_id": tenant_id,
+            "versao": rules.version,
+            "padrao": rules is DEFAULT_RULES,
+            "faixas": rules.to_dicts(),
+        }
+
+    def obter_regras(self, tenant_id: str) -> dict:
+        """
+        Get the rules in effect for a tenant.
+
+        Args:
+            tenant_id: Tenant ID
+
+        Returns:
+            Dict with tenant_id, versao, padrao and faixas
+        """
+        return self._to_dict(tenant_id, get_tenant_rules(self.db, tenant_id))
+
+    def atualizar_regras(
+        self,
+        tenant_id: str,
+        faixas: List[dict],
+        atualizado_por: Optional[str] = None
+    ) -> dict:
+        """
+        Replace the rules of a tenant.
+
+        The rules are compiled before saving (invalid rules are rejected)
+        and the tenant's cached rules are invalidated. Existing pareceres
+        keep the version they were computed with.
+
+        Args:
+            tenant_id: Tenant ID
+            faixas: Rule bands [{tipo, ate_km, template}] in ascending order
+            atualizado_por: User who edited the rules
+
+        Returns:
+            Dict with the new rules
+
+        Raises:
+            ValueError: Invalid rules
+        """
+        rules = CompiledRules.from_dicts(faixas)
+        self.regras_repo.save_for_tenant(tenant_id, rules.to_dicts(), rules.version, atualizado_por)
+        invalidate_rules(tenant_id)
+        self.log_info(f"Parecer rules of tenant {tenant_id} updated to version {rules.version}")
+        return self._to_dict(tenant_id, rules)
+
+    def restaurar_padrao(self, tenant_id: str) -> dict:
+        """
+        Drop the custom rules of a tenant (back to the default rules).
+
+        Args:
+            tenant_id: Tenant ID
+
+        Returns:
+            Dict with the default rules
+        """
+        self.regras_repo.delete_for_tenant(tenant_id)
+        invalidate_rules(tenant_id)
+        self.log_info(f"Parecer rules of tenant {tenant_id} restored to default")
+        return self._to_dict(tenant_id, DEFAULT_RULES)
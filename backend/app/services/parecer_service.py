@@ -4,10 +4,15 @@ Parecer Service - Business logic for parecer (analysis opinion) generation
 
 from sqlalchemy.orm import Session
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, date
 from decimal import Decimal
 
-from app.repositories import PareceRepository, ContratoRepository, LogsAnaliseRepository
+from app.repositories import (
+    PareceRepository,
+    ContratoRepository,
+    LogsAnaliseRepository,
+    HistogramaDistanciasRepository,
+)
 from app.models.parecer import Parecer
 from app.schemas import (
     PareceCreate,
@@ -15,6 +20,7 @@ from app.schemas import (
     PareceListResponse,
     PareceFilterRequest,
 )
+from app.utils.distance_histogram import summarize
 from .base_service import BaseService
 
 
@@ -26,6 +32,7 @@ class PareceService(BaseService):
         self.parecer_repo = PareceRepository(db)
         self.contrato_repo = ContratoRepository(db)
         self.logs_repo = LogsAnaliseRepository(db)
+        self.histograma_repo = HistogramaDistanciasRepository(db)
 
     def criar_parecer(
         self,
@@ -245,6 +252,35 @@ class PareceService(BaseService):
             },
         }
 
+    def get_histograma_distancias(
+        self,
+        tenant_id: str,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None
+    ) -> dict:
+        """
+        Get the distance histogram and percentiles of a tenant's pareceres.
+
+        Served from the materialized histogram (one row per tenant, day
+        and bucket), so the cost depends on the number of buckets and
+        days, not on the number of pareceres.
+
+        Args:
+            tenant_id: Tenant ID
+            data_inicio: First day (inclusive, None = no lower bound)
+            data_fim: Last day (inclusive, None = no upper bound)
+
+        Returns:
+            Dict with total, media_km, p50_km, p90_km, p99_km and buckets
+        """
+        rows = self.histograma_repo.get_bucket_totals(tenant_id, data_inicio, data_fim)
+        return {
+            "tenant_id": tenant_id,
+            "data_inicio": data_inicio,
+            "data_fim": data_fim,
+            **summarize(rows),
+        }
+
     def contar_por_tipo(self, tipo: str) -> int:
         """
         Count pareceres by type.
@@ -0,0 +1,111 @@
+"""
+Reanálise Service - Recalcula em background pareceres desatualizados
+
+Mudanças de coordenadas/endereço do contrato ou do bureau marcam o parecer
+como desatualizado (app.models.staleness). A task periódica do Celery
+(app.tasks.reanalise) reserva os pareceres marcados em lotes e os recalcula
+com GeolocalizacaoService.analisar_lote (uma consulta por tabela, cálculo
+vetorizado e gravação em lote), sem reprocessar a carteira inteira.
+
+Falhas mantêm o parecer desatualizado e o reagendam com espera exponencial
+(REANALISE_RETRY_SECONDS, até REANALISE_RETRY_MAX_SECONDS).
+"""
+
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+import os
+
+from app.repositories import PareceRepository
+from .base_service import BaseService
+from .geolocation_service import GeolocalizacaoService
+
+REANALISE_BATCH_SIZE = int(os.getenv("REANALISE_BATCH_SIZE", "500"))
+REANALISE_LEASE_SECONDS = float(os.getenv("REANALISE_LEASE_SECONDS", "600"))
+REANALISE_RETRY_SECONDS = float(os.getenv("REANALISE_RETRY_SECONDS", "300"))
+REANALISE_RETRY_MAX_SECONDS = float(os.getenv("REANALISE_RETRY_MAX_SECONDS", "86400"))
+
+
+class ReanaliseService(BaseService):
+    """Service for incremental re-analysis of stale pareceres"""
+
+    def __init__(self, db: Session):
+        super().__init__(db)
+        self.parecer_repo = PareceRepository(db)
+        self.geo_service = GeolocalizacaoService(db)
+
+    def reanalisar_lote(self, limite: int = REANALISE_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Claim and recompute one batch of stale pareceres (grouped by tenant
+        and by the distance mode stored on each parecer, so a geodesic
+        parecer is recomputed as geodesic; legacy rows without a mode use
+        the tenant configuration).
+
+        The batch is claimed and committed first, so concurrent runners
+        never recompute the same pareceres. Contracts that fail (bureau or
+        coordinates missing, e.g. geocoding still pending, or an error in
+        the tenant batch) stay stale and are retried with exponential
+        backoff; the next location update retries them at once.
+
+        Args:
+            limite: Maximum number of pareceres in the batch
+
+        Returns:
+            Counters: selecionados, concluidos, erros
+        """
+        pendentes = self.parecer_repo.claim_dirty(
+            limit=limite, lease_seconds=REANALISE_LEASE_SECONDS
+        )
+        self.db.commit()
+
+        grupos: Dict[Tuple[str, Optional[str]], List[int]] = defaultdict(list)
+        for row in pendentes:
+            grupos[(row.tenant_id, row.modo_distancia)].append(row.contrato_id)
+
+        concluidos = erros = 0
+        for (tenant_id, modo_distancia), contrato_ids in grupos.items():
+            try:
+                resultado = self.geo_service.analisar_lote(
+                    tenant_id, None, contrato_ids=contrato_ids,
+                    modo_distancia=modo_distancia
+                )
+            except Exception as e:
+                self.log_error(f"Reanalysis batch failed for tenant {tenant_id}", e)
+                falhas = contrato_ids
+            else:
+                falhas = [
+                    item.contrato_id for item in resultado.resultados
+                    if item.status != "CONCLUIDO"
+                ]
+                concluidos += resultado.concluidos
+            if falhas:
+                self.parecer_repo.defer_dirty(
+                    falhas, REANALISE_RETRY_SECONDS, REANALISE_RETRY_MAX_SECONDS
+                )
+                self.db.commit()
+            erros += len(falhas)
+
+        if pendentes:
+            self.log_info(
+                f"Reanalysis: {concluidos}/{len(pendentes)} stale pareceres recomputed"
+            )
+        return {"selecionados": len(pendentes), "concluidos": concluidos, "erros": erros}
+
+    def reanalisar_pendentes(self, limite: int = REANALISE_BATCH_SIZE) -> int:
+        """
+        Drain the stale queue batch by batch (failed rows wait for their
+        backoff, so they are not claimed again in the same run).
+
+        Args:
+            limite: Batch size
+
+        Returns:
+            Number of pareceres processed
+        """
+        total = 0
+        while True:
+            resultado = self.reanalisar_lote(limite)
+            total += resultado["selecionados"]
+            if resultado["selecionados"] < limite:
+                return total
+
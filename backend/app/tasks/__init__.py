@@ -0,0 +1,43 @@
+"""
+Tasks - Aplicação Celery (tarefas em background)
+
+Worker: celery -A app.tasks worker --loglevel=info
+Agendador (um único processo): celery -A app.tasks beat --loglevel=info
+"""
+
+from celery import Celery
+import os
+
+celery_app = Celery(
+    "sistema_de_laudos",
+    broker=os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/1"),
+    backend=os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/2"),
+    include=["app.tasks.geocodificacao", "app.tasks.reanalise"],
+)
+
+REANALISE_ENABLED = os.getenv("REANALISE_ENABLED", "true").lower() == "true"
+REANALISE_INTERVAL_SECONDS = float(os.getenv("REANALISE_INTERVAL_SECONDS", "30"))
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    timezone="UTC",
+    # Task interrompida (worker caiu) volta para a fila e continua do checkpoint
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+)
+
+# Reanálise incremental: disparada pelo beat, não por processo da API
+if REANALISE_ENABLED:
+    celery_app.conf.beat_schedule = {
+        "reanalise-pendentes": {
+            "task": "reanalise.pendentes",
+            "schedule": REANALISE_INTERVAL_SECONDS,
+            # Execução atrasada é substituída pela próxima
+            "options": {"expires": REANALISE_INTERVAL_SECONDS},
+        },
+    }
+
+__all__ = ["celery_app"]
@@ -0,0 +1,57 @@
+"""
+Tasks de geocodificação em lote
+"""
+
+import logging
+import os
+
+from app.models.database import SessionLocal
+from app.services.geocodificacao_lote_service import (
+    GeocodificacaoLoteService,
+    ProvedorIndisponivel,
+)
+from . import celery_app
+
+logger = logging.getLogger(__name__)
+
+GEOCODE_BULK_MAX_RETRIES = int(os.getenv("GEOCODE_BULK_MAX_RETRIES", "10"))
+GEOCODE_BULK_RETRY_SECONDS = int(os.getenv("GEOCODE_BULK_RETRY_SECONDS", "300"))
+
+
+@celery_app.task(
+    bind=True,
+    name="geocodificacao.backlog_bureau",
+    max_retries=GEOCODE_BULK_MAX_RETRIES,
+)
+def geocodificar_backlog_bureau(self, lote_id: int) -> dict:
+    """
+    Geocodificar o backlog de bureau sem coordenadas de um job
+
+    Provedor indisponível: o progresso até o checkpoint fica gravado e a
+    task é reagendada (GEOCODE_BULK_RETRY_SECONDS); esgotadas as
+    tentativas, o job é marcado como FALHOU.
+
+    Args:
+        lote_id: ID do GeocodificacaoLote
+
+    Returns:
+        Status final do job (vazio se o job não existe)
+    """
+    db = SessionLocal()
+    try:
+        service = GeocodificacaoLoteService(db)
+        try:
+            lote = service.processar(lote_id)
+        except ProvedorIndisponivel as e:
+            if self.request.retries >= self.max_retries:
+                service.falhar(lote_id, f"Provedor de geocodificação indisponível: {e}")
+                raise
+            logger.warning(f"Bulk geocoding job {lote_id}: provider unavailable, retrying: {e}")
+            raise self.retry(exc=e, countdown=GEOCODE_BULK_RETRY_SECONDS)
+        except Exception as e:
+            db.rollback()
+            service.falhar(lote_id, str(e))
+            raise
+        return GeocodificacaoLoteService.status(lote) if lote else {}
+    finally:
+        db.close()
@@ -0,0 +1,25 @@
+"""
+Tasks de reanálise incremental de pareceres desatualizados
+"""
+
+from app.models.database import SessionLocal
+from app.services.reanalise_service import ReanaliseService
+from . import celery_app
+
+
+@celery_app.task(name="reanalise.pendentes", ignore_result=True)
+def reanalisar_pendentes() -> int:
+    """
+    Recalcular os pareceres desatualizados (agendada pelo Celery beat)
+
+    Cada lote é reservado no banco (FOR UPDATE SKIP LOCKED), então
+    execuções sobrepostas dividem o trabalho em vez de repeti-lo.
+
+    Returns:
+        Número de pareceres processados
+    """
+    db = SessionLocal()
+    try:
+        return ReanaliseService(db).reanalisar_pendentes()
+    finally:
+        db.close()
@@ -3,9 +3,59 @@ Utils - Helper functions and utilities
 """
 
 from .distance_calculator import DistanceCalculator
-from .nominatim_client import NominatimClient
+from .nominatim_client import (
+    NominatimClient,
+    NominatimError,
+    get_nominatim_client,
+    close_nominatim_client,
+)
+from .distance_modes import (
+    DistanceMode,
+    register_distance_mode,
+    get_distance_mode,
+    list_distance_modes,
+    resolve_distance_mode,
+)
+from .fingerprint import analysis_fingerprint
+from .geocoder import (
+    Geocoder,
+    GeocoderUnavailable,
+    GeocodeResult,
+    ReverseGeocodeResult,
+    register_geocoder_backend,
+    get_geocoder,
+    close_geocoder,
+)
+from .geocode_scheduler import (
+    GeocodePriority,
+    GeocodeScheduler,
+    get_geocode_scheduler,
+    geocode_scheduler_stats,
+    close_geocode_scheduler,
+)
 
 __all__ = [
     "DistanceCalculator",
     "NominatimClient",
+    "NominatimError",
+    "get_nominatim_client",
+    "close_nominatim_client",
+    "DistanceMode",
+    "register_distance_mode",
+    "get_distance_mode",
+    "list_distance_modes",
+    "resolve_distance_mode",
+    "analysis_fingerprint",
+    "Geocoder",
+    "GeocoderUnavailable",
+    "GeocodeResult",
+    "ReverseGeocodeResult",
+    "register_geocoder_backend",
+    "get_geocoder",
+    "close_geocoder",
+    "GeocodePriority",
+    "GeocodeScheduler",
+    "get_geocode_scheduler",
+    "geocode_scheduler_stats",
+    "close_geocode_scheduler",
 ]
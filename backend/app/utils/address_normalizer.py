@@ -0,0 +1,320 @@
+"""
+Address Normalizer - Normalização de endereços brasileiros
+
+Endereços de contrato e de bureau chegam com abreviações ("R.", "Av",
+"Dr."), acentos, caixa, marcadores de número ("nº", "n.") e CEP em
+formatos diferentes. parse_address reduz o texto a componentes canônicos
+(minúsculas, sem acentos, abreviações expandidas) e monta:
+
+- consulta: o que é enviado ao provedor (logradouro, número, bairro,
+  cidade e UF; sem complemento e, havendo cidade ou UF, sem o CEP, que
+  atrapalha o Nominatim; sem cidade nem UF o CEP é o que localiza a rua
+  e vai junto; só o CEP quando não há logradouro);
+- chave: a consulta sem pontuação, base da chave de cache, mais o setor
+  do CEP (5 dígitos) quando o CEP não foi na consulta. Variações do mesmo
+  endereço caem na mesma entrada, e a mesma rua em CEPs de regiões
+  diferentes não.
+
+Tudo é feito com tabelas e regexes compilados na importação; o
+resultado é memorizado (LRU) porque o mesmo endereço passa pelo cache,
+pelo scheduler e pelo provedor.
+
+Exemplo:
+    >>> parse_address("R. Dr. Arnaldo, nº 455 - apto 12, Cerqueira César, São Paulo/SP, 01246-903").consulta
+    'rua doutor arnaldo, 455, cerqueira cesar, sao paulo, sp'
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple
+import re
+import unicodedata
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_CEP = re.compile(r"(?<![0-9])(\d{2})\.?(\d{3})\s?-?\s?(\d{3})(?![0-9])")
+_SEM_NUMERO = re.compile(r"(?<![0-9a-z])s\s*/\s*n(?:o|umero)?(?![0-9a-z])")
+
+# Acentos e símbolos latinos -> ASCII (tabela gerada uma vez; "º"/"ª" viram letras)
+_FOLD = {
+    code: "".join(c for c in unicodedata.normalize("NFKD", chr(code)) if not unicodedata.combining(c))
+    for code in range(0xC0, 0x250)
+}
+_FOLD.update({ord("º"): "o", ord("ª"): "a", ord("°"): "o"})
+_FOLD_TABLE = str.maketrans(_FOLD)
+
+# Tipos de logradouro
+TIPOS_LOGRADOURO = {
+    "r": "rua", "rua": "rua",
+    "av": "avenida", "ave": "avenida", "avn": "avenida", "avda": "avenida", "avenida": "avenida",
+    "al": "alameda", "alam": "alameda", "alameda": "alameda",
+    "tv": "travessa", "trav": "travessa", "travessa": "travessa",
+    "pc": "praca", "pca": "praca", "pr": "praca", "praca": "praca",
+    "est": "estrada", "estr": "estrada", "estrada": "estrada",
+    "rod": "rodovia", "rodovia": "rodovia",
+    "lg": "largo", "lgo": "largo", "largo": "largo",
+    "bc": "beco", "beco": "beco",
+    "lad": "ladeira", "ladeira": "ladeira",
+    "vd": "viaduto", "viaduto": "viaduto",
+    "via": "via",
+}
+
+_TIPOS = frozenset(TIPOS_LOGRADOURO.values())
+
+# Abreviações dentro do nome (títulos, santos, bairros)
+ABREVIACOES = {
+    "dr": "doutor", "dra": "doutora", "prof": "professor", "profa": "professora",
+    "eng": "engenheiro", "pres": "presidente", "gov": "governador", "sen": "senador",
+    "dep": "deputado", "ver": "vereador", "des": "desembargador", "min": "ministro",
+    "gen": "general", "gal": "general", "mal": "marechal", "cel": "coronel",
+    "cap": "capitao", "ten": "tenente", "sgt": "sargento", "alm": "almirante",
+    "brig": "brigadeiro", "cmte": "comandante", "pe": "padre", "fr": "frei",
+    "sta": "santa", "sto": "santo", "sr": "senhor", "sra": "senhora", "ns": "nossa senhora", "nsa": "nossa senhora",
+    "jd": "jardim", "jdm": "jardim", "vl": "vila", "pq": "parque", "pque": "parque",
+    "res": "residencial", "conj": "conjunto", "cj": "conjunto", "hab": "habitacional",
+    "qd": "quadra", "q": "quadra", "lt": "lote", "km": "km",
+}
+
+# Abreviações ambíguas: só expandidas no início de uma parte do endereço
+_SO_NO_INICIO = {"r", "pr", "est", "lg", "bc", "vd", "q", "pe", "ver", "min", "sen", "des", "cap", "res"}
+
+# Marcadores de número ("n 100", "nº 100") e de CEP, descartados
+_MARCADORES_NUMERO = {"n", "no", "nr", "nro", "num", "numero"}
+_MARCADORES_CEP = {"cep"}
+
+# Complemento: marcador seguido de número/letra (ex.: "apto 12", "bloco b", "casa 2")
+COMPLEMENTOS = {
+    "ap", "apt", "apto", "apartamento", "bl", "bloco", "sl", "sala", "lj", "loja",
+    "box", "casa", "cs", "conj", "cj", "conjunto",
+}
+# Sem valor ("fundos") ou com o valor antes ("12o andar")
+_COMPLEMENTOS_SEM_VALOR = {"fundos", "fds", "cobertura", "cob", "terreo"}
+
+UFS = {
+    "ac", "al", "ap", "am", "ba", "ce", "df", "es", "go", "ma", "mt", "ms", "mg", "pa",
+    "pb", "pr", "pe", "pi", "rj", "rn", "rs", "ro", "rr", "sc", "sp", "se", "to",
+}
+
+SEM_NUMERO = "s/n"
+
+_SEPARATORS = frozenset(",;|/\n-")
+
+# Um passo só: rodovias (BR-116, SP-280) como um token, tokens alfanuméricos
+# e separadores de partes do endereço (vírgula, ponto e vírgula, barra,
+# quebra de linha, " - ")
+_LEXER = re.compile(
+    r"(?<![0-9a-z])(?:br|" + "|".join(sorted(UFS)) + r")-[0-9]{2,3}(?![0-9a-z])"
+    r"|[0-9a-z]+|[,;|/\n]|(?<=\s)-(?=\s)"
+)
+
+
+# Testes de token sem regex (chamados para cada token do endereço)
+def _is_number(token: str) -> bool:
+    """Número de porta: 100, 100a"""
+    return token.isdigit() or (token[:-1].isdigit() and token[-1].isalpha())
+
+
+def _is_ordinal(token: str) -> bool:
+    """Ordinal: 12, 12o"""
+    return token.isdigit() or (token[:-1].isdigit() and token[-1] in "oa")
+
+
+def _is_complemento_valor(token: str) -> bool:
+    """Valor de complemento: 12, 12b, b"""
+    return len(token) == 1 or _is_number(token)
+
+
+@dataclass(frozen=True)
+class AddressComponents:
+    """Endereço normalizado (componentes em minúsculas, sem acentos)"""
+
+    tipo_logradouro: Optional[str]
+    logradouro: Optional[str]
+    numero: Optional[str]
+    complemento: Optional[str]
+    bairro: Optional[str]
+    cidade: Optional[str]
+    uf: Optional[str]
+    cep: Optional[str]  # 8 dígitos
+
+    @property
+    def _rua(self) -> str:
+        return " ".join(part for part in (self.tipo_logradouro, self.logradouro) if part)
+
+    @property
+    def _cep_na_consulta(self) -> bool:
+        """CEP enviado ao provedor: só ele, ou a rua sem cidade nem UF"""
+        return bool(self.cep) and not (self._rua and (self.cidade or self.uf))
+
+    @property
+    def consulta(self) -> str:
+        """Consulta para o provedor (vazia se não sobrou nada do endereço)"""
+        rua = self._rua
+        if not rua:
+            return self.cep or ", ".join(part for part in (self.bairro, self.cidade, self.uf) if part)
+        numero = self.numero if self.numero != SEM_NUMERO else None
+        cep = f"{self.cep[:5]}-{self.cep[5:]}" if self._cep_na_consulta else None
+        return ", ".join(part for part in (rua, numero, self.bairro, self.cidade, self.uf, cep) if part)
+
+    @property
+    def chave(self) -> str:
+        """Consulta sem pontuação mais o setor do CEP que ficou fora dela (base da chave de cache)"""
+        chave = _NON_ALNUM.sub(" ", self.consulta).strip()
+        if self.cep and not self._cep_na_consulta:
+            chave = f"{chave} {self.cep[:5]}"
+        return chave
+
+
+def fold(text: str) -> str:
+    """Minúsculas, sem acentos"""
+    text = str(text).lower()
+    if text.isascii():
+        return text
+    text = text.translate(_FOLD_TABLE)
+    if not text.isascii():
+        # Fora da faixa latina da tabela: decomposição completa
+        text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return text
+
+
+def _expand(tokens: List[str]) -> List[str]:
+    """Expandir abreviações e descartar marcadores de número/CEP"""
+    if len(tokens) == 1 and tokens[0] in UFS:
+        return tokens  # "- PR" é o estado, não "praca"
+    out = []
+    last = len(tokens) - 1
+    for i, token in enumerate(tokens):
+        if token in _MARCADORES_NUMERO and i < last and _is_number(tokens[i + 1]):
+            continue
+        if token in _MARCADORES_CEP:
+            continue
+        if i == 0 and token in TIPOS_LOGRADOURO:
+            out.append(TIPOS_LOGRADOURO[token])
+            continue
+        expanded = ABREVIACOES.get(token)
+        if expanded and (i == 0 or token not in _SO_NO_INICIO):
+            out.extend(expanded.split())
+        else:
+            out.append(token)
+    return out
+
+
+def _split_complemento(tokens: List[str]) -> Tuple[List[str], List[str]]:
+    """Separar tokens de complemento (marcador + valor) do restante"""
+    kept, complemento = [], []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in COMPLEMENTOS and i + 1 < len(tokens) and _is_complemento_valor(tokens[i + 1]):
+            complemento += tokens[i:i + 2]
+            i += 2
+            continue
+        if token == "andar" and kept and _is_ordinal(kept[-1]):
+            complemento += [kept.pop(), token]
+        elif token in _COMPLEMENTOS_SEM_VALOR:
+            complemento.append(token)
+        else:
+            kept.append(token)
+        i += 1
+    return kept, complemento
+
+
+@lru_cache(maxsize=4096)
+def parse_address(address: str) -> AddressComponents:
+    """
+    Normalizar endereço livre em componentes
+
+    A primeira parte é o logradouro (o primeiro número depois do nome
+    vira o número, o que vem depois dele conta como parte seguinte;
+    rodovias como "BR-116" e o "km 20" seguinte ficam no logradouro).
+    Parte só numérica (ou "s/n") logo depois é o número; CEP e UF são
+    reconhecidos em qualquer posição / no final. Das partes restantes,
+    a última é a cidade e a anterior o bairro.
+
+    Args:
+        address: Endereço livre
+
+    Returns:
+        AddressComponents
+    """
+    text = fold(address or "")
+
+    cep = None
+    match = _CEP.search(text)
+    if match:
+        cep = "".join(match.groups())
+        text = text[:match.start()] + " " + text[match.end():]
+    text = _SEM_NUMERO.sub(" sn ", text)
+
+    segments = []
+    complemento = []
+    current = []
+    for token in _LEXER.findall(text) + [","]:
+        if token[0] in _SEPARATORS:
+            if current:
+                tokens, extra = _split_complemento(_expand(current))
+                complemento.extend(extra)
+                if tokens:
+                    segments.append(tokens)
+                current = []
+        else:
+            current.append(token)
+
+    uf = None
+    if segments and segments[-1][-1] in UFS and sum(map(len, segments)) > 1:
+        uf = segments[-1].pop()
+        if not segments[-1]:
+            segments.pop()
+
+    tipo = logradouro = numero = None
+    if segments:
+        street = segments.pop(0)
+        if street[0] in _TIPOS and len(street) > 1:
+            tipo = street.pop(0)
+        for i, token in enumerate(street):
+            # "km 20" de rodovia fica no logradouro (não é número de porta)
+            if i > 0 and street[i - 1] != "km" and (token == "sn" or _is_number(token)):
+                numero = SEM_NUMERO if token == "sn" else token
+                if street[i + 1:]:
+                    segments.insert(0, street[i + 1:])
+                street = street[:i]
+                break
+        if numero is None and segments and len(segments[0]) > 1 and (
+            segments[0][0] == "km" and _is_number(segments[0][1])
+        ):
+            street = street + segments[0][:2]
+            del segments[0][:2]
+            if not segments[0]:
+                segments.pop(0)
+        logradouro = " ".join(street)
+        if numero is None and segments and len(segments[0]) == 1 and (
+            segments[0][0] == "sn" or _is_number(segments[0][0])
+        ):
+            token = segments.pop(0)[0]
+            numero = SEM_NUMERO if token == "sn" else token
+
+    parts = [" ".join(tokens) for tokens in segments]
+    cidade = parts[-1] if parts else None
+    bairro = parts[-2] if len(parts) > 1 else None
+    if len(parts) > 2:
+        complemento.extend(parts[:-2])
+
+    return AddressComponents(
+        tipo_logradouro=tipo,
+        logradouro=logradouro or None,
+        numero=numero,
+        complemento=" ".join(complemento) or None,
+        bairro=bairro,
+        cidade=cidade,
+        uf=uf,
+        cep=cep,
+    )
+
+
+def address_key(address: str) -> str:
+    """Chave canônica do endereço (texto; "" se vazio)"""
+    return parse_address(address).chave
+
+
+def geocode_query(address: str) -> str:
+    """Consulta para o provedor (o texto original se nada for reconhecido)"""
+    return parse_address(address).consulta or (address or "").strip()
@@ -0,0 +1,258 @@
+"""
+CEP Index - Centroides de CEP offline (busca binária, O(log n))
+
+Arquivo binário gerado por build_cep_index a partir de uma base
+(cep, latitude, longitude): CEPs ordenados (uint32) e coordenadas
+(float32) em arrays contíguos, mais o centroide de cada setor (5
+primeiros dígitos) para CEPs ausentes da base. O arquivo é aberto com
+np.memmap: só as páginas tocadas pela busca vão para a memória e os
+workers compartilham o page cache do sistema.
+
+Layout (little-endian, arrays alinhados em 4 bytes):
+    b"CEPIDX01", uint32 n_ceps, uint32 n_setores
+    uint32[n_ceps] ceps, float32[n_ceps] latitudes, float32[n_ceps] longitudes
+    uint32[n_setores] setores, float32[n_setores] latitudes, float32[n_setores] longitudes
+
+Gerar a partir de um CSV (colunas cep, latitude/lat, longitude/lon/lng):
+    python -m app.utils.cep_index dados.csv cep_centroids.bin
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterable, Optional, Tuple
+import csv
+import logging
+import os
+import re
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CEP_INDEX_PATH = os.getenv("CEP_INDEX_PATH", "data/cep_centroids.bin")
+
+MAGIC = b"CEPIDX01"
+_HEADER = np.dtype([("magic", "S8"), ("n_ceps", "<u4"), ("n_setores", "<u4")])
+
+# Níveis de precisão da geocodificação, do mais grosseiro ao mais fino
+PRECISAO_SETOR_CEP = "setor_cep"
+PRECISAO_CEP = "cep"
+PRECISAO_LOGRADOURO = "logradouro"
+PRECISOES = (PRECISAO_SETOR_CEP, PRECISAO_CEP, PRECISAO_LOGRADOURO)
+
+_NON_DIGIT = re.compile(r"\D")
+
+
+def precisao_atende(obtida: str, minima: str) -> bool:
+    """Indica se a precisão obtida é pelo menos a mínima exigida"""
+    return PRECISOES.index(obtida) >= PRECISOES.index(minima)
+
+
+def normalize_cep(cep) -> Optional[int]:
+    """CEP como inteiro de 8 dígitos (None se inválido)"""
+    if cep is None:
+        return None
+    if isinstance(cep, int):
+        # CEP numérico perde os zeros à esquerda (01310100 -> 1310100)
+        return cep if 0 <= cep <= 99999999 else None
+    digits = _NON_DIGIT.sub("", str(cep))
+    return int(digits) if len(digits) == 8 else None
+
+
+@dataclass(frozen=True)
+class CepLocation:
+    """Centroide encontrado para um CEP"""
+
+    latitude: Decimal
+    longitude: Decimal
+    precisao: str  # PRECISAO_CEP ou PRECISAO_SETOR_CEP
+
+
+def _group_mean(keys: np.ndarray, lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Chaves únicas ordenadas e média das coordenadas de cada uma"""
+    unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    sum_lat = np.zeros(len(unique))
+    sum_lon = np.zeros(len(unique))
+    np.add.at(sum_lat, inverse, lat)
+    np.add.at(sum_lon, inverse, lon)
+    return unique.astype("<u4"), (sum_lat / counts).astype("<f4"), (sum_lon / counts).astype("<f4")
+
+
+def build_cep_index(rows: Iterable[Tuple[object, float, float]], path: str) -> int:
+    """
+    Gerar o arquivo do índice
+
+    CEPs inválidos ou coordenadas fora do intervalo são descartados; CEPs
+    repetidos viram a média das coordenadas.
+
+    Args:
+        rows: (cep, latitude, longitude)
+        path: Arquivo de saída
+
+    Returns:
+        Número de CEPs no índice
+    """
+    ceps, lats, lons = [], [], []
+    for cep, lat, lon in rows:
+        code = normalize_cep(cep)
+        try:
+            lat, lon = float(lat), float(lon)
+        except (TypeError, ValueError):
+            continue
+        if code is None or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            continue
+        ceps.append(code)
+        lats.append(lat)
+        lons.append(lon)
+
+    codes = np.asarray(ceps, dtype=np.int64)
+    lat = np.asarray(lats, dtype=np.float64)
+    lon = np.asarray(lons, dtype=np.float64)
+    cep_keys, cep_lat, cep_lon = _group_mean(codes, lat, lon)
+    sector_keys, sector_lat, sector_lon = _group_mean(codes // 1000, lat, lon)
+
+    header = np.array([(MAGIC, len(cep_keys), len(sector_keys))], dtype=_HEADER)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        for array in (header, cep_keys, cep_lat, cep_lon, sector_keys, sector_lat, sector_lon):
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+    return len(cep_keys)
+
+
+def build_cep_index_from_csv(csv_path: str, path: str) -> int:
+    """
+    Gerar o índice a partir de um CSV com cabeçalho
+
+    Colunas aceitas: cep; latitude ou lat; longitude, lon ou lng.
+
+    Returns:
+        Número de CEPs no índice
+    """
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fields = {name.strip().lower(): name for name in reader.fieldnames or ()}
+        try:
+            cep_col = fields["cep"]
+            lat_col = next(fields[n] for n in ("latitude", "lat") if n in fields)
+            lon_col = next(fields[n] for n in ("longitude", "lon", "lng") if n in fields)
+        except (KeyError, StopIteration):
+            raise ValueError("CSV must have cep, latitude and longitude columns")
+        return build_cep_index(((r[cep_col], r[lat_col], r[lon_col]) for r in reader), path)
+
+
+class CepIndex:
+    """Centroides de CEP mapeados do arquivo (somente leitura)"""
+
+    def __init__(self, path: str):
+        header = np.fromfile(path, dtype=_HEADER, count=1)
+        if len(header) != 1 or header["magic"][0] != MAGIC:
+            raise ValueError(f"Not a CEP index file: {path}")
+        n_ceps = int(header["n_ceps"][0])
+        n_sectors = int(header["n_setores"][0])
+
+        if n_ceps + n_sectors:
+            data = np.memmap(path, dtype="<u4", mode="r", offset=_HEADER.itemsize)
+        else:
+            data = np.zeros(0, dtype="<u4")  # mmap não aceita região vazia
+        floats = data.view("<f4")
+        offset = 0
+
+        def take(array, n):
+            nonlocal offset
+            view = array[offset:offset + n]
+            offset += n
+            return view
+
+        self.path = path
+        self._ceps = take(data, n_ceps)
+        self._lat = take(floats, n_ceps)
+        self._lon = take(floats, n_ceps)
+        self._sectors = take(data, n_sectors)
+        self._sector_lat = take(floats, n_sectors)
+        self._sector_lon = take(floats, n_sectors)
+
+    def __len__(self) -> int:
+        return len(self._ceps)
+
+    @staticmethod
+    def _find(keys: np.ndarray, key: int) -> Optional[int]:
+        # Chave no dtype do array: com int do Python o numpy converteria o array inteiro
+        i = int(np.searchsorted(keys, np.uint32(key)))
+        return i if i < len(keys) and keys[i] == key else None
+
+    def lookup(self, cep) -> Optional[CepLocation]:
+        """
+        Centroide do CEP (ou do setor, se o CEP não estiver na base)
+
+        Args:
+            cep: CEP com ou sem máscara
+
+        Returns:
+            CepLocation ou None (CEP inválido ou setor desconhecido)
+        """
+        code = normalize_cep(cep)
+        if code is None:
+            return None
+
+        i = self._find(self._ceps, code)
+        if i is not None:
+            return CepLocation(_decimal(self._lat[i]), _decimal(self._lon[i]), PRECISAO_CEP)
+
+        i = self._find(self._sectors, code // 1000)
+        if i is not None:
+            return CepLocation(_decimal(self._sector_lat[i]), _decimal(self._sector_lon[i]), PRECISAO_SETOR_CEP)
+        return None
+
+
+def _decimal(value) -> Decimal:
+    # Menor representação que reproduz o float32 (sem o ruído de float(value))
+    return Decimal(str(np.float32(value)))
+
+
+# Índice do processo (carregado no primeiro uso)
+_cep_index: Optional[CepIndex] = None
+_loaded = False
+_lock = threading.Lock()
+
+
+def get_cep_index() -> Optional[CepIndex]:
+    """
+    Obter o índice de CEP do processo
+
+    Returns:
+        CepIndex de CEP_INDEX_PATH, ou None se o arquivo não existe
+        ou é inválido (a camada de CEP fica desligada)
+    """
+    global _cep_index, _loaded
+
+    with _lock:
+        if not _loaded:
+            _loaded = True
+            if os.path.exists(CEP_INDEX_PATH):
+                try:
+                    _cep_index = CepIndex(CEP_INDEX_PATH)
+                    logger.info(f"CEP index loaded: {len(_cep_index)} CEPs from {CEP_INDEX_PATH}")
+                except (OSError, ValueError) as e:
+                    logger.warning(f"CEP index unavailable: {e}")
+            else:
+                logger.info(f"CEP index not found at {CEP_INDEX_PATH}; CEP geocoding tier disabled")
+        return _cep_index
+
+
+def set_cep_index(index: Optional[CepIndex]) -> None:
+    """Substituir o índice do processo (testes, recarga após nova geração)"""
+    global _cep_index, _loaded
+
+    with _lock:
+        _cep_index = index
+        _loaded = True
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m app.utils.cep_index <dados.csv> <saida.bin>")
+    print(f"{build_cep_index_from_csv(sys.argv[1], sys.argv[2])} CEPs")
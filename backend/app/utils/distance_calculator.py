@@ -1,14 +1,39 @@
 """
 Distance Calculator - Calcula distância entre dois pontos usando Haversine Formula
+
+Também oferece aproximação equiretangular (triagem rápida) e distância
+geodésica no elipsoide WGS84 (algoritmo de Karney, via geographiclib).
 """
 
 from decimal import Decimal
+from typing import List
 import math
 
+import numpy as np
+from geographiclib.geodesic import Geodesic
+
+from .parecer_rules import DEFAULT_RULES
+
 
 class DistanceCalculator:
     """Calculate distance between two geographic coordinates"""
 
+    # Earth's radius in kilometers
+    EARTH_RADIUS_KM = 6371.0
+
+    # Parecer classification (default rules): distance <= breakpoint[i] -> PARECER_TYPES[i]
+    # Per-tenant rules: app.services.parecer_rules_service.get_tenant_rules
+    PARECER_BREAKPOINTS_KM = DEFAULT_RULES.breakpoints
+    PARECER_TYPES = DEFAULT_RULES.types
+
+    # Versão das regras padrão (hash das faixas e textos): invalida os
+    # pareceres memorizados quando as regras mudam (ver analysis_fingerprint)
+    RULES_VERSION = DEFAULT_RULES.version
+
+    # Distances whose cents fraction is this close to .5 are recomputed with
+    # the scalar path so batch rounding matches round()/Decimal exactly
+    _ROUNDING_TIE_TOLERANCE = 1e-6
+
     @staticmethod
     def haversine(
         lat1: Decimal,
@@ -35,7 +60,7 @@ class DistanceCalculator:
         lon2_f = float(lon2)
 
         # Earth's radius in kilometers
-        R = 6371.0
+        R = DistanceCalculator.EARTH_RADIUS_KM
 
         # Convert degrees to radians
         lat1_rad = math.radians(lat1_f)
@@ -59,6 +84,115 @@ class DistanceCalculator:
 
         return Decimal(str(round(distance_km, 2)))
 
+    @staticmethod
+    def equirectangular(
+        lat1: Decimal,
+        lon1: Decimal,
+        lat2: Decimal,
+        lon2: Decimal
+    ) -> Decimal:
+        """
+        Calculate distance using the equirectangular approximation.
+
+        Fastest mode (no trigonometry besides one cosine); error grows with
+        distance, so it suits screening/pre-filtering rather than laudos.
+
+        Args:
+            lat1: Latitude of point 1
+            lon1: Longitude of point 1
+            lat2: Latitude of point 2
+            lon2: Longitude of point 2
+
+        Returns:
+            Distance in kilometers
+        """
+        lat1_rad = math.radians(float(lat1))
+        lat2_rad = math.radians(float(lat2))
+        dlat = lat2_rad - lat1_rad
+        dlon = math.radians(float(lon2) - float(lon1))
+
+        x = dlon * math.cos((lat1_rad + lat2_rad) / 2)
+        distance_km = DistanceCalculator.EARTH_RADIUS_KM * math.sqrt(x * x + dlat * dlat)
+
+        return Decimal(str(round(distance_km, 2)))
+
+    @staticmethod
+    def equirectangular_batch(lat1, lon1, lat2, lon2) -> np.ndarray:
+        """
+        Vectorized equirectangular distance.
+
+        Args:
+            lat1: Latitudes of points 1
+            lon1: Longitudes of points 1
+            lat2: Latitudes of points 2
+            lon2: Longitudes of points 2
+
+        Returns:
+            float64 array of distances in kilometers, rounded to 2 decimals
+            (NaN where any input coordinate is missing/NaN)
+        """
+        lat1_rad = np.radians(np.asarray(lat1, dtype=np.float64))
+        lat2_rad = np.radians(np.asarray(lat2, dtype=np.float64))
+        dlat = lat2_rad - lat1_rad
+        dlon = np.radians(
+            np.asarray(lon2, dtype=np.float64) - np.asarray(lon1, dtype=np.float64)
+        )
+
+        x = dlon * np.cos((lat1_rad + lat2_rad) / 2)
+        return np.round(DistanceCalculator.EARTH_RADIUS_KM * np.sqrt(x * x + dlat * dlat), 2)
+
+    @staticmethod
+    def geodesic(
+        lat1: Decimal,
+        lon1: Decimal,
+        lat2: Decimal,
+        lon2: Decimal
+    ) -> Decimal:
+        """
+        Calculate geodesic distance on the WGS84 ellipsoid (Karney).
+
+        Accurate to nanometers; use for contested laudos.
+
+        Args:
+            lat1: Latitude of point 1
+            lon1: Longitude of point 1
+            lat2: Latitude of point 2
+            lon2: Longitude of point 2
+
+        Returns:
+            Distance in kilometers
+        """
+        result = Geodesic.WGS84.Inverse(
+            float(lat1), float(lon1), float(lat2), float(lon2), Geodesic.DISTANCE
+        )
+        return Decimal(str(round(result["s12"] / 1000, 2)))
+
+    @staticmethod
+    def geodesic_batch(lat1, lon1, lat2, lon2) -> np.ndarray:
+        """
+        Geodesic distance for many pairs (per-element Karney solution).
+
+        Args:
+            lat1: Latitudes of points 1
+            lon1: Longitudes of points 1
+            lat2: Latitudes of points 2
+            lon2: Longitudes of points 2
+
+        Returns:
+            float64 array of distances in kilometers, rounded to 2 decimals
+            (NaN where any input coordinate is missing/NaN)
+        """
+        arrays = [
+            np.asarray(values, dtype=np.float64).ravel()
+            for values in (lat1, lon1, lat2, lon2)
+        ]
+        inverse = Geodesic.WGS84.Inverse
+        distances = np.full(len(arrays[0]), np.nan)
+        for i, (a, b, c, d) in enumerate(zip(*(values.tolist() for values in arrays))):
+            if not (math.isnan(a) or math.isnan(b) or math.isnan(c) or math.isnan(d)):
+                distances[i] = round(inverse(a, b, c, d, Geodesic.DISTANCE)["s12"] / 1000, 2)
+        return distances
+
     @staticmethod
     def manhattan_distance(
         lat1: Decimal,
@@ -102,16 +236,92 @@ class DistanceCalculator:
         Returns:
             Parecer type (PROXIMAL, MODERADO, DISTANTE, MUITO_DISTANTE)
         """
-        dist = float(distance_km)
+        return DEFAULT_RULES.classify(distance_km)
+
+    @staticmethod
+    def haversine_batch(lat1, lon1, lat2, lon2) -> np.ndarray:
+        """
+        Vectorized Haversine distance for many coordinate pairs.
+
+        Accepts NumPy arrays or any array-like (lists of Decimal, query
+        columns). Results are identical to haversine() for every element:
+        the formula runs in the same operation order, and elements whose
+        rounding to 2 decimals is ambiguous are recomputed with the scalar
+        path.
+
+        Args:
+            lat1: Latitudes of points 1
+            lon1: Longitudes of points 1
+            lat2: Latitudes of points 2
+            lon2: Longitudes of points 2
+
+        Returns:
+            float64 array of distances in kilometers, rounded to 2 decimals
+            (NaN where any input coordinate is missing/NaN)
+        """
+        lat1_f = np.asarray(lat1, dtype=np.float64)
+        lon1_f = np.asarray(lon1, dtype=np.float64)
+        lat2_f = np.asarray(lat2, dtype=np.float64)
+        lon2_f = np.asarray(lon2, dtype=np.float64)
 
-        if dist <= 5:
-            return "PROXIMAL"
-        elif dist <= 20:
-            return "MODERADO"
-        elif dist <= 50:
-            return "DISTANTE"
-        else:
-            return "MUITO_DISTANTE"
+        lat1_rad = np.radians(lat1_f)
+        lon1_rad = np.radians(lon1_f)
+        lat2_rad = np.radians(lat2_f)
+        lon2_rad = np.radians(lon2_f)
+
+        dlat = lat2_rad - lat1_rad
+        dlon = lon2_rad - lon1_rad
+
+        a = (
+            np.sin(dlat / 2) ** 2 +
+            np.cos(lat1_rad) *
+            np.cos(lat2_rad) *
+            np.sin(dlon / 2) ** 2
+        )
+        c = 2 * np.arcsin(np.sqrt(a))
+        distance_km = DistanceCalculator.EARTH_RADIUS_KM * c
+
+        distances = np.round(distance_km, 2)
+
+        # Near-tie elements: defer to the scalar path (round() is correctly rounded)
+        cents = distance_km * 100
+        ambiguous = np.abs(cents - np.floor(cents) - 0.5) < DistanceCalculator._ROUNDING_TIE_TOLERANCE
+        for i in np.flatnonzero(ambiguous):
+            distances.flat[i] = float(DistanceCalculator.haversine(
+                lat1_f.flat[i], lon1_f.flat[i], lat2_f.flat[i], lon2_f.flat[i]
+            ))
+
+        return distances
+
+    @staticmethod
+    def classify_batch(distances_km) -> np.ndarray:
+        """
+        Vectorized get_parecer_type().
+
+        Args:
+            distances_km: Distances in kilometers (array-like)
+
+        Returns:
+            Array of parecer types (PROXIMAL, MODERADO, DISTANTE,
+            MUITO_DISTANTE); empty string where the distance is NaN
+        """
+        return DEFAULT_RULES.classify_batch(distances_km)
+
+    @staticmethod
+    def to_decimals(distances_km) -> List[Decimal]:
+        """
+        Convert batch distances to the Decimal values haversine() returns.
+
+        Args:
+            distances_km: Rounded distances from haversine_batch()
+
+        Returns:
+            List of Decimal (None where the distance is NaN)
+        """
+        return [
+            None if math.isnan(d) else Decimal(str(d))
+            for d in np.asarray(distances_km, dtype=np.float64).tolist()
+        ]
 
     @staticmethod
     def get_parecer_text(
@@ -130,38 +340,4 @@ class DistanceCalculator:
         Returns:
             Generated parecer text
         """
-        tipo = DistanceCalculator.get_parecer_type(distance_km)
-        dist = float(distance_km)
-
-        if tipo == "PROXIMAL":
-            return (
-                f"Análise de Geolocalização: Os endereços estão muito próximos, "
-                f"a uma distância de apenas {dist:.2f} km. "
-                f"Endereço de origem: {endereco_origem}. "
-                f"Endereço de destino: {endereco_destino}. "
-                f"Parecer: APROVADO - Distâncias compatíveis com documentação."
-            )
-        elif tipo == "MODERADO":
-            return (
-                f"Análise de Geolocalização: Os endereços apresentam distância moderada "
-                f"de {dist:.2f} km. "
-                f"Endereço de origem: {endereco_origem}. "
-                f"Endereço de destino: {endereco_destino}. "
-                f"Parecer: ATENÇÃO - Verificar justificativas para variação de endereço."
-            )
-        elif tipo == "DISTANTE":
-            return (
-                f"Análise de Geolocalização: Os endereços estão significativamente afastados, "
-                f"a {dist:.2f} km de distância. "
-                f"Endereço de origem: {endereco_origem}. "
-                f"Endereço de destino: {endereco_destino}. "
-                f"Parecer: ANÁLISE RECOMENDADA - Grande variação geográfica detectada."
-            )
-        else:  # MUITO_DISTANTE
-            return (
-                f"Análise de Geolocalização: Os endereços estão muito distantes, "
-                f"a {dist:.2f} km de distância. "
-                f"Endereço de origem: {endereco_origem}. "
-                f"Endereço de destino: {endereco_destino}. "
-                f"Parecer: RISCO ALTO - Necessária investigação detalhada da documentação."
-            )
+        return DEFAULT_RULES.text(distance_km, endereco_origem, endereco_destino)
@@ -0,0 +1,129 @@
+"""
+Distance Histogram - Buckets fixos em escala logarítmica para distancia_km
+
+Os buckets cobrem de MIN_KM a MAX_KM com BUCKETS_PER_DECADE por década
+(largura relativa de ~26%), mais um bucket inicial [0, MIN_KM) e um
+final [MAX_KM, ∞). Como os limites são fixos, histogramas de dias e
+tenants diferentes se somam bucket a bucket, e contagens podem ser
+mantidas incrementalmente (+1 ao gravar, -1 ao substituir/remover).
+Percentis são estimados interpolando dentro do bucket.
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+import math
+
+MIN_KM = 0.01
+MAX_KM = 100000.0
+BUCKETS_PER_DECADE = 10
+
+_DECADES = int(round(math.log10(MAX_KM / MIN_KM)))
+LAST_BUCKET = _DECADES * BUCKETS_PER_DECADE + 1
+
+# (tenant_id, dia, bucket) -> (contagem, soma_km)
+HistogramKey = Tuple[str, date, int]
+HistogramDeltas = Dict[HistogramKey, Tuple[int, Decimal]]
+
+
+def bucket_index(distance_km) -> int:
+    """Bucket de uma distância (0 = abaixo de MIN_KM, LAST_BUCKET = a partir de MAX_KM)"""
+    distance = float(distance_km)
+    if distance < MIN_KM:
+        return 0
+    if distance >= MAX_KM:
+        return LAST_BUCKET
+    return min(1 + int(math.log10(distance / MIN_KM) * BUCKETS_PER_DECADE), LAST_BUCKET - 1)
+
+
+def bucket_bounds(bucket: int) -> Tuple[float, Optional[float]]:
+    """Limites [de, até) do bucket em km (até = None no último)"""
+    if bucket <= 0:
+        return 0.0, MIN_KM
+    if bucket >= LAST_BUCKET:
+        return MAX_KM, None
+    return (
+        MIN_KM * 10 ** ((bucket - 1) / BUCKETS_PER_DECADE),
+        MIN_KM * 10 ** (bucket / BUCKETS_PER_DECADE),
+    )
+
+
+def add_delta(
+    deltas: HistogramDeltas,
+    tenant_id: str,
+    dia: date,
+    distance_km,
+    sign: int = 1
+) -> None:
+    """Acumular +1/-1 (e ±distância na soma) no bucket da distância"""
+    key = (tenant_id, dia, bucket_index(distance_km))
+    count, total = deltas.get(key, (0, Decimal("0")))
+    deltas[key] = (count + sign, total + sign * Decimal(str(distance_km)))
+
+
+def percentile(counts: Dict[int, int], q: float) -> Optional[float]:
+    """
+    Estimar o percentil q (0-100) a partir das contagens por bucket
+
+    Interpolação geométrica dentro do bucket (linear no primeiro); no
+    último bucket (sem limite superior) retorna o limite inferior.
+    """
+    buckets = sorted((bucket, count) for bucket, count in counts.items() if count > 0)
+    total = sum(count for _, count in buckets)
+    if total == 0:
+        return None
+
+    rank = q / 100 * total
+    cumulative = 0
+    for bucket, count in buckets:
+        if cumulative + count >= rank:
+            low, high = bucket_bounds(bucket)
+            fraction = (rank - cumulative) / count
+            if high is None:
+                return low
+            if bucket == 0:
+                return low + (high - low) * fraction
+            return low * (high / low) ** fraction
+        cumulative += count
+    return bucket_bounds(buckets[-1][0])[0]
+
+
+def summarize(rows: Iterable[Tuple[int, int, Decimal]]) -> dict:
+    """
+    Resumo de um histograma: total, média, p50/p90/p99 e buckets não vazios
+
+    Args:
+        rows: (bucket, contagem, soma_km) já agregados por bucket
+
+    Returns:
+        Dict com total, media_km, p50_km, p90_km, p99_km e buckets
+    """
+    counts: Dict[int, int] = {}
+    soma = Decimal("0")
+    for bucket, count, total_km in rows:
+        if count:
+            counts[bucket] = counts.get(bucket, 0) + int(count)
+            soma += Decimal(str(total_km or 0))
+
+    total = sum(counts.values())
+    buckets: List[dict] = []
+    for bucket in sorted(counts):
+        low, high = bucket_bounds(bucket)
+        buckets.append({
+            "de_km": round(low, 4),
+            "ate_km": None if high is None else round(high, 4),
+            "contagem": counts[bucket],
+        })
+
+    def estimate(q: float) -> Optional[float]:
+        value = percentile(counts, q)
+        return None if value is None else round(value, 2)
+
+    return {
+        "total": total,
+        "media_km": round(float(soma) / total, 2) if total else None,
+        "p50_km": estimate(50),
+        "p90_km": estimate(90),
+        "p99_km": estimate(99),
+        "buckets": buckets,
+    }
@@ -0,0 +1,148 @@
+"""
+Distance Modes - Registro de modos de cálculo de distância
+
+Cada modo troca precisão por velocidade:
+- fast: aproximação equiretangular (triagem em lote)
+- haversine: esfera de raio médio (padrão, comportamento histórico)
+- geodesic: elipsoide WGS84, algoritmo de Karney (laudos contestados)
+
+Seleção (primeira que se aplica):
+1. modo pedido na requisição
+2. DISTANCE_MODE_TENANTS (ex.: "tenant-a:geodesic,tenant-b:fast")
+3. DISTANCE_MODE (padrão: haversine)
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+import os
+
+import numpy as np
+
+from .distance_calculator import DistanceCalculator
+
+DEFAULT_DISTANCE_MODE = "haversine"
+
+
+@dataclass(frozen=True)
+class DistanceMode:
+    """Modo de cálculo de distância (versões escalar e em lote)"""
+
+    name: str
+    description: str
+    scalar: Callable[..., Decimal]
+    batch: Callable[..., np.ndarray]
+
+    def distance(self, lat1, lon1, lat2, lon2) -> Decimal:
+        """Distância em km (Decimal, 2 casas)"""
+        return self.scalar(lat1, lon1, lat2, lon2)
+
+    def distance_batch(self, lat1, lon1, lat2, lon2) -> np.ndarray:
+        """Distâncias em km (float64 arredondado a 2 casas; NaN se faltar coordenada)"""
+        return self.batch(lat1, lon1, lat2, lon2)
+
+
+_modes: Dict[str, DistanceMode] = {}
+
+
+def register_distance_mode(
+    name: str,
+    description: str,
+    scalar: Callable[..., Decimal],
+    batch: Callable[..., np.ndarray],
+) -> DistanceMode:
+    """
+    Registrar modo de distância
+
+    Args:
+        name: Nome do modo (usado em requisições e configuração)
+        description: Descrição curta (precisão / uso)
+        scalar: f(lat1, lon1, lat2, lon2) -> Decimal
+        batch: f(lat1s, lon1s, lat2s, lon2s) -> np.ndarray
+
+    Returns:
+        DistanceMode registrado
+    """
+    mode = DistanceMode(name=name, description=description, scalar=scalar, batch=batch)
+    _modes[name] = mode
+    return mode
+
+
+def get_distance_mode(name: Optional[str] = None) -> DistanceMode:
+    """
+    Obter modo pelo nome
+
+    Raises:
+        ValueError: Se o modo não estiver registrado
+    """
+    name = name or DEFAULT_DISTANCE_MODE
+    try:
+        return _modes[name]
+    except KeyError:
+        raise ValueError(
+            f"Modo de distância desconhecido: {name}. Disponíveis: {', '.join(sorted(_modes))}"
+        )
+
+
+def list_distance_modes() -> List[DistanceMode]:
+    """Modos registrados (ordem de registro)"""
+    return list(_modes.values())
+
+
+def _tenant_modes() -> Dict[str, str]:
+    """Ler DISTANCE_MODE_TENANTS ("tenant:modo,tenant:modo")"""
+    mapping = {}
+    for item in os.getenv("DISTANCE_MODE_TENANTS", "").split(","):
+        tenant_id, _, mode = item.partition(":")
+        if tenant_id.strip() and mode.strip():
+            mapping[tenant_id.strip()] = mode.strip()
+    return mapping
+
+
+def resolve_distance_mode(
+    requested: Optional[str] = None,
+    tenant_id: Optional[str] = None,
+) -> DistanceMode:
+    """
+    Escolher modo: requisição > configuração do tenant > DISTANCE_MODE
+
+    Args:
+        requested: Modo pedido explicitamente (None = usar configuração)
+        tenant_id: Tenant da requisição
+
+    Returns:
+        DistanceMode
+    """
+    if requested:
+        return get_distance_mode(requested)
+    if tenant_id:
+        tenant_mode = _tenant_modes().get(tenant_id)
+        if tenant_mode:
+            return get_distance_mode(tenant_mode)
+    return get_distance_mode(os.getenv("DISTANCE_MODE", DEFAULT_DISTANCE_MODE))
+
+
+# ============================================================================
+# Modos padrão
+# ============================================================================
+
+register_distance_mode(
+    "fast",
+    "Aproximação equiretangular: mais rápida, erro cresce com a distância (triagem)",
+    DistanceCalculator.equirectangular,
+    DistanceCalculator.equirectangular_batch,
+)
+
+register_distance_mode(
+    "haversine",
+    "Esfera de raio médio (6371 km): erro de até ~0.5% (padrão)",
+    DistanceCalculator.haversine,
+    DistanceCalculator.haversine_batch,
+)
+
+register_distance_mode(
+    "geodesic",
+    "Geodésica no elipsoide WGS84 (Karney): precisão submilimétrica (laudos contestados)",
+    DistanceCalculator.geodesic,
+    DistanceCalculator.geodesic_batch,
+)
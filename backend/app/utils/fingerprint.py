@@ -0,0 +1,52 @@
+"""
+Fingerprint - Impressão digital das entradas de uma análise de geolocalização
+
+Duas análises com a mesma impressão digital produzem o mesmo parecer:
+ela cobre os dois pares de coordenadas, os dois endereços, o modo de
+distância e a versão das regras de classificação.
+"""
+
+from decimal import Decimal
+from typing import Optional
+import hashlib
+
+# Escala das colunas de coordenadas (Numeric(..., scale=8))
+COORDINATE_QUANTUM = Decimal("0.00000001")
+
+
+def _coordinate(value) -> str:
+    if value is None:
+        return ""
+    return str(Decimal(str(value)).quantize(COORDINATE_QUANTUM))
+
+
+def analysis_fingerprint(
+    latitude_origem,
+    longitude_origem,
+    latitude_destino,
+    longitude_destino,
+    endereco_origem: Optional[str],
+    endereco_destino: Optional[str],
+    modo_distancia: str,
+    rules_version: str,
+) -> str:
+    """
+    Calcular impressão digital (SHA-256 hex) das entradas da análise
+
+    Coordenadas são normalizadas para a escala gravada no banco, de modo
+    que Decimal lido do banco e float/str da requisição coincidam.
+
+    Returns:
+        String hexadecimal de 64 caracteres
+    """
+    parts = (
+        _coordinate(latitude_origem),
+        _coordinate(longitude_origem),
+        _coordinate(latitude_destino),
+        _coordinate(longitude_destino),
+        endereco_origem or "",
+        endereco_destino or "",
+        modo_distancia,
+        rules_version,
+    )
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
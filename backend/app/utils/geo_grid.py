@@ -0,0 +1,388 @@
+"""
+GeoGridIndex - Índice espacial em memória (grade regular) para coordenadas
+
+Cada célula da grade guarda seus pontos em arrays NumPy contíguos
+(ids, latitudes, longitudes, CPFs) que crescem por duplicação; remoção
+troca o último elemento para a posição liberada. Consultas percorrem só
+as células vizinhas ao ponto, então k-vizinhos e densidade custam
+milissegundos mesmo com centenas de milhares de contratos.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import math
+import threading
+
+import numpy as np
+
+from .distance_calculator import DistanceCalculator
+
+CellKey = Tuple[int, int]
+
+# 1 grau de latitude ~ 111.19 km (mesmo raio da Terra do Haversine)
+KM_PER_DEGREE = math.pi * DistanceCalculator.EARTH_RADIUS_KM / 180
+
+
+class _Cell:
+    """Pontos de uma célula em arrays paralelos (capacidade dobra ao encher)"""
+
+    __slots__ = ("size", "ids", "lats", "lons", "cpfs")
+
+    INITIAL_CAPACITY = 4
+
+    def __init__(self):
+        self.size = 0
+        self.ids = np.empty(self.INITIAL_CAPACITY, dtype=np.int64)
+        self.lats = np.empty(self.INITIAL_CAPACITY, dtype=np.float64)
+        self.lons = np.empty(self.INITIAL_CAPACITY, dtype=np.float64)
+        self.cpfs = np.empty(self.INITIAL_CAPACITY, dtype=np.int64)
+
+    def append(self, contrato_id: int, lat: float, lon: float, cpf: int) -> int:
+        if self.size == len(self.ids):
+            capacity = 2 * len(self.ids)
+            for name in ("ids", "lats", "lons", "cpfs"):
+                grown = np.empty(capacity, dtype=getattr(self, name).dtype)
+                grown[:self.size] = getattr(self, name)[:self.size]
+                setattr(self, name, grown)
+
+        slot = self.size
+        self.ids[slot] = contrato_id
+        self.lats[slot] = lat
+        self.lons[slot] = lon
+        self.cpfs[slot] = cpf
+        self.size += 1
+        return slot
+
+    def remove(self, slot: int) -> Optional[int]:
+        """Remover slot; retorna o id movido para o slot (ou None)"""
+        last = self.size - 1
+        moved = None
+        if slot != last:
+            self.ids[slot] = self.ids[last]
+            self.lats[slot] = self.lats[last]
+            self.lons[slot] = self.lons[last]
+            self.cpfs[slot] = self.cpfs[last]
+            moved = int(self.ids[slot])
+        self.size = last
+        return moved
+
+
+@dataclass
+class Hotspot:
+    """Concentração de contratos num mesmo local"""
+
+    latitude: float
+    longitude: float
+    raio_km: float
+    contratos: int
+    cpfs_distintos: int
+    contrato_ids: List[int]
+
+    def to_dict(self) -> Dict:
+        """Converter para dicionário"""
+        return {
+            "latitude": round(self.latitude, 6),
+            "longitude": round(self.longitude, 6),
+            "raio_km": round(self.raio_km, 3),
+            "contratos": self.contratos,
+            "cpfs_distintos": self.cpfs_distintos,
+            "contrato_ids": self.contrato_ids,
+        }
+
+
+class GeoGridIndex:
+    """
+    Índice de pontos em grade regular de cell_size_km
+
+    Operações:
+    - upsert/remove: O(1)
+    - knn / density: percorre apenas anéis de células ao redor do ponto
+    - hotspots: agrega blocos 3x3 de células (clusters que cruzam a borda
+      de uma célula não são divididos)
+
+    Thread-safe (um lock por índice).
+    """
+
+    def __init__(self, cell_size_km: float = 0.1):
+        self.cell_size_km = cell_size_km
+        self.cell_size_deg = cell_size_km / KM_PER_DEGREE
+        self._cells: Dict[CellKey, _Cell] = {}
+        self._positions: Dict[int, Tuple[CellKey, int]] = {}  # contrato_id -> (célula, slot)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, contrato_id: int) -> bool:
+        return contrato_id in self._positions
+
+    def _key(self, lat: float, lon: float) -> CellKey:
+        return (
+            math.floor(lat / self.cell_size_deg),
+            math.floor(lon / self.cell_size_deg),
+        )
+
+    # ========================================================================
+    # Escrita
+    # ========================================================================
+
+    def upsert(self, contrato_id: int, latitude, longitude, cpf) -> None:
+        """
+        Inserir ou mover um contrato
+
+        Args:
+            contrato_id: ID do contrato
+            latitude: Latitude (None remove o contrato do índice)
+            longitude: Longitude
+            cpf: CPF do cliente (string de dígitos)
+        """
+        if latitude is None or longitude is None:
+            self.remove(contrato_id)
+            return
+
+        lat = float(latitude)
+        lon = float(longitude)
+        key = self._key(lat, lon)
+
+        with self._lock:
+            self._remove_locked(contrato_id)
+            cell = self._cells.get(key)
+            if cell is None:
+                cell = self._cells[key] = _Cell()
+            slot = cell.append(contrato_id, lat, lon, int(cpf or 0))
+            self._positions[contrato_id] = (key, slot)
+
+    def remove(self, contrato_id: int) -> bool:
+        """Remover contrato do índice"""
+        with self._lock:
+            return self._remove_locked(contrato_id)
+
+    def _remove_locked(self, contrato_id: int) -> bool:
+        position = self._positions.pop(contrato_id, None)
+        if position is None:
+            return False
+
+        key, slot = position
+        cell = self._cells[key]
+        moved = cell.remove(slot)
+        if moved is not None:
+            self._positions[moved] = (key, slot)
+        if cell.size == 0:
+            del self._cells[key]
+        return True
+
+    # ========================================================================
+    # Consultas
+    # ========================================================================
+
+    def _ring(self, center: CellKey, radius: int) -> List[_Cell]:
+        """Células no anel de raio (em células) ao redor de center"""
+        row0, col0 = center
+        if radius == 0:
+            cell = self._cells.get(center)
+            return [cell] if cell else []
+
+        keys = []
+        for col in range(col0 - radius, col0 + radius + 1):
+            keys.append((row0 - radius, col))
+            keys.append((row0 + radius, col))
+        for row in range(row0 - radius + 1, row0 + radius):
+            keys.append((row, col0 - radius))
+            keys.append((row, col0 + radius))
+        return [self._cells[key] for key in keys if key in self._cells]
+
+    @staticmethod
+    def _gather(cells: List[_Cell]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        if not cells:
+            empty_i = np.empty(0, dtype=np.int64)
+            empty_f = np.empty(0, dtype=np.float64)
+            return empty_i, empty_f, empty_f, empty_i
+        return (
+            np.concatenate([cell.ids[:cell.size] for cell in cells]),
+            np.concatenate([cell.lats[:cell.size] for cell in cells]),
+            np.concatenate([cell.lons[:cell.size] for cell in cells]),
+            np.concatenate([cell.cpfs[:cell.size] for cell in cells]),
+        )
+
+    def _cells_within(self, lat: float, lon: float, radius_km: float) -> List[_Cell]:
+        """Células que podem conter pontos a até radius_km"""
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        rows = math.ceil(radius_km / self.cell_size_km)
+        cols = math.ceil(radius_km / (self.cell_size_km * cos_lat))
+        row0, col0 = self._key(lat, lon)
+
+        if (2 * rows + 1) * (2 * cols + 1) > len(self._cells):
+            # Área maior que o índice: filtrar as células existentes
+            return [
+                cell for (row, col), cell in self._cells.items()
+                if abs(row - row0) <= rows and abs(col - col0) <= cols
+            ]
+        return [
+            self._cells[(row, col)]
+            for row in range(row0 - rows, row0 + rows + 1)
+            for col in range(col0 - cols, col0 + cols + 1)
+            if (row, col) in self._cells
+        ]
+
+    def knn(self, latitude, longitude, k: int = 10, max_radius_km: float = 50.0) -> List[Tuple[int, float]]:
+        """
+        k contratos mais próximos de um ponto
+
+        Percorre anéis de células até ter k candidatos e o anel seguinte
+        estar mais longe que o k-ésimo.
+
+        Returns:
+            Lista de (contrato_id, distância em km), mais próximos primeiro
+        """
+        lat = float(latitude)
+        lon = float(longitude)
+        center = self._key(lat, lon)
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        # Distância mínima garantida até pontos fora de r anéis (lado mais estreito da célula)
+        ring_km = self.cell_size_km * min(1.0, cos_lat)
+        max_rings = math.ceil(max_radius_km / ring_km) + 1
+
+        with self._lock:
+            cells: List[_Cell] = []
+            for radius in range(max_rings + 1):
+                if (2 * radius + 1) ** 2 > len(self._cells):
+                    # Índice esparso: mais barato filtrar as células existentes
+                    cells = self._cells_within(lat, lon, max_radius_km)
+                    break
+                cells.extend(self._ring(center, radius))
+                count = sum(cell.size for cell in cells)
+                if count >= k and radius * ring_km >= self._kth_distance(cells, lat, lon, k):
+                    break
+            ids, lats, lons, _ = self._gather(cells)
+
+        if len(ids) == 0:
+            return []
+
+        distances = DistanceCalculator.haversine_batch(
+            np.full(len(ids), lat), np.full(len(ids), lon), lats, lons
+        )
+        order = np.argsort(distances, kind="stable")
+        order = order[distances[order] <= max_radius_km][:k]
+        return [(int(ids[i]), float(distances[i])) for i in order]
+
+    def _kth_distance(self, cells: List[_Cell], lat: float, lon: float, k: int) -> float:
+        _, lats, lons, _ = self._gather(cells)
+        distances = DistanceCalculator.haversine_batch(
+            np.full(len(lats), lat), np.full(len(lats), lon), lats, lons
+        )
+        return float(np.partition(distances, k - 1)[k - 1])
+
+    def density(self, latitude, longitude, radius_km: float) -> Dict:
+        """
+        Contratos e CPFs distintos a até radius_km de um ponto
+
+        Returns:
+            Dict com contratos, cpfs_distintos e contrato_ids
+        """
+        lat = float(latitude)
+        lon = float(longitude)
+
+        with self._lock:
+            ids, lats, lons, cpfs = self._gather(self._cells_within(lat, lon, radius_km))
+
+        if len(ids) == 0:
+            return {"contratos": 0, "cpfs_distintos": 0, "contrato_ids": []}
+
+        distances = DistanceCalculator.haversine_batch(
+            np.full(len(ids), lat), np.full(len(ids), lon), lats, lons
+        )
+        inside = distances <= radius_km
+        return {
+            "contratos": int(inside.sum()),
+            "cpfs_distintos": int(len(np.unique(cpfs[inside]))),
+            "contrato_ids": sorted(int(i) for i in ids[inside]),
+        }
+
+    def _block_counts(self, keys: List[CellKey]) -> np.ndarray:
+        """
+        Pontos no bloco 3x3 centrado em cada célula
+
+        Células codificadas como inteiros ordenados; os 9 vizinhos de todas
+        as células são localizados de uma vez com searchsorted.
+        """
+        coords = np.array(keys, dtype=np.int64)
+        codes = (coords[:, 0] << 32) + (coords[:, 1] + (1 << 31))
+        sizes = np.fromiter((self._cells[key].size for key in keys), dtype=np.int64, count=len(keys))
+
+        order = np.argsort(codes)
+        sorted_codes = codes[order]
+        sorted_sizes = sizes[order]
+
+        # Alvos ordenados (sorted_codes + constante): searchsorted com boa localidade
+        sorted_counts = np.zeros(len(keys), dtype=np.int64)
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                target = sorted_codes + (dr << 32) + dc
+                pos = np.minimum(np.searchsorted(sorted_codes, target), len(keys) - 1)
+                sorted_counts += np.where(sorted_codes[pos] == target, sorted_sizes[pos], 0)
+
+        counts = np.empty_like(sorted_counts)
+        counts[order] = sorted_counts
+        return counts
+
+    def hotspots(
+        self,
+        min_contratos: int = 5,
+        min_cpfs: int = 2,
+        limit: int = 50,
+    ) -> List[Hotspot]:
+        """
+        Locais com muitos contratos de CPFs diferentes
+
+        Cada célula soma os pontos do seu bloco 3x3; blocos acima dos
+        limiares viram hotspots em ordem decrescente de contratos, sem
+        sobreposição (células já usadas por um hotspot são descartadas).
+
+        Args:
+            min_contratos: Mínimo de contratos no bloco
+            min_cpfs: Mínimo de CPFs distintos no bloco
+            limit: Máximo de hotspots
+
+        Returns:
+            Lista de Hotspot, mais densos primeiro
+        """
+        with self._lock:
+            if not self._cells:
+                return []
+
+            keys = list(self._cells)
+            block_counts = self._block_counts(keys)
+            dense = np.flatnonzero(block_counts >= min_contratos)
+            candidates = [
+                keys[i] for i in sorted(dense, key=lambda i: (-block_counts[i], keys[i]))
+            ]
+
+            used = set()
+            result: List[Hotspot] = []
+            for row, col in candidates:
+                block = [
+                    (r, c)
+                    for r in (row - 1, row, row + 1)
+                    for c in (col - 1, col, col + 1)
+                    if (r, c) in self._cells and (r, c) not in used
+                ]
+                ids, lats, lons, cpfs = self._gather([self._cells[key] for key in block])
+                if len(ids) < min_contratos:
+                    continue
+                distinct_cpfs = len(np.unique(cpfs))
+                if distinct_cpfs < min_cpfs:
+                    continue
+
+                used.update(block)
+                result.append(Hotspot(
+                    latitude=float(lats.mean()),
+                    longitude=float(lons.mean()),
+                    raio_km=1.5 * self.cell_size_km,
+                    contratos=len(ids),
+                    cpfs_distintos=distinct_cpfs,
+                    contrato_ids=sorted(int(i) for i in ids),
+                ))
+                if len(result) >= limit:
+                    break
+
+        return result
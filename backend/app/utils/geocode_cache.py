@@ -0,0 +1,180 @@
+"""
+Geocode Cache - Normalização de endereços e cache LRU em memória
+
+Endereços que diferem só em caixa, acentos, pontuação, abreviações,
+marcador de número ou complemento levam à mesma chave
+(normalize_address / cache_key, via address_normalizer), então
+"Av. Paulista, nº 1000 - apto 5" e "avenida paulista 1000" compartilham
+a entrada; o CEP (ou o setor dele) entra na chave. O LRU guarda GeocodeEntry
+com validade própria (resultados positivos e negativos têm TTLs
+diferentes) e conta acertos por nível para as métricas de hit ratio.
+
+Geocodificação reversa: as coordenadas são encaixadas numa grade de
+células de ~grid_meters de lado (reverse_cache_key), então pontos que
+diferem só nas últimas casas decimais compartilham a entrada.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+import hashlib
+import math
+import re
+import threading
+import time
+
+from .address_normalizer import address_key, fold
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+# Metros por grau de latitude (esfera de raio médio)
+METERS_PER_DEGREE = 111_195
+
+
+def normalize_address(address: str, country: str = "Brazil") -> str:
+    """
+    Normalizar endereço para chave de cache
+
+    Chave canônica do endereço (address_normalizer: minúsculas, sem
+    acentos, abreviações expandidas, sem complemento, com o setor do
+    CEP); o país entra no final.
+
+    Args:
+        address: Endereço livre
+        country: País
+
+    Returns:
+        Endereço normalizado
+    """
+    return f"{address_key(address)} {_NON_ALNUM.sub(' ', fold(country)).strip()}".strip()
+
+
+def cache_key(normalized: str) -> str:
+    """Chave de tamanho fixo (SHA-256 hex) de um endereço normalizado"""
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def grid_cell(latitude, longitude, grid_meters: float) -> Tuple[int, int]:
+    """
+    Célula (linha, coluna) da grade de ~grid_meters que contém o ponto
+
+    A linha tem altura fixa em graus; a largura de cada linha em graus de
+    longitude cresce com 1/cos(latitude do centro da linha), de modo que
+    as células têm ~grid_meters de lado em qualquer latitude.
+    """
+    lat_step = grid_meters / METERS_PER_DEGREE
+    row = math.floor(float(latitude) / lat_step)
+    center = min(abs((row + 0.5) * lat_step), 89.9)
+    lon_step = lat_step / math.cos(math.radians(center))
+    return row, math.floor(float(longitude) / lon_step)
+
+
+def reverse_cache_key(latitude, longitude, grid_meters: float) -> str:
+    """Chave de cache reverso: tamanho da grade + célula ("10m:-262028:-475496")"""
+    row, col = grid_cell(latitude, longitude, grid_meters)
+    return f"{grid_meters:g}m:{row}:{col}"
+
+
+@dataclass(frozen=True)
+class GeocodeEntry:
+    """Resultado de geocodificação em cache (latitude None = não encontrado)"""
+
+    latitude: Optional[Decimal]
+    longitude: Optional[Decimal]
+    display_name: Optional[str]
+    provider: str
+    consultado_em: datetime
+
+    @property
+    def encontrado(self) -> bool:
+        return self.latitude is not None and self.longitude is not None
+
+    def as_result(self) -> Optional[Tuple[Decimal, Decimal, str]]:
+        """Mesmo formato de NominatimClient.geocode (None = não encontrado)"""
+        if not self.encontrado:
+            return None
+        return (self.latitude, self.longitude, self.display_name or "")
+
+
+class LRUCache:
+    """LRU thread-safe com validade por entrada (relógio monotônico)"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[object, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str):
+        """Valor da chave (None se ausente ou expirado); marca como recente"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value, ttl_seconds: float) -> None:
+        """Gravar valor válido por ttl_seconds (descarta o menos recente se cheio)"""
+        if self.max_size <= 0 or ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class CacheStats:
+    """Contadores de acerto/erro do cache em dois níveis (thread-safe)"""
+
+    COUNTERS = ("memoria", "banco", "negativos", "provedor", "erros")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts: Dict[str, int] = {name: 0 for name in self.COUNTERS}
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def to_dict(self) -> dict:
+        """
+        Contadores e taxas de acerto
+
+        memoria/banco: acertos em cada nível (incluem negativos), negativos:
+        acertos de "não encontrado", provedor: consultas que saíram do
+        processo e foram respondidas, erros: falhas do provedor.
+        """
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts[name] for name in ("memoria", "banco", "provedor", "erros"))
+        hits = counts["memoria"] + counts["banco"]
+        return {
+            **counts,
+            "total": total,
+            "hit_ratio": round(hits / total, 4) if total else None,
+            "hit_ratio_memoria": round(counts["memoria"] / total, 4) if total else None,
+        }
+
+
+class ReverseCacheStats(CacheStats):
+    """Contadores do cache reverso; vizinhos: acertos no banco por proximidade"""
+
+    COUNTERS = CacheStats.COUNTERS + ("vizinhos",)
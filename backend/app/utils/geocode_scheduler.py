@@ -0,0 +1,495 @@
+"""
+Geocode Scheduler - Fila de consultas ao Nominatim com limite global
+
+A política de uso do Nominatim permite ~1 requisição/s por aplicação.
+Todas as consultas do processo passam por um único GeocodeScheduler, que
+roda no loop de fundo (app.utils.loop_thread):
+
+- Limite global: token bucket compartilhado por todos os workers no Redis
+  (GEOCODE_RATE_LIMIT_REDIS_URL). Sem Redis configurado, ou enquanto ele
+  estiver fora, vale um bucket local do processo.
+- Coalescência: consultas idênticas (mesmo endereço normalizado) na fila
+  ou em andamento compartilham uma única requisição HTTP.
+- Prioridades: INTERACTIVE (análises do usuário) sai sempre antes de
+  BACKLOG (jobs em lote). Uma consulta de backlog que recebe um pedido
+  interativo idêntico sobe de faixa.
+- Abandono: quando o último chamador de uma consulta ainda na fila
+  desiste (GEOCODE_QUEUE_TIMEOUT_SECONDS ou cancelamento), ela sai da fila
+  sem gastar token nem requisição.
+- Métricas: tempo de espera na fila por faixa, profundidade da fila e
+  consultas coalescidas (geocode_scheduler_stats).
+
+As consultas despachadas vão para o Geocoder (app.utils.geocoder), que
+escolhe entre os backends configurados com hedge e circuit breaker.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from decimal import Decimal
+from enum import IntEnum
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+import asyncio
+import itertools
+import logging
+import os
+import threading
+import time
+
+import redis.asyncio as redis
+
+from .geocode_cache import cache_key, normalize_address
+from .geocoder import get_geocoder
+from .loop_thread import get_background_loop, run_sync
+from .nominatim_client import NominatimClient, NominatimError
+
+logger = logging.getLogger(__name__)
+
+GEOCODE_RATE_LIMIT_PER_SECOND = float(os.getenv("GEOCODE_RATE_LIMIT_PER_SECOND", "1"))
+GEOCODE_RATE_LIMIT_BURST = float(os.getenv("GEOCODE_RATE_LIMIT_BURST", "1"))
+GEOCODE_RATE_LIMIT_KEY = os.getenv("GEOCODE_RATE_LIMIT_KEY", "geocode:nominatim:bucket")
+GEOCODE_QUEUE_TIMEOUT_SECONDS = float(os.getenv("GEOCODE_QUEUE_TIMEOUT_SECONDS", "30"))
+
+# Segundos sem tentar o Redis depois de uma falha (usa o bucket local)
+REDIS_RETRY_SECONDS = 30
+WAIT_SAMPLES = 1000
+
+
+class GeocodePriority(IntEnum):
+    """Faixas da fila (menor valor sai primeiro)"""
+
+    INTERACTIVE = 0
+    BACKLOG = 1
+
+
+class LocalTokenBucket:
+    """Token bucket do processo (thread-safe)"""
+
+    kind = "local"
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    async def reserve(self) -> float:
+        """
+        Reservar um token
+
+        O saldo pode ficar negativo: quem reserva recebe quanto tempo
+        esperar até o seu token existir.
+
+        Returns:
+            Segundos a esperar antes de usar o token (0 = imediato)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate) - 1
+            self._updated = now
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def close(self) -> None:
+        pass
+
+
+# Mesma lógica do LocalTokenBucket, atômica no Redis e com o relógio do
+# servidor Redis (workers em máquinas diferentes não dependem dos seus
+# relógios). ARGV: tokens por ms, rajada. Retorna ms a esperar.
+_RESERVE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1000)
+if tokens >= 0 then
+    return 0
+end
+return math.ceil(-tokens / rate)
+"""
+
+
+class RedisTokenBucket:
+    """Token bucket compartilhado entre processos (Redis), com fallback local"""
+
+    kind = "redis"
+
+    def __init__(self, url: str, rate: float, burst: float, key: str = GEOCODE_RATE_LIMIT_KEY):
+        self.rate = rate
+        self.burst = burst
+        self.key = key
+        self.fallback = LocalTokenBucket(rate, burst)
+        self._redis = redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=1)
+        self._script = self._redis.register_script(_RESERVE_SCRIPT)
+        self._retry_at = 0.0
+
+    @property
+    def degraded(self) -> bool:
+        """Usando o bucket local por falha recente do Redis"""
+        return time.monotonic() < self._retry_at
+
+    async def reserve(self) -> float:
+        """
+        Reservar um token no bucket global
+
+        Returns:
+            Segundos a esperar antes de usar o token (0 = imediato)
+        """
+        if not self.degraded:
+            try:
+                wait_ms = await self._script(keys=[self.key], args=[self.rate / 1000, self.burst])
+                return int(wait_ms) / 1000
+            except (redis.RedisError, OSError) as e:
+                self._retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+                logger.warning(f"Geocode rate limit: Redis unavailable, using local bucket: {e}")
+        return await self.fallback.reserve()
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def build_token_bucket() -> "LocalTokenBucket | RedisTokenBucket":
+    """Bucket conforme o ambiente (Redis se GEOCODE_RATE_LIMIT_REDIS_URL/REDIS_URL)"""
+    url = os.getenv("GEOCODE_RATE_LIMIT_REDIS_URL") or os.getenv("REDIS_URL")
+    if url:
+        return RedisTokenBucket(url, GEOCODE_RATE_LIMIT_PER_SECOND, GEOCODE_RATE_LIMIT_BURST)
+    return LocalTokenBucket(GEOCODE_RATE_LIMIT_PER_SECOND, GEOCODE_RATE_LIMIT_BURST)
+
+
+class SchedulerStats:
+    """Métricas da fila por faixa (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._queued = {p: 0 for p in GeocodePriority}
+            self._dispatched = {p: 0 for p in GeocodePriority}
+            self._abandoned = {p: 0 for p in GeocodePriority}
+            self._wait_total = {p: 0.0 for p in GeocodePriority}
+            self._wait_max = {p: 0.0 for p in GeocodePriority}
+            self._waits = {p: deque(maxlen=WAIT_SAMPLES) for p in GeocodePriority}
+            self._coalesced = 0
+
+    def enqueued(self, priority: GeocodePriority) -> None:
+        with self._lock:
+            self._queued[priority] += 1
+
+    def promoted(self, old: GeocodePriority, new: GeocodePriority) -> None:
+        with self._lock:
+            self._queued[old] -= 1
+            self._queued[new] += 1
+
+    def coalesced(self) -> None:
+        with self._lock:
+            self._coalesced += 1
+
+    def abandoned(self, priority: GeocodePriority) -> None:
+        with self._lock:
+            self._queued[priority] -= 1
+            self._abandoned[priority] += 1
+
+    def dispatched(self, priority: GeocodePriority, wait: float) -> None:
+        with self._lock:
+            self._queued[priority] -= 1
+            self._dispatched[priority] += 1
+            self._wait_total[priority] += wait
+            self._wait_max[priority] = max(self._wait_max[priority], wait)
+            self._waits[priority].append(wait)
+
+    def to_dict(self) -> dict:
+        """
+        Métricas por faixa
+
+        fila: consultas aguardando token, despachadas: consultas enviadas ao
+        provedor, abandonadas: retiradas da fila sem chamador, espera_*: segundos entre entrar na fila e sair para o
+        provedor (p50/p95 sobre as últimas WAIT_SAMPLES).
+        """
+        with self._lock:
+            lanes = {}
+            for p in GeocodePriority:
+                waits = sorted(self._waits[p])
+                count = self._dispatched[p]
+                lanes[p.name.lower()] = {
+                    "fila": self._queued[p],
+                    "despachadas": count,
+                    "abandonadas": self._abandoned[p],
+                    "espera_media_s": round(self._wait_total[p] / count, 4) if count else None,
+                    "espera_p50_s": round(waits[len(waits) // 2], 4) if waits else None,
+                    "espera_p95_s": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 4) if waits else None,
+                    "espera_max_s": round(self._wait_max[p], 4) if count else None,
+                }
+            return {"coalescidas": self._coalesced, "faixas": lanes}
+
+
+@dataclass(eq=False)
+class _Job:
+    key: str
+    factory: Callable[[], Awaitable]
+    priority: GeocodePriority
+    future: asyncio.Future
+    enqueued_at: float
+    dispatched: bool = False
+    # Chamadores aguardando; sem nenhum antes do despacho a consulta é abandonada
+    waiters: int = 0
+    abandoned: bool = False
+
+
+class GeocodeScheduler:
+    """Fila com prioridade, coalescência e limite global à frente do geocoder"""
+
+    def __init__(self, client: NominatimClient, bucket=None):
+        """
+        Args:
+            client: Geocoder ou cliente com a interface do NominatimClient
+            bucket: Token bucket (padrão: build_token_bucket())
+        """
+        self.client = client
+        self.bucket = bucket or build_token_bucket()
+        self.stats = SchedulerStats()
+        # Estado abaixo só é tocado no loop de fundo
+        self._pending: Dict[str, _Job] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+        self._seq = itertools.count()
+
+    def lane(self, priority: GeocodePriority) -> "GeocodeLane":
+        """Visão com prioridade fixa (mesma interface do NominatimClient)"""
+        return GeocodeLane(self, priority)
+
+    async def search(
+        self,
+        address: str,
+        country: str = "Brazil",
+        priority: GeocodePriority = GeocodePriority.INTERACTIVE
+    ) -> Optional[Tuple[Decimal, Decimal, str]]:
+        """
+        NominatimClient.search pela fila
+
+        Raises:
+            NominatimError: Falha do provedor ou espera acima de
+                GEOCODE_QUEUE_TIMEOUT_SECONDS (faixa interativa)
+        """
+        key = "search:" + cache_key(normalize_address(address, country))
+        return await self._run(key, lambda: self.client.search(address, country), priority)
+
+    async def reverse_geocode(
+        self,
+        latitude: Decimal,
+        longitude: Decimal,
+        priority: GeocodePriority = GeocodePriority.INTERACTIVE
+    ) -> Optional[str]:
+        """NominatimClient.reverse_geocode pela fila (None em falha)"""
+        key = f"reverse:{Decimal(latitude):.6f},{Decimal(longitude):.6f}"
+        try:
+            return await self._run(key, lambda: self.client.reverse_geocode(latitude, longitude), priority)
+        except NominatimError as e:
+            logger.error(f"Error reverse geocoding {latitude}, {longitude}: {e}")
+            return None
+
+    def search_sync(self, address: str, country: str = "Brazil", priority=GeocodePriority.INTERACTIVE):
+        """search para código síncrono"""
+        return run_sync(self.search(address, country, priority))
+
+    def reverse_geocode_sync(self, latitude: Decimal, longitude: Decimal, priority=GeocodePriority.INTERACTIVE):
+        """reverse_geocode para código síncrono"""
+        return run_sync(self.reverse_geocode(latitude, longitude, priority))
+
+    def queue_timeout(self, priority: GeocodePriority) -> Optional[float]:
+        """Espera máxima (fila + consulta); backlog espera o quanto for preciso"""
+        return GEOCODE_QUEUE_TIMEOUT_SECONDS if priority == GeocodePriority.INTERACTIVE else None
+
+    async def close(self) -> None:
+        """Parar o despacho e falhar as consultas pendentes"""
+        await self._on_background_loop(self._close())
+
+    async def _on_background_loop(self, coro):
+        loop = get_background_loop()
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    async def _run(self, key: str, factory: Callable[[], Awaitable], priority: GeocodePriority):
+        return await self._on_background_loop(self._submit(key, factory, GeocodePriority(priority)))
+
+    async def _submit(self, key: str, factory: Callable[[], Awaitable], priority: GeocodePriority):
+        job = self._pending.get(key)
+        if job is None:
+            job = _Job(key, factory, priority, asyncio.get_running_loop().create_future(), time.monotonic())
+            # Marca a exceção como lida mesmo se todos os chamadores desistirem
+            job.future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._pending[key] = job
+            self.stats.enqueued(priority)
+            self._push(job)
+        else:
+            self.stats.coalesced()
+            if priority < job.priority and not job.dispatched:
+                # A entrada antiga na faixa lenta passa a ser ignorada
+                self.stats.promoted(job.priority, priority)
+                job.priority = priority
+                self._push(job)
+
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        job.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(job.future), self.queue_timeout(priority))
+        except asyncio.TimeoutError as e:
+            raise NominatimError("geocode queue timeout") from e
+        finally:
+            job.waiters -= 1
+            if job.waiters == 0 and not job.dispatched and not job.future.done():
+                self._abandon(job)
+
+    def _abandon(self, job: _Job) -> None:
+        """Retirar da fila a consulta sem chamadores (_live passa a ignorá-la)"""
+        job.abandoned = True
+        if self._pending.get(job.key) is job:
+            del self._pending[job.key]
+        self.stats.abandoned(job.priority)
+        job.future.set_exception(NominatimError("geocode query abandoned"))
+
+    def _push(self, job: _Job) -> None:
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        self._queue.put_nowait((job.priority, next(self._seq), job))
+
+    @staticmethod
+    def _live(item) -> bool:
+        priority, _, job = item
+        return not job.dispatched and not job.abandoned and job.priority == priority
+
+    def _next_live(self):
+        """Próxima consulta viva da fila, descartando as mortas (None se esvaziou)"""
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if self._live(item):
+                return item
+        return None
+
+    async def _dispatch(self) -> None:
+        """Um token por consulta; a consulta é escolhida quando o token sai"""
+        token = False
+        while True:
+            # Há consulta viva na fila (só este laço as remove)
+            while True:
+                item = await self._queue.get()
+                if self._live(item):
+                    break
+
+            if not token:
+                self._queue.put_nowait(item)
+                wait = await self.bucket.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                token = True
+
+                # Pedido interativo que chegou durante a espera passa na frente;
+                # se todos desistiram na espera, o token fica para a próxima
+                item = self._next_live()
+                if item is None:
+                    continue
+
+            token = False
+            job = item[2]
+            job.dispatched = True
+            self.stats.dispatched(job.priority, time.monotonic() - job.enqueued_at)
+
+            task = asyncio.create_task(self._execute(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, job: _Job) -> None:
+        try:
+            result = await job.factory()
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._pending.pop(job.key, None)
+
+    async def _close(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        for job in self._pending.values():
+            if not job.future.done():
+                job.future.set_exception(NominatimError("geocode scheduler closed"))
+        self._pending.clear()
+        self._queue = None
+        self.stats.reset()
+        await self.bucket.close()
+
+
+class GeocodeLane:
+    """Scheduler com prioridade fixa, no lugar de um NominatimClient"""
+
+    def __init__(self, scheduler: GeocodeScheduler, priority: GeocodePriority):
+        self.scheduler = scheduler
+        self.priority = priority
+
+    async def search(self, address: str, country: str = "Brazil"):
+        return await self.scheduler.search(address, country, self.priority)
+
+    def search_sync(self, address: str, country: str = "Brazil"):
+        return self.scheduler.search_sync(address, country, self.priority)
+
+    async def reverse_geocode(self, latitude: Decimal, longitude: Decimal):
+        return await self.scheduler.reverse_geocode(latitude, longitude, self.priority)
+
+    def reverse_geocode_sync(self, latitude: Decimal, longitude: Decimal):
+        return self.scheduler.reverse_geocode_sync(latitude, longitude, self.priority)
+
+
+# Instância compartilhada do processo
+_scheduler: Optional[GeocodeScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_geocode_scheduler() -> GeocodeScheduler:
+    """
+    Obter o scheduler de geocodificação compartilhado
+
+    Returns:
+        Instância única de GeocodeScheduler (sobre get_geocoder())
+    """
+    global _scheduler
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = GeocodeScheduler(get_geocoder())
+        return _scheduler
+
+
+def geocode_scheduler_stats() -> dict:
+    """Métricas da fila de geocodificação deste processo"""
+    scheduler = get_geocode_scheduler()
+    return {
+        "limite_por_segundo": scheduler.bucket.rate,
+        "rajada": scheduler.bucket.burst,
+        "bucket": "local" if getattr(scheduler.bucket, "degraded", False) else scheduler.bucket.kind,
+        **scheduler.stats.to_dict(),
+        "provedores": scheduler.client.stats() if hasattr(scheduler.client, "stats") else {},
+    }
+
+
+async def close_geocode_scheduler() -> None:
+    """Fechar o scheduler compartilhado (shutdown, antes do cliente Nominatim)"""
+    global _scheduler
+
+    with _scheduler_lock:
+        scheduler, _scheduler = _scheduler, None
+    if scheduler is not None:
+        await scheduler.close()
@@ -0,0 +1,488 @@
+"""
+Geocoder - Vários provedores com hedge, circuit breaker e timeout adaptativo
+
+Mesma interface do NominatimClient (search, reverse_geocode, *_sync,
+close) sobre uma lista ordenada de backends (GEOCODER_BACKENDS):
+
+- nominatim: NOMINATIM_ENDPOINT (cliente compartilhado)
+- nominatim_local: instância própria em NOMINATIM_SELF_HOSTED_ENDPOINT
+- google: Google Geocoding API (GOOGLE_MAPS_API_KEY)
+- cep: índice offline de centroides de CEP (só consultas que são um CEP)
+
+Backends não configurados são ignorados; outros podem ser registrados
+com register_geocoder_backend. Por consulta:
+
+- Hedge: se o backend em andamento não respondeu dentro do p95 das suas
+  latências recentes (GEOCODER_HEDGE_PERCENTILE), o próximo é disparado
+  em paralelo; vale a primeira resposta e as demais são canceladas. A
+  falha de um backend dispara o próximo na hora.
+- Circuit breaker por backend: GEOCODER_BREAKER_FAILURES falhas seguidas
+  abrem o circuito por GEOCODER_BREAKER_COOLDOWN_SECONDS (backend
+  pulado); depois uma única consulta de teste decide se ele fecha.
+- Timeout adaptativo por backend: GEOCODER_TIMEOUT_MULTIPLIER x p99 das
+  latências recentes, entre GEOCODER_TIMEOUT_MIN_SECONDS e o timeout
+  configurado do cliente. Um timeout entra nas latências como amostra
+  censurada (o próprio timeout), então o limite cresce quando o backend
+  fica mais lento; a consulta de teste do meio aberto usa o teto.
+
+O tempo de uma consulta fica limitado pelos timeouts dos backends
+tentados, e um provedor fora do ar custa uma falha imediata (circuito
+aberto) em vez de um timeout. "Não encontrado" de um backend com
+cobertura parcial (cep) não encerra a consulta. Se nenhum backend
+responder, search levanta GeocoderUnavailable (um NominatimError, como
+o cliente único) e reverse_geocode devolve None.
+
+As respostas trazem o backend que respondeu em .provider (GeocodeResult
+e ReverseGeocodeResult, que se comportam como a tupla e a string do
+NominatimClient), para o cache registrar a origem e a validade de cada
+provedor. "Não encontrado" continua sendo None.
+"""
+
+from collections import deque
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from .address_normalizer import parse_address
+from .cep_index import get_cep_index
+from .google_geocoding_client import GoogleGeocodingClient
+from .loop_thread import run_sync
+from .nominatim_client import NominatimClient, NominatimError, get_nominatim_client
+
+logger = logging.getLogger(__name__)
+
+GEOCODER_BACKENDS = os.getenv("GEOCODER_BACKENDS", "nominatim")
+GEOCODER_HEDGE_PERCENTILE = float(os.getenv("GEOCODER_HEDGE_PERCENTILE", "95"))
+GEOCODER_HEDGE_DELAY_SECONDS = float(os.getenv("GEOCODER_HEDGE_DELAY_SECONDS", "1"))
+GEOCODER_TIMEOUT_MULTIPLIER = float(os.getenv("GEOCODER_TIMEOUT_MULTIPLIER", "3"))
+GEOCODER_TIMEOUT_MIN_SECONDS = float(os.getenv("GEOCODER_TIMEOUT_MIN_SECONDS", "1"))
+GEOCODER_BREAKER_FAILURES = int(os.getenv("GEOCODER_BREAKER_FAILURES", "5"))
+GEOCODER_BREAKER_COOLDOWN_SECONDS = float(os.getenv("GEOCODER_BREAKER_COOLDOWN_SECONDS", "30"))
+
+# Latências guardadas por backend e mínimo para usar os percentis
+# (antes disso: GEOCODER_HEDGE_DELAY_SECONDS e o timeout do cliente)
+LATENCY_SAMPLES = 200
+MIN_LATENCY_SAMPLES = 20
+
+
+class GeocoderUnavailable(NominatimError):
+    """Nenhum backend respondeu (falha, timeout ou circuito aberto em todos)"""
+
+
+class GeocodeResult(tuple):
+    """(latitude, longitude, endereço formatado) com o backend que respondeu"""
+
+    def __new__(cls, result: Tuple[Decimal, Decimal, str], provider: str):
+        self = super().__new__(cls, result)
+        self.provider = provider
+        return self
+
+
+class ReverseGeocodeResult(str):
+    """Endereço da geocodificação reversa ("" sem endereço) com o backend que respondeu"""
+
+    def __new__(cls, address: str, provider: str):
+        self = super().__new__(cls, address)
+        self.provider = provider
+        return self
+
+
+def _with_provider(result, provider: str):
+    """Anexar o nome do backend à resposta (None segue None)"""
+    if isinstance(result, tuple):
+        return GeocodeResult(result, provider)
+    if isinstance(result, str):
+        return ReverseGeocodeResult(result, provider)
+    return result
+
+
+class CircuitBreaker:
+    """Circuito de um backend: fechado, aberto (pulado) e meio aberto (uma consulta de teste)"""
+
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    MEIO_ABERTO = "meio_aberto"
+
+    def __init__(
+        self,
+        failures: int = GEOCODER_BREAKER_FAILURES,
+        cooldown: float = GEOCODER_BREAKER_COOLDOWN_SECONDS
+    ):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.state = self.FECHADO
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Reservar uma consulta (False = pular o backend)"""
+        with self._lock:
+            if self.state == self.ABERTO and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = self.MEIO_ABERTO
+                self._probing = False
+            if self.state == self.FECHADO:
+                return True
+            if self.state == self.MEIO_ABERTO and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.FECHADO
+            self.consecutive_failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.MEIO_ABERTO or self.consecutive_failures >= self.failures:
+                if self.state != self.ABERTO:
+                    logger.warning(f"Geocoder circuit opened after {self.consecutive_failures} failures")
+                self.state = self.ABERTO
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def release(self) -> None:
+        """Consulta cancelada (hedge vencido): libera o teste sem veredito"""
+        with self._lock:
+            self._probing = False
+
+
+class GeocoderBackend:
+    """Um provedor com o seu circuito, latências recentes e contadores"""
+
+    def __init__(self, name: str, client, timeout: Optional[float] = None, owned: bool = True):
+        """
+        Args:
+            name: Nome (métricas e logs)
+            client: Objeto com search/reverse_geocode (interface do NominatimClient);
+                atributos opcionais authoritative e supports_reverse
+            timeout: Teto do timeout adaptativo (padrão: timeout do cliente)
+            owned: Fechar o cliente junto com o Geocoder
+        """
+        self.name = name
+        self.client = client
+        self.max_timeout = timeout or getattr(client, "TIMEOUT", None) or getattr(client, "timeout", 10)
+        self.owned = owned
+        # False: "não encontrado" só vale se nenhum outro backend responder
+        self.authoritative = getattr(client, "authoritative", True)
+        self.supports_reverse = getattr(client, "supports_reverse", True)
+        self.breaker = CircuitBreaker()
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._counts = {"chamadas": 0, "sucessos": 0, "falhas": 0, "timeouts": 0, "hedges": 0}
+
+    def _percentile(self, p: float) -> Optional[float]:
+        samples = sorted(self._latencies)
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+    def timeout(self) -> float:
+        """Timeout da próxima consulta: múltiplo do p99, entre o mínimo e o teto"""
+        if self.breaker.state == CircuitBreaker.MEIO_ABERTO:
+            # Consulta de teste: o p99 pode ser de antes de o backend ficar lento
+            return self.max_timeout
+        p99 = self._percentile(99)
+        if p99 is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(GEOCODER_TIMEOUT_MIN_SECONDS, p99 * GEOCODER_TIMEOUT_MULTIPLIER))
+
+    def hedge_delay(self) -> float:
+        """Espera antes de disparar o próximo backend em paralelo"""
+        delay = self._percentile(GEOCODER_HEDGE_PERCENTILE)
+        return GEOCODER_HEDGE_DELAY_SECONDS if delay is None else delay
+
+    async def call(self, operation: str, *args):
+        """
+        Executar search/reverse_geocode com o timeout adaptativo
+
+        Raises:
+            NominatimError: Falha, timeout ou erro inesperado do cliente
+                (contam para o circuito)
+        """
+        timeout = self.timeout()
+        self._counts["chamadas"] += 1
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(getattr(self.client, operation)(*args), timeout)
+        except asyncio.TimeoutError as e:
+            self._counts["timeouts"] += 1
+            # Amostra censurada: a latência real foi pelo menos o timeout
+            self._latencies.append(timeout)
+            self._failed()
+            raise NominatimError(f"{self.name}: timeout ({timeout:.2f}s)") from e
+        except NominatimError as e:
+            self._failed()
+            raise NominatimError(f"{self.name}: {e}") from e
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception as e:
+            # Erro inesperado do cliente também conta (senão o teste do meio aberto nunca termina)
+            logger.exception(f"Geocoder backend {self.name} raised unexpectedly")
+            self._failed()
+            raise NominatimError(f"{self.name}: {type(e).__name__}: {e}") from e
+
+        if operation == "reverse_geocode" and result is None:
+            self._failed()
+            raise NominatimError(f"{self.name}: reverse geocoding failed")
+        self._counts["sucessos"] += 1
+        self._latencies.append(time.monotonic() - start)
+        self.breaker.record_success()
+        return result
+
+    def _failed(self) -> None:
+        self._counts["falhas"] += 1
+        self.breaker.record_failure()
+
+    def hedged(self) -> None:
+        self._counts["hedges"] += 1
+
+    def to_dict(self) -> dict:
+        p50, p95 = self._percentile(50), self._percentile(95)
+        return {
+            "estado": self.breaker.state,
+            "falhas_seguidas": self.breaker.consecutive_failures,
+            **self._counts,
+            "latencia_p50_s": round(p50, 4) if p50 is not None else None,
+            "latencia_p95_s": round(p95, 4) if p95 is not None else None,
+            "timeout_s": round(self.timeout(), 4),
+        }
+
+
+class Geocoder:
+    """Backends em ordem de preferência, no lugar de um NominatimClient"""
+
+    def __init__(self, backends: List[GeocoderBackend]):
+        if not backends:
+            raise ValueError("Geocoder requires at least one backend")
+        self.backends = backends
+
+    async def search(
+        self,
+        address: str,
+        country: str = "Brazil"
+    ) -> Optional[Tuple[Decimal, Decimal, str]]:
+        """
+        Geocodificar pelo primeiro backend que responder
+
+        Returns:
+            GeocodeResult (latitude, longitude, endereço formatado; .provider)
+            ou None se não encontrado
+
+        Raises:
+            GeocoderUnavailable: Nenhum backend respondeu
+        """
+        return await self._hedged("search", address, country)
+
+    async def reverse_geocode(self, latitude: Decimal, longitude: Decimal) -> Optional[str]:
+        """Geocodificação reversa (ReverseGeocodeResult; "" sem endereço no ponto, None em falha)"""
+        try:
+            return await self._hedged("reverse_geocode", latitude, longitude)
+        except NominatimError as e:
+            logger.error(f"Error reverse geocoding {latitude}, {longitude}: {e}")
+            return None
+
+    def search_sync(self, address: str, country: str = "Brazil"):
+        """search para código síncrono"""
+        return run_sync(self.search(address, country))
+
+    def reverse_geocode_sync(self, latitude: Decimal, longitude: Decimal):
+        """reverse_geocode para código síncrono"""
+        return run_sync(self.reverse_geocode(latitude, longitude))
+
+    async def close(self) -> None:
+        """Fechar os clientes próprios (o Nominatim compartilhado fecha no shutdown)"""
+        for backend in self.backends:
+            close = getattr(backend.client, "close", None)
+            if backend.owned and close is not None:
+                await close()
+
+    def stats(self) -> Dict[str, dict]:
+        """Métricas por backend"""
+        return {backend.name: backend.to_dict() for backend in self.backends}
+
+    async def _hedged(self, operation: str, *args):
+        candidates = iter([
+            backend for backend in self.backends
+            if operation != "reverse_geocode" or backend.supports_reverse
+        ])
+        running: Dict[asyncio.Task, GeocoderBackend] = {}
+        errors: List[str] = []
+        not_found = None
+        answered = False
+
+        def launch(hedge: bool) -> bool:
+            for backend in candidates:
+                if not backend.breaker.allow():
+                    errors.append(f"{backend.name}: circuit open")
+                    continue
+                if hedge:
+                    backend.hedged()
+                task = asyncio.ensure_future(backend.call(operation, *args))
+                # Resultado de uma tarefa descartada não gera aviso de exceção não lida
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                running[task] = backend
+                return True
+            return False
+
+        launch(hedge=False)
+        try:
+            while running:
+                newest = next(reversed(running.values()))
+                done, _ = await asyncio.wait(
+                    running, timeout=newest.hedge_delay(), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    launch(hedge=True)
+                    continue
+                for task in done:
+                    backend = running.pop(task)
+                    try:
+                        result = task.result()
+                    except NominatimError as e:
+                        errors.append(str(e))
+                        continue
+                    if result or backend.authoritative:
+                        return _with_provider(result, backend.name)
+                    not_found, answered = result, True
+                if not running:
+                    launch(hedge=False)
+        finally:
+            for task in running:
+                task.cancel()
+
+        if answered and not errors:
+            return not_found
+        raise GeocoderUnavailable("; ".join(errors) or "no geocoder backend available")
+
+
+class CepIndexBackend:
+    """Índice offline de CEP como backend (consultas que são só um CEP)"""
+
+    authoritative = False
+    supports_reverse = False
+    TIMEOUT = GEOCODER_TIMEOUT_MIN_SECONDS
+
+    async def search(self, address: str, country: str = "Brazil"):
+        index = get_cep_index()
+        components = parse_address(address)
+        # Rua com CEP (consulta sem cidade) fica para os provedores de logradouro
+        cep = components.cep if not components.logradouro else None
+        location = index.lookup(cep) if index is not None and cep else None
+        if location is None:
+            return None
+        return (location.latitude, location.longitude, f"CEP {cep[:5]}-{cep[5:]}")
+
+    async def reverse_geocode(self, latitude: Decimal, longitude: Decimal):
+        return None
+
+
+# Nome -> fábrica do cliente (None = backend não configurado neste ambiente)
+_backend_factories: Dict[str, Callable[[], object]] = {}
+
+
+def register_geocoder_backend(name: str) -> Callable:
+    """
+    Registrar backend para GEOCODER_BACKENDS
+
+    A fábrica não recebe argumentos e devolve o cliente (interface do
+    NominatimClient) ou None quando o backend não está configurado.
+
+    Usage:
+        @register_geocoder_backend("meu_provedor")
+        def meu_provedor():
+            ...
+    """
+    def decorator(factory: Callable[[], object]) -> Callable[[], object]:
+        _backend_factories[name] = factory
+        return factory
+    return decorator
+
+
+@register_geocoder_backend("nominatim")
+def _nominatim_backend():
+    return get_nominatim_client()
+
+
+@register_geocoder_backend("nominatim_local")
+def _nominatim_local_backend():
+    url = os.getenv("NOMINATIM_SELF_HOSTED_ENDPOINT")
+    return NominatimClient(base_url=url) if url else None
+
+
+@register_geocoder_backend("google")
+def _google_backend():
+    api_key = os.getenv("GOOGLE_MAPS_API_KEY")
+    return GoogleGeocodingClient(api_key) if api_key else None
+
+
+@register_geocoder_backend("cep")
+def _cep_backend():
+    return CepIndexBackend()
+
+
+def build_geocoder(names: Optional[str] = None) -> Geocoder:
+    """
+    Geocoder com os backends configurados, na ordem dada
+
+    Args:
+        names: Nomes separados por vírgula (padrão: GEOCODER_BACKENDS)
+
+    Returns:
+        Geocoder (só com o Nominatim compartilhado se nada estiver configurado)
+    """
+    shared = get_nominatim_client()
+    backends = []
+    for name in (n.strip() for n in (names or GEOCODER_BACKENDS).split(",")):
+        if not name:
+            continue
+        factory = _backend_factories.get(name)
+        if factory is None:
+            logger.warning(f"Unknown geocoder backend {name!r} ignored")
+            continue
+        client = factory()
+        if client is None:
+            logger.info(f"Geocoder backend {name!r} not configured; skipped")
+            continue
+        backends.append(GeocoderBackend(name, client, owned=client is not shared))
+    if not backends:
+        backends.append(GeocoderBackend("nominatim", shared, owned=False))
+    return Geocoder(backends)
+
+
+# Instância compartilhada do processo
+_geocoder: Optional[Geocoder] = None
+_geocoder_lock = threading.Lock()
+
+
+def get_geocoder() -> Geocoder:
+    """
+    Obter o geocoder compartilhado
+
+    Returns:
+        Instância única de Geocoder (build_geocoder())
+    """
+    global _geocoder
+
+    with _geocoder_lock:
+        if _geocoder is None:
+            _geocoder = build_geocoder()
+        return _geocoder
+
+
+async def close_geocoder() -> None:
+    """Fechar o geocoder compartilhado (shutdown, antes do cliente Nominatim)"""
+    global _geocoder
+
+    with _geocoder_lock:
+        geocoder, _geocoder = _geocoder, None
+    if geocoder is not None:
+        await geocoder.close()
@@ -0,0 +1,183 @@
+"""
+Geohash - Codificação de coordenadas em células (índice espacial em B-tree)
+
+Cada coordenada vira uma string base32 em que prefixos comuns indicam
+proximidade. Uma célula de precisão p corresponde a um intervalo contíguo
+de strings, então "pontos dentro da célula" é uma busca por intervalo
+(geohash >= prefixo AND geohash < sucessor) atendida por um índice B-tree.
+"""
+
+from typing import List, Optional, Tuple
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_BASE32_INDEX = {char: index for index, char in enumerate(BASE32)}
+
+# Precisão armazenada nas colunas geohash (~4.8m x 4.8m)
+STORED_PRECISION = 9
+
+# Máximo de células usadas para cobrir uma área de busca
+MAX_COVER_CELLS = 32
+
+EARTH_RADIUS_KM = 6371
+
+
+def encode(latitude, longitude, precision: int = STORED_PRECISION) -> Optional[str]:
+    """
+    Codificar coordenada em geohash
+
+    Args:
+        latitude: Latitude (graus)
+        longitude: Longitude (graus)
+        precision: Número de caracteres
+
+    Returns:
+        Geohash ou None se a coordenada estiver ausente
+    """
+    if latitude is None or longitude is None:
+        return None
+
+    lat = float(latitude)
+    lon = float(longitude)
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # bits pares = longitude
+
+    while len(chars) < precision:
+        target, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (target[0] + target[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            target[0] = mid
+        else:
+            bits <<= 1
+            target[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """
+    Dimensões de uma célula em graus
+
+    Returns:
+        Tupla (altura em graus de latitude, largura em graus de longitude)
+    """
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def successor(prefix: str) -> Optional[str]:
+    """
+    Menor string maior que todos os geohashes com o prefixo
+
+    Returns:
+        Limite superior exclusivo (None se o prefixo for só "z")
+    """
+    chars = list(prefix)
+    while chars:
+        index = _BASE32_INDEX[chars[-1]]
+        if index + 1 < len(BASE32):
+            chars[-1] = BASE32[index + 1]
+            return "".join(chars)
+        chars.pop()
+    return None
+
+
+def bbox_for_radius(latitude, longitude, radius_km) -> Tuple[float, float, float, float]:
+    """
+    Retângulo que contém o círculo de raio radius_km
+
+    Returns:
+        Tupla (min_lat, min_lon, max_lat, max_lon)
+    """
+    lat = float(latitude)
+    lon = float(longitude)
+    radius = float(radius_km)
+
+    dlat = math.degrees(radius / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(lat))
+    if cos_lat < 1e-6 or abs(lat) + dlat >= 90:
+        dlon = 180.0
+    else:
+        dlon = min(180.0, math.degrees(radius / (EARTH_RADIUS_KM * cos_lat)))
+
+    return (
+        max(-90.0, lat - dlat),
+        max(-180.0, lon - dlon),
+        min(90.0, lat + dlat),
+        min(180.0, lon + dlon),
+    )
+
+
+def cover_bbox(
+    min_lat,
+    min_lon,
+    max_lat,
+    max_lon,
+    max_cells: int = MAX_COVER_CELLS,
+) -> List[str]:
+    """
+    Células (prefixos) que cobrem um retângulo
+
+    Usa a maior precisão cujo número de células não excede max_cells, para
+    que cada célula descarte o máximo possível de linhas via índice.
+
+    Returns:
+        Lista ordenada de prefixos geohash
+    """
+    min_lat, min_lon = float(min_lat), float(min_lon)
+    max_lat, max_lon = float(max_lat), float(max_lon)
+
+    for precision in range(STORED_PRECISION, 0, -1):
+        lat_step, lon_step = cell_size(precision)
+        first_row = math.floor((min_lat + 90) / lat_step)
+        last_row = math.floor((max_lat + 90) / lat_step)
+        first_col = math.floor((min_lon + 180) / lon_step)
+        last_col = math.floor((max_lon + 180) / lon_step)
+
+        if (last_row - first_row + 1) * (last_col - first_col + 1) > max_cells:
+            continue
+
+        cells = set()
+        for row in range(first_row, last_row + 1):
+            lat = min(90.0, -90 + (row + 0.5) * lat_step)
+            for col in range(first_col, last_col + 1):
+                lon = min(180.0, -180 + (col + 0.5) * lon_step)
+                cells.add(encode(lat, lon, precision))
+        return sorted(cells)
+
+    return [""]  # Área maior que o globo em precisão 1: sem filtro
+
+
+def cell_ranges(cells: List[str]) -> List[Tuple[str, Optional[str]]]:
+    """
+    Converter prefixos em intervalos [início, fim) de strings
+
+    Prefixos adjacentes na ordem base32 são fundidos num único intervalo.
+
+    Returns:
+        Lista de (limite inferior inclusivo, limite superior exclusivo ou None)
+    """
+    ranges: List[Tuple[str, Optional[str]]] = []
+    for cell in sorted(cells):
+        upper = successor(cell) if cell else None
+        if ranges and ranges[-1][1] == cell:
+            ranges[-1] = (ranges[-1][0], upper)
+        else:
+            ranges.append((cell, upper))
+    return ranges
+
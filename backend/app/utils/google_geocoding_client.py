@@ -0,0 +1,153 @@
+"""
+Google Geocoding Client - Commercial geocoding backend
+
+Same interface as NominatimClient (search raises NominatimError on
+provider failures, reverse_geocode returns "" when there is no address
+and None on failure), so it can be one of the Geocoder backends
+(app.utils.geocoder). Enabled when GOOGLE_MAPS_API_KEY is set.
+
+Like NominatimClient, the client keeps one aiohttp session per event
+loop (application loop and the background loop of the *_sync callers).
+"""
+
+import asyncio
+import aiohttp
+from typing import Optional, Tuple
+from decimal import Decimal
+import logging
+import os
+import weakref
+
+from .nominatim_client import NominatimError
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_GEOCODING_ENDPOINT = os.getenv(
+    "GOOGLE_GEOCODING_ENDPOINT", "https://maps.googleapis.com/maps/api/geocode/json"
+)
+GOOGLE_GEOCODING_TIMEOUT_SECONDS = float(os.getenv("GOOGLE_GEOCODING_TIMEOUT_SECONDS", "10"))
+
+
+class GoogleGeocodingClient:
+    """Client for the Google Geocoding API"""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = GOOGLE_GEOCODING_ENDPOINT,
+        timeout: float = GOOGLE_GEOCODING_TIMEOUT_SECONDS
+    ):
+        """
+        Args:
+            api_key: Google Maps Platform API key
+            base_url: Geocoding endpoint (JSON output)
+            timeout: Total timeout per request in seconds
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Session of the running event loop (created on first use)"""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._sessions[loop] = session
+        return session
+
+    async def close(self) -> None:
+        """Close the sessions (only the running loop's and running loops')"""
+        loop = asyncio.get_running_loop()
+        for session_loop, session in list(self._sessions.items()):
+            if session.closed:
+                continue
+            if session_loop is loop:
+                await session.close()
+            elif session_loop.is_running():
+                await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(session.close(), session_loop)
+                )
+        self._sessions.clear()
+
+    async def _request(self, params: dict) -> list:
+        """
+        Results of a geocoding request ([] for ZERO_RESULTS).
+
+        Raises:
+            NominatimError: Timeout, connection error, non-200 response or
+                API error status (quota, denied key, ...)
+        """
+        try:
+            async with self._get_session().get(
+                self.base_url, params={**params, "key": self.api_key}
+            ) as response:
+                if response.status != 200:
+                    raise NominatimError(f"HTTP {response.status}")
+                data = await response.json()
+        except asyncio.TimeoutError as e:
+            raise NominatimError("timeout") from e
+        except aiohttp.ClientError as e:
+            raise NominatimError(str(e)) from e
+
+        status = data.get("status")
+        if status == "ZERO_RESULTS":
+            return []
+        if status != "OK":
+            raise NominatimError(f"Google Geocoding status {status}")
+        return data.get("results", [])
+
+    async def search(
+        self,
+        address: str,
+        country: str = "Brazil"
+    ) -> Optional[Tuple[Decimal, Decimal, str]]:
+        """
+        Geocode address to coordinates, raising on provider failures.
+
+        Args:
+            address: Full address string
+            country: Country name
+
+        Returns:
+            Tuple of (latitude, longitude, formatted_address) or None if not found
+
+        Raises:
+            NominatimError: Provider failure
+        """
+        results = await self._request({"address": f"{address}, {country}", "region": "br"})
+        if not results:
+            return None
+        result = results[0]
+        location = result["geometry"]["location"]
+        return (
+            Decimal(str(location["lat"])),
+            Decimal(str(location["lng"])),
+            result.get("formatted_address", ""),
+        )
+
+    async def reverse_geocode(
+        self,
+        latitude: Decimal,
+        longitude: Decimal
+    ) -> Optional[str]:
+        """
+        Reverse geocode coordinates to address.
+
+        Args:
+            latitude: Latitude
+            longitude: Longitude
+
+        Returns:
+            Address string, "" if there is no address at the point,
+            None on provider failure
+        """
+        try:
+            results = await self._request({"latlng": f"{latitude},{longitude}"})
+        except NominatimError as e:
+            logger.error(f"Error reverse geocoding {latitude}, {longitude}: {e}")
+            return None
+        return results[0].get("formatted_address", "") if results else ""
@@ -0,0 +1,92 @@
+"""
+Loop Thread - Event loop dedicado em thread de fundo para código síncrono
+
+Código síncrono (serviços chamados fora de um endpoint async, workers,
+scripts) executa corrotinas de I/O com run_sync: a corrotina roda no
+loop da thread de fundo e só a thread chamadora espera o resultado.
+Nada de loop aninhado nem run_until_complete no loop do FastAPI, e
+várias chamadas síncronas concorrentes compartilham o mesmo loop (e a
+mesma sessão HTTP), progredindo em paralelo.
+"""
+
+from typing import Awaitable, Optional, TypeVar
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Obter o loop de fundo (inicia a thread no primeiro uso)
+
+    Returns:
+        Event loop rodando na thread de fundo
+    """
+    global _loop, _thread
+
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(
+                target=_loop.run_forever, name="background-event-loop", daemon=True
+            )
+            _thread.start()
+            logger.info("Background event loop started")
+        return _loop
+
+
+def is_background_loop(loop: Optional[asyncio.AbstractEventLoop]) -> bool:
+    """Indica se loop é o loop de fundo"""
+    return loop is not None and loop is _loop
+
+
+def run_sync(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """
+    Executar corrotina no loop de fundo e aguardar o resultado
+
+    Args:
+        coro: Corrotina
+        timeout: Espera máxima em segundos (None = sem limite)
+
+    Returns:
+        Resultado da corrotina (exceções são propagadas)
+
+    Raises:
+        RuntimeError: Chamado de dentro do próprio loop de fundo (deadlock)
+    """
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if is_background_loop(running):
+        coro.close()
+        raise RuntimeError("run_sync called from the background loop; await the coroutine instead")
+
+    future = asyncio.run_coroutine_threadsafe(coro, get_background_loop())
+    return future.result(timeout)
+
+
+def stop_background_loop(timeout: float = 5.0) -> None:
+    """Parar o loop de fundo e aguardar a thread (shutdown da aplicação)"""
+    global _loop, _thread
+
+    with _lock:
+        loop, thread = _loop, _thread
+        _loop = _thread = None
+    if loop is None:
+        return
+
+    loop.call_soon_threadsafe(loop.stop)
+    if thread is not None:
+        thread.join(timeout)
+    if not loop.is_running():
+        loop.close()
+    logger.info("Background event loop stopped")
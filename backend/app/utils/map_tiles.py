@@ -0,0 +1,192 @@
+"""
+Map Tiles - Agregados pré-calculados por zoom para agrupar marcadores no mapa
+
+Os pontos (contrato e bureau) são projetados em Web Mercator e contados
+em células de grade: no zoom z, cada tile do mapa (256px) é dividido em
+2^CELL_BITS x 2^CELL_BITS células, ou seja, a célula é o tile do nível
+z + CELL_BITS. O nível mais fino é agregado a partir dos pontos e cada
+nível mais grosso a partir do anterior (4 células filhas -> 1 pai), então
+uma consulta só lê as células já somadas do nível pedido: o custo e o
+tamanho da resposta dependem da área visível, não do volume de dados.
+
+Cada nível guarda arrays NumPy ordenados pela chave (x, y) da célula,
+com contagens (contratos, bureaus, pontos por tipo de parecer) e somas
+de latitude/longitude (centroide do cluster).
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+
+import numpy as np
+
+MAX_ZOOM = 18
+CELL_BITS = 2
+MAX_LEVEL = MAX_ZOOM + CELL_BITS
+
+# Limite de latitude da projeção Web Mercator
+MAX_LATITUDE = 85.05112878
+
+# Máximo de tiles do mapa por eixo numa consulta (~8k px de viewport)
+MAX_TILES_PER_AXIS = 32
+
+TIPOS_PARECER = ("PROXIMAL", "MODERADO", "DISTANTE", "MUITO_DISTANTE")
+
+# Colunas de contagem: contratos, bureaus e um tipo de parecer por coluna
+_CONTRATOS = 0
+_BUREAUS = 1
+_TIPOS = 2
+_COLUMNS = _TIPOS + len(TIPOS_PARECER)
+
+BBox = Tuple[float, float, float, float]  # (oeste, sul, leste, norte)
+
+
+def tile_xy(latitude, longitude, level: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Coordenadas (x, y) do tile de cada ponto no nível (vetorizado)
+
+    Args:
+        latitude: Latitudes (graus)
+        longitude: Longitudes (graus)
+        level: Nível (zoom) do tile
+
+    Returns:
+        Tupla (x, y) de arrays int64
+    """
+    size = 1 << level
+    lat = np.radians(np.clip(np.asarray(latitude, dtype=np.float64), -MAX_LATITUDE, MAX_LATITUDE))
+    lon = np.asarray(longitude, dtype=np.float64)
+
+    x = np.floor((lon + 180.0) / 360.0 * size)
+    y = np.floor((1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / math.pi) / 2.0 * size)
+    return (
+        np.clip(x, 0, size - 1).astype(np.int64),
+        np.clip(y, 0, size - 1).astype(np.int64),
+    )
+
+
+class _Level:
+    """Células de um nível: chaves ordenadas, contagens e somas de coordenadas"""
+
+    __slots__ = ("level", "keys", "x", "y", "counts", "sum_lat", "sum_lon")
+
+    def __init__(self, level: int, x: np.ndarray, y: np.ndarray,
+                 counts: np.ndarray, sum_lat: np.ndarray, sum_lon: np.ndarray):
+        """Agrupar linhas com a mesma célula (x, y) somando as contagens"""
+        keys, inverse = np.unique((x << level) | y, return_inverse=True)
+        self.level = level
+        self.keys = keys
+        self.x = keys >> level
+        self.y = keys & ((1 << level) - 1)
+        self.counts = np.zeros((len(keys), _COLUMNS), dtype=np.int64)
+        self.sum_lat = np.zeros(len(keys), dtype=np.float64)
+        self.sum_lon = np.zeros(len(keys), dtype=np.float64)
+        np.add.at(self.counts, inverse, counts)
+        np.add.at(self.sum_lat, inverse, sum_lat)
+        np.add.at(self.sum_lon, inverse, sum_lon)
+
+    def parent(self) -> "_Level":
+        """Nível imediatamente mais grosso (cada 2x2 células viram uma)"""
+        return _Level(self.level - 1, self.x >> 1, self.y >> 1,
+                      self.counts, self.sum_lat, self.sum_lon)
+
+    def select(self, x0: int, x1: int, y0: int, y1: int) -> np.ndarray:
+        """Índices das células com x0 <= x <= x1 e y0 <= y <= y1"""
+        start, stop = np.searchsorted(
+            self.keys, [x0 << self.level, (x1 + 1) << self.level], side="left"
+        )
+        y = self.y[start:stop]
+        return start + np.nonzero((y >= y0) & (y <= y1))[0]
+
+
+class TilePyramid:
+    """Agregados de pontos por célula em todos os zooms (imutável após criado)"""
+
+    def __init__(self, latitudes: Sequence, longitudes: Sequence,
+                 bureau: Sequence[bool], tipos: Sequence[Optional[str]]):
+        """
+        Pré-calcular as células de todos os níveis
+
+        Args:
+            latitudes: Latitude de cada ponto
+            longitudes: Longitude de cada ponto
+            bureau: True para ponto de bureau, False para contrato
+            tipos: Tipo de parecer do contrato do ponto (None = sem parecer)
+        """
+        lat = np.asarray(latitudes, dtype=np.float64)
+        lon = np.asarray(longitudes, dtype=np.float64)
+        is_bureau = np.asarray(bureau, dtype=bool)
+
+        counts = np.zeros((len(lat), _COLUMNS), dtype=np.int64)
+        counts[:, _CONTRATOS] = ~is_bureau
+        counts[:, _BUREAUS] = is_bureau
+        for column, tipo in enumerate(TIPOS_PARECER, start=_TIPOS):
+            counts[:, column] = [t == tipo for t in tipos]
+
+        x, y = tile_xy(lat, lon, MAX_LEVEL)
+        finest = _Level(MAX_LEVEL, x, y, counts, lat, lon)
+
+        self.total_pontos = len(lat)
+        self._levels: Dict[int, _Level] = {MAX_LEVEL: finest}
+        level = finest
+        while level.level > CELL_BITS:
+            level = level.parent()
+            self._levels[level.level] = level
+
+    def __len__(self) -> int:
+        return self.total_pontos
+
+    def cells(self, zoom: int) -> int:
+        """Número de células (clusters possíveis) no zoom"""
+        return len(self._levels[min(max(zoom, 0), MAX_ZOOM) + CELL_BITS].keys)
+
+    def clusters(self, bbox: BBox, zoom: int) -> List[dict]:
+        """
+        Clusters (células não vazias) que intersectam a área visível
+
+        Args:
+            bbox: (oeste, sul, leste, norte) em graus; oeste > leste
+                  indica área que cruza o antimeridiano
+            zoom: Zoom do mapa (limitado a 0..MAX_ZOOM)
+
+        Returns:
+            Lista de dicts com id, latitude, longitude (centroide), total,
+            contratos, bureaus, tipo_dominante e tipos
+
+        Raises:
+            ValueError: Área grande demais para o zoom
+        """
+        zoom = min(max(zoom, 0), MAX_ZOOM)
+        level = self._levels[zoom + CELL_BITS]
+        west, south, east, north = bbox
+
+        ranges = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+        (north_y, south_y) = tile_xy([north, south], [0.0, 0.0], level.level)[1]
+
+        selected = []
+        for range_west, range_east in ranges:
+            x0, x1 = tile_xy([0.0, 0.0], [range_west, range_east], level.level)[0]
+            max_cells = MAX_TILES_PER_AXIS << CELL_BITS
+            if x1 - x0 + 1 > max_cells or south_y - north_y + 1 > max_cells:
+                raise ValueError(
+                    f"Área grande demais para o zoom {zoom}: reduza a área ou o zoom"
+                )
+            selected.append(level.select(int(x0), int(x1), int(north_y), int(south_y)))
+
+        indexes = np.concatenate(selected) if selected else np.empty(0, dtype=np.int64)
+        return [self._cluster(level, int(i)) for i in indexes]
+
+    @staticmethod
+    def _cluster(level: _Level, i: int) -> dict:
+        counts = level.counts[i]
+        total = int(counts[_CONTRATOS] + counts[_BUREAUS])
+        tipos = counts[_TIPOS:]
+        return {
+            "id": f"{level.level}/{int(level.x[i])}/{int(level.y[i])}",
+            "latitude": round(float(level.sum_lat[i]) / total, 6),
+            "longitude": round(float(level.sum_lon[i]) / total, 6),
+            "total": total,
+            "contratos": int(counts[_CONTRATOS]),
+            "bureaus": int(counts[_BUREAUS]),
+            "tipo_dominante": TIPOS_PARECER[int(np.argmax(tipos))] if tipos.any() else None,
+            "tipos": {tipo: int(count) for tipo, count in zip(TIPOS_PARECER, tipos) if count},
+        }
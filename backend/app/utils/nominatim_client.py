@@ -1,5 +1,17 @@
 """
 Nominatim Client - Geocoding and address lookup
+
+The client owns a long-lived aiohttp session (connection pool with
+keep-alive, DNS cache and TLS session reuse). One shared instance is
+created at application startup (get_nominatim_client) and closed on
+shutdown (close_nominatim_client). An aiohttp session is bound to the
+event loop it was created on, so the client keeps one session per loop:
+the application loop (async callers) and the background loop used by
+the *_sync wrappers (app.utils.loop_thread).
+
+The server is NOMINATIM_ENDPOINT (public Nominatim by default); point it
+at a self-hosted instance or at the local stand-in used for offline
+tests and load benchmarks (benchmarks/nominatim_standin.py).
 """
 
 import asyncio
@@ -7,24 +19,141 @@ import aiohttp
 from typing import Optional, Tuple
 from decimal import Decimal
 import logging
+import os
+import weakref
+
+from .loop_thread import run_sync, stop_background_loop
 
 logger = logging.getLogger(__name__)
 
+NOMINATIM_MAX_CONNECTIONS = int(os.getenv("NOMINATIM_MAX_CONNECTIONS", "10"))
+NOMINATIM_KEEPALIVE_SECONDS = float(os.getenv("NOMINATIM_KEEPALIVE_SECONDS", "60"))
+NOMINATIM_DNS_CACHE_SECONDS = int(os.getenv("NOMINATIM_DNS_CACHE_SECONDS", "300"))
+NOMINATIM_ENDPOINT = os.getenv("NOMINATIM_ENDPOINT", "https://nominatim.openstreetmap.org").rstrip("/")
+NOMINATIM_TIMEOUT_SECONDS = float(os.getenv("NOMINATIM_TIMEOUT_SECONDS", "10"))
+
+
+class NominatimError(Exception):
+    """Nominatim request failed (timeout, connection error, non-200 response)"""
+
 
 class NominatimClient:
     """Client for Nominatim geocoding service"""
 
-    BASE_URL = "https://nominatim.openstreetmap.org"
-    TIMEOUT = 10
+    BASE_URL = NOMINATIM_ENDPOINT
+    TIMEOUT = NOMINATIM_TIMEOUT_SECONDS
 
-    def __init__(self, user_agent: str = "sistema-de-laudos"):
+    def __init__(
+        self,
+        user_agent: str = "sistema-de-laudos",
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None
+    ):
         """
         Initialize Nominatim client.
 
         Args:
             user_agent: User agent string for requests
+            base_url: Server URL (default: NOMINATIM_ENDPOINT)
+            timeout: Total timeout per request in seconds (default:
+                NOMINATIM_TIMEOUT_SECONDS)
         """
         self.user_agent = user_agent
+        if base_url:
+            self.BASE_URL = base_url.rstrip("/")
+        if timeout is not None:
+            self.TIMEOUT = timeout
+        # Event loop -> session (entries vanish with their loop)
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Session of the running event loop (created on first use)"""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=NOMINATIM_MAX_CONNECTIONS,
+                limit_per_host=NOMINATIM_MAX_CONNECTIONS,
+                ttl_dns_cache=NOMINATIM_DNS_CACHE_SECONDS,
+                keepalive_timeout=NOMINATIM_KEEPALIVE_SECONDS,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"User-Agent": self.user_agent},
+                timeout=aiohttp.ClientTimeout(total=self.TIMEOUT),
+            )
+            self._sessions[loop] = session
+            logger.info("Nominatim session created")
+        return session
+
+    async def open(self) -> None:
+        """Create the session of the running loop ahead of the first request"""
+        self._get_session()
+
+    async def close(self) -> None:
+        """Close the session of the running loop and drop the others"""
+        loop = asyncio.get_running_loop()
+        for session_loop, session in list(self._sessions.items()):
+            if session.closed:
+                continue
+            if session_loop is loop:
+                await session.close()
+            elif session_loop.is_running():
+                # Session of another thread's loop (e.g. the background loop)
+                await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(session.close(), session_loop)
+                )
+            elif not session_loop.is_closed():
+                session_loop.run_until_complete(session.close())
+        self._sessions.clear()
+        logger.info("Nominatim sessions closed")
+
+    async def search(
+        self,
+        address: str,
+        country: str = "Brazil"
+    ) -> Optional[Tuple[Decimal, Decimal, str]]:
+        """
+        Geocode address to coordinates, raising on provider failures.
+
+        Unlike geocode(), a None result here always means "address not
+        found", so callers can cache it (negative caching).
+
+        Args:
+            address: Full address string
+            country: Country name
+
+        Returns:
+            Tuple of (latitude, longitude, formatted_address) or None if not found
+
+        Raises:
+            NominatimError: Timeout, connection error or non-200 response
+        """
+        params = {
+            "q": f"{address}, {country}",
+            "format": "json",
+            "limit": 1
+        }
+        try:
+            async with self._get_session().get(f"{self.BASE_URL}/search", params=params) as response:
+                if response.status != 200:
+                    raise NominatimError(f"HTTP {response.status}")
+                data = await response.json()
+        except asyncio.TimeoutError as e:
+            raise NominatimError("timeout") from e
+        except aiohttp.ClientError as e:
+            raise NominatimError(str(e)) from e
+
+        if not data:
+            return None
+        result = data[0]
+        lat = Decimal(result["lat"])
+        lon = Decimal(result["lon"])
+        display_name = result.get("display_name", "")
+        logger.info(f"Geocoded: {address} -> {lat}, {lon}")
+        return (lat, lon, display_name)
 
     async def geocode(
         self,
@@ -42,33 +171,7 @@ class NominatimClient:
             Tuple of (latitude, longitude, formatted_address) or None if not found
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                params = {
-                    "q": f"{address}, {country}",
-                    "format": "json",
-                    "limit": 1
-                }
-                headers = {"User-Agent": self.user_agent}
-
-                async with session.get(
-                    f"{self.BASE_URL}/search",
-                    params=params,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=self.TIMEOUT)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if data:
-                            result = data[0]
-                            lat = Decimal(result["lat"])
-                            lon = Decimal(result["lon"])
-                            display_name = result.get("display_name", "")
-                            logger.info(f"Geocoded: {address} -> {lat}, {lon}")
-                            return (lat, lon, display_name)
-                    return None
-        except asyncio.TimeoutError:
-            logger.error(f"Timeout geocoding address: {address}")
-            return None
+            return await self.search(address, country)
         except Exception as e:
             logger.error(f"Error geocoding address {address}: {str(e)}")
             return None
@@ -86,30 +189,22 @@ class NominatimClient:
             longitude: Longitude
 
         Returns:
-            Address string or None if not found
+            Address string, "" if there is no address at the point,
+            None on provider failure
         """
+        params = {
+            "lat": str(latitude),
+            "lon": str(longitude),
+            "format": "json"
+        }
         try:
-            async with aiohttp.ClientSession() as session:
-                params = {
-                    "lat": str(latitude),
-                    "lon": str(longitude),
-                    "format": "json"
-                }
-                headers = {"User-Agent": self.user_agent}
-
-                async with session.get(
-                    f"{self.BASE_URL}/reverse",
-                    params=params,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=self.TIMEOUT)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        address = data.get("address", {})
-                        display_name = data.get("display_name", "")
-                        logger.info(f"Reverse geocoded: {latitude}, {longitude} -> {display_name}")
-                        return display_name
-                    return None
+            async with self._get_session().get(f"{self.BASE_URL}/reverse", params=params) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    display_name = data.get("display_name", "")
+                    logger.info(f"Reverse geocoded: {latitude}, {longitude} -> {display_name}")
+                    return display_name
+                return None
         except asyncio.TimeoutError:
             logger.error(f"Timeout reverse geocoding: {latitude}, {longitude}")
             return None
@@ -123,7 +218,7 @@ class NominatimClient:
         country: str = "Brazil"
     ) -> Optional[Tuple[Decimal, Decimal, str]]:
         """
-        Synchronous geocode address (wrapper around async method).
+        Synchronous geocode address (runs on the background event loop).
 
         Args:
             address: Full address string
@@ -132,13 +227,27 @@ class NominatimClient:
         Returns:
             Tuple of (latitude, longitude, formatted_address) or None
         """
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        return run_sync(self.geocode(address, country))
+
+    def search_sync(
+        self,
+        address: str,
+        country: str = "Brazil"
+    ) -> Optional[Tuple[Decimal, Decimal, str]]:
+        """
+        Synchronous search (runs on the background event loop).
 
-        return loop.run_until_complete(self.geocode(address, country))
+        Args:
+            address: Full address string
+            country: Country name
+
+        Returns:
+            Tuple of (latitude, longitude, formatted_address) or None if not found
+
+        Raises:
+            NominatimError: Provider failure
+        """
+        return run_sync(self.search(address, country))
 
     def reverse_geocode_sync(
         self,
@@ -146,7 +255,7 @@ class NominatimClient:
         longitude: Decimal
     ) -> Optional[str]:
         """
-        Synchronous reverse geocode (wrapper around async method).
+        Synchronous reverse geocode (runs on the background event loop).
 
         Args:
             latitude: Latitude
@@ -155,10 +264,32 @@ class NominatimClient:
         Returns:
             Address string or None
         """
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        return run_sync(self.reverse_geocode(latitude, longitude))
+
+
+# Instância compartilhada (criada no startup da aplicação)
+_nominatim_client: Optional[NominatimClient] = None
+
+
+def get_nominatim_client() -> NominatimClient:
+    """
+    Obter o cliente Nominatim compartilhado
+
+    Cria o cliente sob demanda se o startup ainda não o criou
+    (ex.: scripts e testes).
+
+    Returns:
+        Instância única de NominatimClient
+    """
+    global _nominatim_client
+
+    if _nominatim_client is None:
+        _nominatim_client = NominatimClient()
+    return _nominatim_client
+
 
-        return loop.run_until_complete(self.reverse_geocode(latitude, longitude))
+async def close_nominatim_client() -> None:
+    """Fechar as sessões do cliente compartilhado e o loop de fundo (shutdown da aplicação)"""
+    if _nominatim_client is not None:
+        await _nominatim_client.close()
+    stop_background_loop()
@@ -0,0 +1,190 @@
+"""
+Parecer Rules - Regras de classificação do parecer (faixas de distância e textos)
+
+Cada conjunto de regras é uma lista de faixas ordenadas por distância:
+a faixa i vale para distâncias <= ate_km (a última não tem limite). As
+regras são compiladas uma vez: limites num array ordenado (bisect para
+uma distância, searchsorted para lotes) e templates de texto já
+analisados, de modo que classificar e gerar o texto não reinterpreta
+nada a cada chamada.
+
+Templates usam os campos {distancia}, {endereco_origem} e
+{endereco_destino} (com especificação de formato opcional, ex.:
+{distancia:.2f}).
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from decimal import Decimal
+from string import Formatter
+from typing import Callable, List, Optional, Sequence, Tuple
+import hashlib
+import json
+
+import numpy as np
+
+PARECER_TYPES = ("PROXIMAL", "MODERADO", "DISTANTE", "MUITO_DISTANTE")
+TEMPLATE_FIELDS = ("distancia", "endereco_origem", "endereco_destino")
+
+
+@dataclass(frozen=True)
+class ParecerRule:
+    """Faixa de distância: até ate_km (None = sem limite) -> tipo e texto"""
+
+    tipo: str
+    ate_km: Optional[float]
+    template: str
+
+    def to_dict(self) -> dict:
+        """Converter para dicionário"""
+        return {"tipo": self.tipo, "ate_km": self.ate_km, "template": self.template}
+
+
+def _compile_template(template: str) -> Callable[[float, str, str], str]:
+    """
+    Pré-compilar template em partes (literal, campo, formato)
+
+    Raises:
+        ValueError: Campo desconhecido, posicional ou com conversão
+    """
+    parts: List[Tuple[str, Optional[int], str]] = []
+    for literal, field, spec, conversion in Formatter().parse(template):
+        if field is None:
+            parts.append((literal, None, ""))
+            continue
+        if field not in TEMPLATE_FIELDS or conversion:
+            raise ValueError(
+                f"Campo inválido no template: {{{field}}}. "
+                f"Disponíveis: {', '.join(TEMPLATE_FIELDS)}"
+            )
+        parts.append((literal, TEMPLATE_FIELDS.index(field), spec or ""))
+
+    compiled = tuple(parts)
+
+    def render(*values) -> str:
+        return "".join(
+            literal if index is None else literal + format(values[index], spec)
+            for literal, index, spec in compiled
+        )
+
+    # Validar especificações de formato com valores de exemplo
+    render(1.0, "", "")
+    return render
+
+
+class CompiledRules:
+    """Regras de parecer compiladas (imutáveis, compartilhadas entre threads)"""
+
+    def __init__(self, rules: Sequence[ParecerRule]):
+        """
+        Compilar regras
+
+        Raises:
+            ValueError: Regras inválidas (tipo desconhecido/repetido, limites
+                fora de ordem, última faixa com limite, template inválido)
+        """
+        rules = tuple(rules)
+        if not rules:
+            raise ValueError("Informe ao menos uma faixa")
+
+        tipos = [rule.tipo for rule in rules]
+        unknown = [tipo for tipo in tipos if tipo not in PARECER_TYPES]
+        if unknown:
+            raise ValueError(
+                f"Tipo de parecer desconhecido: {unknown[0]}. Disponíveis: {', '.join(PARECER_TYPES)}"
+            )
+        if len(set(tipos)) != len(tipos):
+            raise ValueError("Cada tipo de parecer pode aparecer em apenas uma faixa")
+
+        breakpoints = [rule.ate_km for rule in rules[:-1]]
+        if rules[-1].ate_km is not None:
+            raise ValueError("A última faixa não deve ter limite (ate_km nulo)")
+        if any(limit is None or limit <= 0 for limit in breakpoints):
+            raise ValueError("Faixas intermediárias precisam de ate_km positivo")
+        if any(a >= b for a, b in zip(breakpoints, breakpoints[1:])):
+            raise ValueError("Os limites ate_km devem ser crescentes")
+
+        self.rules = rules
+        self.breakpoints: Tuple[float, ...] = tuple(float(limit) for limit in breakpoints)
+        self.types: Tuple[str, ...] = tuple(tipos)
+        self._breakpoints_array = np.asarray(self.breakpoints, dtype=np.float64)
+        self._types_array = np.asarray(self.types)
+        self._templates = tuple(_compile_template(rule.template) for rule in rules)
+
+        canonical = json.dumps([rule.to_dict() for rule in rules], sort_keys=True, ensure_ascii=False)
+        self.version = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+    @classmethod
+    def from_dicts(cls, faixas: Sequence[dict]) -> "CompiledRules":
+        """Compilar a partir de dicionários (tipo, ate_km, template)"""
+        return cls([
+            ParecerRule(
+                tipo=faixa["tipo"],
+                ate_km=None if faixa.get("ate_km") is None else float(faixa["ate_km"]),
+                template=faixa["template"],
+            )
+            for faixa in faixas
+        ])
+
+    def to_dicts(self) -> List[dict]:
+        """Faixas como dicionários (persistência / API)"""
+        return [rule.to_dict() for rule in self.rules]
+
+    def _band(self, distance_km) -> int:
+        # distância == limite pertence à faixa do limite (<=)
+        return bisect_left(self.breakpoints, float(distance_km))
+
+    def classify(self, distance_km: Decimal) -> str:
+        """Tipo de parecer de uma distância"""
+        return self.types[self._band(distance_km)]
+
+    def classify_batch(self, distances_km) -> np.ndarray:
+        """Tipos de parecer de várias distâncias ("" onde a distância é NaN)"""
+        distances = np.asarray(distances_km, dtype=np.float64)
+        types = self._types_array[np.searchsorted(self._breakpoints_array, distances, side="left")]
+        return np.where(np.isnan(distances), "", types)
+
+    def text(self, distance_km: Decimal, endereco_origem: str, endereco_destino: str) -> str:
+        """Texto do parecer (template da faixa da distância)"""
+        render = self._templates[self._band(distance_km)]
+        return render(float(distance_km), endereco_origem, endereco_destino)
+
+
+DEFAULT_RULES = CompiledRules([
+    ParecerRule(
+        "PROXIMAL",
+        5.0,
+        "Análise de Geolocalização: Os endereços estão muito próximos, "
+        "a uma distância de apenas {distancia:.2f} km. "
+        "Endereço de origem: {endereco_origem}. "
+        "Endereço de destino: {endereco_destino}. "
+        "Parecer: APROVADO - Distâncias compatíveis com documentação.",
+    ),
+    ParecerRule(
+        "MODERADO",
+        20.0,
+        "Análise de Geolocalização: Os endereços apresentam distância moderada "
+        "de {distancia:.2f} km. "
+        "Endereço de origem: {endereco_origem}. "
+        "Endereço de destino: {endereco_destino}. "
+        "Parecer: ATENÇÃO - Verificar justificativas para variação de endereço.",
+    ),
+    ParecerRule(
+        "DISTANTE",
+        50.0,
+        "Análise de Geolocalização: Os endereços estão significativamente afastados, "
+        "a {distancia:.2f} km de distância. "
+        "Endereço de origem: {endereco_origem}. "
+        "Endereço de destino: {endereco_destino}. "
+        "Parecer: ANÁLISE RECOMENDADA - Grande variação geográfica detectada.",
+    ),
+    ParecerRule(
+        "MUITO_DISTANTE",
+        None,
+        "Análise de Geolocalização: Os endereços estão muito distantes, "
+        "a {distancia:.2f} km de distância. "
+        "Endereço de origem: {endereco_origem}. "
+        "Endereço de destino: {endereco_destino}. "
+        "Parecer: RISCO ALTO - Necessária investigação detalhada da documentação.",
+    ),
+])
@@ -0,0 +1,154 @@
+"""
+Benchmark da normalização de endereços (address_normalizer)
+
+Gera um corpus no estilo dos dados reais: cada endereço base aparece com
+variações de abreviação, acento, caixa, marcador de número, complemento,
+separadores e formato de CEP. Mede µs/op de parse_address (sem a memória LRU
+e com acerto nela) e compara quantas chaves de cache distintas o corpus gera
+com a normalização anterior (só caixa/acentos/pontuação) e com a nova,
+ou seja, a taxa de acerto de cache esperada para o corpus.
+
+Uso (a partir de backend/):
+    python -m benchmarks.address_normalization
+    python -m benchmarks.address_normalization --addresses 20000 --seed 7
+"""
+
+import argparse
+import random
+import re
+import time
+import unicodedata
+
+from app.utils.address_normalizer import parse_address
+
+# (tipo, nome, número, bairro, cidade, UF, CEP)
+BASE_ADDRESSES = [
+    ("Avenida", "Paulista", "1000", "Bela Vista", "São Paulo", "SP", "01310100"),
+    ("Rua", "Doutor Arnaldo", "455", "Cerqueira César", "São Paulo", "SP", "01246903"),
+    ("Rua", "25 de Março", "1200", "Centro", "São Paulo", "SP", "01021200"),
+    ("Avenida", "Presidente Vargas", "3131", "Cidade Nova", "Rio de Janeiro", "RJ", "20210031"),
+    ("Rua", "Visconde de Pirajá", "330", "Ipanema", "Rio de Janeiro", "RJ", "22410002"),
+    ("Avenida", "Afonso Pena", "1212", "Centro", "Belo Horizonte", "MG", "30130005"),
+    ("Rua", "XV de Novembro", "700", "Centro", "Curitiba", "PR", "80020310"),
+    ("Avenida", "Borges de Medeiros", "2500", "Praia de Belas", "Porto Alegre", "RS", "90110150"),
+    ("Travessa", "Nossa Senhora de Fátima", "20", "Vila Mariana", "São Paulo", "SP", "04117040"),
+    ("Alameda", "Santos", "200", "Jardim Paulista", "São Paulo", "SP", "01418000"),
+    ("Praça", "da Sé", "1", "Sé", "São Paulo", "SP", "01001000"),
+    ("Estrada", "do Galeão", "3000", "Ilha do Governador", "Rio de Janeiro", "RJ", "21941570"),
+    ("Avenida", "Senador Salgado Filho", "1559", "Tirol", "Natal", "RN", "59015000"),
+    ("Rua", "General Osório", "85", "Centro", "Salvador", "BA", "40060020"),
+    ("Avenida", "Engenheiro Domingos Ferreira", "4060", "Boa Viagem", "Recife", "PE", "51021040"),
+    ("Rodovia", "BR-116", "km 98", "Bairro Alto", "Curitiba", "PR", "82840000"),
+    ("Rodovia", "SP-280", "km 25", "Alphaville", "Barueri", "SP", "06460000"),
+]
+
+TIPO_ABREV = {"Avenida": ["Av.", "Av", "AV", "Avda"], "Rua": ["R.", "R", "RUA"], "Travessa": ["Tv.", "Trav."],
+              "Alameda": ["Al.", "Alam."], "Praça": ["Pç.", "Pça", "Praca"], "Estrada": ["Estr.", "Est."],
+              "Rodovia": ["Rod.", "Rod", "ROD"]}
+NOME_ABREV = {"Doutor": "Dr.", "Presidente": "Pres.", "Senador": "Sen.", "General": "Gen.",
+              "Engenheiro": "Eng.", "Senhora": "Sra."}
+NUMERO_FMT = ["{}", "nº {}", "n. {}", "N {}", "número {}"]
+COMPLEMENTOS = ["", "", "apto 12", "ap. 31", "bloco B", "sala 804", "conj. 121", "casa 2", "12º andar", "fundos"]
+
+
+def strip_accents(text: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def variation(base, rng: random.Random) -> str:
+    """Uma forma "digitada" do endereço base"""
+    tipo, nome, numero, bairro, cidade, uf, cep = base
+    if rng.random() < 0.6:
+        tipo = rng.choice(TIPO_ABREV.get(tipo, [tipo]))
+    for palavra, abrev in NOME_ABREV.items():
+        if palavra in nome and rng.random() < 0.5:
+            nome = nome.replace(palavra, abrev)
+
+    # Rodovia: o "km" é a posição, sem marcador de número
+    partes = [f"{tipo} {nome}", numero if numero.startswith("km") else rng.choice(NUMERO_FMT).format(numero)]
+    complemento = rng.choice(COMPLEMENTOS)
+    if complemento:
+        partes.append(complemento)
+    if rng.random() < 0.5:
+        partes.append(bairro)
+    partes.append(rng.choice([f"{cidade}/{uf}", f"{cidade} - {uf}", f"{cidade}, {uf}", cidade]))
+    if rng.random() < 0.4:
+        partes.append(rng.choice([f"{cep[:5]}-{cep[5:]}", cep, f"CEP {cep[:2]}.{cep[2:5]}-{cep[5:]}"]))
+
+    separador = rng.choice([", ", " - ", " "])
+    text = ", ".join(partes[:2]) + separador + separador.join(partes[2:])
+    if rng.random() < 0.3:
+        text = strip_accents(text)
+    return rng.choice([text, text.upper(), text.lower()])
+
+
+def corpus(count: int, seed: int):
+    rng = random.Random(seed)
+    return [variation(rng.choice(BASE_ADDRESSES), rng) for _ in range(count)]
+
+
+_LEGACY_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def legacy_key(address: str) -> str:
+    """Normalização anterior: caixa, acentos e pontuação"""
+    return _LEGACY_NON_ALNUM.sub(" ", strip_accents(address).lower()).strip()
+
+
+def time_us_per_op(func, addresses) -> float:
+    start = time.perf_counter()
+    for address in addresses:
+        func(address)
+    return (time.perf_counter() - start) / len(addresses) * 1e6
+
+
+def hit_ratio(keys) -> float:
+    """Acertos de um cache sem expiração percorrendo o corpus em ordem"""
+    return 1 - len(set(keys)) / len(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--addresses", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    addresses = corpus(args.addresses, args.seed)
+    uncached = parse_address.__wrapped__
+
+    # Aquecimento fora da medição
+    for address in addresses[:200]:
+        uncached(address)
+    parse_address.cache_clear()
+
+    legacy_us = time_us_per_op(legacy_key, addresses)
+    parse_us = time_us_per_op(uncached, addresses)
+
+    # Memória LRU: endereços repetidos (conjunto menor que o maxsize)
+    repeated = addresses[:1000]
+    time_us_per_op(parse_address, repeated)
+    cached_us = time_us_per_op(parse_address, repeated * 10)
+
+    legacy_keys = [legacy_key(address) for address in addresses]
+    keys = [parse_address(address).chave for address in addresses]
+
+    print(f"{args.addresses} endereços (seed={args.seed}), {len(BASE_ADDRESSES)} endereços base\n")
+    header = f"{'normalização':<26} {'µs/op':>8} {'chaves':>8} {'acerto de cache':>16}"
+    print(header)
+    print("-" * len(header))
+    print(f"{'anterior (caixa/acentos)':<26} {legacy_us:>8.2f} {len(set(legacy_keys)):>8} {hit_ratio(legacy_keys):>15.1%}")
+    print(f"{'parse_address':<26} {parse_us:>8.2f} {len(set(keys)):>8} {hit_ratio(keys):>15.1%}")
+    print(f"{'parse_address (LRU, hit)':<26} {cached_us:>8.2f}")
+
+    # Chaves além dos endereços base: bairro/UF presentes ou não são consultas diferentes
+    by_key = {}
+    for address, key in zip(addresses, keys):
+        by_key.setdefault(key, address)
+    if len(by_key) > len(BASE_ADDRESSES):
+        print("\nchaves além dos endereços base (amostra):")
+        for key in sorted(by_key)[:10]:
+            print(f"  {key!r:<60} <- {by_key[key]!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark dos modos de distância (fast, haversine, geodesic)
+
+Mede ns/op (escalar e em lote) e o erro de cada modo em relação à
+geodésica WGS84 sem arredondamento, sobre pares aleatórios de
+coordenadas brasileiras. Também conta pareceres que mudariam de faixa.
+
+Uso (a partir de backend/):
+    python -m benchmarks.distance_modes
+    python -m benchmarks.distance_modes --pairs 50000 --seed 7
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+from geographiclib.geodesic import Geodesic
+
+from app.utils import DistanceCalculator, list_distance_modes
+
+# Retângulo que contém o território brasileiro
+LAT_RANGE = (-33.7, 5.2)
+LON_RANGE = (-73.9, -34.8)
+
+
+def brazilian_pairs(count: int, seed: int):
+    """Pares aleatórios: metade próximos (até ~50 km), metade em todo o país"""
+    rng = random.Random(seed)
+    lat1, lon1, lat2, lon2 = [], [], [], []
+    for _ in range(count):
+        a = rng.uniform(*LAT_RANGE)
+        b = rng.uniform(*LON_RANGE)
+        if rng.random() < 0.5:
+            c = a + rng.uniform(-0.45, 0.45)
+            d = b + rng.uniform(-0.45, 0.45)
+        else:
+            c = rng.uniform(*LAT_RANGE)
+            d = rng.uniform(*LON_RANGE)
+        lat1.append(a)
+        lon1.append(b)
+        lat2.append(c)
+        lon2.append(d)
+    return [np.asarray(values) for values in (lat1, lon1, lat2, lon2)]
+
+
+def reference_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Geodésica WGS84 sem arredondamento (referência de erro)"""
+    inverse = Geodesic.WGS84.Inverse
+    return np.array([
+        inverse(a, b, c, d, Geodesic.DISTANCE)["s12"] / 1000
+        for a, b, c, d in zip(lat1.tolist(), lon1.tolist(), lat2.tolist(), lon2.tolist())
+    ])
+
+
+def time_ns_per_op(func, count: int) -> float:
+    start = time.perf_counter_ns()
+    func()
+    return (time.perf_counter_ns() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pairs", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    lat1, lon1, lat2, lon2 = brazilian_pairs(args.pairs, args.seed)
+    reference = reference_km(lat1, lon1, lat2, lon2)
+    reference_types = DistanceCalculator.classify_batch(np.round(reference, 2))
+    scalar_args = list(zip(lat1.tolist(), lon1.tolist(), lat2.tolist(), lon2.tolist()))
+
+    print(f"{args.pairs} pares (seed={args.seed}), referência: geodésica WGS84 sem arredondamento\n")
+    header = (
+        f"{'modo':<10} {'escalar ns/op':>14} {'lote ns/op':>11} "
+        f"{'erro máx km':>12} {'erro médio km':>14} {'erro máx % (>1km)':>18} {'faixa ≠':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    for mode in list_distance_modes():
+        # Aquecimento (imports/caches) fora da medição
+        [mode.distance(*pair) for pair in scalar_args[:100]]
+        mode.distance_batch(lat1[:100], lon1[:100], lat2[:100], lon2[:100])
+
+        scalar_ns = time_ns_per_op(
+            lambda: [mode.distance(*pair) for pair in scalar_args], len(scalar_args)
+        )
+        distances = None
+
+        def run_batch():
+            nonlocal distances
+            distances = mode.distance_batch(lat1, lon1, lat2, lon2)
+
+        batch_ns = time_ns_per_op(run_batch, args.pairs)
+
+        error = np.abs(distances - reference)
+        # Erro relativo só acima de 1 km (abaixo disso domina o arredondamento a 2 casas)
+        far = reference >= 1
+        relative = error[far] / reference[far] * 100
+        changed = int((DistanceCalculator.classify_batch(distances) != reference_types).sum())
+
+        print(
+            f"{mode.name:<10} {scalar_ns:>14.0f} {batch_ns:>11.0f} "
+            f"{error.max():>12.3f} {error.mean():>14.4f} {relative.max():>18.3f} {changed:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
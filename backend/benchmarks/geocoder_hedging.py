@@ -0,0 +1,122 @@
+"""
+Benchmark da cauda de latência: cliente único x Geocoder com hedge (offline)
+
+Dois servidores locais (benchmarks.nominatim_standin): o primário com
+latência, jitter e uma fração de requisições penduradas (timeout_rate) ou
+com erro, e um secundário limpo. Compara, para o mesmo corpus:
+
+- cliente: NominatimClient direto no primário (timeout fixo)
+- geocoder: Geocoder(primário, secundário) com hedge no p95, timeout
+  adaptativo e circuit breaker
+
+Mostra p50/p95/p99/máximo por consulta, falhas e os contadores por
+backend (hedges, timeouts, estado do circuito).
+
+Uso (a partir de backend/):
+    python -m benchmarks.geocoder_hedging
+    python -m benchmarks.geocoder_hedging --timeout-rate 0.05 --error-rate 0.02 --requests 1000
+"""
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from app.utils import Geocoder, NominatimClient, NominatimError
+from app.utils.geocoder import GeocoderBackend
+
+from .address_normalization import corpus
+from .nominatim_standin import NominatimStandin, StandinConfig, start_standin_thread
+
+
+async def run(client, addresses, concurrency: int):
+    """Latências (s) por consulta e número de falhas"""
+    latencies = []
+    failures = 0
+    queue = asyncio.Queue()
+    for address in addresses:
+        queue.put_nowait(address)
+
+    async def worker():
+        nonlocal failures
+        while not queue.empty():
+            address = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                await client.search(address)
+            except NominatimError:
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return np.asarray(latencies), failures
+
+
+def report(name: str, latencies, failures: int) -> None:
+    p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99])
+    print(f"{name:<10} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {latencies.max() * 1000:>9.1f} {failures:>7}")
+
+
+async def benchmark(args, primary_url: str, secondary_url: str) -> None:
+    addresses = corpus(args.requests, args.seed)
+    single = NominatimClient(base_url=primary_url, timeout=args.timeout)
+    geocoder = Geocoder([
+        GeocoderBackend("primario", NominatimClient(base_url=primary_url, timeout=args.timeout)),
+        GeocoderBackend("secundario", NominatimClient(base_url=secondary_url, timeout=args.timeout)),
+    ])
+
+    print(f"{len(addresses)} consultas, {args.concurrency} chamadores, timeout do cliente {args.timeout:g}s\n")
+    header = f"{'':<10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'máx ms':>9} {'falhas':>7}"
+    print(header)
+    print("-" * len(header))
+    try:
+        report("cliente", *await run(single, addresses, args.concurrency))
+        report("geocoder", *await run(geocoder, addresses, args.concurrency))
+    finally:
+        await single.close()
+        await geocoder.close()
+
+    print()
+    for name, stats in geocoder.stats().items():
+        print(f"{name}: {stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=2, help="timeout do cliente (s)")
+    parser.add_argument("--latency-ms", type=float, default=40)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--timeout-rate", type=float, default=0.03, help="fração pendurada no primário")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="fração de 503 no primário")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    primary = NominatimStandin(config=StandinConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        timeout_rate=args.timeout_rate,
+        error_rate=args.error_rate,
+        hang_seconds=args.timeout * 2,
+        synthetic=True,
+        seed=args.seed,
+    ))
+    secondary = NominatimStandin(config=StandinConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        synthetic=True,
+        seed=args.seed + 1,
+    ))
+    primary_url, stop_primary = start_standin_thread(primary)
+    secondary_url, stop_secondary = start_standin_thread(secondary)
+    try:
+        asyncio.run(benchmark(args, primary_url, secondary_url))
+    finally:
+        stop_primary()
+        stop_secondary()
+
+
+if __name__ == "__main__":
+    main()
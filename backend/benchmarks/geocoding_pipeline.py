@@ -0,0 +1,149 @@
+"""
+Benchmark de ponta a ponta da geocodificação (offline)
+
+Percorre um corpus de endereços (benchmarks.address_normalization) com
+o pipeline da aplicação: normalização, cache em dois níveis (LRU +
+tabela geocode_cache em SQLite na memória), GeocodeScheduler (limite de
+taxa, coalescência) e NominatimClient contra o servidor local
+(benchmarks.nominatim_standin) com latência e falhas injetadas.
+
+Duas passadas sobre o mesmo corpus: fria (cache vazio) e quente (tudo
+no LRU). Mostra vazão, latência por endereço (p50/p95/p99), requisições
+despachadas ao provedor, consultas coalescidas no scheduler, falhas,
+acerto de cache e os contadores do servidor.
+
+Uso (a partir de backend/):
+    python -m benchmarks.geocoding_pipeline
+    python -m benchmarks.geocoding_pipeline --rate 20 --latency-ms 200 --error-rate 0.05
+    python -m benchmarks.geocoding_pipeline --url http://localhost:8088   # stand-in já no ar
+"""
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base
+from app.models.geocode_cache import GeocodeCache
+from app.services import GeocodingService, geocoding_service
+from app.utils import GeocodePriority, GeocodeScheduler, NominatimClient
+from app.utils.geocode_scheduler import LocalTokenBucket
+
+from .address_normalization import corpus
+from .nominatim_standin import NominatimStandin, StandinConfig, start_standin_thread
+
+
+async def run_pass(service: GeocodingService, addresses, concurrency: int):
+    """Geocodificar o corpus com `concurrency` chamadores; latências (s) e resultados"""
+    latencies = []
+    found = 0
+    queue = asyncio.Queue()
+    for address in addresses:
+        queue.put_nowait(address)
+
+    async def worker():
+        nonlocal found
+        while not queue.empty():
+            address = queue.get_nowait()
+            start = time.perf_counter()
+            result = await service.geocodificar_async(address)
+            latencies.append(time.perf_counter() - start)
+            found += result is not None
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, np.asarray(latencies), found
+
+
+async def benchmark(args, url: str, standin=None):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[GeocodeCache.__table__])
+    db = sessionmaker(bind=engine)()
+
+    client = NominatimClient(base_url=url, timeout=args.timeout)
+    scheduler = GeocodeScheduler(client, LocalTokenBucket(rate=args.rate, burst=args.burst))
+    # Faixa de backlog: sem limite de espera na fila (a carga é toda de uma vez)
+    service = GeocodingService(db, client=scheduler.lane(GeocodePriority.BACKLOG))
+    addresses = corpus(args.addresses, args.seed)
+    geocoding_service.reset_geocode_cache()
+
+    print(
+        f"{len(addresses)} endereços, {args.concurrency} chamadores, limite {args.rate:g} req/s "
+        f"(rajada {args.burst:g}), servidor {url}\n"
+    )
+    header = (
+        f"{'passada':<8} {'s':>7} {'end/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'requisições':>12} {'coalescidas':>12} {'falhas':>7} {'acerto':>7} {'encontrados':>12}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    try:
+        for name in ("fria", "quente"):
+            before = geocoding_service.geocode_cache_stats()
+            queue_before = scheduler.stats.to_dict()
+            elapsed, latencies, found = await run_pass(service, addresses, args.concurrency)
+            after = geocoding_service.geocode_cache_stats()
+            queue_after = scheduler.stats.to_dict()
+
+            dispatched = queue_after["faixas"]["backlog"]["despachadas"] - queue_before["faixas"]["backlog"]["despachadas"]
+            coalesced = queue_after["coalescidas"] - queue_before["coalescidas"]
+            errors = after["erros"] - before["erros"]
+            hits = (after["memoria"] + after["banco"]) - (before["memoria"] + before["banco"])
+            p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99])
+            print(
+                f"{name:<8} {elapsed:>7.2f} {len(addresses) / elapsed:>8.0f} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f} "
+                f"{dispatched:>12} {coalesced:>12} {errors:>7} {hits / len(addresses):>7.1%} {found:>12}"
+            )
+        espera = scheduler.stats.to_dict()["faixas"]["backlog"]
+    finally:
+        await scheduler.close()
+        await client.close()
+        db.close()
+
+    print(f"\nespera na fila (s): média={espera['espera_media_s']} p95={espera['espera_p95_s']} máx={espera['espera_max_s']}")
+    if standin is not None:
+        print(f"servidor: {standin.stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--addresses", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rate", type=float, default=50, help="limite do scheduler (req/s)")
+    parser.add_argument("--burst", type=float, default=1)
+    parser.add_argument("--timeout", type=float, default=2, help="timeout do cliente (s)")
+    parser.add_argument("--url", help="stand-in já no ar (padrão: sobe um local)")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--timeout-rate", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(benchmark(args, args.url.rstrip("/")))
+        return
+
+    standin = NominatimStandin(config=StandinConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.timeout * 2,
+        synthetic=True,
+        seed=args.seed,
+    ))
+    url, stop = start_standin_thread(standin)
+    try:
+        asyncio.run(benchmark(args, url, standin))
+    finally:
+        stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Servidor Nominatim local (stand-in) para testes e benchmarks offline
+
+Responde /search e /reverse no formato JSON do Nominatim a partir de um
+conjunto de endereços (benchmarks/data/nominatim_fixture.json por
+padrão). A consulta é casada pela chave do address_normalizer, a mesma
+usada pelo cache da aplicação. Endereços fora do conjunto retornam []
+ou, com synthetic, coordenadas determinísticas derivadas da chave (para
+corpora de qualquer tamanho).
+
+Injeção de falhas (StandinConfig): latência (média + jitter), HTTP 503
+com probabilidade error_rate, requisição pendurada por hang_seconds com
+probabilidade timeout_rate, e HTTP 429 acima de max_rps requisições por
+segundo (como a política de uso do servidor público). Contadores em
+GET /_standin/stats.
+
+Uso (a partir de backend/):
+    python -m benchmarks.nominatim_standin --port 8088 --latency-ms 150 --error-rate 0.02
+    NOMINATIM_ENDPOINT=http://localhost:8088 uvicorn app.main:app
+"""
+
+from collections import deque
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+
+from aiohttp import web
+
+from app.utils.address_normalizer import address_key, fold
+
+DEFAULT_DATASET = Path(__file__).parent / "data" / "nominatim_fixture.json"
+
+_COUNTRIES = {"brazil", "brasil", "br"}
+
+# Retângulo que contém o território brasileiro (coordenadas sintéticas)
+LAT_RANGE = (-33.7, 5.2)
+LON_RANGE = (-73.9, -34.8)
+
+
+@dataclass
+class StandinConfig:
+    """Comportamento do servidor (pode ser alterado com o servidor no ar)"""
+
+    latency_ms: float = 0
+    jitter_ms: float = 0
+    error_rate: float = 0
+    timeout_rate: float = 0
+    hang_seconds: float = 30
+    max_rps: float = 0
+    synthetic: bool = False
+    reverse_max_km: float = 5
+    seed: Optional[int] = None
+
+
+def load_dataset(path=DEFAULT_DATASET) -> List[dict]:
+    """Endereços do arquivo JSON (query, lat, lon, display_name)"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _query_key(q: str) -> str:
+    """Chave da consulta sem o país que o cliente acrescenta ("..., Brazil")"""
+    head, _, tail = q.rpartition(",")
+    if head and fold(tail).strip() in _COUNTRIES:
+        q = head
+    return address_key(q)
+
+
+def _km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distância aproximada (equiretangular), suficiente para o vizinho mais próximo"""
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return 6371 * math.hypot(x, y)
+
+
+class NominatimStandin:
+    """Aplicação aiohttp com o conjunto de endereços e a injeção de falhas"""
+
+    def __init__(self, dataset: Optional[List[dict]] = None, config: Optional[StandinConfig] = None):
+        self.config = config or StandinConfig()
+        self.places = [self._place(i, entry) for i, entry in enumerate(dataset or load_dataset())]
+        self.index: Dict[str, dict] = {}
+        for place in self.places:
+            self.index.setdefault(address_key(place["query"]), place)
+        self._random = random.Random(self.config.seed)
+        self._recent = deque()
+        self.reset_stats()
+
+    @staticmethod
+    def _place(place_id: int, entry: dict) -> dict:
+        return {
+            "place_id": place_id + 1,
+            "query": entry["query"],
+            "lat": str(entry["lat"]),
+            "lon": str(entry["lon"]),
+            "display_name": entry.get("display_name") or entry["query"],
+        }
+
+    def reset_stats(self) -> None:
+        self.stats = {
+            "requisicoes": 0,
+            "encontrados": 0,
+            "nao_encontrados": 0,
+            "sinteticos": 0,
+            "erros_injetados": 0,
+            "timeouts_injetados": 0,
+            "limitadas_429": 0,
+        }
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/search", self.search)
+        app.router.add_get("/reverse", self.reverse)
+        app.router.add_get("/status", self.status)
+        app.router.add_get("/_standin/stats", self.stats_handler)
+        return app
+
+    async def _inject(self) -> Optional[web.Response]:
+        """Limite de taxa, latência e falhas; resposta de erro ou None para seguir"""
+        config = self.config
+        self.stats["requisicoes"] += 1
+
+        if config.max_rps > 0:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] >= 1:
+                self._recent.popleft()
+            if len(self._recent) >= config.max_rps:
+                self.stats["limitadas_429"] += 1
+                return web.Response(status=429, text="Too Many Requests")
+            self._recent.append(now)
+
+        delay = config.latency_ms + self._random.uniform(-1, 1) * config.jitter_ms
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        roll = self._random.random()
+        if roll < config.timeout_rate:
+            self.stats["timeouts_injetados"] += 1
+            await asyncio.sleep(config.hang_seconds)
+        elif roll < config.timeout_rate + config.error_rate:
+            self.stats["erros_injetados"] += 1
+            return web.Response(status=503, text="Service Unavailable")
+        return None
+
+    def _synthetic(self, key: str) -> dict:
+        """Coordenadas determinísticas para uma chave desconhecida"""
+        digest = hashlib.sha256(key.encode("utf-8")).digest()
+        lat = LAT_RANGE[0] + int.from_bytes(digest[:4], "big") / 2**32 * (LAT_RANGE[1] - LAT_RANGE[0])
+        lon = LON_RANGE[0] + int.from_bytes(digest[4:8], "big") / 2**32 * (LON_RANGE[1] - LON_RANGE[0])
+        return {
+            "place_id": int.from_bytes(digest[8:12], "big"),
+            "lat": f"{lat:.7f}",
+            "lon": f"{lon:.7f}",
+            "display_name": f"{key} (sintético)",
+        }
+
+    @staticmethod
+    def _result(place: dict) -> dict:
+        return {
+            "place_id": place["place_id"],
+            "lat": place["lat"],
+            "lon": place["lon"],
+            "display_name": place["display_name"],
+            "class": "place",
+            "type": "house",
+            "importance": 0.5,
+        }
+
+    async def search(self, request: web.Request) -> web.Response:
+        error = await self._inject()
+        if error is not None:
+            return error
+
+        key = _query_key(request.query.get("q", ""))
+        place = self.index.get(key)
+        if place is not None:
+            self.stats["encontrados"] += 1
+            return web.json_response([self._result(place)])
+        if self.config.synthetic and key:
+            self.stats["sinteticos"] += 1
+            return web.json_response([self._result(self._synthetic(key))])
+        self.stats["nao_encontrados"] += 1
+        return web.json_response([])
+
+    async def reverse(self, request: web.Request) -> web.Response:
+        error = await self._inject()
+        if error is not None:
+            return error
+
+        try:
+            lat = float(request.query["lat"])
+            lon = float(request.query["lon"])
+        except (KeyError, ValueError):
+            return web.json_response({"error": "Invalid coordinates"}, status=400)
+
+        nearest = min(self.places, key=lambda p: _km(lat, lon, float(p["lat"]), float(p["lon"])), default=None)
+        if nearest is not None and _km(lat, lon, float(nearest["lat"]), float(nearest["lon"])) <= self.config.reverse_max_km:
+            self.stats["encontrados"] += 1
+            return web.json_response(self._result(nearest))
+        if self.config.synthetic:
+            self.stats["sinteticos"] += 1
+            return web.json_response({**self._result(self._synthetic(f"{lat:.5f},{lon:.5f}")), "lat": str(lat), "lon": str(lon)})
+        self.stats["nao_encontrados"] += 1
+        # Nominatim responde 200 com "error" quando não há nada próximo
+        return web.json_response({"error": "Unable to geocode"})
+
+    async def status(self, request: web.Request) -> web.Response:
+        return web.Response(text="OK")
+
+    async def stats_handler(self, request: web.Request) -> web.Response:
+        return web.json_response({**self.stats, "config": asdict(self.config), "enderecos": len(self.places)})
+
+
+async def start_standin(
+    standin: NominatimStandin,
+    host: str = "127.0.0.1",
+    port: int = 0
+) -> "tuple[web.AppRunner, str]":
+    """
+    Subir o servidor no loop atual
+
+    Args:
+        standin: Servidor configurado
+        host: Interface
+        port: Porta (0 = livre, escolhida pelo sistema)
+
+    Returns:
+        (runner, URL base); encerrar com await runner.cleanup()
+    """
+    runner = web.AppRunner(standin.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner, f"http://{host}:{runner.addresses[0][1]}"
+
+
+def start_standin_thread(
+    standin: NominatimStandin,
+    host: str = "127.0.0.1",
+    port: int = 0
+) -> "tuple[str, Callable[[], None]]":
+    """
+    Subir o servidor em thread e loop próprios (fora do loop medido)
+
+    Returns:
+        (URL base, função que encerra o servidor e a thread)
+    """
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="nominatim-standin", daemon=True)
+    thread.start()
+    runner, url = asyncio.run_coroutine_threadsafe(start_standin(standin, host, port), loop).result()
+
+    def stop() -> None:
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    return url, stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8088)
+    parser.add_argument("--dataset", default=str(DEFAULT_DATASET))
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--timeout-rate", type=float, default=0)
+    parser.add_argument("--hang-seconds", type=float, default=30)
+    parser.add_argument("--max-rps", type=float, default=0)
+    parser.add_argument("--synthetic", action="store_true", help="coordenadas sintéticas para endereços desconhecidos")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config = StandinConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds,
+        max_rps=args.max_rps,
+        synthetic=args.synthetic,
+        seed=args.seed,
+    )
+    standin = NominatimStandin(load_dataset(args.dataset), config)
+    print(f"{len(standin.places)} endereços, {config}")
+    web.run_app(standin.app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""add geohash columns for spatial queries
+
+Revision ID: 003_add_geohash_columns
+Revises: 002_add_audit_logs
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.geohash import encode
+
+
+# revision identifiers, used by Alembic.
+revision = '003_add_geohash_columns'
+down_revision = '002_add_audit_logs'
+branch_labels = None
+depends_on = None
+
+
+# tabela -> [(coluna geohash, coluna latitude, coluna longitude, índice)]
+GEOHASH_COLUMNS = {
+    'dados_contrato': [
+        ('geohash', 'latitude', 'longitude', 'idx_dados_contrato_geohash'),
+    ],
+    'dados_bureau': [
+        ('geohash', 'latitude', 'longitude', 'idx_dados_bureau_geohash'),
+    ],
+    'pareceres': [
+        ('geohash_inicio', 'latitude_inicio', 'longitude_inicio', 'idx_parecer_geohash_inicio'),
+        ('geohash_fim', 'latitude_fim', 'longitude_fim', 'idx_parecer_geohash_fim'),
+    ],
+}
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def _backfill(table: str, geohash_column: str, latitude_column: str, longitude_column: str) -> None:
+    """Preencher geohash das linhas existentes em lotes"""
+    connection = op.get_bind()
+    last_id = 0
+
+    while True:
+        rows = connection.execute(
+            sa.text(
+                f"SELECT id, {latitude_column}, {longitude_column} FROM {table} "
+                f"WHERE id > :last_id AND {latitude_column} IS NOT NULL "
+                f"AND {longitude_column} IS NOT NULL ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+
+        connection.execute(
+            sa.text(f"UPDATE {table} SET {geohash_column} = :geohash WHERE id = :id"),
+            [{"id": row[0], "geohash": encode(row[1], row[2])} for row in rows],
+        )
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    """Adicionar colunas geohash (índice B-tree) e preencher linhas existentes"""
+
+    for table, columns in GEOHASH_COLUMNS.items():
+        for geohash_column, latitude_column, longitude_column, index_name in columns:
+            op.add_column(table, sa.Column(geohash_column, sa.String(12), nullable=True))
+            _backfill(table, geohash_column, latitude_column, longitude_column)
+            op.create_index(index_name, table, [geohash_column], unique=False)
+
+
+def downgrade() -> None:
+    """Reverter as mudanças"""
+
+    for table, columns in GEOHASH_COLUMNS.items():
+        for geohash_column, _, _, index_name in columns:
+            op.drop_index(index_name, table_name=table)
+            op.drop_column(table, geohash_column)
@@ -0,0 +1,28 @@
+"""add fingerprint to pareceres (memoized analysis)
+
+Revision ID: 004_add_parecer_fingerprint
+Revises: 003_add_geohash_columns
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004_add_parecer_fingerprint'
+down_revision = '003_add_geohash_columns'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Adicionar coluna fingerprint (pareceres existentes são recalculados na próxima análise)"""
+
+    op.add_column('pareceres', sa.Column('fingerprint', sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    """Reverter as mudanças"""
+
+    op.drop_column('pareceres', 'fingerprint')
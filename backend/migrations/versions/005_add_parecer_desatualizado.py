@@ -0,0 +1,33 @@
+"""add desatualizado flag to pareceres (incremental re-analysis)
+
+Revision ID: 005_add_parecer_desatualizado
+Revises: 004_add_parecer_fingerprint
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005_add_parecer_desatualizado'
+down_revision = '004_add_parecer_fingerprint'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Adicionar flag desatualizado (marcada quando coordenadas/endereços mudam)"""
+
+    op.add_column(
+        'pareceres',
+        sa.Column('desatualizado', sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+    op.create_index('idx_parecer_desatualizado', 'pareceres', ['desatualizado'], unique=False)
+
+
+def downgrade() -> None:
+    """Reverter as mudanças"""
+
+    op.drop_index('idx_parecer_desatualizado', table_name='pareceres')
+    op.drop_column('pareceres', 'desatualizado')
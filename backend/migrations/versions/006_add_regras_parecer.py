@@ -0,0 +1,44 @@
+"""add per-tenant parecer rules and rules version on pareceres
+
+Revision ID: 006_add_regras_parecer
+Revises: 005_add_parecer_desatualizado
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006_add_regras_parecer'
+down_revision = '005_add_parecer_desatualizado'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Criar regras_parecer e adicionar pareceres.regras_versao"""
+
+    op.create_table(
+        'regras_parecer',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.String(36), nullable=False),
+        sa.Column('faixas', sa.JSON(), nullable=False),
+        sa.Column('versao', sa.String(12), nullable=False),
+        sa.Column('atualizado_por', sa.String(255), nullable=True),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_regras_parecer_id'), 'regras_parecer', ['id'], unique=False)
+    op.create_index(op.f('ix_regras_parecer_tenant_id'), 'regras_parecer', ['tenant_id'], unique=True)
+
+    op.add_column('pareceres', sa.Column('regras_versao', sa.String(12), nullable=True))
+
+
+def downgrade() -> None:
+    """Reverter as mudanças"""
+
+    op.drop_column('pareceres', 'regras_versao')
+    op.drop_index(op.f('ix_regras_parecer_tenant_id'), table_name='regras_parecer')
+    op.drop_index(op.f('ix_regras_parecer_id'), table_name='regras_parecer')
+    op.drop_table('regras_parecer')
@@ -0,0 +1,83 @@
+"""add materialized distance histogram per tenant and day
+
+Revision ID: 007_add_histograma_distancias
+Revises: 006_add_regras_parecer
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from decimal import Decimal
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.distance_histogram import add_delta
+
+
+# revision identifiers, used by Alembic.
+revision = '007_add_histograma_distancias'
+down_revision = '006_add_regras_parecer'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def _backfill() -> None:
+    """Agregar pareceres existentes por tenant, dia e bucket"""
+    connection = op.get_bind()
+    deltas = {}
+    last_id = 0
+
+    while True:
+        rows = connection.execute(
+            sa.text(
+                "SELECT p.id, u.tenant_id, p.distancia_km, p.criado_em FROM pareceres p "
+                "JOIN dados_contrato c ON c.id = p.contrato_id "
+                "JOIN usuarios u ON u.id = c.usuario_id "
+                "WHERE p.id > :last_id ORDER BY p.id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+
+        for _, tenant_id, distancia_km, criado_em in rows:
+            add_delta(deltas, tenant_id, criado_em.date(), Decimal(str(distancia_km)))
+        last_id = rows[-1][0]
+
+    if deltas:
+        op.bulk_insert(
+            sa.table(
+                'histograma_distancias',
+                sa.column('tenant_id', sa.String),
+                sa.column('dia', sa.Date),
+                sa.column('bucket', sa.SmallInteger),
+                sa.column('contagem', sa.Integer),
+                sa.column('soma_km', sa.Numeric),
+            ),
+            [
+                {"tenant_id": tenant_id, "dia": dia, "bucket": bucket, "contagem": count, "soma_km": total}
+                for (tenant_id, dia, bucket), (count, total) in deltas.items()
+            ],
+        )
+
+
+def upgrade() -> None:
+    """Criar histograma_distancias e preencher com os pareceres existentes"""
+
+    op.create_table(
+        'histograma_distancias',
+        sa.Column('tenant_id', sa.String(36), nullable=False),
+        sa.Column('dia', sa.Date(), nullable=False),
+        sa.Column('bucket', sa.SmallInteger(), nullable=False),
+        sa.Column('contagem', sa.Integer(), nullable=False),
+        sa.Column('soma_km', sa.Numeric(precision=16, scale=2), nullable=False),
+        sa.PrimaryKeyConstraint('tenant_id', 'dia', 'bucket'),
+    )
+    _backfill()
+
+
+def downgrade() -> None:
+    """Reverter as mudanças"""
+
+    op.drop_table('histograma_distancias')
@@ -0,0 +1,41 @@
+"""add persistent geocoding cache
+
+Revision ID: 008_add_geocode_cache
+Revises: 007_add_histograma_distancias
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008_add_geocode_cache'
+down_revision = '007_add_histograma_distancias'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Criar geocode_cache"""
+
+    op.create_table(
+        'geocode_cache',
+        sa.Column('chave', sa.String(64), nullable=False),
+        sa.Column('endereco_normalizado', sa.Text(), nullable=False),
+        sa.Column('latitude', sa.Numeric(precision=10, scale=8), nullable=True),
+        sa.Column('longitude', sa.Numeric(precision=11, scale=8), nullable=True),
+        sa.Column('display_name', sa.Text(), nullable=True),
+        sa.Column('provider', sa.String(50), nullable=False),
+        sa.Column('encontrado', sa.Boolean(), nullable=False),
+        sa.Column('consultado_em', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('chave'),
+    )
+    op.create_index(op.f('ix_geocode_cache_consultado_em'), 'geocode_cache', ['consultado_em'], unique=False)
+
+
+def downgrade() -> None:
+    """Reverter as mudanças"""
+
+    op.drop_index(op.f('ix_geocode_cache_consultado_em'), table_name='geocode_cache')
+    op.drop_table('geocode_cache')
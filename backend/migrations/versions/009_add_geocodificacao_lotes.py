@@ -0,0 +1,49 @@
+"""add bulk geocoding jobs
+
+Revision ID: 009_add_geocodificacao_lotes
+Revises: 008_add_geocode_cache
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009_add_geocodificacao_lotes'
+down_revision = '008_add_geocode_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Criar geocodificacao_lotes"""
+
+    op.create_table(
+        'geocodificacao_lotes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.String(36), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('processados', sa.Integer(), nullable=False),
+        sa.Column('geocodificados', sa.Integer(), nullable=False),
+        sa.Column('nao_encontrados', sa.Integer(), nullable=False),
+        sa.Column('ultimo_bureau_id', sa.Integer(), nullable=False),
+        sa.Column('task_id', sa.String(255), nullable=True),
+        sa.Column('mensagem', sa.Text(), nullable=True),
+        sa.Column('criado_em', sa.DateTime(), nullable=False),
+        sa.Column('iniciado_em', sa.DateTime(), nullable=True),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=False),
+        sa.Column('concluido_em', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_geocodificacao_lotes_id'), 'geocodificacao_lotes', ['id'], unique=False)
+    op.create_index('idx_geocodificacao_lotes_tenant_status', 'geocodificacao_lotes', ['tenant_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Reverter as mudanças"""
+
+    op.drop_index('idx_geocodificacao_lotes_tenant_status', table_name='geocodificacao_lotes')
+    op.drop_index(op.f('ix_geocodificacao_lotes_id'), table_name='geocodificacao_lotes')
+    op.drop_table('geocodificacao_lotes')
@@ -0,0 +1,32 @@
+"""add geocoding precision to dados_bureau
+
+Revision ID: 010_add_precisao_geocodificacao
+Revises: 009_add_geocodificacao_lotes
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010_add_precisao_geocodificacao'
+down_revision = '009_add_geocodificacao_lotes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Adicionar precisao_geocodificacao (coordenadas existentes vieram do Nominatim)"""
+
+    op.add_column('dados_bureau', sa.Column('precisao_geocodificacao', sa.String(20), nullable=True))
+    op.execute(
+        "UPDATE dados_bureau SET precisao_geocodificacao = 'logradouro' "
+        "WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Reverter as mudanças"""
+
+    op.drop_column('dados_bureau', 'precisao_geocodificacao')
@@ -0,0 +1,43 @@
+"""add persistent reverse geocoding cache
+
+Revision ID: 011_add_reverse_geocode_cache
+Revises: 010_add_precisao_geocodificacao
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011_add_reverse_geocode_cache'
+down_revision = '010_add_precisao_geocodificacao'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Criar reverse_geocode_cache"""
+
+    op.create_table(
+        'reverse_geocode_cache',
+        sa.Column('chave', sa.String(64), nullable=False),
+        sa.Column('latitude', sa.Numeric(precision=10, scale=8), nullable=False),
+        sa.Column('longitude', sa.Numeric(precision=11, scale=8), nullable=False),
+        sa.Column('geohash', sa.String(12), nullable=False),
+        sa.Column('display_name', sa.Text(), nullable=True),
+        sa.Column('provider', sa.String(50), nullable=False),
+        sa.Column('encontrado', sa.Boolean(), nullable=False),
+        sa.Column('consultado_em', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('chave'),
+    )
+    op.create_index('idx_reverse_geocode_cache_geohash', 'reverse_geocode_cache', ['geohash'], unique=False)
+    op.create_index(op.f('ix_reverse_geocode_cache_consultado_em'), 'reverse_geocode_cache', ['consultado_em'], unique=False)
+
+
+def downgrade() -> None:
+    """Reverter as mudanças"""
+
+    op.drop_index(op.f('ix_reverse_geocode_cache_consultado_em'), table_name='reverse_geocode_cache')
+    op.drop_index('idx_reverse_geocode_cache_geohash', table_name='reverse_geocode_cache')
+    op.drop_table('reverse_geocode_cache')
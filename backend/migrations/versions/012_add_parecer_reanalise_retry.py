@@ -0,0 +1,33 @@
+"""add re-analysis retry state to pareceres
+
+Revision ID: 012_add_parecer_reanalise_retry
+Revises: 011_add_reverse_geocode_cache
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012_add_parecer_reanalise_retry'
+down_revision = '011_add_reverse_geocode_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Adicionar tentativas e próxima reanálise (lote em andamento ou espera após falha)"""
+
+    op.add_column(
+        'pareceres',
+        sa.Column('reanalise_tentativas', sa.Integer(), server_default='0', nullable=False),
+    )
+    op.add_column('pareceres', sa.Column('reanalise_apos', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Reverter as mudanças"""
+
+    op.drop_column('pareceres', 'reanalise_apos')
+    op.drop_column('pareceres', 'reanalise_tentativas')
@@ -0,0 +1,28 @@
+"""add distance mode to pareceres
+
+Revision ID: 013_add_parecer_modo_distancia
+Revises: 012_add_parecer_reanalise_retry
+Create Date: 2026-10-20 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '013_add_parecer_modo_distancia'
+down_revision = '012_add_parecer_reanalise_retry'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Adicionar pareceres.modo_distancia (reanálise usa o modo do cálculo original)"""
+
+    op.add_column('pareceres', sa.Column('modo_distancia', sa.String(20), nullable=True))
+
+
+def downgrade() -> None:
+    """Reverter as mudanças"""
+
+    op.drop_column('pareceres', 'modo_distancia')
@@ -0,0 +1,97 @@
+"""
+Testes para a normalização de endereços brasileiros
+"""
+
+import pytest
+
+from app.utils.address_normalizer import AddressComponents, address_key, geocode_query, parse_address
+from app.utils.geocode_cache import normalize_address
+
+
+def test_components():
+    """Testar extração de componentes de um endereço completo"""
+    endereco = parse_address("R. Dr. Arnaldo, nº 455 - apto 12, Cerqueira César, São Paulo/SP, 01246-903")
+
+    assert endereco == AddressComponents(
+        tipo_logradouro="rua",
+        logradouro="doutor arnaldo",
+        numero="455",
+        complemento="apto 12",
+        bairro="cerqueira cesar",
+        cidade="sao paulo",
+        uf="sp",
+        cep="01246903",
+    )
+    assert endereco.consulta == "rua doutor arnaldo, 455, cerqueira cesar, sao paulo, sp"
+
+
+@pytest.mark.parametrize("variacao, chave", [
+    ("Av. Paulista, 1000 - São Paulo/SP", "avenida paulista 1000 sao paulo sp"),
+    ("AV PAULISTA N 1000, SAO PAULO - SP", "avenida paulista 1000 sao paulo sp"),
+    ("Av Paulista 1000 conj. 121 - Sao Paulo - SP", "avenida paulista 1000 sao paulo sp"),
+    ("avenida paulista, nº 1000, são paulo, sp, cep 01310-100", "avenida paulista 1000 sao paulo sp 01310"),
+    ("Avenida Paulista, n. 1000, 12º andar, São Paulo SP 01310100", "avenida paulista 1000 sao paulo sp 01310"),
+    ("Av. Paulista, 1000, São Paulo/SP, 01311-000", "avenida paulista 1000 sao paulo sp 01311"),
+])
+def test_variations_share_key(variacao, chave):
+    """Testar que abreviação, acento, caixa, número e complemento não mudam a chave (o setor do CEP entra)"""
+    assert address_key(variacao) == chave
+    assert geocode_query(variacao) == "avenida paulista, 1000, sao paulo, sp"
+
+
+def test_cep_distinguishes_same_street():
+    """Testar que a mesma rua em CEPs diferentes não colide e que o CEP vai ao provedor sem cidade/UF"""
+    curitiba = "Rua Sete de Setembro, 100, 80060-070"
+    sao_paulo = "Rua Sete de Setembro, 100, 01310-100"
+
+    assert normalize_address(curitiba) != normalize_address(sao_paulo)
+    assert geocode_query(curitiba) == "rua sete de setembro, 100, 80060-070"
+    assert normalize_address(geocode_query(curitiba)) == normalize_address(curitiba)
+    assert normalize_address("Rua XV, 10, Curitiba/PR, 80020-310") != normalize_address("Rua XV, 10, Curitiba/PR, 81000-000")
+
+
+def test_ambiguous_abbreviations():
+    """Testar UF isolada, rua numerada, sem número e nomes que parecem complemento"""
+    assert parse_address("Pç. Tiradentes, 10, Curitiba - PR").uf == "pr"
+    assert geocode_query("Rua 1") == "rua 1"
+    assert geocode_query("Rua 25 de Março, 100") == "rua 25 de marco, 100"
+    assert parse_address("Rua Sem Nome, s/n").numero == "s/n"
+    assert geocode_query("Rua Sem Nome, s/n") == "rua sem nome"
+    assert geocode_query("Rua Casa Verde, 10") == "rua casa verde, 10"
+    assert geocode_query("Trav. N. Sra. de Fátima, 20 casa 2 fundos") == "travessa n senhora de fatima, 20"
+
+
+@pytest.mark.parametrize("endereco, consulta", [
+    ("Rod. BR-116 km 20", "rodovia br-116 km 20"),
+    ("ROD BR-116, KM 20, Curitiba/PR", "rodovia br-116 km 20, curitiba, pr"),
+    ("Rodovia SP-280, km 25, Barueri - SP", "rodovia sp-280 km 25, barueri, sp"),
+    ("Rod. BR-101, 1500, Joinville/SC", "rodovia br-101, 1500, joinville, sc"),
+    ("rod br-116, km 98 bairro alto curitiba", "rodovia br-116 km 98, bairro alto curitiba"),
+])
+def test_highways_keep_their_id(endereco, consulta):
+    """Testar que BR-116/SP-280 não viram rua + número e que o km fica no logradouro"""
+    assert geocode_query(endereco) == consulta
+    assert normalize_address(consulta) == normalize_address(endereco)
+
+
+def test_cep_only_and_empty():
+    """Testar endereço só com CEP e texto sem nada reconhecível"""
+    assert geocode_query("CEP 20040-002") == "20040002"
+    assert parse_address("").consulta == ""
+    assert geocode_query("  ??  ") == "??"
+
+
+def test_query_is_stable():
+    """Testar que normalizar a consulta devolve a mesma chave (cache e provedor coincidem)
+
+    Com cidade ou UF, o setor do CEP fica só na chave (a consulta não o leva).
+    """
+    for endereco in (
+        "R. Dr. Arnaldo, nº 455 - apto 12, Cerqueira César, São Paulo/SP",
+        "Estr. do Galeão, 3000 bl. B, Rio de Janeiro - RJ",
+        "Al. Santos 200",
+        "Al. Santos 200, 01418-000",
+    ):
+        consulta = geocode_query(endereco)
+        assert address_key(consulta) == address_key(endereco)
+        assert normalize_address(consulta) == normalize_address(endereco)
@@ -0,0 +1,333 @@
+"""
+Testes HTTP (TestClient) das rotas: assinatura, injeção de dependências e rate limiting
+"""
+
+from dataclasses import replace
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.dependencies import get_db, get_identity
+from app.api.rate_limiting import limiter
+from app.api.v1 import bureau as bureau_router
+from app.core.oidc_models import Identity
+from app.main import app
+from app.models.database import Base
+from app.models.dados_bureau import DadosBureau
+from app.models.dados_contrato import DadosContrato
+from app.models.logs_analise import LogsAnalise
+from app.models.parecer import Parecer
+from app.models.usuario import Usuario
+from app.services import bureau_service, geocoding_service, geolocation_service, parecer_rules_service
+from app.services.map_cluster_service import invalidate_pyramids
+
+# Tabelas criáveis no SQLite (tenants tem índice duplicado no SQLite)
+TABLES = [table for table in Base.metadata.sorted_tables if table.name != "tenants"]
+
+TENANT = "tenant-123"
+
+RIO = (Decimal("-22.90680000"), Decimal("-43.17290000"), "Rio de Janeiro, Brasil")
+
+
+@pytest.fixture
+def db():
+    """Banco SQLite em memória com as tabelas da aplicação"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    session = sessionmaker(bind=engine)()
+    parecer_rules_service.invalidate_rules()
+    invalidate_pyramids()
+    geocoding_service.reset_geocode_cache()
+
+    yield session
+
+    parecer_rules_service.invalidate_rules()
+    invalidate_pyramids()
+    geocoding_service.reset_geocode_cache()
+    session.close()
+    Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+
+@pytest.fixture
+def identity():
+    return Identity(
+        sub="admin-user-1",
+        email="admin@example.com",
+        preferred_username="admin",
+        tenant_id=TENANT,
+        roles=["admin", "analista"],
+    )
+
+
+@pytest.fixture
+def client(db, identity):
+    """TestClient com banco e identidade substituídos; limites zerados a cada teste"""
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_identity] = lambda: identity
+    limiter.reset()
+
+    yield TestClient(app, raise_server_exceptions=False)
+
+    app.dependency_overrides.clear()
+
+
+class FakeNominatim:
+    """Provedor de teste: coordenadas e endereço fixos"""
+
+    async def search(self, address, country="Brazil"):
+        return RIO
+
+    async def reverse_geocode(self, latitude, longitude):
+        return RIO[2]
+
+
+@pytest.fixture
+def provedor(monkeypatch):
+    """Substitui a fila do provedor nos serviços das rotas de geocodificação"""
+    provedor = FakeNominatim()
+    scheduler = SimpleNamespace(lane=lambda prioridade: provedor)
+    for module in (geolocation_service, bureau_service):
+        monkeypatch.setattr(module, "get_geocode_scheduler", lambda: scheduler)
+    return provedor
+
+
+@pytest.fixture
+def usuario(db):
+    usuario = Usuario(keycloak_id="admin-user-1", email="admin@example.com", nome="Admin", tenant_id=TENANT)
+    db.add(usuario)
+    db.flush()
+    return usuario
+
+
+@pytest.fixture
+def contrato(db, usuario):
+    """Contrato do tenant com bureau geocodificado (~1 km de distância)"""
+    contrato = DadosContrato(
+        usuario_id=usuario.id,
+        cpf_cliente="12345678901",
+        numero_contrato="CT-001",
+        latitude=Decimal("-23.56130000"),
+        longitude=Decimal("-46.65590000"),
+        endereco_assinatura="Av. Paulista, 1000",
+        arquivo_pdf_path="/tmp/contrato.pdf",
+    )
+    db.add(contrato)
+    db.flush()
+    db.add(DadosBureau(
+        contrato_id=contrato.id,
+        cpf_cliente="12345678901",
+        nome_cliente="Cliente",
+        logradouro="Rua Augusta, 500",
+        latitude=Decimal("-23.55520000"),
+        longitude=Decimal("-46.66250000"),
+    ))
+    db.commit()
+    return contrato
+
+
+def test_analisar_geolocalizacao(client, db, contrato):
+    """POST /geolocalizacao/analisar: repetição servida pelo parecer memorizado"""
+    primeira = client.post("/api/v1/geolocalizacao/analisar", json={"contrato_id": contrato.id})
+    assert primeira.status_code == 200, primeira.text
+    assert primeira.json()["tipo_parecer"] == "PROXIMAL"
+
+    segunda = client.post("/api/v1/geolocalizacao/analisar", json={"contrato_id": contrato.id})
+
+    assert segunda.status_code == 200, segunda.text
+    parecer = db.query(Parecer).filter_by(contrato_id=contrato.id).one()
+    assert segunda.json()["timestamp"] == parecer.criado_em.isoformat()
+    assert segunda.json()["distancia_km"] == primeira.json()["distancia_km"]
+    assert db.query(LogsAnalise).filter_by(contrato_id=contrato.id).count() == 1
+
+    forcada = client.post(
+        "/api/v1/geolocalizacao/analisar", json={"contrato_id": contrato.id, "forcar_atualizacao": True}
+    )
+    assert forcada.status_code == 200, forcada.text
+    assert db.query(LogsAnalise).filter_by(contrato_id=contrato.id).count() == 2
+
+
+def test_analisar_geolocalizacao_modo_distancia(client, db, contrato):
+    """POST /geolocalizacao/analisar com modo_distancia: usado no cálculo e gravado no parecer"""
+    padrao = client.post("/api/v1/geolocalizacao/analisar", json={"contrato_id": contrato.id})
+    assert padrao.json()["modo_distancia"] == "haversine"
+
+    response = client.post(
+        "/api/v1/geolocalizacao/analisar", json={"contrato_id": contrato.id, "modo_distancia": "geodesic"}
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["modo_distancia"] == "geodesic"
+    assert response.json()["distancia_km"] != padrao.json()["distancia_km"]
+    parecer = db.query(Parecer).filter_by(contrato_id=contrato.id).one()
+    assert parecer.modo_distancia == "geodesic"
+    assert str(parecer.distancia_km) == response.json()["distancia_km"]
+
+    assert client.post(
+        "/api/v1/geolocalizacao/analisar", json={"contrato_id": contrato.id, "modo_distancia": "x"}
+    ).status_code == 422
+
+
+def test_analisar_lote(client, contrato):
+    """POST /geolocalizacao/analisar-lote"""
+    response = client.post("/api/v1/geolocalizacao/analisar-lote", json={"contrato_ids": [contrato.id]})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["concluidos"] == 1
+
+
+def test_buscar_proximos(client, contrato):
+    """GET /geolocalizacao/proximos"""
+    response = client.get(
+        "/api/v1/geolocalizacao/proximos",
+        params={"latitude": "-23.5613", "longitude": "-46.6559", "raio_km": "1"},
+    )
+
+    assert response.status_code == 200, response.text
+    assert [item["id"] for item in response.json()["resultados"]] == [contrato.id]
+
+
+def test_listar_hotspots(client, contrato):
+    """GET /geolocalizacao/hotspots"""
+    response = client.get("/api/v1/geolocalizacao/hotspots", params={"min_contratos": 2})
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"total_indexado": 1, "hotspots": []}
+
+
+FAIXAS = [
+    {"tipo": "PROXIMAL", "ate_km": 2, "template": "Distância de {distancia:.2f} km. APROVADO."},
+    {"tipo": "MUITO_DISTANTE", "ate_km": None, "template": "Distância de {distancia:.2f} km. RISCO ALTO."},
+]
+
+
+def test_get_regras(client):
+    """GET /pareceres/regras"""
+    response = client.get("/api/v1/pareceres/regras")
+
+    assert response.status_code == 200, response.text
+    assert response.json()["padrao"] is True
+
+
+def test_update_regras(client):
+    """PUT /pareceres/regras"""
+    response = client.put("/api/v1/pareceres/regras", json={"faixas": FAIXAS})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["padrao"] is False
+    assert [faixa["tipo"] for faixa in response.json()["faixas"]] == ["PROXIMAL", "MUITO_DISTANTE"]
+
+
+def test_delete_regras(client):
+    """DELETE /pareceres/regras"""
+    assert client.put("/api/v1/pareceres/regras", json={"faixas": FAIXAS}).status_code == 200
+
+    response = client.delete("/api/v1/pareceres/regras")
+
+    assert response.status_code == 200, response.text
+    assert response.json()["padrao"] is True
+
+
+def test_get_histograma(client, contrato):
+    """GET /pareceres/estatisticas/histograma"""
+    assert client.post("/api/v1/geolocalizacao/analisar-lote", json={"contrato_ids": [contrato.id]}).status_code == 200
+
+    response = client.get("/api/v1/pareceres/estatisticas/histograma")
+
+    assert response.status_code == 200, response.text
+    assert response.json()["total"] == 1
+    assert [bucket["contagem"] for bucket in response.json()["buckets"]] == [1]
+
+
+def test_listar_clusters(client, contrato):
+    """GET /geolocalizacao/clusters"""
+    response = client.get("/api/v1/geolocalizacao/clusters", params={"bbox": "-46.7,-23.6,-46.6,-23.5", "zoom": 3})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["total_pontos"] == 2
+    assert [(cluster["contratos"], cluster["bureaus"]) for cluster in response.json()["clusters"]] == [(1, 1)]
+
+
+def test_estatisticas_geocode_cache(client):
+    """GET /geolocalizacao/geocode-cache/estatisticas"""
+    response = client.get("/api/v1/geolocalizacao/geocode-cache/estatisticas")
+
+    assert response.status_code == 200, response.text
+    assert {"memoria", "banco", "provedor", "hit_ratio", "reverso"} <= response.json().keys()
+
+
+def test_estatisticas_geocode_scheduler(client):
+    """GET /geolocalizacao/geocode-scheduler/estatisticas"""
+    response = client.get("/api/v1/geolocalizacao/geocode-scheduler/estatisticas")
+
+    assert response.status_code == 200, response.text
+    assert {"interactive", "backlog"} <= response.json()["faixas"].keys()
+
+
+@pytest.fixture
+def lote(client, monkeypatch):
+    """Job de geocodificação em lote criado pela API (fila Celery substituída)"""
+    monkeypatch.setattr(
+        bureau_router.geocodificar_backlog_bureau, "apply_async", lambda args: SimpleNamespace(id="task-1")
+    )
+    return client.post("/api/v1/bureau/geocodificacao-lote")
+
+
+def test_iniciar_geocodificacao_lote(lote):
+    """POST /bureau/geocodificacao-lote"""
+    assert lote.status_code == 202, lote.text
+    assert lote.json()["status"] == "PENDENTE"
+
+
+def test_status_geocodificacao_lote(client, lote):
+    """GET /bureau/geocodificacao-lote/{lote_id}"""
+    response = client.get(f"/api/v1/bureau/geocodificacao-lote/{lote.json()['id']}")
+
+    assert response.status_code == 200, response.text
+    assert response.json()["id"] == lote.json()["id"]
+    assert client.get("/api/v1/bureau/geocodificacao-lote/999").status_code == 404
+
+
+def test_cancelar_geocodificacao_lote(client, lote):
+    """POST /bureau/geocodificacao-lote/{lote_id}/cancelar"""
+    response = client.post(f"/api/v1/bureau/geocodificacao-lote/{lote.json()['id']}/cancelar")
+
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "CANCELADO"
+
+
+def test_geocodificar_endereco(client, provedor):
+    """GET /geolocalizacao/geocode"""
+    response = client.get("/api/v1/geolocalizacao/geocode", params={"endereco": "Praça XV, Rio de Janeiro"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["endereco_formatado"] == RIO[2]
+
+
+def test_reverse_geocodificar(client, provedor):
+    """GET /geolocalizacao/reverse"""
+    response = client.get("/api/v1/geolocalizacao/reverse", params={"latitude": "-22.9068", "longitude": "-43.1729"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["endereco"] == RIO[2]
+
+
+def test_geocodificar_bureau(client, provedor, contrato, identity):
+    """POST /bureau/{contrato_id}/geocodificar"""
+    response = client.post(f"/api/v1/bureau/{contrato.id}/geocodificar", params={"precisao_minima": "logradouro"})
+
+    assert response.status_code == 200, response.text
+    assert Decimal(str(response.json()["latitude"])) == RIO[0]
+    assert response.json()["precisao_geocodificacao"] == "logradouro"
+
+    app.dependency_overrides[get_identity] = lambda: replace(identity, tenant_id="outro-tenant")
+    response = client.post(f"/api/v1/bureau/{contrato.id}/geocodificar", params={"precisao_minima": "logradouro"})
+    assert response.status_code == 403, response.text
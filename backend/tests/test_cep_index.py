@@ -0,0 +1,182 @@
+"""
+Testes para o índice offline de centroides de CEP
+"""
+
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base
+from app.models.usuario import Usuario
+from app.models.dados_contrato import DadosContrato
+from app.models.dados_bureau import DadosBureau
+from app.models.parecer import Parecer
+from app.models.geocode_cache import GeocodeCache
+from app.services import BureauService, GeocodingService, geocoding_service
+from app.utils.cep_index import (
+    CepIndex,
+    build_cep_index,
+    build_cep_index_from_csv,
+    precisao_atende,
+    set_cep_index,
+)
+
+TABLES = [model.__table__ for model in (Usuario, DadosContrato, DadosBureau, Parecer, GeocodeCache)]
+
+RIO = (Decimal("-22.90680000"), Decimal("-43.17290000"), "Rio de Janeiro")
+
+ROWS = [
+    ("01310-100", -23.5613, -46.6559),
+    ("01310100", -23.5615, -46.6561),  # repetido: média
+    ("01310-200", -23.5650, -46.6520),
+    ("20040-002", -22.9035, -43.1760),
+    ("123", -23.0, -46.0),              # CEP inválido
+    ("04538-133", 95.0, -46.0),         # latitude inválida
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = tmp_path / "ceps.bin"
+    assert build_cep_index(ROWS, str(path)) == 3
+    return CepIndex(str(path))
+
+
+def test_exact_lookup_averages_duplicates(index):
+    """Testar busca exata com e sem máscara (CEP repetido vira a média)"""
+    local = index.lookup("01310-100")
+
+    assert local.precisao == "cep"
+    assert (local.latitude, local.longitude) == (Decimal("-23.5614"), Decimal("-46.656"))
+    assert index.lookup(1310100) == local
+    assert len(index) == 3
+
+
+def test_sector_fallback_and_misses(index):
+    """Testar centroide do setor para CEP ausente e None para setor desconhecido"""
+    local = index.lookup("01310-999")
+
+    assert local.precisao == "setor_cep"
+    assert local.latitude == Decimal("-23.5626")  # média dos CEPs 01310-xxx
+    assert index.lookup("99999-999") is None
+    assert index.lookup("0131") is None
+    assert index.lookup(None) is None
+
+
+def test_build_from_csv_and_empty_index(tmp_path):
+    """Testar geração a partir de CSV e índice sem CEPs"""
+    csv_path = tmp_path / "ceps.csv"
+    csv_path.write_text("CEP,lat,lng\n20040-002,-22.9035,-43.1760\n", encoding="utf-8")
+    path = tmp_path / "ceps.bin"
+
+    assert build_cep_index_from_csv(str(csv_path), str(path)) == 1
+    assert CepIndex(str(path)).lookup("20040002").longitude == Decimal("-43.176")
+
+    build_cep_index([], str(path))
+    assert CepIndex(str(path)).lookup("20040002") is None
+
+    csv_path.write_text("codigo,lat,lng\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        build_cep_index_from_csv(str(csv_path), str(path))
+
+
+def test_precisao_atende():
+    """Testar ordem de precisão setor_cep < cep < logradouro"""
+    assert precisao_atende("cep", "setor_cep")
+    assert precisao_atende("logradouro", "cep")
+    assert not precisao_atende("setor_cep", "cep")
+
+
+class FakeNominatim:
+    """Provedor de teste: coordenadas fixas"""
+
+    def __init__(self):
+        self.chamadas = []
+
+    async def search(self, address, country="Brazil"):
+        self.chamadas.append(address)
+        return RIO
+
+
+@pytest.fixture
+def db(index):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    geocoding_service.reset_geocode_cache()
+    set_cep_index(index)
+    session = sessionmaker(bind=engine)()
+
+    usuario = Usuario(keycloak_id="kc-1", email="a@a.com", nome="A", tenant_id="tenant-1")
+    session.add(usuario)
+    session.flush()
+    for i, cep in enumerate(["01310100", "01310999", None]):
+        contrato = DadosContrato(
+            usuario_id=usuario.id, cpf_cliente="12345678901", numero_contrato=f"CT-{i}",
+            latitude=Decimal("-23.56130000"), longitude=Decimal("-46.65590000"),
+            endereco_assinatura="Av. Paulista, 1000", arquivo_pdf_path="/tmp/c.pdf",
+        )
+        session.add(contrato)
+        session.flush()
+        session.add(DadosBureau(
+            contrato_id=contrato.id, cpf_cliente="12345678901", nome_cliente="Cliente",
+            logradouro=f"Rua {i}", cep=cep,
+        ))
+    session.commit()
+
+    yield session
+
+    session.close()
+    set_cep_index(None)
+    geocoding_service.reset_geocode_cache()
+    Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+
+def make_service(db, provedor):
+    service = BureauService(db)
+    service.geocoding = GeocodingService(db, client=provedor)
+    return service
+
+
+def bureau_id(db, logradouro):
+    return db.query(DadosBureau).filter_by(logradouro=logradouro).one().id
+
+
+@pytest.mark.parametrize("logradouro, precisao_minima, esperado, chamadas", [
+    ("Rua 0", "cep", "cep", []),
+    ("Rua 1", "setor_cep", "setor_cep", []),
+    ("Rua 1", "cep", "logradouro", ["rua 1"]),        # só o setor no índice
+    ("Rua 0", "logradouro", "logradouro", ["rua 0"]),
+    ("Rua 2", "setor_cep", "logradouro", ["rua 2"]),  # sem CEP
+])
+async def test_bureau_geocoding_tiers(db, logradouro, precisao_minima, esperado, chamadas):
+    """Testar que o índice de CEP atende sem rede quando a precisão mínima permite"""
+    provedor = FakeNominatim()
+    service = make_service(db, provedor)
+
+    resposta = await service.geocodificar_endereco_bureau_async(
+        bureau_id(db, logradouro), usuario_id=1, precisao_minima=precisao_minima
+    )
+
+    assert resposta.precisao_geocodificacao == esperado
+    assert provedor.chamadas == chamadas
+    if esperado == "logradouro":
+        assert (resposta.latitude, resposta.longitude) == (RIO[0], RIO[1])
+    else:
+        assert resposta.latitude != RIO[0]
+
+
+async def test_bureau_geocoding_defaults_to_street(db):
+    """Testar que, sem precisão mínima, o endereço vai ao provedor mesmo com CEP no índice"""
+    provedor = FakeNominatim()
+
+    resposta = await make_service(db, provedor).geocodificar_endereco_bureau_async(bureau_id(db, "Rua 0"), usuario_id=1)
+
+    assert resposta.precisao_geocodificacao == "logradouro"
+    assert provedor.chamadas == ["rua 0"]
@@ -7,11 +7,12 @@ Testing:
 - get_optional_identity dependency (optional auth)
 - @require_roles decorator (role-based access)
 - @require_tenant decorator (tenant isolation)
+- @require_policy and compiled policy registry
 - Error handlers (401, 403, 429, 500)
 """
 
 import pytest
-from fastapi import FastAPI, Depends, status
+from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.testclient import TestClient
 from fastapi.security import HTTPAuthorizationCredentials
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -24,7 +25,13 @@ from app.api.dependencies import (
     get_optional_identity,
     get_db,
 )
-from app.api.decorators import require_roles, require_tenant
+from app.api.decorators import (
+    require_roles,
+    require_tenant,
+    require_policy,
+    get_policy,
+    list_policies,
+)
 from app.api.error_handlers import (
     AuthenticationError,
     AuthorizationError,
@@ -328,6 +335,84 @@ def test_require_tenant_missing_tenant_id():
     # Should fail because tenant_id is missing
 
 
+# ============================================================================
+# TEST: Compiled policies
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_compiled_roles_allow_and_deny(valid_identity, admin_identity):
+    """Test that compiled role masks allow matching roles (case-insensitive) and deny others."""
+    @require_roles("ANALISTA", "Revisor")
+    async def protected_endpoint(identity: Identity):
+        return {"status": "allowed"}
+    
+    assert await protected_endpoint(identity=valid_identity) == {"status": "allowed"}
+    
+    with pytest.raises(HTTPException) as exc_info:
+        await protected_endpoint(identity=admin_identity)
+    assert exc_info.value.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_identity_resolved_positionally(valid_identity):
+    """Test that identity is found by its declared position for sync endpoints."""
+    @require_tenant()
+    def tenant_safe_endpoint(contrato_id: int, identity: Identity):
+        return identity.tenant_id
+    
+    assert tenant_safe_endpoint(1, valid_identity) == "tenant-456"
+
+
+@pytest.mark.asyncio
+async def test_require_policy_denies_missing_tenant(valid_identity):
+    """Test that a single policy enforces roles and tenant together."""
+    @require_policy(roles=("analista",), tenant=True)
+    async def analisar(identity: Identity):
+        return "ok"
+    
+    assert await analisar(identity=valid_identity) == "ok"
+    
+    valid_identity.tenant_id = None
+    with pytest.raises(HTTPException) as exc_info:
+        await analisar(identity=valid_identity)
+    assert exc_info.value.detail == "Tenant information missing"
+
+
+def test_stacked_decorators_merge_into_one_policy():
+    """Test that stacked decorators are recorded as a single auditable policy."""
+    @require_tenant()
+    @require_roles("admin")
+    async def admin_endpoint(identity: Identity):
+        return "ok"
+    
+    policy = get_policy(admin_endpoint)
+    
+    assert policy.roles == ("admin",)
+    assert policy.tenant is True
+    assert policy in list_policies()
+
+
+@pytest.mark.asyncio
+async def test_stacked_role_decorators_are_reported_as_and(valid_identity):
+    """Test that stacked @require_roles keep one role set per decorator (AND)."""
+    @require_roles("admin", "analista")
+    @require_roles("revisor", "analista")
+    async def stacked_endpoint(identity: Identity):
+        return "ok"
+    
+    policy = get_policy(stacked_endpoint)
+    
+    assert policy.role_sets == (("revisor", "analista"), ("admin", "analista"))
+    assert policy.roles == ("analista",)
+    assert policy.to_dict()["role_sets"] == [["revisor", "analista"], ["admin", "analista"]]
+    assert await stacked_endpoint(identity=valid_identity) == "ok"
+
+
+def test_require_roles_without_roles_is_rejected():
+    """Test that require_roles() with no roles fails at decoration time."""
+    with pytest.raises(ValueError):
+        require_roles()
+
+
 # ============================================================================
 # TEST: Error Handlers
 # ============================================================================
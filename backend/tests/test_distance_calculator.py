@@ -0,0 +1,146 @@
+"""
+Testes para DistanceCalculator (caminho escalar e vetorizado)
+"""
+
+import random
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from app.utils import (
+    DistanceCalculator,
+    analysis_fingerprint,
+    get_distance_mode,
+    list_distance_modes,
+    resolve_distance_mode,
+)
+
+
+@pytest.fixture
+def brazil_pairs():
+    """Pares de coordenadas aleatórias dentro do Brasil (semente fixa)"""
+    rng = random.Random(42)
+    pairs = []
+    for _ in range(20000):
+        lat1 = Decimal(f"{rng.uniform(-33.7, 5.2):.8f}")
+        lon1 = Decimal(f"{rng.uniform(-73.9, -34.8):.8f}")
+        # Metade dos pares próximos (faixas de parecer mais comuns)
+        spread = 0.5 if rng.random() < 0.5 else 10.0
+        lat2 = Decimal(f"{float(lat1) + rng.uniform(-spread, spread):.8f}")
+        lon2 = Decimal(f"{float(lon1) + rng.uniform(-spread, spread):.8f}")
+        pairs.append((lat1, lon1, lat2, lon2))
+    return pairs
+
+
+class TestHaversineBatch:
+    """Testes para haversine_batch / classify_batch"""
+
+    def test_batch_identical_to_scalar(self, brazil_pairs):
+        """Testar que o caminho vetorizado reproduz exatamente o escalar"""
+        lat1, lon1, lat2, lon2 = zip(*brazil_pairs)
+
+        distances = DistanceCalculator.haversine_batch(lat1, lon1, lat2, lon2)
+        decimals = DistanceCalculator.to_decimals(distances)
+        tipos = DistanceCalculator.classify_batch(distances)
+
+        for i, pair in enumerate(brazil_pairs):
+            expected = DistanceCalculator.haversine(*pair)
+            assert decimals[i] == expected
+            assert str(decimals[i]) == str(expected)
+            assert tipos[i] == DistanceCalculator.get_parecer_type(expected)
+
+    def test_classify_breakpoints(self):
+        """Testar limites das faixas (inclusivos)"""
+        tipos = DistanceCalculator.classify_batch([0, 5, 5.01, 20, 20.01, 50, 50.01, 1000])
+
+        assert list(tipos) == [
+            "PROXIMAL", "PROXIMAL", "MODERADO", "MODERADO",
+            "DISTANTE", "DISTANTE", "MUITO_DISTANTE", "MUITO_DISTANTE",
+        ]
+
+    def test_missing_coordinates_yield_nan(self):
+        """Testar que coordenadas ausentes resultam em NaN e tipo vazio"""
+        distances = DistanceCalculator.haversine_batch(
+            [-23.55, np.nan], [-46.63, -46.63], [-23.56, -23.56], [-46.64, -46.64]
+        )
+
+        assert not np.isnan(distances[0])
+        assert np.isnan(distances[1])
+        assert DistanceCalculator.classify_batch(distances)[1] == ""
+        assert DistanceCalculator.to_decimals(distances)[1] is None
+
+
+class TestDistanceModes:
+    """Testes para o registro de modos de distância"""
+
+    def test_registered_modes(self):
+        """Testar modos padrão"""
+        assert [mode.name for mode in list_distance_modes()][:3] == ["fast", "haversine", "geodesic"]
+
+    def test_geodesic_reference_value(self):
+        """Testar geodésica WGS84 (1 grau de longitude no equador)"""
+        assert DistanceCalculator.geodesic(0, 0, 0, 1) == Decimal("111.32")
+
+    @pytest.mark.parametrize("name", ["fast", "haversine", "geodesic"])
+    def test_batch_matches_scalar(self, brazil_pairs, name):
+        """Testar que o lote de cada modo reproduz o escalar"""
+        mode = get_distance_mode(name)
+        pairs = brazil_pairs[:500]
+        lat1, lon1, lat2, lon2 = zip(*pairs)
+
+        decimals = DistanceCalculator.to_decimals(mode.distance_batch(lat1, lon1, lat2, lon2))
+
+        assert decimals == [mode.distance(*pair) for pair in pairs]
+
+    def test_modes_close_to_geodesic(self, brazil_pairs):
+        """Testar erro relativo dos modos aproximados em distâncias maiores que 10 km"""
+        lat1, lon1, lat2, lon2 = zip(*brazil_pairs[:2000])
+        reference = get_distance_mode("geodesic").distance_batch(lat1, lon1, lat2, lon2)
+        far = reference > 10
+
+        for name, tolerance in (("haversine", 0.007), ("fast", 0.02)):
+            distances = get_distance_mode(name).distance_batch(lat1, lon1, lat2, lon2)
+            relative = np.abs(distances[far] - reference[far]) / reference[far]
+            assert relative.max() < tolerance
+
+    def test_unknown_mode(self):
+        """Testar modo desconhecido"""
+        with pytest.raises(ValueError):
+            get_distance_mode("manhattan")
+
+    @patch.dict("os.environ", {
+        "DISTANCE_MODE": "fast",
+        "DISTANCE_MODE_TENANTS": "tenant-a:geodesic, tenant-b:haversine",
+    })
+    def test_resolution_order(self):
+        """Testar prioridade: requisição > tenant > DISTANCE_MODE"""
+        assert resolve_distance_mode("haversine", "tenant-a").name == "haversine"
+        assert resolve_distance_mode(None, "tenant-a").name == "geodesic"
+        assert resolve_distance_mode(None, "tenant-b").name == "haversine"
+        assert resolve_distance_mode(None, "tenant-c").name == "fast"
+        assert resolve_distance_mode().name == "fast"
+
+
+class TestAnalysisFingerprint:
+    """Testes para analysis_fingerprint"""
+
+    ARGS = ("-23.5613", "-46.6559", "-23.5552", "-46.6625", "Av. Paulista", "Rua Augusta", "haversine", "1")
+
+    def test_coordinate_representation_does_not_matter(self):
+        """Testar que Decimal do banco e float/str da requisição coincidem"""
+        fingerprint = analysis_fingerprint(*self.ARGS)
+        assert len(fingerprint) == 64
+        assert analysis_fingerprint(
+            Decimal("-23.56130000"), -46.6559, Decimal("-23.5552"), "-46.66250000", *self.ARGS[4:]
+        ) == fingerprint
+
+    @pytest.mark.parametrize("index,value", [
+        (0, "-23.5614"), (3, "-46.6626"), (4, "Av. Brasil"), (5, None), (6, "geodesic"), (7, "2"),
+    ])
+    def test_any_input_changes_fingerprint(self, index, value):
+        """Testar que cada entrada faz parte da impressão digital"""
+        args = list(self.ARGS)
+        args[index] = value
+        assert analysis_fingerprint(*args) != analysis_fingerprint(*self.ARGS)
@@ -0,0 +1,252 @@
+"""
+Testes para o histograma materializado de distâncias (distance_histogram / histograma_distancias)
+"""
+
+from decimal import Decimal
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base
+from app.models.usuario import Usuario
+from app.models.dados_contrato import DadosContrato
+from app.models.dados_bureau import DadosBureau
+from app.models.parecer import Parecer
+from app.models.regras_parecer import RegrasParecer
+from app.models.histograma_distancias import HistogramaDistancias
+from app.models.logs_analise import LogsAnalise
+from app.repositories import BureauRepository, PareceRepository
+from app.services import ContratoService, GeolocalizacaoService, PareceService
+from app.services import parecer_rules_service
+from app.utils.distance_histogram import (
+    LAST_BUCKET, MAX_KM, MIN_KM, bucket_bounds, bucket_index, percentile, summarize,
+)
+
+TABLES = [
+    model.__table__
+    for model in (Usuario, DadosContrato, DadosBureau, Parecer, RegrasParecer, HistogramaDistancias, LogsAnalise)
+]
+
+# Largura relativa de um bucket (10 por década)
+BUCKET_RATIO = 10 ** 0.1
+
+
+class TestBuckets:
+    """Testes para os buckets em escala logarítmica"""
+
+    @pytest.mark.parametrize("distance", [0, 0.005, MIN_KM, 0.9, 1, 3.7, 42, 999.99, MAX_KM, 1e7])
+    def test_bucket_contains_distance(self, distance):
+        """Testar que a distância cai dentro dos limites do próprio bucket"""
+        bucket = bucket_index(distance)
+        low, high = bucket_bounds(bucket)
+
+        assert 0 <= bucket <= LAST_BUCKET
+        assert low <= distance * (1 + 1e-12)
+        assert high is None or distance < high * (1 + 1e-12)
+
+    def test_percentiles_within_bucket_resolution(self):
+        """Testar p50/p90/p99 estimados contra numpy em distâncias aleatórias"""
+        rng = np.random.default_rng(7)
+        distances = rng.lognormal(mean=1.5, sigma=1.2, size=20000)
+
+        counts = {}
+        for distance in distances:
+            bucket = bucket_index(distance)
+            counts[bucket] = counts.get(bucket, 0) + 1
+
+        for q in (50, 90, 99):
+            estimated = percentile(counts, q)
+            exact = np.percentile(distances, q)
+            assert exact / BUCKET_RATIO <= estimated <= exact * BUCKET_RATIO
+
+    def test_summarize(self):
+        """Testar total, média exata e buckets não vazios"""
+        resumo = summarize([
+            (bucket_index(1), 2, Decimal("2.20")),
+            (bucket_index(30), 1, Decimal("30.00")),
+            (bucket_index(5), 0, Decimal("0")),
+        ])
+
+        assert resumo["total"] == 3
+        assert resumo["media_km"] == pytest.approx(10.73, abs=0.01)
+        assert [bucket["contagem"] for bucket in resumo["buckets"]] == [2, 1]
+        assert summarize([])["p50_km"] is None
+
+
+@pytest.fixture
+def db():
+    """Banco SQLite em memória com as tabelas da análise e do histograma"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    session = sessionmaker(bind=engine)()
+    parecer_rules_service.invalidate_rules()
+
+    yield session
+
+    parecer_rules_service.invalidate_rules()
+    session.close()
+    Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+
+@pytest.fixture
+def contratos(db):
+    """Quatro contratos do tenant-1 e um do tenant-2, com bureau a distâncias variadas"""
+    ids = {}
+    for tenant_id, offsets in (("tenant-1", (0.001, 0.01, 0.1, 1.0)), ("tenant-2", (0.05,))):
+        usuario = Usuario(keycloak_id=f"kc-{tenant_id}", email=f"a@{tenant_id}.com", nome="A", tenant_id=tenant_id)
+        db.add(usuario)
+        db.flush()
+        for i, offset in enumerate(offsets):
+            contrato = DadosContrato(
+                usuario_id=usuario.id, cpf_cliente="12345678901", numero_contrato=f"CT-{tenant_id}-{i}",
+                latitude=Decimal("-23.56130000"), longitude=Decimal("-46.65590000"),
+                endereco_assinatura="Av. Paulista, 1000", arquivo_pdf_path="/tmp/c.pdf",
+            )
+            db.add(contrato)
+            db.flush()
+            db.add(DadosBureau(
+                contrato_id=contrato.id, cpf_cliente="12345678901", nome_cliente="Cliente",
+                logradouro="Rua Augusta, 500",
+                latitude=Decimal("-23.56130000") + Decimal(str(offset)),
+                longitude=Decimal("-46.65590000"),
+            ))
+            ids.setdefault(tenant_id, []).append(contrato.id)
+    db.commit()
+    return ids
+
+
+def histogram_by_bucket(db, tenant_id):
+    """Contagens materializadas por bucket (somando os dias)"""
+    rows = db.query(
+        HistogramaDistancias.bucket, func.sum(HistogramaDistancias.contagem)
+    ).filter(
+        HistogramaDistancias.tenant_id == tenant_id
+    ).group_by(HistogramaDistancias.bucket).all()
+    return {bucket: int(count) for bucket, count in rows if count}
+
+
+def pareceres_by_bucket(db, contrato_ids):
+    """Contagens por bucket recalculadas a partir dos pareceres"""
+    counts = {}
+    for (distancia,) in db.query(Parecer.distancia_km).filter(Parecer.contrato_id.in_(contrato_ids)):
+        bucket = bucket_index(distancia)
+        counts[bucket] = counts.get(bucket, 0) + 1
+    return counts
+
+
+class TestHistogramaMaterializado:
+    """Testes para a manutenção incremental do histograma"""
+
+    def test_batch_and_reanalysis_keep_counts(self, db, contratos):
+        """Testar contagens após a análise em lote e após reanálise com mudança de bucket"""
+        service = GeolocalizacaoService(db)
+        service.analisar_lote("tenant-1", None, contrato_ids=contratos["tenant-1"])
+        service.analisar_lote("tenant-2", None, contrato_ids=contratos["tenant-2"])
+
+        assert histogram_by_bucket(db, "tenant-1") == pareceres_by_bucket(db, contratos["tenant-1"])
+        assert sum(histogram_by_bucket(db, "tenant-2").values()) == 1
+
+        # Bureau muda de lugar: o parecer troca de bucket sem contar duas vezes
+        contrato_id = contratos["tenant-1"][0]
+        bureau = BureauRepository(db).get_by_contrato(contrato_id)
+        bureau.latitude = Decimal("-22.90680000")
+        db.commit()
+        service.analisar_lote("tenant-1", None, contrato_ids=[contrato_id])
+
+        assert histogram_by_bucket(db, "tenant-1") == pareceres_by_bucket(db, contratos["tenant-1"])
+        assert sum(histogram_by_bucket(db, "tenant-1").values()) == 4
+
+    def test_deletions_decrement(self, db, contratos):
+        """Testar remoção do parecer e do contrato (cascata)"""
+        GeolocalizacaoService(db).analisar_lote("tenant-1", None, contrato_ids=contratos["tenant-1"])
+        primeiro, segundo = contratos["tenant-1"][:2]
+
+        parecer = PareceRepository(db).get_by_contrato(primeiro)
+        assert PareceRepository(db).delete(parecer.id)
+        assert ContratoService(db).delete_contrato(segundo)
+
+        restantes = contratos["tenant-1"][2:]
+        assert histogram_by_bucket(db, "tenant-1") == pareceres_by_bucket(db, restantes)
+
+    def test_service_summary(self, db, contratos):
+        """Testar resumo do serviço (total, média exata, percentis e isolamento por tenant)"""
+        GeolocalizacaoService(db).analisar_lote("tenant-1", None, contrato_ids=contratos["tenant-1"])
+        distancias = [float(d) for (d,) in db.query(Parecer.distancia_km)]
+
+        resumo = PareceService(db).get_histograma_distancias("tenant-1")
+
+        assert resumo["total"] == 4
+        assert resumo["media_km"] == pytest.approx(sum(distancias) / 4, abs=0.01)
+        assert resumo["p50_km"] <= resumo["p90_km"] <= resumo["p99_km"]
+        assert resumo["p99_km"] <= max(distancias) * BUCKET_RATIO
+        assert sum(bucket["contagem"] for bucket in resumo["buckets"]) == 4
+        assert PareceService(db).get_histograma_distancias("tenant-2")["total"] == 0
+
+
+def parecer_row(contrato_id, distancia_km):
+    """Linha de parecer para bulk_upsert"""
+    return {
+        "contrato_id": contrato_id, "distancia_km": Decimal(distancia_km),
+        "tipo_parecer": "MODERADO", "texto_parecer": f"{distancia_km} km",
+        "latitude_inicio": Decimal("-23.56130000"), "longitude_inicio": Decimal("-46.65590000"),
+        "latitude_fim": Decimal("-23.56130000"), "longitude_fim": Decimal("-46.65590000"),
+    }
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL não definido")
+def test_concurrent_replacement_postgres():
+    """Testar duas substituições concorrentes do mesmo parecer (PostgreSQL, READ COMMITTED)"""
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    Base.metadata.drop_all(bind=engine, tables=TABLES)
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    Session = sessionmaker(bind=engine)
+    setup, primeira, segunda = Session(), Session(), Session()
+    try:
+        usuario = Usuario(keycloak_id="kc-1", email="a@tenant-1.com", nome="A", tenant_id="tenant-1")
+        setup.add(usuario)
+        setup.flush()
+        contrato = DadosContrato(
+            usuario_id=usuario.id, cpf_cliente="12345678901", numero_contrato="CT-1",
+            endereco_assinatura="Av. Paulista, 1000", arquivo_pdf_path="/tmp/c.pdf",
+            latitude=Decimal("-23.56130000"), longitude=Decimal("-46.65590000"),
+        )
+        setup.add(contrato)
+        setup.flush()
+        contrato_id = contrato.id
+        PareceRepository(setup).bulk_upsert([parecer_row(contrato_id, "1")])
+        setup.commit()
+
+        # A primeira substituição fica aberta enquanto a segunda começa
+        PareceRepository(primeira).bulk_upsert([parecer_row(contrato_id, "10")])
+
+        def substituir():
+            PareceRepository(segunda).bulk_upsert([parecer_row(contrato_id, "100")])
+            segunda.commit()
+
+        concorrente = threading.Thread(target=substituir)
+        concorrente.start()
+        time.sleep(0.5)
+        primeira.commit()
+        concorrente.join(timeout=10)
+        assert not concorrente.is_alive()
+
+        setup.expire_all()
+        assert histogram_by_bucket(setup, "tenant-1") == pareceres_by_bucket(setup, [contrato_id])
+        assert histogram_by_bucket(setup, "tenant-1") == {bucket_index(100): 1}
+    finally:
+        for session in (setup, primeira, segunda):
+            session.rollback()
+            session.close()
+        Base.metadata.drop_all(bind=engine, tables=TABLES)
+        engine.dispose()
@@ -0,0 +1,182 @@
+"""
+Testes para o índice espacial em memória (GeoGridIndex / GeoIndexService)
+"""
+
+import random
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base
+from app.models.usuario import Usuario
+from app.models.dados_contrato import DadosContrato
+from app.models.parecer import Parecer
+from app.models.logs_analise import LogsAnalise
+from app.services import ContratoService, GeoIndexService
+from app.services import geo_index_service
+from app.utils import DistanceCalculator
+from app.utils.geo_grid import GeoGridIndex
+
+TABLES = [model.__table__ for model in (Usuario, DadosContrato, Parecer, LogsAnalise)]
+
+CENTRO = (-23.5505, -46.6333)
+
+
+@pytest.fixture
+def pontos():
+    """3000 pontos aleatórios num quadrado de ~40km ao redor do centro"""
+    rng = random.Random(3)
+    return [
+        (i, CENTRO[0] + rng.uniform(-0.2, 0.2), CENTRO[1] + rng.uniform(-0.2, 0.2), str(10**10 + i))
+        for i in range(1, 3001)
+    ]
+
+
+@pytest.fixture
+def index(pontos):
+    index = GeoGridIndex(cell_size_km=0.1)
+    for contrato_id, lat, lon, cpf in pontos:
+        index.upsert(contrato_id, lat, lon, cpf)
+    return index
+
+
+def _distances(pontos, lat, lon):
+    _, lats, lons, _ = zip(*pontos)
+    return DistanceCalculator.haversine_batch(
+        np.full(len(pontos), lat), np.full(len(pontos), lon), lats, lons
+    )
+
+
+class TestGeoGridIndex:
+    """Testes para GeoGridIndex"""
+
+    @pytest.mark.parametrize("k", [1, 10, 50])
+    def test_knn_matches_brute_force(self, index, pontos, k):
+        """Testar k-vizinhos contra força bruta"""
+        distances = _distances(pontos, *CENTRO)
+        expected = sorted(distances)[:k]
+
+        result = index.knn(*CENTRO, k=k)
+
+        assert [distance for _, distance in result] == pytest.approx(expected)
+
+    def test_density_matches_brute_force(self, index, pontos):
+        """Testar densidade contra força bruta"""
+        distances = _distances(pontos, *CENTRO)
+        expected = sorted(pontos[i][0] for i in np.flatnonzero(distances <= 2))
+
+        result = index.density(*CENTRO, 2)
+
+        assert result["contrato_ids"] == expected
+        assert result["contratos"] == len(expected)
+        assert result["cpfs_distintos"] == len(expected)
+
+    def test_upsert_moves_and_remove(self, index):
+        """Testar atualização incremental (mover / remover)"""
+        index.upsert(1, -22.9068, -43.1729, "1")
+        assert index.knn(-22.9068, -43.1729, k=1) == [(1, 0.0)]
+        assert len(index) == 3000
+
+        assert index.remove(1)
+        assert 1 not in index
+        assert index.knn(-22.9068, -43.1729, k=1, max_radius_km=10) == []
+
+        # Coordenada ausente remove o contrato
+        index.upsert(2, None, None, "2")
+        assert 2 not in index
+
+    def test_cells_grow_past_initial_capacity(self):
+        """Testar crescimento dos arrays de uma célula"""
+        index = GeoGridIndex()
+        for i in range(100):
+            index.upsert(i, -23.5505, -46.6333, str(i % 3))
+        for i in range(0, 100, 2):
+            index.remove(i)
+
+        result = index.density(-23.5505, -46.6333, 0.01)
+        assert result["contrato_ids"] == list(range(1, 100, 2))
+        assert result["cpfs_distintos"] == 3
+
+    def test_hotspots(self, index):
+        """Testar detecção de local com muitos contratos de CPFs diferentes"""
+        # 8 contratos no mesmo local, CPFs diferentes
+        for i in range(8):
+            index.upsert(10000 + i, -23.6000 + i * 1e-5, -46.7000, str(20**8 + i))
+        # 8 contratos no mesmo local, mesmo CPF (não é hotspot com min_cpfs=2)
+        for i in range(8):
+            index.upsert(20000 + i, -23.4000, -46.5000 + i * 1e-5, "99999999999")
+
+        hotspots = index.hotspots(min_contratos=8, min_cpfs=2)
+
+        assert len(hotspots) == 1
+        assert set(range(10000, 10008)) <= set(hotspots[0].contrato_ids)
+        assert hotspots[0].cpfs_distintos >= 8
+        assert hotspots[0].latitude == pytest.approx(-23.6, abs=1e-3)
+
+
+@pytest.fixture
+def db():
+    """Banco SQLite em memória apenas com as tabelas de contrato"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    session = sessionmaker(bind=engine)()
+    geo_index_service.reset_indexes()
+
+    yield session
+
+    geo_index_service.reset_indexes()
+    session.close()
+    Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+
+class TestGeoIndexService:
+    """Testes para GeoIndexService (carga por tenant e atualização incremental)"""
+
+    def test_tenant_index_incremental(self, db):
+        """Testar carga por tenant, atualização incremental e remoção"""
+        usuario = Usuario(keycloak_id="kc-1", email="a@t1.com", nome="A", tenant_id="tenant-1")
+        outro = Usuario(keycloak_id="kc-2", email="b@t2.com", nome="B", tenant_id="tenant-2")
+        db.add_all([usuario, outro])
+        db.flush()
+
+        def contrato(usuario_id, numero, cpf, lat=None, lon=None):
+            item = DadosContrato(
+                usuario_id=usuario_id, cpf_cliente=cpf, numero_contrato=numero,
+                latitude=lat, longitude=lon, arquivo_pdf_path="/tmp/c.pdf",
+            )
+            db.add(item)
+            db.flush()
+            return item
+
+        for i in range(4):
+            contrato(usuario.id, f"CT-{i}", f"1000000000{i}", Decimal("-23.55050000"), Decimal("-46.63330000"))
+        contrato(outro.id, "CT-OUTRO", "20000000000", Decimal("-23.55050000"), Decimal("-46.63330000"))
+        pendente = contrato(usuario.id, "CT-PENDENTE", "10000000009")
+        db.commit()
+
+        service = GeoIndexService(db)
+        result = service.hotspots("tenant-1", min_contratos=4, min_cpfs=2)
+        assert result["total_indexado"] == 4
+        assert result["hotspots"][0]["contratos"] == 4
+
+        # Geocodificação posterior entra no índice já carregado
+        ContratoService(db).atualizar_localizacao(
+            pendente.id, Decimal("-23.55050000"), Decimal("-46.63330000")
+        )
+        result = service.hotspots("tenant-1", min_contratos=4, min_cpfs=2)
+        assert result["total_indexado"] == 5
+        assert pendente.id in result["hotspots"][0]["contrato_ids"]
+
+        # Outro tenant isolado
+        assert service.densidade("tenant-2", Decimal("-23.5505"), Decimal("-46.6333"))["contratos"] == 1
+
+        ContratoService(db).delete_contrato(pendente.id)
+        assert service.hotspots("tenant-1", min_contratos=4)["total_indexado"] == 4
@@ -0,0 +1,186 @@
+"""
+Testes para o cache de geocodificação em dois níveis (GeocodingService)
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base
+from app.models.geocode_cache import GeocodeCache
+from app.services import GeocodingService
+from app.services import geocoding_service
+from app.utils import GeocodeResult, NominatimError
+from app.utils.address_normalizer import geocode_query
+from app.utils.geocode_cache import LRUCache, normalize_address
+
+TABLES = [GeocodeCache.__table__]
+
+
+class FakeNominatim:
+    """Provedor de teste: respostas fixas por endereço e contagem de chamadas
+
+    O provedor recebe a consulta normalizada; as respostas são indexadas por ela.
+    """
+
+    def __init__(self, respostas):
+        self.respostas = {geocode_query(endereco): resposta for endereco, resposta in respostas.items()}
+        self.chamadas = []
+
+    def search_sync(self, address, country="Brazil"):
+        self.chamadas.append(address)
+        resposta = self.respostas.get(address)
+        if isinstance(resposta, Exception):
+            raise resposta
+        return resposta
+
+    async def search(self, address, country="Brazil"):
+        return self.search_sync(address, country)
+
+
+PAULISTA = (Decimal("-23.56130000"), Decimal("-46.65590000"), "Avenida Paulista, 1000, São Paulo")
+
+
+@pytest.fixture
+def db():
+    """Banco SQLite em memória só com a tabela do cache"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    session = sessionmaker(bind=engine)()
+    geocoding_service.reset_geocode_cache()
+
+    yield session
+
+    geocoding_service.reset_geocode_cache()
+    session.close()
+    Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+
+def test_normalize_address():
+    """Testar que caixa, acentos, pontuação e espaços não mudam a chave"""
+    assert normalize_address("Av. Paulista,  1000 - São Paulo") == normalize_address("av paulista 1000 sao paulo")
+    assert normalize_address("Rua A") != normalize_address("Rua A", country="Portugal")
+
+
+def test_lru_eviction_and_expiry():
+    """Testar descarte do menos recente e expiração por entrada"""
+    cache = LRUCache(2)
+    cache.put("a", 1, 60)
+    cache.put("b", 2, 60)
+    assert cache.get("a") == 1
+    cache.put("c", 3, 60)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+    cache.put("d", 4, -1)
+    assert cache.get("d") is None
+
+
+class TestGeocodingService:
+    """Testes para os dois níveis, cache negativo e métricas"""
+
+    def test_memory_then_database_levels(self, db):
+        """Testar consulta única ao provedor e acerto no banco a partir de outro processo"""
+        provedor = FakeNominatim({"Av. Paulista, 1000": PAULISTA})
+        service = GeocodingService(db, provedor)
+
+        assert service.geocodificar("Av. Paulista, 1000") == PAULISTA
+        assert service.geocodificar("AV PAULISTA 1000") == PAULISTA
+        assert len(provedor.chamadas) == 1
+
+        # Outro processo: LRU vazio, entrada vem da tabela
+        geocoding_service._memory_cache.clear()
+        assert GeocodingService(db, provedor).geocodificar("av. paulista, 1000") == PAULISTA
+        assert len(provedor.chamadas) == 1
+
+        stats = geocoding_service.geocode_cache_stats()
+        assert (stats["provedor"], stats["memoria"], stats["banco"]) == (1, 1, 1)
+        assert stats["hit_ratio"] == pytest.approx(2 / 3, abs=1e-4)
+
+    def test_negative_cache_and_errors(self, db):
+        """Testar cache de 'não encontrado' e que falhas do provedor não são gravadas"""
+        provedor = FakeNominatim({"Rua Inexistente": None, "Rua Instavel": NominatimError("timeout")})
+        service = GeocodingService(db, provedor)
+
+        assert service.geocodificar("Rua Inexistente") is None
+        assert service.geocodificar("Rua Inexistente") is None
+        assert provedor.chamadas == ["rua inexistente"]
+
+        assert service.geocodificar("Rua Instavel") is None
+        assert service.geocodificar("Rua Instavel") is None
+        assert provedor.chamadas.count("rua instavel") == 2
+        assert db.query(GeocodeCache).count() == 1
+
+        stats = geocoding_service.geocode_cache_stats()
+        assert (stats["negativos"], stats["erros"]) == (1, 2)
+
+    def test_ttl_expiry(self, db):
+        """Testar que entradas negativas expiram antes das positivas"""
+        provedor = FakeNominatim({"Rua A": PAULISTA, "Rua B": None})
+        service = GeocodingService(db, provedor)
+        service.geocodificar("Rua A")
+        service.geocodificar("Rua B")
+
+        # Envelhecer as entradas além do TTL negativo (mas dentro do positivo)
+        db.query(GeocodeCache).update(
+            {GeocodeCache.consultado_em: datetime.utcnow() - geocoding_service.GEOCODE_NEGATIVE_TTL - timedelta(minutes=1)}
+        )
+        db.commit()
+        geocoding_service._memory_cache.clear()
+
+        service.geocodificar("Rua A")
+        service.geocodificar("Rua B")
+        assert provedor.chamadas == ["rua a", "rua b", "rua b"]
+
+        assert service.limpar_expirados() == 0
+        db.query(GeocodeCache).update({GeocodeCache.consultado_em: datetime(2000, 1, 1)})
+        db.commit()
+        assert service.limpar_expirados() == 2
+
+    def test_provider_recorded_with_its_ttl(self, db):
+        """Testar que o backend que respondeu é gravado e a validade dele se aplica (google: 30 dias)"""
+        provedor = FakeNominatim({
+            "Rua Google": GeocodeResult(PAULISTA, "google"),
+            "Rua Nominatim": GeocodeResult(PAULISTA, "nominatim_local"),
+        })
+        service = GeocodingService(db, provedor)
+        service.geocodificar("Rua Google")
+        service.geocodificar("Rua Nominatim")
+
+        assert {row.provider for row in db.query(GeocodeCache)} == {"google", "nominatim_local"}
+
+        # 31 dias: além do limite do Google, dentro da validade geral
+        db.query(GeocodeCache).update({GeocodeCache.consultado_em: datetime.utcnow() - timedelta(days=31)})
+        db.commit()
+        geocoding_service._memory_cache.clear()
+
+        service.geocodificar("Rua Google")
+        service.geocodificar("Rua Nominatim")
+        assert provedor.chamadas == ["rua google", "rua nominatim", "rua google"]
+
+        db.query(GeocodeCache).update({GeocodeCache.consultado_em: datetime.utcnow() - timedelta(days=31)})
+        db.commit()
+        assert service.limpar_expirados() == 1
+        assert [row.provider for row in db.query(GeocodeCache)] == ["nominatim_local"]
+
+
+async def test_async_path_shares_cache(db):
+    """Testar que o caminho async usa os mesmos dois níveis do síncrono"""
+    provedor = FakeNominatim({"Av. Paulista, 1000": PAULISTA, "Rua Inexistente": None})
+    service = GeocodingService(db, client=provedor)
+
+    assert await service.geocodificar_async("Av. Paulista, 1000") == PAULISTA
+    assert await service.geocodificar_async("Rua Inexistente") is None
+    assert service.geocodificar("av paulista 1000") == PAULISTA
+    assert await service.geocodificar_async("rua inexistente") is None
+
+    assert provedor.chamadas == ["avenida paulista, 1000", "rua inexistente"]
@@ -0,0 +1,187 @@
+"""
+Testes para a fila de geocodificação (GeocodeScheduler)
+"""
+
+from decimal import Decimal
+import asyncio
+import time
+
+import pytest
+
+from app.utils import GeocodePriority, GeocodeScheduler, NominatimError
+from app.utils import geocode_scheduler as scheduler_module
+from app.utils.geocode_scheduler import LocalTokenBucket, RedisTokenBucket
+
+PAULISTA = (Decimal("-23.56130000"), Decimal("-46.65590000"), "Avenida Paulista, 1000, São Paulo")
+
+
+class FakeNominatim:
+    """Provedor de teste: registra ordem e instante de cada requisição"""
+
+    def __init__(self, latencia=0.02, falhas=()):
+        self.latencia = latencia
+        self.falhas = set(falhas)
+        self.chamadas = []
+
+    async def search(self, address, country="Brazil"):
+        self.chamadas.append((address, time.monotonic()))
+        await asyncio.sleep(self.latencia)
+        if address in self.falhas:
+            raise NominatimError("HTTP 503")
+        return PAULISTA
+
+    async def reverse_geocode(self, latitude, longitude):
+        self.chamadas.append((f"{latitude},{longitude}", time.monotonic()))
+        return "Avenida Paulista"
+
+
+@pytest.fixture
+async def scheduler():
+    """Scheduler com bucket local rápido (20 req/s, sem rajada)"""
+    provedor = FakeNominatim()
+    scheduler = GeocodeScheduler(provedor, LocalTokenBucket(rate=20, burst=1))
+
+    yield scheduler
+
+    await scheduler.close()
+
+
+async def test_identical_queries_are_coalesced(scheduler):
+    """Testar que endereços equivalentes concorrentes geram uma só requisição"""
+    resultados = await asyncio.gather(
+        scheduler.search("Av. Paulista, 1000"),
+        scheduler.search("av paulista 1000"),
+        scheduler.search("AV. PAULISTA 1000", priority=GeocodePriority.BACKLOG),
+    )
+
+    assert resultados == [PAULISTA] * 3
+    assert len(scheduler.client.chamadas) == 1
+    assert scheduler.stats.to_dict()["coalescidas"] == 2
+
+    # Terminada a requisição, nova consulta volta ao provedor
+    await scheduler.search("Av. Paulista, 1000")
+    assert len(scheduler.client.chamadas) == 2
+
+
+async def test_rate_limit_spaces_requests(scheduler):
+    """Testar intervalo mínimo de 1/rate entre requisições distintas"""
+    await asyncio.gather(*(scheduler.search(f"Rua {i}") for i in range(5)))
+
+    instantes = [t for _, t in scheduler.client.chamadas]
+    intervalos = [b - a for a, b in zip(instantes, instantes[1:])]
+    assert len(instantes) == 5
+    assert min(intervalos) >= 0.045
+
+
+async def test_interactive_lane_goes_first(scheduler):
+    """Testar que consultas interativas passam à frente do backlog pendente"""
+    backlog = [
+        asyncio.create_task(scheduler.search(f"Lote {i}", priority=GeocodePriority.BACKLOG))
+        for i in range(4)
+    ]
+    await asyncio.sleep(0.01)
+    interativa = await scheduler.search("Rua do Usuário")
+    await asyncio.gather(*backlog)
+
+    ordem = [endereco for endereco, _ in scheduler.client.chamadas]
+    assert ordem.index("Rua do Usuário") <= 1
+    assert interativa == PAULISTA
+
+    faixas = scheduler.stats.to_dict()["faixas"]
+    assert faixas["backlog"]["despachadas"] == 4
+    assert faixas["interactive"]["despachadas"] == 1
+    assert faixas["backlog"]["fila"] == faixas["interactive"]["fila"] == 0
+    assert faixas["backlog"]["espera_max_s"] > faixas["interactive"]["espera_max_s"]
+
+
+async def test_backlog_query_promoted_by_interactive_duplicate(scheduler):
+    """Testar que pedido interativo idêntico promove a consulta de backlog"""
+    backlog = [
+        asyncio.create_task(scheduler.search(f"Lote {i}", priority=GeocodePriority.BACKLOG))
+        for i in range(4)
+    ]
+    await asyncio.sleep(0.01)
+    await scheduler.search("Lote 3")
+    await asyncio.gather(*backlog)
+
+    ordem = [endereco for endereco, _ in scheduler.client.chamadas]
+    assert ordem.count("Lote 3") == 1
+    assert ordem.index("Lote 3") <= 1
+
+
+async def test_errors_reach_every_waiter(scheduler):
+    """Testar que a falha do provedor chega a todos os chamadores coalescidos"""
+    scheduler.client.falhas.add("Rua Instável")
+
+    resultados = await asyncio.gather(
+        scheduler.search("Rua Instável"),
+        scheduler.search("rua instavel"),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(r, NominatimError) for r in resultados)
+    assert len(scheduler.client.chamadas) == 1
+
+
+async def test_timed_out_query_leaves_the_queue(monkeypatch):
+    """Testar que a consulta cujo último chamador desistiu não é mais despachada"""
+    monkeypatch.setattr(scheduler_module, "GEOCODE_QUEUE_TIMEOUT_SECONDS", 0.05)
+    scheduler = GeocodeScheduler(FakeNominatim(), LocalTokenBucket(rate=5, burst=1))
+    try:
+        await scheduler.search("Rua 0")  # gasta o token: a próxima espera ~0,2s
+        backlog = asyncio.create_task(scheduler.search("Rua 2", priority=GeocodePriority.BACKLOG))
+        with pytest.raises(NominatimError, match="timeout"):
+            await scheduler.search("Rua 1")
+        # Chamador de backlog coalescido mantém a consulta viva
+        interativa = asyncio.create_task(scheduler.search("Rua 2"))
+        with pytest.raises(NominatimError, match="timeout"):
+            await interativa
+        assert await backlog == PAULISTA
+
+        assert [endereco for endereco, _ in scheduler.client.chamadas] == ["Rua 0", "Rua 2"]
+        faixas = scheduler.stats.to_dict()["faixas"]
+        assert faixas["interactive"]["abandonadas"] == 1
+        assert faixas["interactive"]["fila"] == faixas["backlog"]["fila"] == 0
+    finally:
+        await scheduler.close()
+
+
+async def test_abandoned_during_token_wait():
+    """Testar desistência durante a espera do token: despacho segue vivo e o token não se perde"""
+    scheduler = GeocodeScheduler(FakeNominatim(), LocalTokenBucket(rate=1 / 0.3, burst=1))
+    try:
+        await scheduler.search("Rua 0")  # gasta o token: a próxima espera ~0,3s
+        backlog = asyncio.create_task(scheduler.search("Rua 1", priority=GeocodePriority.BACKLOG))
+        await asyncio.sleep(0.1)
+        backlog.cancel()
+        await asyncio.sleep(0.3)  # o token sai com a fila só com a consulta morta
+
+        assert not scheduler._dispatcher.done()
+        inicio = time.monotonic()
+        assert await scheduler.search("Rua 2") == PAULISTA
+        assert time.monotonic() - inicio < 0.15  # usa o token já reservado
+
+        assert [endereco for endereco, _ in scheduler.client.chamadas] == ["Rua 0", "Rua 2"]
+        assert scheduler.stats.to_dict()["faixas"]["backlog"]["abandonadas"] == 1
+    finally:
+        await scheduler.close()
+
+
+async def test_lane_and_sync_wrappers(scheduler):
+    """Testar a visão com prioridade fixa, inclusive a partir de thread síncrona"""
+    lane = scheduler.lane(GeocodePriority.BACKLOG)
+
+    assert await asyncio.to_thread(lane.search_sync, "Av. Paulista, 1000") == PAULISTA
+    assert await lane.reverse_geocode(Decimal("-23.5613"), Decimal("-46.6559")) == "Avenida Paulista"
+    assert scheduler.stats.to_dict()["faixas"]["backlog"]["despachadas"] == 2
+
+
+async def test_redis_bucket_falls_back_to_local():
+    """Testar que Redis indisponível não bloqueia: vale o bucket local"""
+    bucket = RedisTokenBucket("redis://127.0.0.1:1/0", rate=20, burst=1)
+
+    assert await bucket.reserve() == 0
+    assert bucket.degraded
+    assert await bucket.reserve() > 0
+
+    await bucket.close()
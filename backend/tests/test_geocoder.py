@@ -0,0 +1,224 @@
+"""
+Testes do Geocoder (vários backends, hedge, circuit breaker, timeout adaptativo)
+"""
+
+from decimal import Decimal
+import asyncio
+import time
+
+import pytest
+
+from app.utils import Geocoder, GeocoderUnavailable, NominatimError
+from app.utils import geocoder as geocoder_module
+from app.utils.geocoder import CepIndexBackend, CircuitBreaker, GeocoderBackend, build_geocoder
+
+PAULISTA = (Decimal("-23.5647"), Decimal("-46.6527"), "Avenida Paulista, 1000")
+
+
+class FakeBackend:
+    """Backend de teste: latência fixa, falhas programadas e contagem de chamadas"""
+
+    TIMEOUT = 2
+
+    def __init__(self, resposta=PAULISTA, latencia=0.0, falhar=False, erro=NominatimError("HTTP 503")):
+        self.resposta = resposta
+        self.latencia = latencia
+        self.falhar = falhar
+        self.erro = erro
+        self.chamadas = 0
+        self.canceladas = 0
+
+    async def search(self, address, country="Brazil"):
+        self.chamadas += 1
+        try:
+            await asyncio.sleep(self.latencia)
+        except asyncio.CancelledError:
+            self.canceladas += 1
+            raise
+        if self.falhar:
+            raise self.erro
+        return self.resposta
+
+    async def reverse_geocode(self, latitude, longitude):
+        self.chamadas += 1
+        await asyncio.sleep(self.latencia)
+        return None if self.falhar else "Avenida Paulista, 1000"
+
+
+def build(*clientes, **kwargs):
+    return Geocoder([GeocoderBackend(f"b{i}", cliente, **kwargs) for i, cliente in enumerate(clientes)])
+
+
+async def test_primary_answers_without_hedge():
+    """Testar que o primeiro backend responde sozinho quando é rápido"""
+    primario, secundario = FakeBackend(), FakeBackend()
+
+    assert await build(primario, secundario).search("Av. Paulista, 1000") == PAULISTA
+    assert (primario.chamadas, secundario.chamadas) == (1, 0)
+
+
+async def test_hedge_after_delay(monkeypatch):
+    """Testar disparo do segundo backend após o atraso de hedge e cancelamento do lento"""
+    monkeypatch.setattr(geocoder_module, "GEOCODER_HEDGE_DELAY_SECONDS", 0.05)
+    lento = FakeBackend(latencia=1)
+    rapido = FakeBackend(resposta=(Decimal("1"), Decimal("2"), "rápido"))
+    geocoder = build(lento, rapido)
+
+    inicio = time.monotonic()
+    resultado = await geocoder.search("Av. Paulista, 1000")
+    assert resultado == (Decimal("1"), Decimal("2"), "rápido")
+    assert resultado.provider == "b1"
+    assert time.monotonic() - inicio < 0.5
+    await asyncio.sleep(0.01)
+    assert lento.canceladas == 1
+    assert geocoder.stats()["b1"]["hedges"] == 1
+
+
+async def test_failover_and_not_found():
+    """Testar falha do primeiro disparando o próximo na hora, e 'não encontrado' autoritativo"""
+    assert await build(FakeBackend(falhar=True), FakeBackend()).search("x") == PAULISTA
+
+    segundo = FakeBackend()
+    assert await build(FakeBackend(resposta=None), segundo).search("x") is None
+    assert segundo.chamadas == 0
+
+    with pytest.raises(GeocoderUnavailable, match="b0: HTTP 503"):
+        await build(FakeBackend(falhar=True)).search("x")
+
+
+async def test_non_authoritative_not_found_falls_through():
+    """Testar que o 'não encontrado' do índice de CEP não encerra a consulta"""
+    geocoder = Geocoder([
+        GeocoderBackend("cep", CepIndexBackend()),
+        GeocoderBackend("nominatim", FakeBackend()),
+    ])
+    assert await geocoder.search("Avenida Paulista, 1000") == PAULISTA
+    assert await Geocoder([GeocoderBackend("cep", CepIndexBackend())]).search("Avenida Paulista") is None
+
+
+async def test_circuit_breaker():
+    """Testar abertura após falhas seguidas, backend pulado e fechamento pela consulta de teste"""
+    instavel, reserva = FakeBackend(falhar=True), FakeBackend()
+    geocoder = build(instavel, reserva)
+    breaker = geocoder.backends[0].breaker
+    breaker.failures, breaker.cooldown = 2, 0.05
+
+    await geocoder.search("x")
+    await geocoder.search("x")
+    assert breaker.state == CircuitBreaker.ABERTO
+
+    await geocoder.search("x")
+    assert instavel.chamadas == 2
+
+    await asyncio.sleep(0.06)
+    instavel.falhar = False
+    assert await geocoder.search("x") == PAULISTA
+    assert breaker.state == CircuitBreaker.FECHADO
+    assert instavel.chamadas == 3
+
+
+def test_half_open_allows_single_probe():
+    """Testar uma única consulta de teste no circuito meio aberto"""
+    breaker = CircuitBreaker(failures=1, cooldown=0)
+    breaker.record_failure()
+
+    assert breaker.allow() is True
+    assert breaker.state == CircuitBreaker.MEIO_ABERTO
+    assert breaker.allow() is False
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.ABERTO
+
+
+async def test_unexpected_error_counts_as_failure():
+    """Testar que erro inesperado do cliente conta como falha e não prende o teste do meio aberto"""
+    instavel = FakeBackend(falhar=True, erro=KeyError("lat"))
+    geocoder = build(instavel, FakeBackend())
+    breaker = geocoder.backends[0].breaker
+    breaker.failures, breaker.cooldown = 1, 0
+
+    assert await geocoder.search("x") == PAULISTA
+    assert breaker.state == CircuitBreaker.ABERTO
+
+    assert await geocoder.search("x") == PAULISTA  # consulta de teste falha de novo
+    assert breaker.state == CircuitBreaker.ABERTO
+    assert breaker.allow() is True
+    assert geocoder.stats()["b0"]["falhas"] == 2
+
+    with pytest.raises(GeocoderUnavailable, match="b0: KeyError"):
+        await build(FakeBackend(falhar=True, erro=KeyError("lat"))).search("x")
+
+
+async def test_adaptive_timeout(monkeypatch):
+    """Testar timeout derivado do p99 das latências recentes"""
+    monkeypatch.setattr(geocoder_module, "GEOCODER_TIMEOUT_MIN_SECONDS", 0.05)
+    cliente = FakeBackend(latencia=0.01)
+    backend = GeocoderBackend("b0", cliente)
+    assert backend.timeout() == 2
+
+    for _ in range(geocoder_module.MIN_LATENCY_SAMPLES):
+        await backend.call("search", "x", "Brazil")
+    assert 0.05 <= backend.timeout() < 0.2
+
+    cliente.latencia = 1
+    with pytest.raises(NominatimError, match="timeout"):
+        await backend.call("search", "x", "Brazil")
+    assert backend.to_dict()["timeouts"] == 1
+
+
+async def test_timeout_grows_after_latency_shift(monkeypatch):
+    """Testar que timeouts entram como amostras censuradas e o limite acompanha o backend mais lento"""
+    monkeypatch.setattr(geocoder_module, "GEOCODER_TIMEOUT_MIN_SECONDS", 0.05)
+    cliente = FakeBackend(latencia=0.005)
+    backend = GeocoderBackend("b0", cliente)
+    for _ in range(geocoder_module.MIN_LATENCY_SAMPLES):
+        await backend.call("search", "x", "Brazil")
+    aprendido = backend.timeout()
+    assert aprendido < 0.2
+
+    cliente.latencia = 0.3  # mais lento que o timeout aprendido, longe do teto (2s)
+    timeouts = 0
+    while True:
+        try:
+            assert await backend.call("search", "x", "Brazil") == PAULISTA
+            break
+        except NominatimError:
+            timeouts += 1
+            assert timeouts < 4
+    assert timeouts >= 1
+    assert backend.timeout() > 0.3
+
+
+async def test_half_open_probe_uses_max_timeout(monkeypatch):
+    """Testar que a consulta de teste usa o teto e fecha o circuito de um backend que ficou lento"""
+    monkeypatch.setattr(geocoder_module, "GEOCODER_TIMEOUT_MIN_SECONDS", 0.01)
+    cliente = FakeBackend(latencia=0.001)
+    geocoder = build(cliente)
+    backend = geocoder.backends[0]
+    backend.breaker.failures, backend.breaker.cooldown = 1, 0
+    for _ in range(geocoder_module.MIN_LATENCY_SAMPLES):
+        await geocoder.search("x")
+
+    cliente.latencia = 0.5  # acima de 3x o timeout censurado, abaixo do teto
+    with pytest.raises(GeocoderUnavailable, match="timeout"):
+        await geocoder.search("x")
+    assert backend.breaker.state == CircuitBreaker.ABERTO
+
+    assert await geocoder.search("x") == PAULISTA
+    assert backend.breaker.state == CircuitBreaker.FECHADO
+
+
+async def test_reverse_geocode():
+    """Testar reverso com failover (None do cliente é falha) e None quando todos falham"""
+    endereco = await build(FakeBackend(falhar=True), FakeBackend()).reverse_geocode(Decimal("1"), Decimal("2"))
+    assert (endereco, endereco.provider) == ("Avenida Paulista, 1000", "b1")
+    assert await build(FakeBackend(falhar=True)).reverse_geocode(Decimal("1"), Decimal("2")) is None
+
+
+def test_build_skips_unconfigured(monkeypatch):
+    """Testar que backends desconhecidos ou sem configuração são ignorados"""
+    monkeypatch.delenv("GOOGLE_MAPS_API_KEY", raising=False)
+    monkeypatch.delenv("NOMINATIM_SELF_HOSTED_ENDPOINT", raising=False)
+
+    geocoder = build_geocoder("google, nominatim_local, desconhecido, cep")
+    assert [backend.name for backend in geocoder.backends] == ["cep"]
+    assert [backend.name for backend in build_geocoder("google").backends] == ["nominatim"]
@@ -0,0 +1,217 @@
+"""
+Testes para a geocodificação em lote do backlog de bureau
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base
+from app.models.usuario import Usuario
+from app.models.dados_contrato import DadosContrato
+from app.models.dados_bureau import DadosBureau
+from app.models.parecer import Parecer
+from app.models.geocode_cache import GeocodeCache
+from app.models.geocodificacao_lote import GeocodificacaoLote
+from app.services import GeocodificacaoLoteService, GeocodingService
+from app.services import geocodificacao_lote_service, geocoding_service
+from app.services.geocodificacao_lote_service import ProvedorIndisponivel
+from app.tasks import geocodificacao as tasks
+from app.utils import NominatimError
+from app.utils.address_normalizer import geocode_query
+from app.utils.geohash import encode
+
+TABLES = [
+    model.__table__
+    for model in (Usuario, DadosContrato, DadosBureau, Parecer, GeocodeCache, GeocodificacaoLote)
+]
+
+RIO = (Decimal("-22.90680000"), Decimal("-43.17290000"), "Rio de Janeiro")
+
+
+class FakeNominatim:
+    """Provedor de teste: coordenadas fixas, exceto endereços desconhecidos ou com falha
+
+    O provedor recebe a consulta normalizada ("Rua 1" -> "rua 1").
+    """
+
+    def __init__(self, desconhecidos=(), falhas=()):
+        self.desconhecidos = {geocode_query(endereco) for endereco in desconhecidos}
+        self.falhas = {geocode_query(endereco) for endereco in falhas}
+        self.chamadas = []
+
+    async def search(self, address, country="Brazil"):
+        self.chamadas.append(address)
+        if address in self.falhas:
+            raise NominatimError("HTTP 503")
+        if address in self.desconhecidos:
+            return None
+        return RIO
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    geocoding_service.reset_geocode_cache()
+
+    yield engine
+
+    geocoding_service.reset_geocode_cache()
+    Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+
+@pytest.fixture
+def db(engine, monkeypatch):
+    """Sessão com backlog: 5 bureaus do tenant-1 (1 já geocodificado) e 1 do tenant-2"""
+    monkeypatch.setattr(geocodificacao_lote_service, "GEOCODE_BULK_BATCH_SIZE", 2)
+    session = sessionmaker(bind=engine)()
+
+    for tenant_id, enderecos in (
+        ("tenant-1", ["Rua 1", "Rua Inexistente", "Rua 3", "Rua 4", "Rua 5"]),
+        ("tenant-2", ["Rua Outro Tenant"]),
+    ):
+        usuario = Usuario(keycloak_id=f"kc-{tenant_id}", email=f"a@{tenant_id}.com", nome="A", tenant_id=tenant_id)
+        session.add(usuario)
+        session.flush()
+        for i, endereco in enumerate(enderecos):
+            contrato = DadosContrato(
+                usuario_id=usuario.id, cpf_cliente="12345678901", numero_contrato=f"CT-{tenant_id}-{i}",
+                latitude=Decimal("-23.56130000"), longitude=Decimal("-46.65590000"),
+                endereco_assinatura="Av. Paulista, 1000", arquivo_pdf_path="/tmp/c.pdf",
+            )
+            session.add(contrato)
+            session.flush()
+            geocodificado = endereco == "Rua 5"
+            session.add(DadosBureau(
+                contrato_id=contrato.id, cpf_cliente="12345678901", nome_cliente="Cliente",
+                logradouro=endereco,
+                latitude=RIO[0] if geocodificado else None,
+                longitude=RIO[1] if geocodificado else None,
+            ))
+            if endereco == "Rua 1":
+                session.add(Parecer(
+                    contrato_id=contrato.id, distancia_km=Decimal("0"), tipo_parecer="PROXIMAL",
+                    texto_parecer="x",
+                    latitude_inicio=contrato.latitude, longitude_inicio=contrato.longitude,
+                    latitude_fim=contrato.latitude, longitude_fim=contrato.longitude,
+                ))
+    session.commit()
+
+    yield session
+
+    session.close()
+
+
+def make_service(db, provedor):
+    return GeocodificacaoLoteService(db, geocoding=GeocodingService(db, client=provedor))
+
+
+def localizacao(db, endereco):
+    bureau = db.query(DadosBureau).filter_by(logradouro=endereco).one()
+    return bureau.latitude, bureau.longitude
+
+
+def test_drains_tenant_backlog(db):
+    """Testar geocodificação de todo o backlog do tenant em lotes"""
+    provedor = FakeNominatim(desconhecidos={"Rua Inexistente"})
+    service = make_service(db, provedor)
+
+    lote = service.criar("tenant-1")
+    assert lote.total == 4
+    assert service.criar("tenant-1").id == lote.id  # um job ativo por tenant
+
+    lote = service.processar(lote.id)
+
+    assert lote.status == "CONCLUIDO"
+    assert (lote.processados, lote.geocodificados, lote.nao_encontrados) == (4, 3, 1)
+    assert provedor.chamadas == ["rua 1", "rua inexistente", "rua 3", "rua 4"]
+    assert localizacao(db, "Rua 3") == (RIO[0], RIO[1])
+    assert db.query(DadosBureau).filter_by(logradouro="Rua 3").one().geohash == encode(RIO[0], RIO[1])
+    assert localizacao(db, "Rua Inexistente") == (None, None)
+    assert localizacao(db, "Rua Outro Tenant") == (None, None)
+    assert db.query(Parecer).one().desatualizado is True
+
+    status = service.status(lote)
+    assert (status["percentual"], status["restantes"], status["eta_segundos"]) == (100.0, 0, None)
+
+
+def test_provider_failure_keeps_checkpoint_and_resumes(db):
+    """Testar que a falha do provedor grava o progresso e o job continua do checkpoint"""
+    provedor = FakeNominatim(desconhecidos={"Rua Inexistente"}, falhas={"Rua 3"})
+    service = make_service(db, provedor)
+    lote = service.criar("tenant-1")
+
+    with pytest.raises(ProvedorIndisponivel):
+        service.processar(lote.id)
+
+    db.refresh(lote)
+    assert lote.status == "EXECUTANDO"
+    assert (lote.processados, lote.geocodificados) == (2, 1)
+    assert lote.ultimo_bureau_id == db.query(DadosBureau).filter_by(logradouro="Rua Inexistente").one().id
+
+    provedor.falhas.clear()
+    provedor.chamadas.clear()
+    lote = service.processar(lote.id)
+
+    assert lote.status == "CONCLUIDO"
+    # Rua 4 foi consultada no lote que falhou e agora vem do cache
+    assert provedor.chamadas == ["rua 3"]
+    assert (lote.processados, lote.geocodificados, lote.nao_encontrados) == (4, 3, 1)
+
+
+def test_cancelled_job_stops(db):
+    """Testar que job cancelado não é processado e libera um novo job"""
+    provedor = FakeNominatim()
+    service = make_service(db, provedor)
+    lote = service.criar("tenant-1")
+
+    service.cancelar(lote)
+    lote = service.processar(lote.id)
+
+    assert lote.status == "CANCELADO"
+    assert provedor.chamadas == []
+    assert service.criar("tenant-1").id != lote.id
+    assert service.obter(lote.id, "tenant-2") is None
+
+
+def test_status_eta():
+    """Testar taxa e previsão a partir do último checkpoint"""
+    inicio = datetime(2026, 1, 1, 12, 0, 0)
+    lote = GeocodificacaoLote(
+        id=1, status="EXECUTANDO", total=100, processados=25, geocodificados=20, nao_encontrados=5,
+        criado_em=inicio, iniciado_em=inicio, atualizado_em=inicio + timedelta(seconds=50),
+    )
+
+    status = GeocodificacaoLoteService.status(lote, agora=inicio + timedelta(seconds=60))
+
+    assert status["taxa_por_segundo"] == 0.5
+    assert status["eta_segundos"] == 140
+    assert status["previsao_conclusao"] == inicio + timedelta(seconds=200)
+    assert status["percentual"] == 25.0
+
+
+def test_celery_task(db, engine, monkeypatch):
+    """Testar a task Celery (execução local) com sessão própria"""
+    provedor = FakeNominatim(desconhecidos={"Rua Inexistente"})
+
+    class Service(GeocodificacaoLoteService):
+        def __init__(self, session):
+            super().__init__(session, geocoding=GeocodingService(session, client=provedor))
+
+    monkeypatch.setattr(tasks, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(tasks, "GeocodificacaoLoteService", Service)
+    lote = make_service(db, provedor).criar("tenant-1")
+
+    resultado = tasks.geocodificar_backlog_bureau.apply(args=[lote.id]).get()
+
+    assert resultado["status"] == "CONCLUIDO"
+    assert resultado["geocodificados"] == 3
@@ -0,0 +1,319 @@
+"""
+Testes para análise de geolocalização em lote (GeolocalizacaoService.analisar_lote)
+"""
+
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base
+from app.models.usuario import Usuario
+from app.models.dados_contrato import DadosContrato
+from app.models.dados_bureau import DadosBureau
+from app.models.parecer import Parecer
+from app.models.regras_parecer import RegrasParecer
+from app.models.histograma_distancias import HistogramaDistancias
+from app.models.logs_analise import LogsAnalise
+from app.services import GeolocalizacaoService
+from app.services import parecer_rules_service
+from app.utils import DistanceCalculator
+
+TABLES = [
+    model.__table__
+    for model in (Usuario, DadosContrato, DadosBureau, Parecer, RegrasParecer, HistogramaDistancias, LogsAnalise)
+]
+
+
+@pytest.fixture
+def db():
+    """Banco SQLite em memória apenas com as tabelas da análise"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    session = sessionmaker(bind=engine)()
+    parecer_rules_service.invalidate_rules()
+
+    yield session
+
+    parecer_rules_service.invalidate_rules()
+    session.close()
+    Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+
+@pytest.fixture
+def statements(db):
+    """Registrar SQL executado (para verificar consultas em lote)"""
+    executed = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", before_execute)
+    yield executed
+    event.remove(db.get_bind(), "before_cursor_execute", before_execute)
+
+
+def _usuario(db, tenant_id: str, n: int) -> Usuario:
+    usuario = Usuario(
+        keycloak_id=f"kc-{tenant_id}-{n}",
+        email=f"user{n}@{tenant_id}.com",
+        nome=f"Usuário {n}",
+        tenant_id=tenant_id,
+    )
+    db.add(usuario)
+    db.flush()
+    return usuario
+
+
+def _contrato(db, usuario: Usuario, lat, lon, status="RECEBIDO") -> DadosContrato:
+    contrato = DadosContrato(
+        usuario_id=usuario.id,
+        cpf_cliente="12345678901",
+        numero_contrato=f"CT-{usuario.id}-{lat}-{lon}",
+        latitude=lat,
+        longitude=lon,
+        endereco_assinatura="Av. Paulista, 1000",
+        arquivo_pdf_path="/tmp/contrato.pdf",
+        status=status,
+    )
+    db.add(contrato)
+    db.flush()
+    return contrato
+
+
+def _bureau(db, contrato: DadosContrato, lat, lon) -> DadosBureau:
+    bureau = DadosBureau(
+        contrato_id=contrato.id,
+        cpf_cliente="12345678901",
+        nome_cliente="Cliente",
+        logradouro="Rua Augusta, 500",
+        latitude=lat,
+        longitude=lon,
+    )
+    db.add(bureau)
+    db.flush()
+    return bureau
+
+
+@pytest.fixture
+def cenario(db):
+    """Contratos do tenant-1 (ok, sem bureau, sem coordenadas) e um do tenant-2"""
+    usuario = _usuario(db, "tenant-1", 1)
+    outro = _usuario(db, "tenant-2", 2)
+
+    proximo = _contrato(db, usuario, Decimal("-23.56130000"), Decimal("-46.65590000"))
+    _bureau(db, proximo, Decimal("-23.55520000"), Decimal("-46.66250000"))
+
+    distante = _contrato(db, usuario, Decimal("-23.55050000"), Decimal("-46.63330000"))
+    _bureau(db, distante, Decimal("-22.90680000"), Decimal("-43.17290000"))
+
+    sem_bureau = _contrato(db, usuario, Decimal("-23.55050000"), Decimal("-46.63330000"))
+
+    sem_coordenadas = _contrato(db, usuario, None, None)
+    _bureau(db, sem_coordenadas, Decimal("-23.55520000"), Decimal("-46.66250000"))
+
+    outro_tenant = _contrato(db, outro, Decimal("-23.56130000"), Decimal("-46.65590000"))
+    _bureau(db, outro_tenant, Decimal("-23.55520000"), Decimal("-46.66250000"))
+
+    db.commit()
+    return {
+        "usuario": usuario,
+        "proximo": proximo.id,
+        "distante": distante.id,
+        "sem_bureau": sem_bureau.id,
+        "sem_coordenadas": sem_coordenadas.id,
+        "outro_tenant": outro_tenant.id,
+    }
+
+
+class TestAnalisarLote:
+    """Testes para GeolocalizacaoService.analisar_lote"""
+
+    def test_results_match_single_analysis(self, db, cenario):
+        """Testar que o lote grava os mesmos pareceres da análise individual"""
+        ids = [cenario["proximo"], cenario["distante"]]
+        resultado = GeolocalizacaoService(db).analisar_lote(
+            "tenant-1", cenario["usuario"].id, contrato_ids=ids
+        )
+
+        assert resultado.total == 2
+        assert resultado.concluidos == 2
+        assert resultado.erros == 0
+        assert [item.contrato_id for item in resultado.resultados] == ids
+
+        for item in resultado.resultados:
+            contrato = db.get(DadosContrato, item.contrato_id)
+            bureau = db.query(DadosBureau).filter_by(contrato_id=item.contrato_id).one()
+            expected = DistanceCalculator.haversine(
+                contrato.latitude, contrato.longitude, bureau.latitude, bureau.longitude
+            )
+
+            assert item.status == "CONCLUIDO"
+            assert item.distancia_km == expected
+            assert item.tipo_parecer == DistanceCalculator.get_parecer_type(expected)
+
+            parecer = db.query(Parecer).filter_by(contrato_id=item.contrato_id).one()
+            assert parecer.distancia_km == expected
+            assert parecer.tipo_parecer == item.tipo_parecer
+            assert contrato.status == "CONCLUIDO"
+
+    def test_per_contract_errors(self, db, cenario):
+        """Testar erros individuais sem abortar o lote"""
+        ids = [
+            cenario["proximo"],
+            cenario["sem_bureau"],
+            cenario["sem_coordenadas"],
+            cenario["outro_tenant"],
+            99999,
+        ]
+        resultado = GeolocalizacaoService(db).analisar_lote(
+            "tenant-1", cenario["usuario"].id, contrato_ids=ids
+        )
+
+        status = {item.contrato_id: item.status for item in resultado.resultados}
+        assert status == {
+            cenario["proximo"]: "CONCLUIDO",
+            cenario["sem_bureau"]: "ERRO",
+            cenario["sem_coordenadas"]: "ERRO",
+            cenario["outro_tenant"]: "ERRO",
+            99999: "ERRO",
+        }
+        assert resultado.concluidos == 1
+        assert resultado.erros == 4
+
+        # Contrato de outro tenant não é tocado
+        assert db.query(Parecer).filter_by(contrato_id=cenario["outro_tenant"]).count() == 0
+        assert db.get(DadosContrato, cenario["outro_tenant"]).status == "RECEBIDO"
+
+        # Logs: SUCESSO/ERRO apenas para contratos do tenant
+        eventos = {
+            log.contrato_id: log.tipo_evento for log in db.query(LogsAnalise).all()
+        }
+        assert eventos == {
+            cenario["proximo"]: "SUCESSO",
+            cenario["sem_bureau"]: "ERRO",
+            cenario["sem_coordenadas"]: "ERRO",
+        }
+
+    def test_upsert_replaces_existing_parecer(self, db, cenario):
+        """Testar que reanálise substitui o parecer existente (contrato_id único)"""
+        service = GeolocalizacaoService(db)
+        service.analisar_lote("tenant-1", None, contrato_ids=[cenario["proximo"]])
+
+        bureau = db.query(DadosBureau).filter_by(contrato_id=cenario["proximo"]).one()
+        bureau.latitude = Decimal("-22.90680000")
+        bureau.longitude = Decimal("-43.17290000")
+        db.commit()
+
+        resultado = service.analisar_lote("tenant-1", None, contrato_ids=[cenario["proximo"]])
+
+        pareceres = db.query(Parecer).filter_by(contrato_id=cenario["proximo"]).all()
+        assert len(pareceres) == 1
+        db.refresh(pareceres[0])
+        assert pareceres[0].tipo_parecer == "MUITO_DISTANTE"
+        assert pareceres[0].distancia_km == resultado.resultados[0].distancia_km
+
+    def test_distance_mode_recorded(self, db, cenario):
+        """Testar modo de distância escolhido na requisição"""
+        resultado = GeolocalizacaoService(db).analisar_lote(
+            "tenant-1", None, contrato_ids=[cenario["distante"]], modo_distancia="geodesic"
+        )
+
+        contrato = db.get(DadosContrato, cenario["distante"])
+        bureau = db.query(DadosBureau).filter_by(contrato_id=cenario["distante"]).one()
+        assert resultado.modo_distancia == "geodesic"
+        assert resultado.resultados[0].distancia_km == DistanceCalculator.geodesic(
+            contrato.latitude, contrato.longitude, bureau.latitude, bureau.longitude
+        )
+
+    def test_status_filter(self, db, cenario):
+        """Testar seleção por status no lugar de IDs"""
+        resultado = GeolocalizacaoService(db).analisar_lote(
+            "tenant-1", None, status="RECEBIDO", limite=10
+        )
+
+        assert {item.contrato_id for item in resultado.resultados} == {
+            cenario["proximo"],
+            cenario["distante"],
+            cenario["sem_bureau"],
+            cenario["sem_coordenadas"],
+        }
+
+    def test_set_based_queries(self, db, cenario, statements):
+        """Testar que contratos e bureau são lidos com uma consulta cada"""
+        ids = [cenario["proximo"], cenario["distante"], cenario["sem_bureau"]]
+        parecer_rules_service.get_tenant_rules(db, "tenant-1")  # regras já em cache
+        statements.clear()
+        GeolocalizacaoService(db).analisar_lote("tenant-1", None, contrato_ids=ids)
+
+        selects = [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+        assert len(selects) == 4
+        assert "dados_contrato" in selects[0]
+        assert "dados_bureau" in selects[1]
+        # Escrita: trava dos contratos e pareceres substituídos (histograma), uma vez por lote
+        assert "pareceres" not in selects[2]
+        assert "pareceres" in selects[3]
+
+
+class TestAnaliseMemorizada:
+    """Testes para a memorização de GeolocalizacaoService.analisar_geolocalizacao"""
+
+    def _writes(self, statements):
+        return [
+            sql for sql in statements
+            if sql.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+
+    def test_repeated_analysis_has_no_writes(self, db, cenario, statements):
+        """Testar que repetir a análise com as mesmas entradas não grava nada"""
+        service = GeolocalizacaoService(db)
+        primeira = service.analisar_geolocalizacao(cenario["proximo"], cenario["usuario"].id)
+        assert self._writes(statements)
+
+        statements.clear()
+        segunda = service.analisar_geolocalizacao(cenario["proximo"], cenario["usuario"].id)
+
+        assert self._writes(statements) == []
+        assert segunda.distancia_km == primeira.distancia_km
+        assert segunda.tipo_parecer == primeira.tipo_parecer
+        assert segunda.texto_parecer == primeira.texto_parecer
+        assert db.query(LogsAnalise).count() == 1
+
+    def test_force_and_changed_inputs_recompute(self, db, cenario, statements):
+        """Testar recálculo com forcar_atualizacao, mudança de entrada ou de modo"""
+        service = GeolocalizacaoService(db)
+        service.analisar_geolocalizacao(cenario["proximo"], None)
+
+        statements.clear()
+        service.analisar_geolocalizacao(cenario["proximo"], None, forcar_atualizacao=True)
+        assert self._writes(statements)
+
+        statements.clear()
+        service.analisar_geolocalizacao(cenario["proximo"], None, modo_distancia="geodesic")
+        assert self._writes(statements)
+
+        bureau = db.query(DadosBureau).filter_by(contrato_id=cenario["proximo"]).one()
+        bureau.latitude = Decimal("-22.90680000")
+        bureau.longitude = Decimal("-43.17290000")
+        db.commit()
+
+        resultado = service.analisar_geolocalizacao(cenario["proximo"], None)
+        assert resultado.tipo_parecer == "MUITO_DISTANTE"
+        assert db.query(Parecer).filter_by(contrato_id=cenario["proximo"]).one().tipo_parecer == "MUITO_DISTANTE"
+
+    def test_batch_result_is_reused(self, db, cenario, statements):
+        """Testar que o parecer gravado em lote é reutilizado na análise individual"""
+        service = GeolocalizacaoService(db)
+        service.analisar_lote("tenant-1", None, contrato_ids=[cenario["distante"]])
+
+        statements.clear()
+        resultado = service.analisar_geolocalizacao(cenario["distante"], None)
+
+        assert self._writes(statements) == []
+        assert resultado.tipo_parecer == "MUITO_DISTANTE"
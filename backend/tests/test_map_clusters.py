@@ -0,0 +1,151 @@
+"""
+Testes para os clusters do mapa (TilePyramid / MapClusterService)
+"""
+
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base
+from app.models.usuario import Usuario
+from app.models.dados_contrato import DadosContrato
+from app.models.dados_bureau import DadosBureau
+from app.models.parecer import Parecer
+from app.services import MapClusterService
+from app.services import map_cluster_service
+from app.utils.map_tiles import CELL_BITS, MAX_ZOOM, TilePyramid, tile_xy
+
+TABLES = [model.__table__ for model in (Usuario, DadosContrato, DadosBureau, Parecer)]
+
+BRASIL = (-74.0, -34.0, -34.0, 5.5)
+
+
+@pytest.fixture
+def pontos():
+    """Pontos aleatórios no Brasil, concentrados em torno de São Paulo"""
+    rng = np.random.default_rng(3)
+    lat = np.concatenate([rng.uniform(-33, 5, 3000), rng.normal(-23.55, 0.05, 2000)])
+    lon = np.concatenate([rng.uniform(-73, -35, 3000), rng.normal(-46.63, 0.05, 2000)])
+    bureau = rng.random(len(lat)) < 0.5
+    tipos = rng.choice(["PROXIMAL", "MODERADO", "DISTANTE", "MUITO_DISTANTE", None], len(lat))
+    return lat, lon, bureau, list(tipos)
+
+
+class TestTilePyramid:
+    """Testes para os agregados pré-calculados por zoom"""
+
+    @pytest.mark.parametrize("zoom", [0, 4, 9, 14])
+    def test_clusters_match_brute_force(self, pontos, zoom):
+        """Testar contagens e tipo dominante contra agrupamento direto dos pontos"""
+        lat, lon, bureau, tipos = pontos
+        pyramid = TilePyramid(lat, lon, bureau, tipos)
+        bbox = BRASIL if zoom <= 4 else (-46.8, -23.7, -46.5, -23.4)
+
+        clusters = {c["id"]: c for c in pyramid.clusters(bbox, zoom)}
+
+        level = zoom + CELL_BITS
+        x, y = tile_xy(lat, lon, level)
+        x0, x1 = tile_xy([0, 0], [bbox[0], bbox[2]], level)[0]
+        y1, y0 = tile_xy([bbox[1], bbox[3]], [0, 0], level)[1]  # y cresce para o sul
+        inside = (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+
+        expected = {}
+        for i in np.nonzero(inside)[0]:
+            cell = expected.setdefault(f"{level}/{x[i]}/{y[i]}", {"contratos": 0, "bureaus": 0, "tipos": {}})
+            cell["bureaus" if bureau[i] else "contratos"] += 1
+            if tipos[i]:
+                cell["tipos"][tipos[i]] = cell["tipos"].get(tipos[i], 0) + 1
+
+        assert clusters.keys() == expected.keys()
+        for key, cell in expected.items():
+            cluster = clusters[key]
+            assert (cluster["contratos"], cluster["bureaus"]) == (cell["contratos"], cell["bureaus"])
+            assert cluster["tipos"] == cell["tipos"]
+            assert cluster["tipos"].get(cluster["tipo_dominante"], 0) == max(cell["tipos"].values(), default=0)
+
+    def test_total_preserved_across_zooms(self, pontos):
+        """Testar que todos os pontos aparecem em todo zoom (mundo inteiro)"""
+        lat, lon, bureau, tipos = pontos
+        pyramid = TilePyramid(lat, lon, bureau, tipos)
+
+        for zoom in (0, 1, 2, 3):
+            clusters = pyramid.clusters((-180, -85, 180, 85), zoom)
+            assert sum(c["total"] for c in clusters) == len(lat)
+        assert pyramid.cells(0) <= pyramid.cells(5) <= pyramid.cells(MAX_ZOOM)
+
+    def test_antimeridian_and_limits(self):
+        """Testar bbox que cruza o antimeridiano e área grande demais para o zoom"""
+        pyramid = TilePyramid([-17.7, -17.8, 0.0], [178.4, -179.9, 0.0], [False, True, False], [None] * 3)
+
+        clusters = pyramid.clusters((170.0, -20.0, -170.0, -10.0), 5)
+        assert sum(c["total"] for c in clusters) == 2
+
+        with pytest.raises(ValueError):
+            pyramid.clusters(BRASIL, 12)
+        assert TilePyramid([], [], [], []).clusters(BRASIL, 3) == []
+
+
+@pytest.fixture
+def db():
+    """Banco SQLite em memória com contratos, bureau e pareceres"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    session = sessionmaker(bind=engine)()
+    map_cluster_service.invalidate_pyramids()
+
+    yield session
+
+    map_cluster_service.invalidate_pyramids()
+    session.close()
+    Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+
+def test_service_clusters_per_tenant(db):
+    """Testar carga do tenant (contrato + bureau + tipo) e isolamento entre tenants"""
+    for tenant_id, quantidade in (("tenant-1", 3), ("tenant-2", 1)):
+        usuario = Usuario(keycloak_id=f"kc-{tenant_id}", email=f"a@{tenant_id}.com", nome="A", tenant_id=tenant_id)
+        db.add(usuario)
+        db.flush()
+        for i in range(quantidade):
+            contrato = DadosContrato(
+                usuario_id=usuario.id, cpf_cliente="12345678901", numero_contrato=f"CT-{tenant_id}-{i}",
+                latitude=Decimal("-23.56130000"), longitude=Decimal("-46.65590000"),
+                endereco_assinatura="Av. Paulista, 1000", arquivo_pdf_path="/tmp/c.pdf",
+            )
+            db.add(contrato)
+            db.flush()
+            db.add(DadosBureau(
+                contrato_id=contrato.id, cpf_cliente="12345678901", nome_cliente="Cliente",
+                logradouro="Av. Rio Branco, 1",
+                latitude=Decimal("-22.90680000"), longitude=Decimal("-43.17290000"),
+            ))
+            if i < 2:
+                db.add(Parecer(
+                    contrato_id=contrato.id, distancia_km=Decimal("357.00"), tipo_parecer="MUITO_DISTANTE",
+                    texto_parecer="x",
+                    latitude_inicio=contrato.latitude, longitude_inicio=contrato.longitude,
+                    latitude_fim=Decimal("-22.90680000"), longitude_fim=Decimal("-43.17290000"),
+                ))
+    db.commit()
+
+    service = MapClusterService(db)
+    resposta = service.clusters("tenant-1", BRASIL, 5)
+
+    assert resposta["total_pontos"] == 6
+    clusters = sorted(resposta["clusters"], key=lambda c: c["longitude"])
+    assert [(c["contratos"], c["bureaus"]) for c in clusters] == [(3, 0), (0, 3)]
+    assert clusters[0]["tipo_dominante"] == "MUITO_DISTANTE"
+    assert clusters[0]["tipos"] == {"MUITO_DISTANTE": 2}
+    assert clusters[0]["latitude"] == pytest.approx(-23.5613)
+
+    # Zoom acima do máximo usa o nível mais fino
+    assert service.clusters("tenant-1", (-46.66, -23.565, -46.65, -23.555), 22)["zoom"] == MAX_ZOOM
+    assert service.clusters("tenant-2", BRASIL, 5)["total_pontos"] == 2
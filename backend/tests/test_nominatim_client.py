@@ -0,0 +1,122 @@
+"""
+Testes para o NominatimClient (sessão aiohttp compartilhada)
+"""
+
+from decimal import Decimal
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.utils import NominatimClient, NominatimError
+from app.utils import loop_thread, nominatim_client
+
+
+@pytest.fixture
+async def servidor():
+    """Servidor Nominatim local que registra a porta de origem de cada requisição"""
+    portas = []
+
+    async def search(request):
+        portas.append(request.transport.get_extra_info("peername")[1])
+        if request.query["q"].startswith("Erro"):
+            return web.Response(status=503)
+        if request.query["q"].startswith("Nada"):
+            return web.json_response([])
+        return web.json_response([{"lat": "-23.5613", "lon": "-46.6559", "display_name": "Av. Paulista"}])
+
+    app = web.Application()
+    app.router.add_get("/search", search)
+    server = TestServer(app)
+    await server.start_server()
+    server.portas = portas
+
+    yield server
+
+    await server.close()
+
+
+async def test_session_reused_across_requests(servidor):
+    """Testar que várias consultas usam a mesma sessão e a mesma conexão (keep-alive)"""
+    client = NominatimClient()
+    client.BASE_URL = str(servidor.make_url("")).rstrip("/")
+
+    for _ in range(3):
+        assert await client.geocode("Av. Paulista, 1000") == (
+            Decimal("-23.5613"), Decimal("-46.6559"), "Av. Paulista"
+        )
+    session = client._get_session()
+
+    assert len(set(servidor.portas)) == 1
+    assert session.headers["User-Agent"] == "sistema-de-laudos"
+
+    await client.close()
+    assert session.closed
+    assert client._get_session() is not session
+    await client.close()
+
+
+async def test_search_distinguishes_not_found_from_errors(servidor):
+    """Testar None para 'não encontrado' e NominatimError para falha do provedor"""
+    client = NominatimClient()
+    client.BASE_URL = str(servidor.make_url("")).rstrip("/")
+
+    assert await client.search("Nada aqui") is None
+    with pytest.raises(NominatimError):
+        await client.search("Erro no provedor")
+    assert await client.geocode("Erro no provedor") is None
+
+    await client.close()
+
+
+def test_shared_instance():
+    """Testar que os serviços recebem a mesma instância"""
+    assert nominatim_client.get_nominatim_client() is nominatim_client.get_nominatim_client()
+
+
+@pytest.fixture
+async def servidor_lento():
+    """Servidor local que demora 0.2s por resposta"""
+    async def search(request):
+        await asyncio.sleep(0.2)
+        return web.json_response([{"lat": "-22.9068", "lon": "-43.1729", "display_name": "Rio"}])
+
+    app = web.Application()
+    app.router.add_get("/search", search)
+    server = TestServer(app)
+    await server.start_server()
+
+    yield server
+
+    await server.close()
+
+
+async def test_sync_calls_run_on_background_loop(servidor_lento):
+    """Testar chamadas síncronas concorrentes sem bloquear o loop da aplicação"""
+    client = NominatimClient()
+    client.BASE_URL = str(servidor_lento.make_url("")).rstrip("/")
+
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*(
+        asyncio.to_thread(client.search_sync, f"Rua {i}") for i in range(5)
+    ))
+    decorrido = time.perf_counter() - inicio
+
+    assert all(r[2] == "Rio" for r in resultados)
+    # Cinco consultas de 0.2s em paralelo no loop de fundo (não em sequência)
+    assert decorrido < 0.8
+    assert any(loop_thread.is_background_loop(loop) for loop in client._sessions.keys())
+
+    await client.close()
+    assert not client._sessions
+
+
+def test_run_sync_rejects_background_loop():
+    """Testar que run_sync dentro do próprio loop de fundo falha em vez de travar"""
+    async def aninhado():
+        return loop_thread.run_sync(asyncio.sleep(0))
+
+    with pytest.raises(RuntimeError):
+        loop_thread.run_sync(aninhado())
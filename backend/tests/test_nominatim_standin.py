@@ -0,0 +1,84 @@
+"""
+Testes do NominatimClient contra o servidor Nominatim local (stand-in)
+"""
+
+from decimal import Decimal
+import time
+
+import pytest
+
+from app.utils import NominatimClient, NominatimError
+from app.utils.address_normalizer import geocode_query
+from benchmarks.nominatim_standin import NominatimStandin, StandinConfig, start_standin
+
+
+@pytest.fixture
+async def standin():
+    """Stand-in com o conjunto padrão em porta livre"""
+    standin = NominatimStandin(config=StandinConfig(seed=1))
+    runner, standin.url = await start_standin(standin)
+
+    yield standin
+
+    await runner.cleanup()
+
+
+@pytest.fixture
+async def client(standin):
+    client = NominatimClient(base_url=standin.url, timeout=0.5)
+
+    yield client
+
+    await client.close()
+
+
+async def test_search_and_reverse(standin, client):
+    """Testar endereço do conjunto (qualquer variação), ausente e geocodificação reversa"""
+    lat, lon, nome = await client.search(geocode_query("AV. PAULISTA, nº 1000 - apto 5, São Paulo/SP"))
+
+    assert (lat, lon) == (Decimal("-23.5647"), Decimal("-46.6527"))
+    assert nome.startswith("1000, Avenida Paulista")
+    assert await client.search("Rua Que Não Existe, 1") is None
+    assert (await client.reverse_geocode(Decimal("-23.5650"), Decimal("-46.6530"))).startswith("1000, Avenida Paulista")
+    assert await client.reverse_geocode(Decimal("0"), Decimal("0")) == ""
+    assert (standin.stats["encontrados"], standin.stats["nao_encontrados"]) == (2, 2)
+
+
+async def test_synthetic_answers_are_deterministic(standin, client):
+    """Testar coordenadas sintéticas estáveis para endereços desconhecidos"""
+    standin.config.synthetic = True
+
+    primeiro = await client.search("Rua Que Não Existe, 1")
+    assert primeiro is not None
+    assert await client.search("rua que nao existe 1") == primeiro
+    assert -33.7 <= float(primeiro[0]) <= 5.2
+
+
+async def test_injected_failures(standin, client):
+    """Testar 503, timeout e 429 injetados como NominatimError no cliente"""
+    standin.config.error_rate = 1
+    with pytest.raises(NominatimError, match="503"):
+        await client.search("Avenida Paulista, 1000, São Paulo, SP")
+    assert await client.geocode("Avenida Paulista, 1000, São Paulo, SP") is None
+
+    standin.config.error_rate = 0
+    standin.config.timeout_rate = 1
+    standin.config.hang_seconds = 2
+    with pytest.raises(NominatimError, match="timeout"):
+        await client.search("Avenida Paulista, 1000, São Paulo, SP")
+
+    standin.config.timeout_rate = 0
+    standin.config.max_rps = 1
+    standin.reset_stats()
+    await client.search("Avenida Paulista, 1000, São Paulo, SP")
+    with pytest.raises(NominatimError, match="429"):
+        await client.search("Avenida Paulista, 1000, São Paulo, SP")
+    assert standin.stats["limitadas_429"] == 1
+
+
+async def test_latency_injection(standin, client):
+    """Testar latência configurada"""
+    standin.config.latency_ms = 100
+    inicio = time.monotonic()
+    await client.search("Avenida Paulista, 1000, São Paulo, SP")
+    assert time.monotonic() - inicio >= 0.09
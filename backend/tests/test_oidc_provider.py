@@ -16,9 +16,30 @@ from app.core import (
     OIDCProviderFactory,
     IdentityAdapter,
     TokenValidationResult,
+    JWKSCache,
 )
 
 
+def make_jwks(*kids):
+    """Gerar JWKS com chaves RSA reais para os kids informados"""
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.hazmat.primitives import serialization
+    from jose import jwk
+    
+    keys = []
+    for kid in kids:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        key = jwk.construct(pem, "RS256").to_dict()
+        key["kid"] = kid
+        key["use"] = "sig"
+        keys.append(key)
+    return {"keys": keys}
+
+
 @pytest.fixture
 def keycloak_config():
     """Configuração de teste para Keycloak"""
@@ -299,6 +320,171 @@ class TestKeycloakProvider:
         assert identity.roles == ["analista", "revisor"]
 
 
+class TestJWKSCache:
+    """Testes para o índice de chaves do JWKSCache"""
+    
+    def test_index_built_by_kid(self):
+        """Testar que o cache indexa chaves públicas prontas por kid"""
+        cache = JWKSCache(keys=make_jwks("k1", "k2"), cached_at=datetime.utcnow())
+        
+        assert set(cache.public_keys) == {"k1", "k2"}
+        assert cache.get_key("k1") is cache.public_keys["k1"]
+        assert cache.get_key("unknown") is None
+    
+    def test_get_key_without_kid_returns_first(self):
+        """Testar fallback para primeira chave quando não há kid"""
+        cache = JWKSCache(keys=make_jwks("k1"), cached_at=datetime.utcnow())
+        
+        assert cache.get_key(None) is cache.public_keys["k1"]
+    
+    def test_expired_cache_returns_none(self):
+        """Testar que cache expirado não retorna chaves"""
+        cache = JWKSCache(
+            keys=make_jwks("k1"),
+            cached_at=datetime.utcnow() - timedelta(seconds=120),
+            ttl_seconds=60,
+        )
+        
+        assert not cache.is_valid()
+        assert cache.get_key("k1") is None
+    
+    def test_refresh_window(self):
+        """Testar janela de atualização antecipada"""
+        cache = JWKSCache(
+            keys={"keys": []},
+            cached_at=datetime.utcnow() - timedelta(seconds=85),
+            ttl_seconds=100,
+            refresh_ratio=0.8,
+        )
+        
+        assert cache.is_valid()
+        assert cache.should_refresh()
+        assert cache.seconds_until_refresh() == 0.0
+
+
+@pytest.mark.asyncio
+class TestSigningKeyLookup:
+    """Testes para busca de chave de assinatura com rotação"""
+    
+    async def test_unknown_kid_forces_single_refresh(self, keycloak_provider):
+        """Testar que kid desconhecido força refresh limitado por intervalo"""
+        jwks_responses = [make_jwks("old"), make_jwks("old", "new")]
+        
+        async def fake_fetch():
+            keycloak_provider._jwks_cache = JWKSCache(
+                keys=jwks_responses.pop(0),
+                cached_at=datetime.utcnow(),
+            )
+            return keycloak_provider._jwks_cache
+        
+        with patch.object(keycloak_provider, "_fetch_jwks", side_effect=fake_fetch) as mock_fetch:
+            key = await keycloak_provider.get_signing_key("new")
+            assert key is not None
+            assert mock_fetch.call_count == 2
+            
+            # Segundo kid desconhecido dentro do intervalo não força novo refresh
+            assert await keycloak_provider.get_signing_key("missing") is None
+            assert mock_fetch.call_count == 2
+        
+        await keycloak_provider.aclose()
+
+
+@pytest.mark.asyncio
+class TestSingleFlight:
+    """Testes para coalescência de buscas concorrentes de JWKS"""
+    
+    async def test_concurrent_cold_start_fetches_once(self, keycloak_provider):
+        """Testar que requisições concorrentes compartilham uma única busca"""
+        import asyncio
+        
+        async def slow_fetch():
+            await asyncio.sleep(0.01)
+            keycloak_provider._jwks_cache = JWKSCache(
+                keys=make_jwks("k1"),
+                cached_at=datetime.utcnow(),
+            )
+            return keycloak_provider._jwks_cache
+        
+        with patch.object(keycloak_provider, "_fetch_jwks", side_effect=slow_fetch) as mock_fetch:
+            results = await asyncio.gather(*[keycloak_provider.get_jwks() for _ in range(20)])
+        
+        assert mock_fetch.call_count == 1
+        assert all(r is results[0] for r in results)
+        await keycloak_provider.aclose()
+    
+    async def test_expired_cache_served_while_revalidating(self, keycloak_provider):
+        """Testar stale-while-revalidate para JWKS expirado"""
+        import asyncio
+        
+        stale = JWKSCache(
+            keys=make_jwks("k1"),
+            cached_at=datetime.utcnow() - timedelta(seconds=120),
+            ttl_seconds=60,
+            stale_ttl_seconds=3600,
+        )
+        keycloak_provider._jwks_cache = stale
+        refreshed = asyncio.Event()
+        
+        async def fetch():
+            refreshed.set()
+            return stale
+        
+        with patch.object(keycloak_provider, "_fetch_jwks", side_effect=fetch):
+            assert await keycloak_provider.get_jwks() is stale.keys
+            assert stale.get_key("k1") is not None
+            await asyncio.wait_for(refreshed.wait(), timeout=1)
+        
+        await keycloak_provider.aclose()
+
+
+@pytest.mark.asyncio
+class TestDiscoveryCache:
+    """Testes para cache de metadados de descoberta"""
+    
+    @staticmethod
+    def make_response(status_code, payload=None, etag=None):
+        response = Mock()
+        response.status_code = status_code
+        response.json.return_value = payload
+        response.headers = {"ETag": etag} if etag else {}
+        response.raise_for_status.return_value = None
+        return response
+    
+    async def test_metadata_cached_between_calls(self, keycloak_provider):
+        """Testar que descoberta é buscada uma única vez dentro do TTL"""
+        metadata = {"jwks_uri": "https://keycloak.example.com/certs"}
+        client = Mock()
+        client.get = AsyncMock(return_value=self.make_response(200, metadata, etag='"v1"'))
+        keycloak_provider._http_client = client
+        
+        assert await keycloak_provider.get_discovery_metadata() == metadata
+        assert await keycloak_provider.get_discovery_metadata() == metadata
+        assert client.get.await_count == 1
+        assert client.get.await_args.args[0] == (
+            "https://keycloak.example.com/realms/sistema-laudos/.well-known/openid-configuration"
+        )
+    
+    async def test_expired_metadata_revalidated_with_etag(self, keycloak_provider):
+        """Testar revalidação em background com If-None-Match e resposta 304"""
+        metadata = {"jwks_uri": "https://keycloak.example.com/certs"}
+        client = Mock()
+        client.get = AsyncMock(side_effect=[
+            self.make_response(200, metadata, etag='"v1"'),
+            self.make_response(304),
+        ])
+        keycloak_provider._http_client = client
+        
+        await keycloak_provider.get_discovery_metadata()
+        keycloak_provider._discovery_cache.cached_at -= timedelta(days=1)
+        
+        # Metadados expirados são servidos enquanto a revalidação roda em background
+        assert await keycloak_provider.get_discovery_metadata() == metadata
+        await keycloak_provider._inflight["discovery"]
+        
+        assert client.get.await_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+        assert keycloak_provider._discovery_cache.is_valid()
+
+
 class TestIntegration:
     """Testes de integração"""
     
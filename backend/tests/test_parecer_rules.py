@@ -0,0 +1,184 @@
+"""
+Testes para as regras de parecer compiladas (CompiledRules / RegrasParecerService)
+"""
+
+import random
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base
+from app.models.usuario import Usuario
+from app.models.dados_contrato import DadosContrato
+from app.models.dados_bureau import DadosBureau
+from app.models.parecer import Parecer
+from app.models.regras_parecer import RegrasParecer
+from app.models.histograma_distancias import HistogramaDistancias
+from app.models.logs_analise import LogsAnalise
+from app.services import GeolocalizacaoService, RegrasParecerService
+from app.services import parecer_rules_service
+from app.utils import DistanceCalculator
+from app.utils.parecer_rules import CompiledRules, DEFAULT_RULES
+
+TABLES = [
+    model.__table__
+    for model in (Usuario, DadosContrato, DadosBureau, Parecer, RegrasParecer, HistogramaDistancias, LogsAnalise)
+]
+
+FAIXAS_TENANT = [
+    {"tipo": "PROXIMAL", "ate_km": 0.5, "template": "Até 500m: {distancia:.1f} km ({endereco_origem})."},
+    {"tipo": "DISTANTE", "ate_km": 10, "template": "Distante: {distancia:.2f} km."},
+    {"tipo": "MUITO_DISTANTE", "ate_km": None, "template": "Muito distante: {distancia:.2f} km -> {endereco_destino}."},
+]
+
+
+class TestCompiledRules:
+    """Testes para CompiledRules"""
+
+    def test_default_rules_keep_historical_behavior(self):
+        """Testar limites (<=) e texto das regras padrão"""
+        assert DEFAULT_RULES.breakpoints == (5.0, 20.0, 50.0)
+        assert DEFAULT_RULES.classify(Decimal("5.00")) == "PROXIMAL"
+        assert DEFAULT_RULES.classify(Decimal("5.01")) == "MODERADO"
+        assert DEFAULT_RULES.classify(Decimal("50.00")) == "DISTANTE"
+        assert DEFAULT_RULES.classify(Decimal("50.01")) == "MUITO_DISTANTE"
+
+        assert DistanceCalculator.get_parecer_text(Decimal("3.456"), "Rua A", "Rua B") == (
+            "Análise de Geolocalização: Os endereços estão muito próximos, "
+            "a uma distância de apenas 3.46 km. "
+            "Endereço de origem: Rua A. "
+            "Endereço de destino: Rua B. "
+            "Parecer: APROVADO - Distâncias compatíveis com documentação."
+        )
+
+    def test_batch_matches_scalar(self):
+        """Testar searchsorted (lote) contra bisect (escalar), com NaN"""
+        rules = CompiledRules.from_dicts(FAIXAS_TENANT)
+        rng = random.Random(11)
+        distances = [round(rng.uniform(0, 30), 2) for _ in range(500)] + [0.5, 10.0]
+
+        batch = rules.classify_batch(distances + [float("nan")])
+
+        assert list(batch[:-1]) == [rules.classify(d) for d in distances]
+        assert batch[-1] == ""
+
+    def test_templates_and_version(self):
+        """Testar templates pré-compilados e versão determinística"""
+        rules = CompiledRules.from_dicts(FAIXAS_TENANT)
+
+        assert rules.text(Decimal("0.44"), "Rua A", "Rua B") == "Até 500m: 0.4 km (Rua A)."
+        assert rules.text(Decimal("12"), "Rua A", "Rua B") == "Muito distante: 12.00 km -> Rua B."
+        assert rules.version == CompiledRules.from_dicts(FAIXAS_TENANT).version
+        assert rules.version != DEFAULT_RULES.version
+
+    @pytest.mark.parametrize("faixas", [
+        [],
+        [{"tipo": "PROXIMAL", "ate_km": 5, "template": "x"}],
+        [{"tipo": "OUTRO", "ate_km": None, "template": "x"}],
+        [
+            {"tipo": "PROXIMAL", "ate_km": 10, "template": "x"},
+            {"tipo": "MODERADO", "ate_km": 5, "template": "x"},
+            {"tipo": "DISTANTE", "ate_km": None, "template": "x"},
+        ],
+        [
+            {"tipo": "PROXIMAL", "ate_km": 5, "template": "x"},
+            {"tipo": "PROXIMAL", "ate_km": None, "template": "x"},
+        ],
+        [{"tipo": "PROXIMAL", "ate_km": None, "template": "{cpf}"}],
+        [{"tipo": "PROXIMAL", "ate_km": None, "template": "{distancia:q}"}],
+    ])
+    def test_invalid_rules(self, faixas):
+        """Testar rejeição de regras inválidas"""
+        with pytest.raises(ValueError):
+            CompiledRules.from_dicts(faixas)
+
+
+@pytest.fixture
+def db():
+    """Banco SQLite em memória com as tabelas da análise e das regras"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    session = sessionmaker(bind=engine)()
+    parecer_rules_service.invalidate_rules()
+
+    yield session
+
+    parecer_rules_service.invalidate_rules()
+    session.close()
+    Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+
+@pytest.fixture
+def contratos(db):
+    """Um contrato a ~0.9 km do bureau em cada tenant"""
+    ids = {}
+    for tenant_id in ("tenant-1", "tenant-2"):
+        usuario = Usuario(keycloak_id=f"kc-{tenant_id}", email=f"a@{tenant_id}.com", nome="A", tenant_id=tenant_id)
+        db.add(usuario)
+        db.flush()
+        contrato = DadosContrato(
+            usuario_id=usuario.id, cpf_cliente="12345678901", numero_contrato=f"CT-{tenant_id}",
+            latitude=Decimal("-23.56130000"), longitude=Decimal("-46.65590000"),
+            endereco_assinatura="Av. Paulista, 1000", arquivo_pdf_path="/tmp/c.pdf",
+        )
+        db.add(contrato)
+        db.flush()
+        db.add(DadosBureau(
+            contrato_id=contrato.id, cpf_cliente="12345678901", nome_cliente="Cliente",
+            logradouro="Rua Augusta, 500",
+            latitude=Decimal("-23.55520000"), longitude=Decimal("-46.66250000"),
+        ))
+        ids[tenant_id] = contrato.id
+    db.commit()
+    return ids
+
+
+class TestRegrasParecerService:
+    """Testes para regras por tenant (cache, invalidação e versão no parecer)"""
+
+    def test_tenant_rules_applied_and_stamped(self, db, contratos):
+        """Testar regras do tenant na análise e versão gravada no parecer"""
+        regras = RegrasParecerService(db)
+        assert regras.obter_regras("tenant-1")["padrao"] is True
+
+        versao = regras.atualizar_regras("tenant-1", FAIXAS_TENANT, atualizado_por="admin")["versao"]
+
+        service = GeolocalizacaoService(db)
+        service.analisar_lote("tenant-1", None, contrato_ids=[contratos["tenant-1"]])
+        analise = service.analisar_geolocalizacao(contratos["tenant-2"], None, tenant_id="tenant-2")
+
+        parecer = db.query(Parecer).filter_by(contrato_id=contratos["tenant-1"]).one()
+        assert parecer.tipo_parecer == "DISTANTE"
+        assert parecer.texto_parecer.startswith("Distante: ")
+        assert parecer.regras_versao == versao
+
+        # Outro tenant continua com as regras padrão
+        assert analise.tipo_parecer == "PROXIMAL"
+        assert analise.regras_versao == DEFAULT_RULES.version
+
+    def test_edit_invalidates_cache(self, db, contratos):
+        """Testar que a edição invalida as regras compiladas em cache"""
+        regras = RegrasParecerService(db)
+        service = GeolocalizacaoService(db)
+        contrato_id = contratos["tenant-1"]
+
+        primeira = service.analisar_geolocalizacao(contrato_id, None, tenant_id="tenant-1")
+        assert primeira.tipo_parecer == "PROXIMAL"
+        assert parecer_rules_service.get_tenant_rules(db, "tenant-1") is DEFAULT_RULES
+
+        regras.atualizar_regras("tenant-1", FAIXAS_TENANT)
+        # Nova versão das regras muda a impressão digital: recalcula
+        segunda = service.analisar_geolocalizacao(contrato_id, None, tenant_id="tenant-1")
+        assert segunda.tipo_parecer == "DISTANTE"
+
+        assert regras.restaurar_padrao("tenant-1")["padrao"] is True
+        terceira = service.analisar_geolocalizacao(contrato_id, None, tenant_id="tenant-1")
+        assert terceira.tipo_parecer == "PROXIMAL"
+        assert terceira.regras_versao == DEFAULT_RULES.version
@@ -0,0 +1,280 @@
+"""
+Testes para a reanálise incremental (parecer desatualizado + ReanaliseService)
+"""
+
+from datetime import datetime
+from decimal import Decimal
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base
+from app.models.usuario import Usuario
+from app.models.dados_contrato import DadosContrato
+from app.models.dados_bureau import DadosBureau
+from app.models.parecer import Parecer
+from app.models.regras_parecer import RegrasParecer
+from app.models.histograma_distancias import HistogramaDistancias
+from app.models.logs_analise import LogsAnalise
+from app.repositories import BureauRepository, ContratoRepository, PareceRepository
+from app.services import GeolocalizacaoService, ReanaliseService
+from app.services import parecer_rules_service
+from app.utils.distance_modes import resolve_distance_mode
+
+TABLES = [
+    model.__table__
+    for model in (Usuario, DadosContrato, DadosBureau, Parecer, RegrasParecer, HistogramaDistancias, LogsAnalise)
+]
+
+RIO = (Decimal("-22.90680000"), Decimal("-43.17290000"))
+
+
+@pytest.fixture
+def db():
+    """Banco SQLite em memória apenas com as tabelas da análise"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    session = sessionmaker(bind=engine)()
+    parecer_rules_service.invalidate_rules()
+
+    yield session
+
+    parecer_rules_service.invalidate_rules()
+    session.close()
+    Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+
+@pytest.fixture
+def analisados(db):
+    """Três contratos de dois tenants, todos com parecer PROXIMAL"""
+    contratos = {}
+    for tenant_id, quantidade in (("tenant-1", 2), ("tenant-2", 1)):
+        usuario = Usuario(
+            keycloak_id=f"kc-{tenant_id}", email=f"a@{tenant_id}.com",
+            nome="Analista", tenant_id=tenant_id,
+        )
+        db.add(usuario)
+        db.flush()
+        for i in range(quantidade):
+            contrato = DadosContrato(
+                usuario_id=usuario.id, cpf_cliente="12345678901",
+                numero_contrato=f"CT-{tenant_id}-{i}",
+                latitude=Decimal("-23.56130000"), longitude=Decimal("-46.65590000"),
+                endereco_assinatura="Av. Paulista, 1000", arquivo_pdf_path="/tmp/c.pdf",
+            )
+            db.add(contrato)
+            db.flush()
+            db.add(DadosBureau(
+                contrato_id=contrato.id, cpf_cliente="12345678901", nome_cliente="Cliente",
+                logradouro="Rua Augusta, 500",
+                latitude=Decimal("-23.55520000"), longitude=Decimal("-46.66250000"),
+            ))
+            contratos.setdefault(tenant_id, []).append(contrato.id)
+        db.commit()
+        GeolocalizacaoService(db).analisar_lote(tenant_id, None, contrato_ids=contratos[tenant_id])
+    return contratos
+
+
+def _dirty(db):
+    return sorted(contrato_id for (contrato_id,) in db.query(Parecer.contrato_id).filter(Parecer.desatualizado))
+
+
+class TestParecerDesatualizado:
+    """Testes para a marcação de pareceres desatualizados"""
+
+    def test_location_updates_mark_parecer(self, db, analisados):
+        """Testar que update_location (contrato ou bureau) marca o parecer"""
+        primeiro, segundo = analisados["tenant-1"]
+        assert _dirty(db) == []
+
+        ContratoRepository(db).update_location(primeiro, *RIO)
+        bureau = db.query(DadosBureau).filter_by(contrato_id=segundo).one()
+        BureauRepository(db).update_location(bureau.id, *RIO)
+
+        assert _dirty(db) == [primeiro, segundo]
+
+    def test_unrelated_updates_do_not_mark(self, db, analisados):
+        """Testar que mudanças fora das entradas da análise não marcam"""
+        primeiro, _ = analisados["tenant-1"]
+
+        ContratoRepository(db).update_status(primeiro, "EM_REVISAO")
+        # Mesmas coordenadas: sem mudança real
+        ContratoRepository(db).update_location(
+            primeiro, Decimal("-23.56130000"), Decimal("-46.65590000")
+        )
+
+        assert _dirty(db) == []
+
+
+class TestReanaliseService:
+    """Testes para ReanaliseService"""
+
+    def test_recomputes_only_stale_pareceres(self, db, analisados):
+        """Testar recálculo em lote apenas dos pareceres marcados (por tenant)"""
+        primeiro, segundo = analisados["tenant-1"]
+        (outro,) = analisados["tenant-2"]
+        criado_em = db.query(Parecer).filter_by(contrato_id=segundo).one().criado_em
+
+        ContratoRepository(db).update_location(primeiro, *RIO)
+        ContratoRepository(db).update_location(outro, *RIO)
+
+        processados = ReanaliseService(db).reanalisar_pendentes(limite=1)
+
+        db.expire_all()
+        assert processados == 2
+        assert _dirty(db) == []
+        tipos = {p.contrato_id: p.tipo_parecer for p in db.query(Parecer).all()}
+        assert tipos == {primeiro: "MUITO_DISTANTE", segundo: "PROXIMAL", outro: "MUITO_DISTANTE"}
+        assert db.query(Parecer).filter_by(contrato_id=segundo).one().criado_em == criado_em
+
+    def test_reanalysis_keeps_distance_mode(self, db, analisados):
+        """Testar que a reanálise usa o modo gravado no parecer (geodésico continua geodésico)"""
+        primeiro, segundo = analisados["tenant-1"]
+        GeolocalizacaoService(db).analisar_lote(
+            "tenant-1", None, contrato_ids=[primeiro], modo_distancia="geodesic"
+        )
+        ContratoRepository(db).update_location(primeiro, *RIO)
+        ContratoRepository(db).update_location(segundo, *RIO)
+
+        assert ReanaliseService(db).reanalisar_lote()["concluidos"] == 2
+
+        db.expire_all()
+        pareceres = {p.contrato_id: p for p in db.query(Parecer).all()}
+        assert pareceres[primeiro].modo_distancia == "geodesic"
+        assert pareceres[segundo].modo_distancia == "haversine"
+        bureau = db.query(DadosBureau).filter_by(contrato_id=primeiro).one()
+        geodesica = resolve_distance_mode("geodesic").distance(*RIO, bureau.latitude, bureau.longitude)
+        assert pareceres[primeiro].distancia_km == Decimal(str(round(geodesica, 2)))
+
+    def test_failed_contract_stays_dirty_with_backoff(self, db, analisados):
+        """Testar que contrato sem coordenadas fica marcado e só volta após a espera"""
+        primeiro, _ = analisados["tenant-1"]
+        bureau = db.query(DadosBureau).filter_by(contrato_id=primeiro).one()
+        BureauRepository(db).update_location(bureau.id, None, None)
+
+        resultado = ReanaliseService(db).reanalisar_lote()
+
+        assert resultado == {"selecionados": 1, "concluidos": 0, "erros": 1}
+        assert _dirty(db) == [primeiro]
+        erro = db.query(LogsAnalise).filter_by(contrato_id=primeiro, tipo_evento="ERRO").one()
+        assert "coordinates" in erro.detalhes
+        parecer = db.query(Parecer).filter_by(contrato_id=primeiro).one()
+        assert parecer.reanalise_tentativas == 1
+        assert parecer.reanalise_apos > datetime.utcnow()
+
+        # Em espera: não é reservado de novo
+        assert ReanaliseService(db).reanalisar_lote()["selecionados"] == 0
+
+        # Geocodificação chega: a nova marcação zera a espera e a reanálise conclui
+        BureauRepository(db).update_location(bureau.id, *RIO)
+        assert ReanaliseService(db).reanalisar_lote() == {"selecionados": 1, "concluidos": 1, "erros": 0}
+        db.expire_all()
+        parecer = db.query(Parecer).filter_by(contrato_id=primeiro).one()
+        assert (parecer.desatualizado, parecer.reanalise_tentativas, parecer.reanalise_apos) == (False, 0, None)
+
+    def test_backoff_grows_and_is_capped(self, db, analisados):
+        """Testar espera exponencial entre falhas, limitada ao máximo"""
+        primeiro, _ = analisados["tenant-1"]
+        repo = PareceRepository(db)
+        repo.set_dirty([primeiro])
+
+        esperas = []
+        for _ in range(4):
+            antes = datetime.utcnow()
+            repo.defer_dirty([primeiro], base_seconds=60, max_seconds=300)
+            parecer = db.query(Parecer).filter_by(contrato_id=primeiro).one()
+            esperas.append(round((parecer.reanalise_apos - antes).total_seconds()))
+
+        assert esperas == [60, 120, 240, 300]
+        assert parecer.desatualizado is True
+
+    def test_tenant_batch_error_defers_its_contracts(self, db, analisados, monkeypatch):
+        """Testar que erro no lote de um tenant adia só os contratos dele"""
+        primeiro, _ = analisados["tenant-1"]
+        (outro,) = analisados["tenant-2"]
+        ContratoRepository(db).update_location(primeiro, *RIO)
+        ContratoRepository(db).update_location(outro, *RIO)
+
+        analisar_lote = GeolocalizacaoService.analisar_lote
+
+        def falhar_tenant_1(self, tenant_id, *args, **kwargs):
+            if tenant_id == "tenant-1":
+                raise RuntimeError("conexão perdida")
+            return analisar_lote(self, tenant_id, *args, **kwargs)
+
+        monkeypatch.setattr(GeolocalizacaoService, "analisar_lote", falhar_tenant_1)
+        resultado = ReanaliseService(db).reanalisar_lote()
+
+        assert resultado == {"selecionados": 2, "concluidos": 1, "erros": 1}
+        assert _dirty(db) == [primeiro]
+        assert db.query(Parecer).filter_by(contrato_id=primeiro).one().reanalise_tentativas == 1
+
+    def test_claimed_rows_are_leased(self, db, analisados):
+        """Testar que pareceres reservados não são reservados de novo enquanto a reserva vale"""
+        primeiro, segundo = analisados["tenant-1"]
+        PareceRepository(db).set_dirty([primeiro, segundo])
+
+        reservados = PareceRepository(db).claim_dirty(limit=1)
+        db.commit()
+
+        assert [row.contrato_id for row in reservados] == [primeiro]
+        assert [row.contrato_id for row in PareceRepository(db).claim_dirty()] == [segundo]
+        assert PareceRepository(db).claim_dirty() == []
+        db.commit()
+
+        # Reserva vencida (runner caiu no meio do lote): volta a ser reservável
+        db.query(Parecer).update({Parecer.reanalise_apos: datetime(2000, 1, 1)})
+        assert len(PareceRepository(db).claim_dirty()) == 2
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL não definido")
+def test_concurrent_claims_are_disjoint_postgres():
+    """Testar que dois runners concorrentes reservam lotes disjuntos (SKIP LOCKED)"""
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    Base.metadata.drop_all(bind=engine, tables=TABLES)
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    Session = sessionmaker(bind=engine)
+    setup, primeiro, segundo = Session(), Session(), Session()
+    try:
+        usuario = Usuario(keycloak_id="kc-1", email="a@tenant-1.com", nome="A", tenant_id="tenant-1")
+        setup.add(usuario)
+        setup.flush()
+        for i in range(4):
+            contrato = DadosContrato(
+                usuario_id=usuario.id, cpf_cliente="12345678901", numero_contrato=f"CT-{i}",
+                latitude=Decimal("-23.56130000"), longitude=Decimal("-46.65590000"),
+                endereco_assinatura="Av. Paulista, 1000", arquivo_pdf_path="/tmp/c.pdf",
+            )
+            setup.add(contrato)
+            setup.flush()
+            setup.add(Parecer(
+                contrato_id=contrato.id, distancia_km=Decimal("1"), tipo_parecer="PROXIMAL",
+                texto_parecer="1 km", desatualizado=True,
+                latitude_inicio=contrato.latitude, longitude_inicio=contrato.longitude,
+                latitude_fim=contrato.latitude, longitude_fim=contrato.longitude,
+            ))
+        setup.commit()
+
+        # O primeiro ainda não fez commit da reserva: o segundo pula as linhas travadas
+        lote_1 = {row.contrato_id for row in PareceRepository(primeiro).claim_dirty(limit=2)}
+        lote_2 = {row.contrato_id for row in PareceRepository(segundo).claim_dirty(limit=4)}
+        primeiro.commit()
+        segundo.commit()
+
+        assert len(lote_1) == 2 and len(lote_2) == 2
+        assert lote_1.isdisjoint(lote_2)
+        assert PareceRepository(setup).claim_dirty() == []
+    finally:
+        for session in (setup, primeiro, segundo):
+            session.rollback()
+            session.close()
+        Base.metadata.drop_all(bind=engine, tables=TABLES)
+        engine.dispose()
@@ -0,0 +1,192 @@
+"""
+Testes para o cache de geocodificação reversa (grade de coordenadas)
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base
+from app.models.reverse_geocode_cache import ReverseGeocodeCache
+from app.services import GeocodingService
+from app.services import geocoding_service
+from app.utils import ReverseGeocodeResult
+from app.utils.geocode_cache import reverse_cache_key
+from app.utils.geohash import encode
+
+TABLES = [ReverseGeocodeCache.__table__]
+
+PAULISTA = "1000, Avenida Paulista, Bela Vista, São Paulo"
+
+
+class FakeNominatim:
+    """Provedor de teste: endereço por ponto fixo (mais próximo até ~1 km) e contagem de chamadas
+
+    Segue o NominatimClient: "" sem endereço no ponto, None em falha.
+    """
+
+    def __init__(self, enderecos, falhar=False):
+        self.enderecos = enderecos
+        self.falhar = falhar
+        self.chamadas = []
+
+    def reverse_geocode_sync(self, latitude, longitude):
+        self.chamadas.append((latitude, longitude))
+        if self.falhar:
+            return None
+        for (lat, lon), endereco in self.enderecos.items():
+            if abs(float(latitude) - lat) < 0.01 and abs(float(longitude) - lon) < 0.01:
+                return endereco
+        return ""
+
+    async def reverse_geocode(self, latitude, longitude):
+        return self.reverse_geocode_sync(latitude, longitude)
+
+
+@pytest.fixture
+def db():
+    """Banco SQLite em memória só com a tabela do cache reverso"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    session = sessionmaker(bind=engine)()
+    geocoding_service.reset_geocode_cache()
+
+    yield session
+
+    geocoding_service.reset_geocode_cache()
+    session.close()
+    Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+
+@pytest.fixture
+def provedor():
+    return FakeNominatim({(-23.5647, -46.6527): PAULISTA})
+
+
+def test_grid_key():
+    """Testar que pontos a poucos metros caem na mesma célula e a grade entra na chave"""
+    assert reverse_cache_key(Decimal("-23.564712"), Decimal("-46.652718"), 10) == \
+        reverse_cache_key(Decimal("-23.564713"), Decimal("-46.652719"), 10)
+    assert reverse_cache_key(-23.5647, -46.6527, 10) != reverse_cache_key(-23.5649, -46.6527, 10)
+    assert reverse_cache_key(-23.5647, -46.6527, 10).startswith("10m:")
+    assert reverse_cache_key(-23.5647, -46.6527, 10) != reverse_cache_key(-23.5647, -46.6527, 50)
+
+
+class TestReverseGeocodeCache:
+    """Testes para os dois níveis, vizinho mais próximo e métricas"""
+
+    def test_memory_then_database_levels(self, db, provedor):
+        """Testar consulta única ao provedor para pontos da mesma célula e acerto no banco"""
+        service = GeocodingService(db, provedor)
+
+        assert service.reverse_geocodificar(Decimal("-23.564712"), Decimal("-46.652718")) == PAULISTA
+        assert service.reverse_geocodificar(Decimal("-23.564713"), Decimal("-46.652719")) == PAULISTA
+        assert len(provedor.chamadas) == 1
+
+        # Outro processo: LRU vazio, entrada vem da tabela
+        geocoding_service._reverse_memory_cache.clear()
+        assert GeocodingService(db, provedor).reverse_geocodificar(Decimal("-23.564712"), Decimal("-46.652718")) == PAULISTA
+        assert len(provedor.chamadas) == 1
+
+        row = db.query(ReverseGeocodeCache).one()
+        assert row.geohash == encode(Decimal("-23.564712"), Decimal("-46.652718"))
+        stats = geocoding_service.geocode_cache_stats()["reverso"]
+        assert (stats["provedor"], stats["memoria"], stats["banco"]) == (1, 1, 1)
+
+    def test_provider_recorded_with_its_ttl(self, db):
+        """Testar que o backend que respondeu é gravado e expira pela validade dele"""
+        provedor = FakeNominatim({(-23.5647, -46.6527): ReverseGeocodeResult(PAULISTA, "google")})
+        service = GeocodingService(db, provedor)
+        service.reverse_geocodificar(Decimal("-23.5647"), Decimal("-46.6527"))
+
+        assert db.query(ReverseGeocodeCache).one().provider == "google"
+
+        db.query(ReverseGeocodeCache).update({ReverseGeocodeCache.consultado_em: datetime.utcnow() - timedelta(days=31)})
+        db.commit()
+        geocoding_service._reverse_memory_cache.clear()
+
+        assert service.reverse_geocodificar(Decimal("-23.5647"), Decimal("-46.6527")) == PAULISTA
+        assert len(provedor.chamadas) == 2
+
+        db.query(ReverseGeocodeCache).update({ReverseGeocodeCache.consultado_em: datetime.utcnow() - timedelta(days=31)})
+        db.commit()
+        assert service.limpar_reversos_expirados() == 1
+
+    def test_negative_cache_and_errors(self, db):
+        """Testar cache de ponto sem endereço e que falhas do provedor não são gravadas"""
+        service = GeocodingService(db, FakeNominatim({}))
+        assert service.reverse_geocodificar(Decimal("0"), Decimal("0")) is None
+        assert service.reverse_geocodificar(Decimal("0"), Decimal("0")) is None
+        assert len(service.nominatim.chamadas) == 1
+
+        falho = GeocodingService(db, FakeNominatim({}, falhar=True))
+        assert falho.reverse_geocodificar(Decimal("-10"), Decimal("-40")) is None
+        assert falho.reverse_geocodificar(Decimal("-10"), Decimal("-40")) is None
+        assert len(falho.nominatim.chamadas) == 2
+        assert db.query(ReverseGeocodeCache).count() == 1
+
+        stats = geocoding_service.geocode_cache_stats()["reverso"]
+        assert (stats["negativos"], stats["erros"]) == (1, 2)
+
+    def test_nearest_within_tolerance(self, db, provedor, monkeypatch):
+        """Testar acerto pelo ponto mais próximo na célula vizinha, só dentro da tolerância"""
+        service = GeocodingService(db, provedor)
+        service.reverse_geocodificar(Decimal("-23.564700"), Decimal("-46.652700"))
+
+        # ~12 m ao norte: outra célula, fora do cache sem tolerância
+        vizinho = (Decimal("-23.564590"), Decimal("-46.652700"))
+        assert reverse_cache_key(*vizinho, 10) != reverse_cache_key(Decimal("-23.5647"), Decimal("-46.6527"), 10)
+
+        monkeypatch.setattr(geocoding_service, "REVERSE_GEOCODE_TOLERANCE_METERS", 5)
+        service.reverse_geocodificar(*vizinho)
+        assert len(provedor.chamadas) == 2
+
+        geocoding_service.reset_geocode_cache()
+        db.query(ReverseGeocodeCache).filter(
+            ReverseGeocodeCache.chave == reverse_cache_key(*vizinho, 10)
+        ).delete()
+        db.commit()
+
+        monkeypatch.setattr(geocoding_service, "REVERSE_GEOCODE_TOLERANCE_METERS", 20)
+        assert service.reverse_geocodificar(*vizinho) == PAULISTA
+        assert service.reverse_geocodificar(*vizinho) == PAULISTA
+        assert len(provedor.chamadas) == 2
+        stats = geocoding_service.geocode_cache_stats()["reverso"]
+        assert (stats["banco"], stats["vizinhos"], stats["memoria"]) == (1, 1, 1)
+
+    def test_ttl_expiry(self, db, provedor):
+        """Testar expiração e limpeza das entradas persistentes"""
+        service = GeocodingService(db, provedor)
+        service.reverse_geocodificar(Decimal("-23.5647"), Decimal("-46.6527"))
+
+        db.query(ReverseGeocodeCache).update(
+            {ReverseGeocodeCache.consultado_em: datetime.utcnow() - geocoding_service.GEOCODE_CACHE_TTL - timedelta(minutes=1)}
+        )
+        db.commit()
+        geocoding_service._reverse_memory_cache.clear()
+
+        assert service.reverse_geocodificar(Decimal("-23.5647"), Decimal("-46.6527")) == PAULISTA
+        assert len(provedor.chamadas) == 2
+
+        db.query(ReverseGeocodeCache).update(
+            {ReverseGeocodeCache.consultado_em: datetime.utcnow() - geocoding_service.GEOCODE_CACHE_TTL - timedelta(minutes=1)}
+        )
+        db.commit()
+        assert service.limpar_reversos_expirados() == 1
+        assert db.query(ReverseGeocodeCache).count() == 0
+
+    async def test_async_shares_cache(self, db, provedor):
+        """Testar que a variante assíncrona usa os mesmos níveis"""
+        service = GeocodingService(db, provedor)
+
+        assert await service.reverse_geocodificar_async(Decimal("-23.5647"), Decimal("-46.6527")) == PAULISTA
+        assert service.reverse_geocodificar(Decimal("-23.5647"), Decimal("-46.6527")) == PAULISTA
+        assert len(provedor.chamadas) == 1
@@ -0,0 +1,190 @@
+"""
+Testes para índice geohash e consultas espaciais (raio / retângulo)
+"""
+
+import random
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base
+from app.models.usuario import Usuario
+from app.models.dados_contrato import DadosContrato
+from app.models.dados_bureau import DadosBureau
+from app.models.parecer import Parecer
+from app.models.logs_analise import LogsAnalise
+from app.repositories import BureauRepository, ContratoRepository
+from app.services import GeolocalizacaoService
+from app.utils import DistanceCalculator
+from app.utils import geohash
+
+TABLES = [
+    model.__table__
+    for model in (Usuario, DadosContrato, DadosBureau, Parecer, LogsAnalise)
+]
+
+CENTRO = (Decimal("-23.55050000"), Decimal("-46.63330000"))  # Praça da Sé
+
+
+@pytest.fixture
+def db():
+    """Banco SQLite em memória apenas com as tabelas da análise"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    session = sessionmaker(bind=engine)()
+
+    yield session
+
+    session.close()
+    Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+
+@pytest.fixture
+def contratos(db):
+    """500 contratos espalhados a até ~30km do centro (tenant-1) + 1 do tenant-2"""
+    rng = random.Random(7)
+    usuario = Usuario(keycloak_id="kc-1", email="a@t1.com", nome="A", tenant_id="tenant-1")
+    outro = Usuario(keycloak_id="kc-2", email="b@t2.com", nome="B", tenant_id="tenant-2")
+    db.add_all([usuario, outro])
+    db.flush()
+
+    for i in range(500):
+        lat = CENTRO[0] + Decimal(f"{rng.uniform(-0.3, 0.3):.8f}")
+        lon = CENTRO[1] + Decimal(f"{rng.uniform(-0.3, 0.3):.8f}")
+        contrato = DadosContrato(
+            usuario_id=usuario.id,
+            cpf_cliente="12345678901",
+            numero_contrato=f"CT-{i}",
+            latitude=lat,
+            longitude=lon,
+            arquivo_pdf_path="/tmp/c.pdf",
+        )
+        db.add(contrato)
+        db.flush()
+        db.add(DadosBureau(
+            contrato_id=contrato.id,
+            cpf_cliente="12345678901",
+            nome_cliente="Cliente",
+            logradouro=f"Rua {i}",
+            latitude=lat,
+            longitude=lon,
+        ))
+
+    db.add(DadosContrato(
+        usuario_id=outro.id,
+        cpf_cliente="10987654321",
+        numero_contrato="CT-OUTRO",
+        latitude=CENTRO[0],
+        longitude=CENTRO[1],
+        arquivo_pdf_path="/tmp/c.pdf",
+    ))
+    db.commit()
+    return db.query(DadosContrato).all()
+
+
+class TestGeohash:
+    """Testes para app.utils.geohash"""
+
+    def test_encode_reference_value(self):
+        """Testar valor de referência do geohash"""
+        assert geohash.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+    def test_missing_coordinates(self):
+        """Testar coordenada ausente"""
+        assert geohash.encode(None, -46.6) is None
+
+    def test_cover_contains_points(self):
+        """Testar que as células cobrem todos os pontos do retângulo"""
+        bbox = geohash.bbox_for_radius(*CENTRO, 5)
+        ranges = geohash.cell_ranges(geohash.cover_bbox(*bbox))
+        rng = random.Random(1)
+
+        for _ in range(2000):
+            code = geohash.encode(
+                rng.uniform(bbox[0], bbox[2]), rng.uniform(bbox[1], bbox[3])
+            )
+            assert any(
+                code >= lower and (upper is None or code < upper)
+                for lower, upper in ranges
+            )
+
+    def test_successor(self):
+        """Testar limite superior exclusivo de um prefixo"""
+        assert geohash.successor("6gyf") == "6gyg"
+        assert geohash.successor("6gz") == "6h"
+        assert geohash.successor("zz") is None
+
+
+class TestSpatialRepository:
+    """Testes para consultas por raio / retângulo"""
+
+    def test_geohash_maintained_by_orm(self, db, contratos):
+        """Testar que a coluna geohash acompanha latitude/longitude"""
+        contrato = contratos[0]
+        assert contrato.geohash == geohash.encode(contrato.latitude, contrato.longitude)
+
+        ContratoRepository(db).update_location(contrato.id, Decimal("-22.9068"), Decimal("-43.1729"))
+        assert contrato.geohash == geohash.encode(Decimal("-22.9068"), Decimal("-43.1729"))
+
+    @pytest.mark.parametrize("raio_km", [0.5, 2, 10, 50])
+    def test_radius_matches_brute_force(self, db, contratos, raio_km):
+        """Testar que a busca por raio retorna exatamente os pontos do raio"""
+        repo = ContratoRepository(db)
+        encontrados = repo.get_within_radius(*CENTRO, raio_km, limit=1000)
+
+        esperado = {
+            contrato.id
+            for contrato in contratos
+            if DistanceCalculator.haversine(*CENTRO, contrato.latitude, contrato.longitude) <= raio_km
+        }
+        assert {contrato.id for contrato, _ in encontrados} == esperado
+
+        distancias = [distancia for _, distancia in encontrados]
+        assert distancias == sorted(distancias)
+
+    def test_bbox(self, db, contratos):
+        """Testar busca por retângulo"""
+        bbox = (-23.6, -46.7, -23.5, -46.6)
+        encontrados = ContratoRepository(db).get_in_bbox(*bbox, limit=1000)
+
+        esperado = {
+            contrato.id
+            for contrato in contratos
+            if bbox[0] <= contrato.latitude <= bbox[2] and bbox[1] <= contrato.longitude <= bbox[3]
+        }
+        assert {contrato.id for contrato in encontrados} == esperado
+
+    def test_tenant_query(self, db, contratos):
+        """Testar isolamento por tenant na busca por raio"""
+        repo = ContratoRepository(db)
+        todos = repo.get_within_radius(*CENTRO, 5, limit=1000)
+        do_tenant = repo.get_within_radius(
+            *CENTRO, 5, limit=1000, query=repo.query_for_tenant("tenant-2")
+        )
+
+        assert len(do_tenant) == 1
+        assert do_tenant[0][0].numero_contrato == "CT-OUTRO"
+        assert len(todos) > 1
+
+
+class TestBuscarProximos:
+    """Testes para GeolocalizacaoService.buscar_proximos"""
+
+    def test_limit_and_tipo(self, db, contratos):
+        """Testar limite e busca de bureau"""
+        service = GeolocalizacaoService(db)
+        resultado = service.buscar_proximos("tenant-1", *CENTRO, Decimal("10"), tipo="bureau", limite=5)
+
+        assert resultado.total == 5
+        assert resultado.tipo == "bureau"
+        assert all(item.distancia_km <= 10 for item in resultado.resultados)
+
+        bureau_ids = {bureau.id for bureau in BureauRepository(db).query_for_tenant("tenant-1")}
+        assert {item.id for item in resultado.resultados} <= bureau_ids
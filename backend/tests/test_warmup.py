@@ -0,0 +1,78 @@
+"""
+Testes para warm-up de startup e readiness
+"""
+
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from app.core import warmup
+
+
+@pytest.fixture
+def isolated_warmup():
+    """Registro de etapas e estado isolados por teste"""
+    with patch.object(warmup, "_steps", []), \
+         patch.object(warmup, "warmup_state", warmup.WarmupState()):
+        yield warmup
+
+
+@pytest.mark.asyncio
+class TestRunWarmup:
+    """Testes para execução das etapas de warm-up"""
+
+    async def test_ready_only_after_steps_finish(self, isolated_warmup):
+        """Testar que readiness só fica verde ao final do warm-up"""
+        seen_ready = []
+
+        @isolated_warmup.register_warmup_step("cache")
+        async def warm_cache():
+            seen_ready.append(isolated_warmup.is_ready())
+
+        state = await isolated_warmup.run_warmup()
+
+        assert seen_ready == [False]
+        assert state.ready
+        assert state.steps == {"cache": "ok"}
+
+    async def test_failing_step_does_not_block_others(self, isolated_warmup):
+        """Testar que falha em uma etapa é registrada e as demais continuam"""
+        @isolated_warmup.register_warmup_step("broken")
+        async def broken():
+            raise RuntimeError("idp offline")
+
+        @isolated_warmup.register_warmup_step("skipped")
+        async def skipped():
+            return "skipped"
+
+        state = await isolated_warmup.run_warmup()
+
+        assert state.ready
+        assert state.steps["broken"] == "error: idp offline"
+        assert state.steps["skipped"] == "skipped"
+
+    @patch.dict("os.environ", {"WARMUP_TIMEOUT_SECONDS": "0.01"})
+    async def test_step_timeout(self, isolated_warmup):
+        """Testar timeout de etapa lenta"""
+        @isolated_warmup.register_warmup_step("slow")
+        async def slow():
+            await asyncio.sleep(1)
+
+        state = await isolated_warmup.run_warmup()
+
+        assert state.steps["slow"].startswith("error: timeout")
+
+    @patch.dict("os.environ", {"WARMUP_STEPS": "b"})
+    async def test_steps_filtered_by_env(self, isolated_warmup):
+        """Testar seleção de etapas via WARMUP_STEPS"""
+        @isolated_warmup.register_warmup_step("a")
+        async def a():
+            pass
+
+        @isolated_warmup.register_warmup_step("b")
+        async def b():
+            pass
+
+        state = await isolated_warmup.run_warmup()
+
+        assert list(state.steps) == ["b"]
@@ -1,4 +1,5 @@
 import { useState, useCallback, useEffect } from 'react'
+import { fetchClusters } from '../services/geoService'
 
 export function useMap(initialCenter = [-15.7942, -48.0192], initialZoom = 5) {
   const [center, setCenter] = useState(initialCenter)
@@ -55,6 +56,33 @@ export function useMap(initialCenter = [-15.7942, -48.0192], initialZoom = 5) {
     }
   }, [])
 
+  // Fetch server-side clusters for the visible area (one marker per cluster)
+  const fetchClusterMarkers = useCallback(async (bounds, mapZoom) => {
+    setLoading(true)
+    setError(null)
+
+    try {
+      const data = await fetchClusters(bounds, mapZoom)
+      setMarkers(
+        data.clusters.map((cluster) => ({
+          id: cluster.id,
+          lat: Number(cluster.latitude),
+          lng: Number(cluster.longitude),
+          title: `${cluster.total} ${cluster.total === 1 ? 'local' : 'locais'}`,
+          description: `${cluster.contratos} contrato(s), ${cluster.bureaus} endereço(s) de bureau`,
+          type: 'cluster',
+          info: cluster.tipo_dominante || 'Sem parecer',
+          count: cluster.total,
+        }))
+      )
+    } catch (err) {
+      setError(err.message || 'Erro ao buscar clusters do mapa')
+      setMarkers([])
+    } finally {
+      setLoading(false)
+    }
+  }, [])
+
   // Add marker
   const addMarker = useCallback((markerData) => {
     setMarkers((prevMarkers) => [
@@ -186,6 +214,7 @@ export function useMap(initialCenter = [-15.7942, -48.0192], initialZoom = 5) {
 
     // Methods
     fetchLocations,
+    fetchClusterMarkers,
     addMarker,
     removeMarker,
     updateMarker,
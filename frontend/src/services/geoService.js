@@ -46,7 +46,7 @@ export const reverseGeocode = async (latitude, longitude) => {
 export const geocodeAddress = async (address) => {
   try {
     const response = await api.get('/geolocalizacao/geocode', {
-      params: { address },
+      params: { endereco: address },
     })
     return response.data
   } catch (error) {
@@ -70,6 +70,24 @@ export const calculateDistance = async (from, to) => {
   }
 }
 
+/**
+ * Buscar clusters de contratos/bureau da área visível do mapa
+ * GET /geolocalizacao/clusters
+ * @param {Object} bounds - Área visível { west, south, east, north }
+ * @param {number} zoom - Zoom do mapa
+ * @returns {Promise} { zoom, total_pontos, clusters }
+ */
+export const fetchClusters = async ({ west, south, east, north }, zoom) => {
+  try {
+    const response = await api.get('/geolocalizacao/clusters', {
+      params: { bbox: [west, south, east, north].join(','), zoom },
+    })
+    return response.data
+  } catch (error) {
+    throw new Error(error.message || 'Erro ao buscar clusters do mapa')
+  }
+}
+
 /**
  * Buscar todas as localizações com filtros
  * GET /geolocalizacao
@@ -39,6 +39,7 @@ export {
   reverseGeocode,
   geocodeAddress,
   calculateDistance,
+  fetchClusters,
   searchLocations,
   createLocation,
   updateLocation,